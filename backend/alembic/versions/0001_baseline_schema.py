@@ -0,0 +1,349 @@
+"""Baseline schema
+
+The schema SQLModel.metadata.create_all produced on startup before
+migrations existed, written out as explicit DDL so the revision never
+changes with the models. Tables that already exist are skipped, so
+databases created by create_all upgrade through it unchanged.
+
+Later revisions must still be idempotent (IF NOT EXISTS): databases
+created before migrations existed may already have some of their objects.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Creation order (referenced tables first)
+TABLES = [
+    "images",
+    "metrics_rollup_state",
+    "service_categories",
+    "tariff_plans",
+    "users",
+    "merchants",
+    "payments",
+    "merchant_contacts",
+    "merchant_daily_metrics",
+    "merchant_subscriptions",
+    "services",
+    "daily_service_metrics",
+    "featured_services",
+    "reviews",
+    "user_interactions",
+]
+
+# PostgreSQL enum types created with the tables
+ENUM_TYPES = [
+    "imagetype",
+    "usertype",
+    "paymenttype",
+    "paymentmethod",
+    "paymentstatus",
+    "contacttype",
+    "uq_merchant_daily_metrics_merchant_date",
+    "subscriptionstatus",
+    "uq_daily_service_metrics_service_date",
+    "featuretype",
+    "interactiontype",
+]
+
+
+def upgrade() -> None:
+    # Nothing can be inspected when emitting SQL (alembic upgrade --sql)
+    existing = set() if op.get_context().as_sql else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "images" not in existing:
+        op.create_table(
+            "images",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("s3_url", sa.String(), nullable=False),
+            sa.Column("file_name", sa.String(), nullable=False),
+            sa.Column("file_size", sa.Integer(), nullable=True),
+            sa.Column("image_type", sa.Enum("SERVICE_IMAGE", "MERCHANT_GALLERY", "USER_AVATAR", "MERCHANT_COVER", "CATEGORY_ICON", name="imagetype"), nullable=False),
+            sa.Column("related_id", sa.String(), nullable=False),
+            sa.Column("display_order", sa.Integer(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id")
+        )
+    if "metrics_rollup_state" not in existing:
+        op.create_table(
+            "metrics_rollup_state",
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("watermark", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("name")
+        )
+    if "service_categories" not in existing:
+        op.create_table(
+            "service_categories",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("icon_url", sa.String(), nullable=True),
+            sa.Column("display_order", sa.Integer(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("name")
+        )
+    if "tariff_plans" not in existing:
+        op.create_table(
+            "tariff_plans",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("price_per_month", sa.Float(), nullable=False),
+            sa.Column("max_services", sa.Integer(), nullable=False),
+            sa.Column("max_images_per_service", sa.Integer(), nullable=False),
+            sa.Column("max_phone_numbers", sa.Integer(), nullable=False),
+            sa.Column("max_gallery_images", sa.Integer(), nullable=False),
+            sa.Column("max_social_accounts", sa.Integer(), nullable=False),
+            sa.Column("allow_website", sa.Boolean(), nullable=False),
+            sa.Column("allow_cover_image", sa.Boolean(), nullable=False),
+            sa.Column("monthly_featured_cards", sa.Integer(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("name")
+        )
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("phone_number", sa.String(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("avatar_url", sa.String(), nullable=True),
+            sa.Column("user_type", sa.Enum("CLIENT", "MERCHANT", "ADMIN", name="usertype"), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_users_phone_number", "users", ["phone_number"], unique=True)
+    if "merchants" not in existing:
+        op.create_table(
+            "merchants",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("business_name", sa.String(), nullable=True),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column("cover_image_url", sa.String(), nullable=True),
+            sa.Column("location_region", sa.String(), nullable=True),
+            sa.Column("latitude", sa.Float(), nullable=True),
+            sa.Column("longitude", sa.Float(), nullable=True),
+            sa.Column("website_url", sa.String(), nullable=True),
+            sa.Column("is_verified", sa.Boolean(), nullable=False),
+            sa.Column("overall_rating", sa.Float(), nullable=False),
+            sa.Column("total_reviews", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("user_id")
+        )
+        op.create_index("ix_merchants_location_region", "merchants", ["location_region"], unique=False)
+    if "payments" not in existing:
+        op.create_table(
+            "payments",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("payment_type", sa.Enum("TARIFF_SUBSCRIPTION", "FEATURED_SERVICE", name="paymenttype"), nullable=False),
+            sa.Column("payment_method", sa.Enum("PAYME", "CLICK", "UZUMBANK", name="paymentmethod"), nullable=False),
+            sa.Column("transaction_id", sa.String(), nullable=True),
+            sa.Column("status", sa.Enum("PENDING", "COMPLETED", "FAILED", "CANCELLED", name="paymentstatus"), nullable=False),
+            sa.Column("payment_url", sa.String(), nullable=True),
+            sa.Column("webhook_data", sa.JSON(), nullable=True),
+            sa.Column("payment_metadata", sa.JSON(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("completed_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+    if "merchant_contacts" not in existing:
+        op.create_table(
+            "merchant_contacts",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("merchant_id", sa.Uuid(), nullable=False),
+            sa.Column("contact_type", sa.Enum("PHONE", "SOCIAL_MEDIA", name="contacttype"), nullable=False),
+            sa.Column("contact_value", sa.String(), nullable=False),
+            sa.Column("platform_name", sa.String(), nullable=True),
+            sa.Column("display_order", sa.Integer(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["merchant_id"], ["merchants.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+    if "merchant_daily_metrics" not in existing:
+        op.create_table(
+            "merchant_daily_metrics",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("merchant_id", sa.Uuid(), nullable=False),
+            sa.Column("metric_date", sa.Date(), nullable=False),
+            sa.Column("total_views_today", sa.Integer(), nullable=False),
+            sa.Column("total_likes_today", sa.Integer(), nullable=False),
+            sa.Column("total_saves_today", sa.Integer(), nullable=False),
+            sa.Column("total_shares_today", sa.Integer(), nullable=False),
+            sa.Column("total_reviews_today", sa.Integer(), nullable=False),
+            sa.Column("active_services", sa.Integer(), nullable=False),
+            sa.Column("featured_services", sa.Integer(), nullable=False),
+            sa.Column("overall_rating", sa.Float(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["merchant_id"], ["merchants.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("merchant_id", "metric_date", name="uq_merchant_daily_metrics_merchant_date")
+        )
+        op.create_index("ix_merchant_daily_metrics_merchant_id", "merchant_daily_metrics", ["merchant_id"], unique=False)
+        op.create_index("ix_merchant_daily_metrics_metric_date", "merchant_daily_metrics", ["metric_date"], unique=False)
+    if "merchant_subscriptions" not in existing:
+        op.create_table(
+            "merchant_subscriptions",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("merchant_id", sa.Uuid(), nullable=False),
+            sa.Column("tariff_plan_id", sa.Uuid(), nullable=False),
+            sa.Column("payment_id", sa.Uuid(), nullable=True),
+            sa.Column("start_date", sa.Date(), nullable=False),
+            sa.Column("end_date", sa.Date(), nullable=False),
+            sa.Column("status", sa.Enum("ACTIVE", "EXPIRED", "CANCELLED", name="subscriptionstatus"), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["merchant_id"], ["merchants.id"]),
+            sa.ForeignKeyConstraint(["payment_id"], ["payments.id"]),
+            sa.ForeignKeyConstraint(["tariff_plan_id"], ["tariff_plans.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+    if "services" not in existing:
+        op.create_table(
+            "services",
+            sa.Column("id", sa.String(), nullable=False),
+            sa.Column("merchant_id", sa.Uuid(), nullable=False),
+            sa.Column("category_id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.String(), nullable=False),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("price_type", sa.String(), nullable=True),
+            sa.Column("location_region", sa.String(), nullable=False),
+            sa.Column("latitude", sa.Float(), nullable=True),
+            sa.Column("longitude", sa.Float(), nullable=True),
+            sa.Column("view_count", sa.Integer(), nullable=False),
+            sa.Column("like_count", sa.Integer(), nullable=False),
+            sa.Column("save_count", sa.Integer(), nullable=False),
+            sa.Column("share_count", sa.Integer(), nullable=False),
+            sa.Column("popularity_score", sa.Float(), nullable=False),
+            sa.Column("popularity_updated_at", sa.DateTime(), nullable=True),
+            sa.Column("overall_rating", sa.Float(), nullable=False),
+            sa.Column("total_reviews", sa.Integer(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["category_id"], ["service_categories.id"]),
+            sa.ForeignKeyConstraint(["merchant_id"], ["merchants.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_services_category_id", "services", ["category_id"], unique=False)
+        op.create_index("ix_services_category_region_popularity", "services", ["category_id", "location_region", "popularity_score"], unique=False)
+        op.create_index("ix_services_latitude_longitude", "services", ["latitude", "longitude"], unique=False)
+        op.create_index("ix_services_location_region", "services", ["location_region"], unique=False)
+        op.create_index("ix_services_merchant_id", "services", ["merchant_id"], unique=False)
+        op.create_index("ix_services_popularity_score", "services", ["popularity_score"], unique=False)
+    if "daily_service_metrics" not in existing:
+        op.create_table(
+            "daily_service_metrics",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("service_id", sa.String(), nullable=False),
+            sa.Column("merchant_id", sa.Uuid(), nullable=False),
+            sa.Column("metric_date", sa.Date(), nullable=False),
+            sa.Column("views_today", sa.Integer(), nullable=False),
+            sa.Column("likes_today", sa.Integer(), nullable=False),
+            sa.Column("saves_today", sa.Integer(), nullable=False),
+            sa.Column("shares_today", sa.Integer(), nullable=False),
+            sa.Column("reviews_today", sa.Integer(), nullable=False),
+            sa.Column("total_views", sa.Integer(), nullable=False),
+            sa.Column("total_likes", sa.Integer(), nullable=False),
+            sa.Column("total_saves", sa.Integer(), nullable=False),
+            sa.Column("total_shares", sa.Integer(), nullable=False),
+            sa.Column("total_reviews", sa.Integer(), nullable=False),
+            sa.Column("average_rating", sa.Float(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["merchant_id"], ["merchants.id"]),
+            sa.ForeignKeyConstraint(["service_id"], ["services.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("service_id", "metric_date", name="uq_daily_service_metrics_service_date")
+        )
+        op.create_index("ix_daily_service_metrics_merchant_id", "daily_service_metrics", ["merchant_id"], unique=False)
+        op.create_index("ix_daily_service_metrics_metric_date", "daily_service_metrics", ["metric_date"], unique=False)
+        op.create_index("ix_daily_service_metrics_service_id", "daily_service_metrics", ["service_id"], unique=False)
+    if "featured_services" not in existing:
+        op.create_table(
+            "featured_services",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("service_id", sa.String(), nullable=False),
+            sa.Column("merchant_id", sa.Uuid(), nullable=False),
+            sa.Column("payment_id", sa.Uuid(), nullable=True),
+            sa.Column("start_date", sa.DateTime(), nullable=False),
+            sa.Column("end_date", sa.DateTime(), nullable=False),
+            sa.Column("days_duration", sa.Integer(), nullable=False),
+            sa.Column("amount_paid", sa.Float(), nullable=True),
+            sa.Column("feature_type", sa.Enum("MONTHLY_ALLOCATION", "PAID_FEATURE", name="featuretype"), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["merchant_id"], ["merchants.id"]),
+            sa.ForeignKeyConstraint(["payment_id"], ["payments.id"]),
+            sa.ForeignKeyConstraint(["service_id"], ["services.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+    if "reviews" not in existing:
+        op.create_table(
+            "reviews",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("service_id", sa.String(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("merchant_id", sa.Uuid(), nullable=False),
+            sa.Column("rating", sa.Integer(), nullable=False),
+            sa.Column("comment", sa.String(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["merchant_id"], ["merchants.id"]),
+            sa.ForeignKeyConstraint(["service_id"], ["services.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id")
+        )
+        op.create_index("ix_reviews_merchant_id", "reviews", ["merchant_id"], unique=False)
+        op.create_index("ix_reviews_service_id", "reviews", ["service_id"], unique=False)
+    if "user_interactions" not in existing:
+        op.create_table(
+            "user_interactions",
+            sa.Column("id", sa.Uuid(), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("service_id", sa.String(), nullable=False),
+            sa.Column("interaction_type", sa.Enum("VIEW", "LIKE", "SAVE", "SHARE", name="interactiontype"), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["service_id"], ["services.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sqlite_autoincrement=True
+        )
+        op.create_index("ix_user_interactions_service_created", "user_interactions", ["service_id", "created_at"], unique=False)
+        op.create_index("ix_user_interactions_service_id", "user_interactions", ["service_id"], unique=False)
+        op.create_index("ix_user_interactions_user_id", "user_interactions", ["user_id"], unique=False)
+        op.create_index("uq_user_interactions_user_service_type", "user_interactions", ["user_id", "service_id", "interaction_type"], unique=True, postgresql_where=sa.text("interaction_type <> 'SHARE'"), sqlite_where=sa.text("interaction_type <> 'SHARE'"))
+
+
+def downgrade() -> None:
+    for name in reversed(TABLES):
+        op.drop_table(name)
+    if op.get_context().dialect.name == "postgresql":
+        for name in ENUM_TYPES:
+            op.execute(f"DROP TYPE IF EXISTS {name}")
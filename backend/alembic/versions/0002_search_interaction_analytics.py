@@ -0,0 +1,99 @@
+"""Search, interaction, analytics and popularity structures
+
+PostgreSQL-only DDL that previously ran on every startup: the generated
+full-text search column with its GIN/trigram indexes, plus the indexes,
+unique keys and columns added to the models after the first deployments
+(create_all never alters existing tables).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:10:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The tsvector column is a generated column, so PostgreSQL keeps it in sync
+# with name/description. The 'simple' configuration is used because content
+# is Uzbek/Russian and must not be stemmed as English.
+SERVICE_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE services ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_services_search_vector ON services USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_services_name_trgm ON services USING GIN (lower(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_services_description_trgm ON services USING GIN (lower(description) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_services_latitude_longitude ON services (latitude, longitude)",
+]
+
+# Unique partial index backing the atomic like/save/view toggle. Tables created
+# before the index existed may hold duplicate rows, so those are removed
+# (keeping the oldest) the first time the index is built.
+USER_INTERACTION_DDL = [
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_indexes WHERE indexname = 'uq_user_interactions_user_service_type'
+        ) THEN
+            DELETE FROM user_interactions a
+            USING user_interactions b
+            WHERE a.user_id = b.user_id
+              AND a.service_id = b.service_id
+              AND a.interaction_type = b.interaction_type
+              AND a.interaction_type <> 'SHARE'
+              AND (a.created_at, a.id::text) > (b.created_at, b.id::text);
+            CREATE UNIQUE INDEX uq_user_interactions_user_service_type
+                ON user_interactions (user_id, service_id, interaction_type)
+                WHERE interaction_type <> 'SHARE';
+        END IF;
+    END $$
+    """,
+]
+
+# Unique keys the daily metrics rollup upserts on
+ANALYTICS_DDL = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_daily_service_metrics_service_date ON daily_service_metrics (service_id, metric_date)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_merchant_daily_metrics_merchant_date ON merchant_daily_metrics (merchant_id, metric_date)",
+]
+
+# Popularity score columns and indexes
+POPULARITY_DDL = [
+    "ALTER TABLE services ADD COLUMN IF NOT EXISTS popularity_score DOUBLE PRECISION NOT NULL DEFAULT 0",
+    "ALTER TABLE services ADD COLUMN IF NOT EXISTS popularity_updated_at TIMESTAMP WITHOUT TIME ZONE",
+    "CREATE INDEX IF NOT EXISTS ix_services_popularity_score ON services (popularity_score)",
+    "CREATE INDEX IF NOT EXISTS ix_services_category_region_popularity ON services (category_id, location_region, popularity_score)",
+    "CREATE INDEX IF NOT EXISTS ix_user_interactions_service_created ON user_interactions (service_id, created_at)",
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for statement in SERVICE_SEARCH_DDL + USER_INTERACTION_DDL + ANALYTICS_DDL + POPULARITY_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # Only the search structures are dropped; the rest is declared on the
+    # models and therefore part of the baseline.
+    op.execute("DROP INDEX IF EXISTS ix_services_description_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_services_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_services_search_vector")
+    op.execute("ALTER TABLE services DROP COLUMN IF EXISTS search_vector")
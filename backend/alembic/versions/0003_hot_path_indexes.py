@@ -0,0 +1,52 @@
+"""Composite and partial indexes for hot query paths
+
+Most lookups only read active rows, so is_active = true is the index
+predicate rather than a key column, which keeps the indexes small. The
+(user_id, service_id, interaction_type) lookup is already served by
+uq_user_interactions_user_service_type from revision 0002.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:20:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns, predicate)
+INDEXES = [
+    ("ix_images_related_type_order", "images", "related_id, image_type, display_order", "is_active = true"),
+    ("ix_featured_services_service_window", "featured_services", "service_id, end_date, start_date", "is_active = true"),
+    ("ix_featured_services_active_end_date", "featured_services", "end_date", "is_active = true"),
+    ("ix_payments_method_transaction", "payments", "payment_method, transaction_id", None),
+    ("ix_reviews_service_created", "reviews", "service_id, created_at", "is_active = true"),
+    ("ix_services_active_created", "services", "created_at", "is_active = true"),
+    ("ix_services_category_active_created", "services", "category_id, created_at", "is_active = true"),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for name, table, columns, predicate in INDEXES:
+        where = f" WHERE {predicate}" if predicate else ""
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns}){where}")
+    # Refresh planner statistics so the new indexes are considered right away
+    for table in dict.fromkeys(table for _, table, _, _ in INDEXES):
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for name, _, _, _ in reversed(INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
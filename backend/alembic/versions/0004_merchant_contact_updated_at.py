@@ -0,0 +1,32 @@
+"""Track merchant contact edits
+
+Contacts are part of the service detail page, so their last change feeds
+the page's ETag.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:05:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE merchant_contacts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITHOUT TIME ZONE")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE merchant_contacts DROP COLUMN IF EXISTS updated_at")
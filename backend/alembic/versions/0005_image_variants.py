@@ -0,0 +1,36 @@
+"""Store resized image variant URLs
+
+Thumbnails and medium-size WebP copies are generated at upload time;
+list endpoints serve the thumbnail instead of the original upload.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 13:20:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS thumbnail_url VARCHAR")
+    op.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS medium_url VARCHAR")
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS avatar_thumbnail_url VARCHAR")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE users DROP COLUMN IF EXISTS avatar_thumbnail_url")
+    op.execute("ALTER TABLE images DROP COLUMN IF EXISTS medium_url")
+    op.execute("ALTER TABLE images DROP COLUMN IF EXISTS thumbnail_url")
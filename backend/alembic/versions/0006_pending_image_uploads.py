@@ -0,0 +1,55 @@
+"""Pending presigned image uploads
+
+Tracks direct-to-S3 upload URLs between issue and confirmation so tariff
+limits include in-flight uploads and unconfirmed objects can be reaped.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 14:05:00.000000
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table("pending_image_uploads"):
+        return
+
+    op.create_table(
+        "pending_image_uploads",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("s3_key", sa.String(), nullable=False),
+        sa.Column("content_type", sa.String(), nullable=False),
+        sa.Column("file_name", sa.String(), nullable=False),
+        sa.Column(
+            "image_type",
+            # Created by 0001
+            postgresql.ENUM(
+                "SERVICE_IMAGE", "MERCHANT_GALLERY", "USER_AVATAR", "MERCHANT_COVER", "CATEGORY_ICON",
+                name="imagetype", create_type=False
+            ),
+            nullable=False
+        ),
+        sa.Column("related_id", sa.String(), nullable=False),
+        sa.Column("display_order", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("s3_key")
+    )
+    op.create_index("ix_pending_image_uploads_expires_at", "pending_image_uploads", ["expires_at"])
+    op.create_index("ix_pending_image_uploads_user_id", "pending_image_uploads", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("pending_image_uploads")
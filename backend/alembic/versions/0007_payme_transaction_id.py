@@ -0,0 +1,39 @@
+"""Indexed Payme transaction ID on payments
+
+Payme Merchant API calls look payments up by Payme's transaction ID, which
+older payments only kept in payment_metadata. Adding the nullable column
+is a catalog-only change; existing rows are filled in chunks by
+scripts/backfill_payme_transaction_ids.py instead of here, so startup
+never holds a long lock on payments.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 14:40:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE payments ADD COLUMN IF NOT EXISTS payme_transaction_id VARCHAR(64)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_payments_payme_transaction_id ON payments (payme_transaction_id)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_payments_payme_transaction_id")
+    op.execute("ALTER TABLE payments DROP COLUMN IF EXISTS payme_transaction_id")
@@ -0,0 +1,60 @@
+"""Typed payment account requisite columns
+
+Provider account requisites (tariff plan and months, or service and days)
+were only kept in payment_metadata, so matching a Payme request to a
+pending payment loaded every pending payment into Python. They now get
+their own columns, indexed together with payment_type and status.
+
+Only the columns and indexes are created here, so startup is not held
+up by rewriting payments. Pending payments created before this revision
+are filled from metadata afterwards, in chunks:
+
+    python scripts/backfill_payment_account_columns.py
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 15:10:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = [
+    ("tariff_plan_id", "UUID"),
+    ("duration_months", "INTEGER"),
+    ("service_id", "VARCHAR(9)"),
+    ("duration_days", "INTEGER"),
+]
+
+INDEXES = [
+    ("ix_payments_tariff_account", "payment_type, status, tariff_plan_id, duration_months"),
+    ("ix_payments_boost_account", "payment_type, status, service_id, duration_days"),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for name, column_type in COLUMNS:
+        op.execute(f"ALTER TABLE payments ADD COLUMN IF NOT EXISTS {name} {column_type}")
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON payments ({columns})")
+    op.execute("ANALYZE payments")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for name, _ in reversed(INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    for name, _ in reversed(COLUMNS):
+        op.execute(f"ALTER TABLE payments DROP COLUMN IF EXISTS {name}")
@@ -0,0 +1,59 @@
+"""Payme transaction time columns
+
+GetStatement read every Payme payment, took payme_create_time from
+payment_metadata and filtered the period in Python. The Payme timestamps
+(milliseconds) and the cancellation reason now get their own columns,
+with payme_create_time indexed for the statement range scan.
+
+Only the columns and index are created here, so startup never holds a
+long lock on payments. Older payments are filled in chunks afterwards by
+scripts/backfill_payme_transaction_times.py. Run it right after
+upgrading: GetStatement selects by payme_create_time, so payments without
+it are left out of statements until they are backfilled.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 16:40:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = [
+    ("payme_create_time", "BIGINT"),
+    ("payme_perform_time", "BIGINT"),
+    ("payme_cancel_time", "BIGINT"),
+    ("payme_cancel_reason", "INTEGER"),
+]
+
+INDEXES = [
+    ("ix_payments_payme_create_time", "payme_create_time"),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for name, column_type in COLUMNS:
+        op.execute(f"ALTER TABLE payments ADD COLUMN IF NOT EXISTS {name} {column_type}")
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON payments ({columns})")
+    op.execute("ANALYZE payments")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for name, _ in reversed(INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    for name, _ in reversed(COLUMNS):
+        op.execute(f"ALTER TABLE payments DROP COLUMN IF EXISTS {name}")
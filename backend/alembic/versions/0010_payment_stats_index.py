@@ -0,0 +1,34 @@
+"""Index for admin revenue statistics
+
+Revenue totals and charts aggregate completed payments by completed_at;
+(status, completed_at) turns them into a range scan of the completed
+payments only.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 17:30:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_payments_status_completed_at ON payments (status, completed_at)")
+    op.execute("ANALYZE payments")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_payments_status_completed_at")
@@ -0,0 +1,65 @@
+"""Payment webhook inbox
+
+Stores received provider webhooks, unique per (provider, event_id), so the
+endpoint can acknowledge right away and a background worker applies them
+with retries and per-transaction ordering.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 19:10:00.000000
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not op.get_context().as_sql and sa.inspect(op.get_bind()).has_table("payment_webhook_events"):
+        return
+
+    op.create_table(
+        "payment_webhook_events",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column(
+            "provider",
+            # Created by 0001
+            postgresql.ENUM("PAYME", "CLICK", "UZUMBANK", name="paymentmethod", create_type=False),
+            nullable=False
+        ),
+        sa.Column("event_id", sa.String(), nullable=False),
+        sa.Column("transaction_id", sa.String(), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum("PENDING", "PROCESSING", "PROCESSED", "FAILED", name="webhookeventstatus"),
+            nullable=False
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("provider", "event_id", name="uq_payment_webhook_events_provider_event")
+    )
+    op.create_index(
+        "ix_payment_webhook_events_status_next_attempt", "payment_webhook_events", ["status", "next_attempt_at"]
+    )
+    op.create_index(
+        "ix_payment_webhook_events_transaction", "payment_webhook_events", ["provider", "transaction_id", "created_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("payment_webhook_events")
+    if op.get_context().dialect.name == "postgresql":
+        op.execute("DROP TYPE IF EXISTS webhookeventstatus")
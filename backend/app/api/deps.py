@@ -1,27 +1,40 @@
-from typing import Optional
+import hashlib
+import json
+from typing import Any, Optional
 from uuid import UUID
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.core.config import settings
 from app.core.database import get_db_session
 from app.core.security import verify_token
 from app.core.exceptions import HTTPUnauthorized, HTTPForbidden
-from app.models import User, UserType, Merchant, MerchantSubscription, SubscriptionStatus
+from app.core.identity import RequestIdentity
+from app.models import User, UserType, Merchant
+from app.repositories.user_repository import UserRepository
+from app.utils.user_cache import auth_user_cache
 
 # HTTP Bearer token security
 security = HTTPBearer()
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db_session)
 ) -> User:
     """
     Get current authenticated user from JWT token.
     
+    Decoded tokens and active users are cached briefly. On a database
+    lookup the user's merchant profile and active subscription are loaded in
+    the same query and kept as the request identity (see
+    get_current_identity).
+    
     Args:
+        request: Current request
         credentials: Bearer token credentials
         db: Database session
         
@@ -45,15 +58,62 @@ async def get_current_user(
     if not isinstance(user_id, str) or len(user_id) != 9 or not user_id.isdigit():
         raise HTTPUnauthorized("Invalid user ID format in token")
     
-    # Get user from database
-    statement = select(User).where(User.id == user_id, User.is_active == True)
-    result = await db.execute(statement)
-    user = result.scalar_one_or_none()
+    # Recently seen active users skip the database
+    user = await auth_user_cache.get(user_id)
+    if user is not None:
+        # Attach to the session so changes to it are persisted as usual
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+    
+    # Get user with merchant and subscription from database
+    identity_row = await UserRepository(db).get_user_identity(user_id)
     
-    if not user:
+    if not identity_row:
         raise HTTPUnauthorized("User not found or inactive")
     
-    return user
+    identity = RequestIdentity(*identity_row)
+    request.state.identity = identity
+    await auth_user_cache.set(identity.user)
+    return identity.user
+
+
+async def _resolve_identity(request: Request, user: User, db: AsyncSession) -> RequestIdentity:
+    """
+    Get the request identity for a user, loading it at most once per request.
+    
+    Args:
+        request: Current request
+        user: Authenticated user
+        db: Database session
+        
+    Returns:
+        RequestIdentity: Identity of the user
+    """
+    identity = getattr(request.state, "identity", None)
+    if identity is None or identity.user.id != user.id:
+        identity_row = await UserRepository(db).get_user_identity(user.id)
+        identity = RequestIdentity(*identity_row) if identity_row else RequestIdentity(user)
+        request.state.identity = identity
+    return identity
+
+
+async def get_current_identity(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session)
+) -> RequestIdentity:
+    """
+    Get the current user with merchant profile and active subscription.
+    
+    Args:
+        request: Current request
+        current_user: Current authenticated user
+        db: Database session
+        
+    Returns:
+        RequestIdentity: Identity of the current user
+    """
+    return await _resolve_identity(request, current_user, db)
 
 
 async def get_current_client(
@@ -98,43 +158,59 @@ async def get_current_merchant_user(
     return current_user
 
 
-async def get_current_merchant(
+async def get_current_merchant_identity(
+    request: Request,
     current_user: User = Depends(get_current_merchant_user),
     db: AsyncSession = Depends(get_db_session)
-) -> Merchant:
+) -> RequestIdentity:
     """
-    Get current merchant profile.
+    Get the current merchant user with merchant profile and active subscription.
+    
+    Pass it to MerchantManager so the profile and subscription are not
+    fetched again.
     
     Args:
+        request: Current request
         current_user: Current authenticated merchant user
         db: Database session
         
+    Returns:
+        RequestIdentity: Identity of the current merchant user
+    """
+    return await _resolve_identity(request, current_user, db)
+
+
+async def get_current_merchant(
+    identity: RequestIdentity = Depends(get_current_merchant_identity)
+) -> Merchant:
+    """
+    Get current merchant profile.
+    
+    Args:
+        identity: Current merchant identity
+        
     Returns:
         Merchant: Current merchant profile
         
     Raises:
         HTTPForbidden: If merchant profile not found
     """
-    statement = select(Merchant).where(Merchant.user_id == current_user.id)
-    result = await db.execute(statement)
-    merchant = result.scalar_one_or_none()
-    
-    if not merchant:
+    if not identity.merchant:
         raise HTTPForbidden("Merchant profile not found")
     
-    return merchant
+    return identity.merchant
 
 
 async def get_current_active_merchant(
     merchant: Merchant = Depends(get_current_merchant),
-    db: AsyncSession = Depends(get_db_session)
+    identity: RequestIdentity = Depends(get_current_merchant_identity)
 ) -> Merchant:
     """
     Get current merchant with active subscription.
     
     Args:
         merchant: Current merchant
-        db: Database session
+        identity: Current merchant identity
         
     Returns:
         Merchant: Current merchant with active subscription
@@ -142,15 +218,7 @@ async def get_current_active_merchant(
     Raises:
         HTTPForbidden: If merchant doesn't have active subscription
     """
-    # Check for active subscription
-    statement = select(MerchantSubscription).where(
-        MerchantSubscription.merchant_id == merchant.id,
-        MerchantSubscription.status == SubscriptionStatus.ACTIVE
-    )
-    result = await db.execute(statement)
-    subscription = result.scalar_one_or_none()
-    
-    if not subscription:
+    if not identity.has_active_subscription:
         raise HTTPForbidden("Active subscription required")
     
     return merchant
@@ -179,6 +247,7 @@ async def get_current_admin(
 
 # Optional authentication (for endpoints that work with or without auth)
 async def get_current_user_optional(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
     db: AsyncSession = Depends(get_db_session)
 ) -> Optional[User]:
@@ -186,6 +255,7 @@ async def get_current_user_optional(
     Get current user if authenticated, None otherwise.
     
     Args:
+        request: Current request
         credentials: Optional bearer token credentials
         db: Database session
         
@@ -196,6 +266,78 @@ async def get_current_user_optional(
         return None
     
     try:
-        return await get_current_user(credentials, db)
+        return await get_current_user(request, credentials, db)
     except HTTPException:
-        return None
\ No newline at end of file
+        return None
+
+
+class ConditionalResponse:
+    """
+    Conditional GET support (ETag / If-None-Match) for an endpoint.
+    
+    Use as a dependency and call check() with the resource's ETag before
+    building the response body; when it returns a response, return that 304
+    instead. The ETag and Cache-Control headers are set on the normal
+    response as well.
+    """
+    
+    def __init__(self, request: Request, response: Response):
+        self.request = request
+        self.response = response
+    
+    @staticmethod
+    def make_etag(*parts: Any, weak: bool = False) -> str:
+        """
+        Build an ETag from JSON-compatible version values.
+        
+        Args:
+            parts: Values the representation depends on
+            weak: Mark the ETag weak (semantically, not byte-for-byte, equal)
+            
+        Returns:
+            Quoted ETag header value
+        """
+        digest = hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()
+        return f'W/"{digest}"' if weak else f'"{digest}"'
+    
+    def check(self, etag: str, public: bool = False, max_age: Optional[int] = None) -> Optional[Response]:
+        """
+        Set validator headers and match the request's If-None-Match.
+        
+        Args:
+            etag: Current ETag of the resource
+            public: Whether shared caches may store the response (only for
+                responses identical for every user)
+            max_age: Freshness lifetime for public responses in seconds
+                (defaults to HTTP_CACHE_MAX_AGE_SECONDS)
+            
+        Returns:
+            304 response to return if the client's copy is current, else None
+        """
+        if public:
+            max_age = settings.HTTP_CACHE_MAX_AGE_SECONDS if max_age is None else max_age
+            cache_control = f"public, max-age={max_age}"
+        else:
+            cache_control = "private, no-cache"
+        headers = {
+            "ETag": etag,
+            "Cache-Control": cache_control,
+            "Vary": "Authorization"
+        }
+        self.response.headers.update(headers)
+        
+        if_none_match = self.request.headers.get("if-none-match")
+        if if_none_match and self._matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return None
+    
+    @staticmethod
+    def _matches(if_none_match: str, etag: str) -> bool:
+        """Weak comparison of If-None-Match against the current ETag."""
+        if if_none_match.strip() == "*":
+            return True
+        current = etag.removeprefix("W/")
+        return any(
+            candidate.strip().removeprefix("W/") == current
+            for candidate in if_none_match.split(",")
+        )
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status, File, Uplo
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db_session
-from app.api.deps import get_current_admin
+from app.api.deps import get_current_admin, ConditionalResponse
 from app.models import User
 from app.services.category_service import CategoryService
 from app.services.service_manager import ServiceManager
@@ -26,23 +26,39 @@ from app.core.exceptions import (
     ValidationError,
     ForbiddenError
 )
-from app.utils.s3_client import s3_image_manager
+from app.utils.image_upload import image_upload_service
+from app.utils.s3_deletion_queue import s3_deletion_queue
+from app.utils.response_cache import response_cache, TAG_CATEGORIES
 
 router = APIRouter()
 
 
 @router.get("/", response_model=ServiceCategoriesResponse)
 async def get_categories(
+    conditional: ConditionalResponse = Depends(),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
     Get all active service categories with service counts (public endpoint).
     
+    The response is publicly cacheable and carries an ETag of its content;
+    a matching If-None-Match gets 304 Not Modified.
+    
     Returns:
         ServiceCategoriesResponse: List of active categories with service counts
     """
     service_manager = ServiceManager(db)
-    return await service_manager.get_categories()
+    
+    async def compute_categories():
+        categories_response = await service_manager.get_categories()
+        return categories_response.model_dump(mode="json")
+    
+    payload = await response_cache.get_or_compute("categories:list", {}, (TAG_CATEGORIES,), compute_categories)
+    not_modified = conditional.check(conditional.make_etag(payload), public=True)
+    if not_modified is not None:
+        return not_modified
+    
+    return ServiceCategoriesResponse.model_validate(payload)
 
 
 @router.get("/admin/list", response_model=CategoryListResponse)
@@ -264,30 +280,15 @@ async def upload_category_icon(
         if not category:
             raise NotFoundError(f"Category with ID {category_id} not found")
         
-        # Delete old icon from S3 if it exists
         old_icon_url = category.icon_url
-        if old_icon_url:
-            s3_image_manager.delete_image(old_icon_url)
-        
-        # Read file content for validation and upload
-        content = await file.read()
-        content_type = file.content_type or 'application/octet-stream'
-        content_length = len(content)
         
-        # Validate image constraints
-        s3_image_manager.validate_image_constraints(content_type, content_length)
-        
-        # Upload file object to S3
-        from io import BytesIO
-        fileobj = BytesIO(content)
-        
-        s3_url = s3_image_manager.upload_fileobj(
-            fileobj=fileobj,
-            file_name=file.filename or "icon",
-            content_type=content_type,
+        # Validate and stream the file to S3 off the event loop
+        uploaded = await image_upload_service.upload(
+            file,
             image_type="category_icon",
             related_id=str(category_id)
         )
+        s3_url = uploaded.s3_url
         
         # Update category icon URL
         updated = await category_repo.update_icon_url(category_id, s3_url)
@@ -295,6 +296,10 @@ async def upload_category_icon(
         if not updated:
             raise NotFoundError(f"Category with ID {category_id} not found")
         
+        # Delete the replaced icon from S3 in the background
+        s3_deletion_queue.enqueue(old_icon_url)
+        await response_cache.invalidate(TAG_CATEGORIES)
+        
         return ImageUploadResponse(
             success=True,
             message="Category icon uploaded successfully",
@@ -343,12 +348,12 @@ async def delete_category_icon(
         if not category:
             raise NotFoundError(f"Category with ID {category_id} not found")
         
-        # Delete icon from S3 if it exists
-        if category.icon_url:
-            s3_image_manager.delete_image(category.icon_url)
+        old_icon_url = category.icon_url
         
-        # Delete icon (set to None)
+        # Delete icon (set to None), then the object from S3 in the background
         deleted = await category_repo.delete_icon(category_id)
+        s3_deletion_queue.enqueue(old_icon_url)
+        await response_cache.invalidate(TAG_CATEGORIES)
         
         return SuccessResponse(
             success=True,
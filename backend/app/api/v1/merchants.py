@@ -30,7 +30,8 @@ from app.schemas.merchant_schema import (
 )
 from app.schemas.payment_schema import SubscriptionResponse, SubscriptionWithLimitsResponse
 from app.schemas.common_schema import SuccessResponse
-from app.api.deps import get_current_merchant_user, get_current_active_merchant
+from app.api.deps import get_current_merchant_user, get_current_active_merchant, get_current_merchant_identity
+from app.core.identity import RequestIdentity
 from app.models import User, Merchant, Image, ImageType, MerchantSubscription, SubscriptionStatus
 from app.core.exceptions import (
     WedyException, 
@@ -40,6 +41,7 @@ from app.core.exceptions import (
     PaymentRequiredError
 )
 from app.utils.s3_client import s3_image_manager
+from app.utils.response_cache import response_cache, TAG_SERVICES, TAG_CATEGORIES, TAG_FEATURED
 from uuid import uuid4
 
 router = APIRouter()
@@ -283,6 +285,7 @@ async def check_subscription_limit(
 @router.get("/services", response_model=MerchantServicesResponse)
 async def get_merchant_services(
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -290,13 +293,14 @@ async def get_merchant_services(
     
     Args:
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         MerchantServicesResponse: Merchant services with statistics
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.get_merchant_services(current_user.id)
     
     except NotFoundError as e:
@@ -310,6 +314,7 @@ async def get_merchant_services(
 async def create_merchant_service(
     service_data: ServiceCreateRequest,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -318,13 +323,14 @@ async def create_merchant_service(
     Args:
         service_data: Service creation data
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         MerchantServiceResponse: Created service
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.create_merchant_service(current_user.id, service_data)
     
     except NotFoundError as e:
@@ -354,6 +360,7 @@ async def update_merchant_service(
     service_id: str,
     service_data: ServiceUpdateRequest,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -363,6 +370,7 @@ async def update_merchant_service(
         service_id: 9-digit numeric string ID of the service to update
         service_data: Service update data
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
@@ -373,12 +381,12 @@ async def update_merchant_service(
         from app.models import ServiceCategory
         from sqlalchemy import select
         
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         service_repo = ServiceRepository(db)
         
         # Get merchant
-        merchant = await merchant_repo.get_merchant_by_user_id(current_user.id)
+        merchant = await merchant_manager.get_merchant(current_user.id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -414,9 +422,11 @@ async def update_merchant_service(
             service.latitude = service_data.latitude
         if service_data.longitude is not None:
             service.longitude = service_data.longitude
+        service.updated_at = datetime.now()
         
         # Save updates
         updated_service = await service_repo.update(service)
+        await response_cache.invalidate(TAG_SERVICES, TAG_CATEGORIES)
         
         # Get category for response
         category_stmt = select(ServiceCategory).where(ServiceCategory.id == updated_service.category_id)
@@ -463,6 +473,7 @@ async def update_merchant_service(
 async def delete_merchant_service(
     service_id: str,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -471,6 +482,7 @@ async def delete_merchant_service(
     Args:
         service_id: 9-digit numeric string ID of the service to delete
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
@@ -479,12 +491,12 @@ async def delete_merchant_service(
     try:
         from app.repositories.service_repository import ServiceRepository
         
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         service_repo = ServiceRepository(db)
         
         # Get merchant
-        merchant = await merchant_repo.get_merchant_by_user_id(current_user.id)
+        merchant = await merchant_manager.get_merchant(current_user.id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -499,6 +511,7 @@ async def delete_merchant_service(
         # Soft delete service
         service.is_active = False
         await service_repo.update(service)
+        await response_cache.invalidate(TAG_SERVICES, TAG_CATEGORIES, TAG_FEATURED)
         
         return SuccessResponse(
             success=True,
@@ -520,6 +533,7 @@ async def delete_merchant_service(
 @router.get("/profile", response_model=MerchantProfileResponse)
 async def get_merchant_profile(
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -529,7 +543,7 @@ async def get_merchant_profile(
         MerchantProfileResponse: Complete merchant profile with subscription info
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.get_merchant_profile(current_user.id)
     
     except NotFoundError as e:
@@ -543,6 +557,7 @@ async def get_merchant_profile(
 async def update_merchant_profile(
     profile_data: MerchantProfileUpdateRequest,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -551,13 +566,14 @@ async def update_merchant_profile(
     Args:
         profile_data: Profile update data
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         MerchantProfileResponse: Updated merchant profile
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.update_merchant_profile(
             current_user.id, profile_data
         )
@@ -586,6 +602,7 @@ async def update_merchant_profile(
 @router.get("/analytics/services", response_model=MerchantAnalyticsResponse)
 async def get_merchant_analytics(
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -593,13 +610,14 @@ async def get_merchant_analytics(
     
     Args:
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         MerchantAnalyticsResponse: Merchant analytics dashboard data
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.get_merchant_analytics(current_user.id)
     
     except NotFoundError as e:
@@ -612,6 +630,7 @@ async def get_merchant_analytics(
 @router.get("/featured-services", response_model=MerchantFeaturedServicesResponse)
 async def get_featured_services_tracking(
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -619,13 +638,14 @@ async def get_featured_services_tracking(
     
     Args:
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         MerchantFeaturedServicesResponse: Featured services tracking data
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.get_featured_services_tracking(current_user.id)
     
     except NotFoundError as e:
@@ -639,6 +659,7 @@ async def get_featured_services_tracking(
 async def create_monthly_featured_service(
     service_id: str = Form(..., description="9-digit numeric string ID of the service to feature"),
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -647,13 +668,14 @@ async def create_monthly_featured_service(
     Args:
         service_id: 9-digit numeric string ID of the service to feature
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         FeaturedServiceResponse: Created featured service
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.create_monthly_featured_service(
             current_user.id, 
             service_id
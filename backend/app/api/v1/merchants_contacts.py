@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db_session
-from app.api.deps import get_current_merchant_user
+from app.api.deps import get_current_merchant_user, get_current_merchant_identity
+from app.core.identity import RequestIdentity
 from app.models import User
 from app.schemas.merchant_schema import MerchantContactResponse, MerchantContactRequest, MerchantContactUpdateRequest
 from app.core.exceptions import NotFoundError, PaymentRequiredError, ForbiddenError
 from app.services.merchant_manager import MerchantManager
 from app.schemas.common_schema import SuccessResponse
 from typing import List
+from datetime import datetime
 from uuid import UUID
 
 router = APIRouter()
@@ -16,6 +18,7 @@ router = APIRouter()
 @router.get("/contacts", response_model=List[MerchantContactResponse])
 async def get_merchant_contacts(
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -23,13 +26,14 @@ async def get_merchant_contacts(
     
     Args:
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         List[MerchantContactResponse]: Merchant contacts
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.get_merchant_contacts(current_user.id)
     
     except NotFoundError as e:
@@ -43,6 +47,7 @@ async def get_merchant_contacts(
 async def add_merchant_contact(
     contact_data: MerchantContactRequest,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -51,13 +56,14 @@ async def add_merchant_contact(
     Args:
         contact_data: Contact data
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         MerchantContactResponse: Created contact
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.add_merchant_contact(current_user.id, contact_data)
     
     except NotFoundError as e:
@@ -82,6 +88,7 @@ async def update_merchant_contact(
     contact_id: UUID,
     contact_data: MerchantContactUpdateRequest,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -91,17 +98,18 @@ async def update_merchant_contact(
         contact_id: UUID of the contact to update
         contact_data: Contact update data
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         MerchantContactResponse: Updated contact
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         
         # Get merchant
-        merchant = await merchant_repo.get_merchant_by_user_id(current_user.id)
+        merchant = await merchant_manager.get_merchant(current_user.id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -117,6 +125,7 @@ async def update_merchant_contact(
             contact.platform_name = contact_data.platform_name
         if contact_data.display_order is not None:
             contact.display_order = contact_data.display_order
+        contact.updated_at = datetime.now()
         
         # Save updates
         updated_contact = await merchant_repo.update_contact(contact)
@@ -147,6 +156,7 @@ async def update_merchant_contact(
 async def remove_merchant_contact(
     contact_id: UUID,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -155,17 +165,18 @@ async def remove_merchant_contact(
     Args:
         contact_id: UUID of the contact to delete
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         SuccessResponse: Confirmation of deletion
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         
         # Get merchant
-        merchant = await merchant_repo.get_merchant_by_user_id(current_user.id)
+        merchant = await merchant_manager.get_merchant(current_user.id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
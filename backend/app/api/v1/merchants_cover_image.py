@@ -1,13 +1,14 @@
-from io import BytesIO
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db_session
-from app.api.deps import get_current_active_merchant
+from app.api.deps import get_current_active_merchant, get_current_merchant_identity
+from app.core.identity import RequestIdentity
 from app.models import Merchant
 from app.schemas.merchant_schema import ImageUploadResponse
 from app.core.exceptions import NotFoundError, PaymentRequiredError, ForbiddenError, ValidationError
 from app.services.merchant_manager import MerchantManager
-from app.utils.s3_client import s3_image_manager
+from app.utils.image_upload import image_upload_service
+from app.utils.s3_deletion_queue import s3_deletion_queue
 from app.schemas.common_schema import SuccessResponse
 
 router = APIRouter()
@@ -17,6 +18,7 @@ router = APIRouter()
 async def add_cover_image(
     file: UploadFile = File(..., description="Cover image file"),
     current_merchant: Merchant = Depends(get_current_active_merchant),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -25,6 +27,7 @@ async def add_cover_image(
     Args:
         file: Cover image file (multipart/form-data)
         current_merchant: Current authenticated merchant
+        identity: Current merchant identity
         db: Database session
         
     Returns:
@@ -32,10 +35,10 @@ async def add_cover_image(
     """
     try:
         # Check if cover image is allowed in tariff plan
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         
-        subscription_data = await merchant_repo.get_active_subscription(current_merchant.id)
+        subscription_data = await merchant_manager.get_active_subscription(current_merchant.id)
         if not subscription_data:
             raise PaymentRequiredError("Active subscription required")
         
@@ -43,26 +46,18 @@ async def add_cover_image(
         if not tariff_plan.allow_cover_image:
             raise ForbiddenError("Cover image not allowed in current tariff plan")
         
-        # Read file content
-        content = await file.read()
-        content_type = file.content_type or 'application/octet-stream'
-        content_length = len(content)
-        
-        # Validate image constraints
-        s3_image_manager.validate_image_constraints(content_type, content_length)
-        
-        # Upload directly to S3
-        fileobj = BytesIO(content)
-        s3_url = s3_image_manager.upload_fileobj(
-            fileobj=fileobj,
-            file_name=file.filename,
-            content_type=content_type,
+        # Validate and stream the file to S3 off the event loop
+        uploaded = await image_upload_service.upload(
+            file,
             image_type="merchant_cover",
             related_id=str(current_merchant.id)
         )
+        s3_url = uploaded.s3_url
+        old_cover_url = current_merchant.cover_image_url
         
-        # Update merchant cover image URL
+        # Update merchant cover image URL, then delete the replaced one in the background
         await merchant_repo.update_cover_image(current_merchant.id, s3_url)
+        s3_deletion_queue.enqueue(old_cover_url)
         
         return ImageUploadResponse(
             success=True,
@@ -94,6 +89,7 @@ async def add_cover_image(
 async def update_cover_image(
     file: UploadFile = File(..., description="Cover image file"),
     current_merchant: Merchant = Depends(get_current_active_merchant),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -102,6 +98,7 @@ async def update_cover_image(
     Args:
         file: Cover image file (multipart/form-data)
         current_merchant: Current authenticated merchant
+        identity: Current merchant identity
         db: Database session
         
     Returns:
@@ -109,10 +106,10 @@ async def update_cover_image(
     """
     try:
         # Check if cover image is allowed in tariff plan
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         
-        subscription_data = await merchant_repo.get_active_subscription(current_merchant.id)
+        subscription_data = await merchant_manager.get_active_subscription(current_merchant.id)
         if not subscription_data:
             raise PaymentRequiredError("Active subscription required")
         
@@ -120,26 +117,18 @@ async def update_cover_image(
         if not tariff_plan.allow_cover_image:
             raise ForbiddenError("Cover image not allowed in current tariff plan")
         
-        # Read file content
-        content = await file.read()
-        content_type = file.content_type or 'application/octet-stream'
-        content_length = len(content)
-        
-        # Validate image constraints
-        s3_image_manager.validate_image_constraints(content_type, content_length)
-        
-        # Upload directly to S3
-        fileobj = BytesIO(content)
-        s3_url = s3_image_manager.upload_fileobj(
-            fileobj=fileobj,
-            file_name=file.filename,
-            content_type=content_type,
+        # Validate and stream the file to S3 off the event loop
+        uploaded = await image_upload_service.upload(
+            file,
             image_type="merchant_cover",
             related_id=str(current_merchant.id)
         )
+        s3_url = uploaded.s3_url
+        old_cover_url = current_merchant.cover_image_url
         
-        # Update merchant cover image URL
+        # Update merchant cover image URL, then delete the replaced one in the background
         await merchant_repo.update_cover_image(current_merchant.id, s3_url)
+        s3_deletion_queue.enqueue(old_cover_url)
         
         return ImageUploadResponse(
             success=True,
@@ -170,6 +159,7 @@ async def update_cover_image(
 @router.delete("/cover-image", response_model=SuccessResponse)
 async def remove_cover_image(
     current_merchant: Merchant = Depends(get_current_active_merchant),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -177,21 +167,27 @@ async def remove_cover_image(
     
     Args:
         current_merchant: Current authenticated merchant
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         SuccessResponse: Confirmation of deletion
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         
+        old_cover_url = current_merchant.cover_image_url
+        
         # Delete cover image (set to None)
         deleted = await merchant_repo.delete_cover_image(current_merchant.id)
         
         if not deleted:
             raise NotFoundError("Merchant not found")
         
+        # Delete the object from S3 in the background
+        s3_deletion_queue.enqueue(old_cover_url)
+        
         return SuccessResponse(
             success=True,
             message="Cover image deleted successfully"
@@ -1,15 +1,22 @@
-from io import BytesIO
 from typing import List, Optional
 from uuid import UUID, uuid4
 from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db_session
-from app.api.deps import get_current_active_merchant
+from app.api.deps import get_current_active_merchant, get_current_merchant_identity
+from app.core.identity import RequestIdentity
 from app.models import Image, ImageType, Merchant
-from app.schemas.merchant_schema import MerchantGalleryResponse, ImageUploadResponse
-from app.core.exceptions import PaymentRequiredError, ForbiddenError, ValidationError
+from app.schemas.merchant_schema import (
+    MerchantGalleryResponse,
+    ImageUploadResponse,
+    PresignedUploadRequest,
+    PresignedUploadResponse,
+    ConfirmUploadRequest
+)
+from app.core.exceptions import PaymentRequiredError, ForbiddenError, ValidationError, NotFoundError
 from app.services.merchant_manager import MerchantManager
-from app.utils.s3_client import s3_image_manager
+from app.services.image_upload_manager import ImageUploadManager
+from app.utils.image_upload import image_upload_service
 from app.schemas.common_schema import SuccessResponse
 
 router = APIRouter()
@@ -18,6 +25,7 @@ router = APIRouter()
 @router.get("/gallery", response_model=List[MerchantGalleryResponse])
 async def get_gallery_images(
     current_merchant: Merchant = Depends(get_current_active_merchant),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -25,13 +33,14 @@ async def get_gallery_images(
     
     Args:
         current_merchant: Current authenticated merchant
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         List[MerchantGalleryResponse]: Gallery images
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         images = await merchant_manager.merchant_repo.get_merchant_gallery_images(
             current_merchant.id
         )
@@ -40,6 +49,8 @@ async def get_gallery_images(
             MerchantGalleryResponse(
                 id=image.id,
                 s3_url=image.s3_url,
+                thumbnail_url=image.thumbnail_url,
+                medium_url=image.medium_url,
                 file_name=image.file_name,
                 file_size=image.file_size,
                 display_order=image.display_order,
@@ -60,6 +71,7 @@ async def add_gallery_image(
     file: UploadFile = File(..., description="Gallery image file"),
     display_order: Optional[int] = Form(0, description="Display order"),
     current_merchant: Merchant = Depends(get_current_active_merchant),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -69,17 +81,18 @@ async def add_gallery_image(
         file: Gallery image file (multipart/form-data)
         display_order: Display order for the image
         current_merchant: Current authenticated merchant
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         ImageUploadResponse: Upload result with S3 URL
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         
         # Check tariff limits
-        subscription_data = await merchant_repo.get_active_subscription(current_merchant.id)
+        subscription_data = await merchant_manager.get_active_subscription(current_merchant.id)
         if not subscription_data:
             raise PaymentRequiredError("Active subscription required")
         
@@ -92,30 +105,23 @@ async def add_gallery_image(
                 f"Max allowed: {tariff_plan.max_gallery_images}"
             )
         
-        # Read file content
-        content = await file.read()
-        content_type = file.content_type or 'application/octet-stream'
-        content_length = len(content)
-        
-        # Validate image constraints
-        s3_image_manager.validate_image_constraints(content_type, content_length)
-        
-        # Upload directly to S3
-        fileobj = BytesIO(content)
-        s3_url = s3_image_manager.upload_fileobj(
-            fileobj=fileobj,
-            file_name=file.filename,
-            content_type=content_type,
+        # Validate and stream the file to S3 off the event loop, with thumbnails
+        uploaded = await image_upload_service.upload(
+            file,
             image_type="merchant_gallery",
-            related_id=str(current_merchant.id)
+            related_id=str(current_merchant.id),
+            variants=True
         )
+        s3_url = uploaded.s3_url
         
         # Create image record
         image = Image(
             id=uuid4(),
             s3_url=s3_url,
+            thumbnail_url=uploaded.thumbnail_url,
+            medium_url=uploaded.medium_url,
             file_name=file.filename,
-            file_size=content_length,
+            file_size=uploaded.size,
             image_type=ImageType.MERCHANT_GALLERY,
             related_id=str(current_merchant.id),
             display_order=display_order or 0
@@ -128,6 +134,7 @@ async def add_gallery_image(
             message="Gallery image uploaded successfully",
             image_id=created_image.id,
             s3_url=s3_url,
+            thumbnail_url=uploaded.thumbnail_url,
             presigned_url=None
         )
     
@@ -150,10 +157,121 @@ async def add_gallery_image(
         )
 
 
+@router.post("/gallery/upload-url", response_model=PresignedUploadResponse)
+async def request_gallery_upload_url(
+    upload_request: PresignedUploadRequest,
+    current_merchant: Merchant = Depends(get_current_active_merchant),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Get a presigned URL to upload a gallery image directly to S3.
+    
+    The tariff limit is checked before the URL is issued; pending uploads
+    count against it until they are confirmed or expire.
+    
+    Args:
+        upload_request: File name, content type and display order
+        current_merchant: Current authenticated merchant
+        identity: Current merchant identity
+        db: Database session
+        
+    Returns:
+        PresignedUploadResponse: Upload URL and upload ID to confirm with
+    """
+    try:
+        upload_manager = ImageUploadManager(db, identity)
+        pending, upload_url = await upload_manager.request_upload(
+            current_merchant.user_id,
+            ImageType.MERCHANT_GALLERY,
+            file_name=upload_request.file_name,
+            content_type=upload_request.content_type,
+            display_order=upload_request.display_order
+        )
+        
+        return PresignedUploadResponse(
+            upload_id=pending.id,
+            upload_url=upload_url,
+            s3_url=upload_manager.s3.get_public_url(pending.s3_key),
+            content_type=pending.content_type,
+            expires_at=pending.expires_at
+        )
+    
+    except (PaymentRequiredError, ForbiddenError, ValidationError, NotFoundError) as e:
+        status_code = {
+            PaymentRequiredError: status.HTTP_402_PAYMENT_REQUIRED,
+            ForbiddenError: status.HTTP_403_FORBIDDEN,
+            ValidationError: status.HTTP_400_BAD_REQUEST,
+            NotFoundError: status.HTTP_404_NOT_FOUND
+        }[type(e)]
+        
+        raise HTTPException(status_code=status_code, detail=str(e))
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create gallery upload URL: {str(e)}"
+        )
+
+
+@router.post("/gallery/upload-confirm", response_model=ImageUploadResponse)
+async def confirm_gallery_upload(
+    confirm_request: ConfirmUploadRequest,
+    current_merchant: Merchant = Depends(get_current_active_merchant),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Confirm a gallery image uploaded with a presigned URL.
+    
+    Args:
+        confirm_request: Upload ID returned with the upload URL
+        current_merchant: Current authenticated merchant
+        identity: Current merchant identity
+        db: Database session
+        
+    Returns:
+        ImageUploadResponse: Created gallery image
+    """
+    try:
+        upload_manager = ImageUploadManager(db, identity)
+        image = await upload_manager.confirm_upload(
+            current_merchant.user_id,
+            confirm_request.upload_id,
+            ImageType.MERCHANT_GALLERY
+        )
+        
+        return ImageUploadResponse(
+            success=True,
+            message="Gallery image uploaded successfully",
+            image_id=image.id,
+            s3_url=image.s3_url,
+            thumbnail_url=image.thumbnail_url,
+            presigned_url=None
+        )
+    
+    except (PaymentRequiredError, ForbiddenError, ValidationError, NotFoundError) as e:
+        status_code = {
+            PaymentRequiredError: status.HTTP_402_PAYMENT_REQUIRED,
+            ForbiddenError: status.HTTP_403_FORBIDDEN,
+            ValidationError: status.HTTP_400_BAD_REQUEST,
+            NotFoundError: status.HTTP_404_NOT_FOUND
+        }[type(e)]
+        
+        raise HTTPException(status_code=status_code, detail=str(e))
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to confirm gallery upload: {str(e)}"
+        )
+
+
 @router.delete("/gallery/{image_id}")
 async def remove_gallery_image(
     image_id: UUID,
     current_merchant: Merchant = Depends(get_current_active_merchant),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -162,13 +280,14 @@ async def remove_gallery_image(
     Args:
         image_id: UUID of the image to remove
         current_merchant: Current authenticated merchant
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         dict: Success message
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         
         # Delete image record
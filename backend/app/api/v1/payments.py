@@ -1,22 +1,27 @@
 import logging
+from datetime import date
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Header
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Header, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.core.database import get_db_session
+from app.core.database import AsyncSessionLocal, get_db_session
 from app.core.config import get_settings
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_admin
+from app.core.exceptions import ValidationError
 from app.models.user_model import User
-from app.models.payment_model import PaymentMethod
+from app.models.payment_model import PaymentMethod, PaymentType
 from app.services.payment_service import PaymentService, PaymentError, SubscriptionError
+from app.services.payment_stats_service import PaymentStatsService
+from app.services.payment_webhook_worker import payment_webhook_worker
 from app.services.payment_providers import get_payment_providers
 from app.services.payme_merchant_api import PaymeMerchantAPI
 from app.schemas.payment_schema import (
     PaymentResponse, SubscriptionResponse,
     TariffPaymentRequest, FeaturedServicePaymentRequest,
-    WebhookPaymentData, PaymentWebhookResponse
+    WebhookPaymentData, PaymentWebhookResponse,
+    PaymentStatsResponse, RevenueSeriesResponse
 )
 
 
@@ -118,7 +123,6 @@ async def payment_webhook(
     request: Request,
     authorization: Optional[str] = Header(None, alias="Authorization"),
     test_operation: Optional[str] = Header(None, alias="Test-Operation"),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     payment_service: PaymentService = Depends(get_payment_service),
     session: AsyncSession = Depends(get_db_session)
 ):
@@ -318,19 +322,35 @@ async def payment_webhook(
                 secret_key=valid_secret_key
             )
             
+            # Explicitly set media_type and headers to ensure JSON response and prevent redirects
+            response_headers = {
+                "Content-Type": "application/json",
+                "Cache-Control": "no-cache, no-store, must-revalidate",
+                "Pragma": "no-cache",
+                "Expires": "0"
+            }
+            
+            # Statements can cover many transactions; write them out as they are read.
+            # The body reads through its own session: from FastAPI 0.106 on, yield
+            # dependencies such as get_db_session are closed before a StreamingResponse
+            # body runs, so `session` must not be used by it.
+            if webhook_data.get("method") == "GetStatement":
+                statement = await merchant_api.stream_statement(webhook_data, AsyncSessionLocal)
+                if statement is not None:
+                    return StreamingResponse(
+                        statement,
+                        status_code=200,
+                        media_type="application/json",
+                        headers=response_headers
+                    )
+            
             # Handle Merchant API request
             response = await merchant_api.handle_request(webhook_data)
-            # Explicitly set media_type and headers to ensure JSON response and prevent redirects
             return JSONResponse(
                 status_code=200,
                 content=response,
                 media_type="application/json",
-                headers={
-                    "Content-Type": "application/json",
-                    "Cache-Control": "no-cache, no-store, must-revalidate",
-                    "Pragma": "no-cache",
-                    "Expires": "0"
-                }
+                headers=response_headers
             )
         
         # Regular webhook notification handling
@@ -343,17 +363,14 @@ async def payment_webhook(
                 detail=f"Invalid payment method: {method}"
             )
         
-        # Process webhook in background
-        background_tasks.add_task(
-            _process_webhook_background,
-            payment_service,
-            payment_method,
-            webhook_data
-        )
+        # Store the event in the webhook inbox and acknowledge right away;
+        # payment_webhook_worker applies it in the background
+        accepted = await payment_service.accept_payment_webhook(payment_method, webhook_data)
+        payment_webhook_worker.notify()
         
         return PaymentWebhookResponse(
             success=True,
-            message="Webhook received and will be processed"
+            message="Webhook received and will be processed" if accepted else "Webhook already received"
         )
         
     except HTTPException:
@@ -421,29 +438,6 @@ def _extract_merchant_id_from_auth(authorization: str) -> Optional[str]:
         return None
 
 
-async def _process_webhook_background(
-    payment_service: PaymentService,
-    payment_method: PaymentMethod,
-    webhook_data: dict
-):
-    """Process webhook in background task."""
-    try:
-        success = await payment_service.process_payment_webhook(
-            payment_method=payment_method,
-            webhook_data=webhook_data
-        )
-        
-        # Log the result (in production, use proper logging)
-        if success:
-            print(f"Webhook processed successfully for {payment_method}")
-        else:
-            print(f"Webhook processing failed for {payment_method}")
-            
-    except Exception as e:
-        # Log error (in production, use proper logging and maybe retry logic)
-        print(f"Background webhook processing error: {str(e)}")
-
-
 # Admin endpoints (would require admin authentication in production)
 @router.post("/admin/expire-subscriptions")
 async def expire_old_subscriptions(
@@ -475,21 +469,48 @@ async def _expire_subscriptions_background(payment_service: PaymentService):
         print(f"Background subscription expiry error: {str(e)}")
 
 
-@router.get("/admin/stats")
+@router.get("/admin/stats", response_model=PaymentStatsResponse)
 async def get_payment_stats(
-    payment_service: PaymentService = Depends(get_payment_service)
+    start_date: Optional[date] = Query(None, description="Only payments created on or after this day"),
+    end_date: Optional[date] = Query(None, description="Only payments created on or before this day"),
+    current_user: User = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_db_session)
 ):
     """Get payment and subscription statistics (admin only)."""
     try:
-        # In production, this would require admin authentication
-        # For now, return basic stats from the payment service
-        return {
-            "message": "Payment statistics endpoint",
-            "note": "Would return comprehensive stats in full implementation"
-        }
+        return await PaymentStatsService(session).get_overview(start_date, end_date)
         
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to get payment stats: {str(e)}"
+        )
+
+
+@router.get("/admin/stats/revenue", response_model=RevenueSeriesResponse)
+async def get_revenue_series(
+    period: str = Query("day", description="Chart period: day or month"),
+    start_date: Optional[date] = Query(None, description="First day (defaults to the last 30 days or 12 months)"),
+    end_date: Optional[date] = Query(None, description="Last day (defaults to today)"),
+    payment_type: Optional[PaymentType] = Query(None, description="Only count payments of this type"),
+    current_user: User = Depends(get_current_admin),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Get completed payment revenue per day or month (admin only)."""
+    try:
+        return await PaymentStatsService(session).get_revenue_series(
+            start_date=start_date,
+            end_date=end_date,
+            period=period,
+            payment_type=payment_type
+        )
+        
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get revenue series: {str(e)}"
         )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from io import BytesIO
+from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
 
@@ -9,6 +9,7 @@ from sqlalchemy import select, and_
 from app.core.database import get_db_session
 from app.services.service_manager import ServiceManager
 from app.services.merchant_manager import MerchantManager
+from app.services.image_upload_manager import ImageUploadManager
 from app.schemas.service_schema import (
     ServiceSearchFilters,
     PaginatedServiceResponse,
@@ -23,10 +24,21 @@ from app.schemas.merchant_schema import (
     MerchantServiceResponse,
     MerchantServicesResponse,
     ImageUploadResponse,
+    PresignedUploadRequest,
+    PresignedUploadResponse,
+    ConfirmUploadRequest,
     FeaturedServiceResponse
 )
 from app.schemas.common_schema import PaginationParams, SuccessResponse
-from app.api.deps import get_current_user, get_current_merchant_user, get_current_admin, get_current_user_optional
+from app.api.deps import (
+    get_current_user,
+    get_current_merchant_user,
+    get_current_admin,
+    get_current_user_optional,
+    get_current_merchant_identity,
+    ConditionalResponse
+)
+from app.core.identity import RequestIdentity
 from app.models import User, Service, Image, ImageType, FeatureType
 from app.repositories.service_repository import ServiceRepository
 from app.repositories.merchant_repository import MerchantRepository
@@ -37,7 +49,9 @@ from app.core.exceptions import (
     ForbiddenError, 
     PaymentRequiredError
 )
-from app.utils.s3_client import s3_image_manager
+from app.utils.image_upload import image_upload_service
+from app.utils.counter_buffer import service_counter_buffer
+from app.utils.response_cache import response_cache, TAG_SERVICES, TAG_CATEGORIES, TAG_FEATURED, TAG_TRENDING
 
 router = APIRouter()
 
@@ -46,6 +60,9 @@ router = APIRouter()
 async def get_services(
     # Featured mode
     featured: Optional[bool] = Query(None, description="Get only featured services"),
+    trending: Optional[bool] = Query(
+        None, description="Get services by popularity score (category_id/location_region apply)"
+    ),
     
     # Browse/Search filters
     query: Optional[str] = Query(None, description="Search query for name/description"),
@@ -55,18 +72,25 @@ async def get_services(
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price in UZS"),
     min_rating: Optional[float] = Query(None, ge=0, le=5, description="Minimum rating"),
     is_verified_merchant: Optional[bool] = Query(None, description="Only verified merchants"),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitude of the search point"),
+    lng: Optional[float] = Query(None, ge=-180, le=180, description="Longitude of the search point"),
+    radius_km: Optional[float] = Query(None, gt=0, le=1000, description="Search radius in km around lat/lng"),
     sort_by: Optional[str] = Query(
         "created_at", 
-        description="Sort by: created_at, price, rating, popularity, name"
+        description="Sort by: created_at, price, rating, popularity, name, relevance, distance"
     ),
     sort_order: Optional[str] = Query(
-        "desc", 
-        description="Sort order: asc, desc"
+        None, 
+        description="Sort order: asc, desc (default: asc for distance, desc otherwise)"
     ),
     
     # Pagination
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset cursor (next_cursor of the previous page); pass empty to start cursor mode"
+    ),
     
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: AsyncSession = Depends(get_db_session)
@@ -76,11 +100,14 @@ async def get_services(
     
     Modes:
     1. Featured: Set featured=true to get only featured services
-    2. Search: Provide any search filters (query, location, price, etc.)
-    3. Browse: Default mode - browse all services with optional category filter
+    2. Trending: Set trending=true to get services by popularity score
+    3. Search: Provide any search filters (query, location, price, etc.)
+    4. Browse: Default mode - browse all services with optional category filter
     
     Args:
         featured: If True, returns only featured services (other filters ignored)
+        trending: If True, returns services by popularity score, optionally
+            filtered by category_id and location_region (other filters ignored)
         query: Search query for service name/description
         category_id: Filter by category ID (integer)
         location_region: Filter by Uzbekistan region
@@ -88,10 +115,15 @@ async def get_services(
         max_price: Maximum price in UZS
         min_rating: Minimum rating (0-5)
         is_verified_merchant: Only show services from verified merchants
-        sort_by: Sort field (created_at, price, rating, popularity, name)
-        sort_order: Sort order (asc, desc)
+        lat: Search point latitude (with lng, enables distance_km in results)
+        lng: Search point longitude
+        radius_km: Only services within this distance of lat/lng
+        sort_by: Sort field (created_at, price, rating, popularity, name, relevance, distance)
+        sort_order: Sort order (asc, desc; defaults to asc for distance, desc otherwise)
         page: Page number (1-based)
         limit: Items per page (1-100)
+        cursor: Opt-in keyset pagination; when set, page is ignored, total is
+            not computed and next_cursor is returned while has_more is true
         db: Database session
         
     Returns:
@@ -102,21 +134,30 @@ async def get_services(
     """
     try:
         service_manager = ServiceManager(db)
-        pagination = PaginationParams(page=page, limit=limit)
+        pagination = PaginationParams(page=page, limit=limit, cursor=cursor)
         
         # Get user_id if authenticated
         user_id = current_user.id if current_user else None
         
         # Featured mode - return only featured services
         if featured:
-            # Get all featured services (typically small number)
-            featured_response = await service_manager.get_featured_services(limit=None, user_id=user_id)
+            # Get all featured services (typically small number), shared across users
+            async def compute_featured():
+                featured_response = await service_manager.get_featured_services(limit=None)
+                return featured_response.model_dump(mode="json")
+            
+            featured_response = FeaturedServicesResponse.model_validate(
+                await response_cache.get_or_compute(
+                    "services:featured", {}, (TAG_FEATURED, TAG_SERVICES), compute_featured
+                )
+            )
             total_featured = featured_response.total
             
             # Apply pagination to featured services
             start_idx = (page - 1) * limit
             end_idx = start_idx + limit
             paginated_services = featured_response.services[start_idx:end_idx]
+            await service_manager.apply_user_flags(paginated_services, user_id)
             
             total_pages = (total_featured + limit - 1) // limit if total_featured > 0 else 1
             has_more = page < total_pages
@@ -130,6 +171,33 @@ async def get_services(
                 total_pages=total_pages
             )
         
+        # Trending mode - precomputed popularity score, identical for everyone
+        if trending:
+            async def compute_trending():
+                trending_response = await service_manager.get_trending_services(
+                    category_id=category_id,
+                    location_region=location_region,
+                    pagination=pagination
+                )
+                return trending_response.model_dump(mode="json")
+            
+            trending_response = PaginatedServiceResponse.model_validate(
+                await response_cache.get_or_compute(
+                    "services:trending",
+                    {
+                        "category_id": category_id,
+                        "location_region": location_region,
+                        "page": page,
+                        "limit": limit,
+                        "cursor": cursor
+                    },
+                    (TAG_TRENDING, TAG_SERVICES),
+                    compute_trending
+                )
+            )
+            await service_manager.apply_user_flags(trending_response.services, user_id)
+            return trending_response
+        
         # Check if any search filters are provided (search mode)
         has_search_filters = any([
             query,
@@ -138,6 +206,9 @@ async def get_services(
             max_price is not None,
             min_rating is not None,
             is_verified_merchant is not None,
+            lat is not None,
+            lng is not None,
+            radius_km is not None,
             sort_by and sort_by != "created_at",  # If sort_by is something other than default
             sort_order and sort_order != "desc"  # If sort_order is something other than default
         ])
@@ -152,8 +223,11 @@ async def get_services(
                 max_price=max_price,
                 min_rating=min_rating,
                 is_verified_merchant=is_verified_merchant,
+                latitude=lat,
+                longitude=lng,
+                radius_km=radius_km,
                 sort_by=sort_by or "created_at",
-                sort_order=sort_order or "desc"
+                sort_order=sort_order
             )
             
             return await service_manager.search_services(
@@ -162,12 +236,26 @@ async def get_services(
                 user_id=user_id
             )
         else:
-            # Browse mode - simple browsing with optional category filter
-            return await service_manager.browse_services(
-                category_id=category_id,
-                pagination=pagination,
-                user_id=user_id
+            # Browse mode - simple browsing with optional category filter.
+            # The page is identical for everyone, so it is cached without the
+            # user and the user's likes/saves are overlaid afterwards.
+            async def compute_browse():
+                browse_response = await service_manager.browse_services(
+                    category_id=category_id,
+                    pagination=pagination
+                )
+                return browse_response.model_dump(mode="json")
+            
+            browse_response = PaginatedServiceResponse.model_validate(
+                await response_cache.get_or_compute(
+                    "services:browse",
+                    {"category_id": category_id, "page": page, "limit": limit, "cursor": cursor},
+                    (TAG_SERVICES,),
+                    compute_browse
+                )
             )
+            await service_manager.apply_user_flags(browse_response.services, user_id)
+            return browse_response
     
     except ValidationError as e:
         raise HTTPException(
@@ -182,6 +270,7 @@ async def get_services(
 @router.get("/my", response_model=MerchantServicesResponse)
 async def get_my_services(
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -189,13 +278,14 @@ async def get_my_services(
     
     Args:
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         MerchantServicesResponse: Merchant services with statistics
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.get_merchant_services(current_user.id)
     
     except NotFoundError as e:
@@ -213,14 +303,21 @@ async def get_my_services(
 @router.get("/{service_id}", response_model=ServiceDetailResponse)
 async def get_service_details(
     service_id: str,
+    conditional: ConditionalResponse = Depends(),
     current_user: Optional[User] = Depends(get_current_user_optional),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
     Get detailed service information including merchant info and images.
     
+    Supports conditional requests: the response carries a weak ETag (the
+    view count changes on every request and is not part of it), and a
+    matching If-None-Match gets 304 Not Modified. The view is counted either
+    way.
+    
     Args:
         service_id: 9-digit numeric string ID of the service
+        conditional: Conditional request helper
         current_user: Optional authenticated user
         db: Database session
         
@@ -233,6 +330,15 @@ async def get_service_details(
     try:
         service_manager = ServiceManager(db)
         user_id = current_user.id if current_user else None
+        
+        version = await service_manager.get_service_detail_version(service_id, user_id=user_id)
+        if version is not None:
+            etag = conditional.make_etag(service_id, user_id, *version, weak=True)
+            not_modified = conditional.check(etag)
+            if not_modified is not None:
+                await service_manager.record_service_view(service_id)
+                return not_modified
+        
         return await service_manager.get_service_details(service_id, user_id=user_id)
     
     except NotFoundError as e:
@@ -296,6 +402,7 @@ async def record_service_interaction(
 async def create_service(
     service_data: ServiceCreateRequest,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -304,13 +411,14 @@ async def create_service(
     Args:
         service_data: Service creation data
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         MerchantServiceResponse: Created service
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         return await merchant_manager.create_merchant_service(current_user.id, service_data)
     
     except NotFoundError as e:
@@ -340,6 +448,7 @@ async def update_service(
     service_id: str,
     service_data: ServiceUpdateRequest,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -349,18 +458,19 @@ async def update_service(
         service_id: 9-digit numeric string ID of the service to update
         service_data: Service update data
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         MerchantServiceResponse: Updated service
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         service_repo = ServiceRepository(db)
         
         # Get merchant
-        merchant = await merchant_repo.get_merchant_by_user_id(current_user.id)
+        merchant = await merchant_manager.get_merchant(current_user.id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -397,9 +507,11 @@ async def update_service(
             service.latitude = service_data.latitude
         if service_data.longitude is not None:
             service.longitude = service_data.longitude
+        service.updated_at = datetime.now()
         
         # Save updates
         updated_service = await service_repo.update(service)
+        await response_cache.invalidate(TAG_SERVICES, TAG_CATEGORIES)
         
         # Get category for response
         from app.models import ServiceCategory
@@ -407,6 +519,7 @@ async def update_service(
         category_result = await db.execute(category_stmt)
         category = category_result.scalar_one_or_none()
         
+        counts = service_counter_buffer.merged_counts(updated_service)
         return MerchantServiceResponse(
             id=updated_service.id,
             name=updated_service.name,
@@ -415,10 +528,10 @@ async def update_service(
             location_region=updated_service.location_region,
             latitude=updated_service.latitude,
             longitude=updated_service.longitude,
-            view_count=updated_service.view_count,
-            like_count=updated_service.like_count,
-            save_count=updated_service.save_count,
-            share_count=updated_service.share_count,
+            view_count=counts["view_count"],
+            like_count=counts["like_count"],
+            save_count=counts["save_count"],
+            share_count=counts["share_count"],
             overall_rating=updated_service.overall_rating,
             total_reviews=updated_service.total_reviews,
             is_active=updated_service.is_active,
@@ -446,6 +559,7 @@ async def update_service(
 async def delete_service(
     service_id: str,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -454,18 +568,19 @@ async def delete_service(
     Args:
         service_id: 9-digit numeric string ID of the service to delete
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         SuccessResponse: Confirmation of deletion
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         service_repo = ServiceRepository(db)
         
         # Get merchant
-        merchant = await merchant_repo.get_merchant_by_user_id(current_user.id)
+        merchant = await merchant_manager.get_merchant(current_user.id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -480,6 +595,7 @@ async def delete_service(
         # Soft delete by setting is_active=False
         service.is_active = False
         await service_repo.update(service)
+        await response_cache.invalidate(TAG_SERVICES, TAG_CATEGORIES, TAG_FEATURED)
         
         return SuccessResponse(
             success=True,
@@ -500,6 +616,7 @@ async def upload_service_image(
     file: UploadFile = File(..., description="Service image file"),
     display_order: Optional[int] = Form(0, description="Display order"),
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -510,17 +627,18 @@ async def upload_service_image(
         file: Service image file (multipart/form-data)
         display_order: Display order for the image
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         ImageUploadResponse: Upload result with S3 URL
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         
         # Get merchant
-        merchant = await merchant_repo.get_merchant_by_user_id(current_user.id)
+        merchant = await merchant_manager.get_merchant(current_user.id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -539,7 +657,7 @@ async def upload_service_image(
             raise NotFoundError("Service not found or not owned by merchant")
         
         # Check tariff limits
-        subscription_data = await merchant_repo.get_active_subscription(merchant.id)
+        subscription_data = await merchant_manager.get_active_subscription(merchant.id)
         if not subscription_data:
             raise PaymentRequiredError("Active subscription required")
         
@@ -553,42 +671,38 @@ async def upload_service_image(
                 f"Max allowed: {tariff_plan.max_images_per_service}"
             )
         
-        # Read file content
-        content = await file.read()
-        content_type = file.content_type or 'application/octet-stream'
-        content_length = len(content)
-        
-        # Validate image constraints
-        s3_image_manager.validate_image_constraints(content_type, content_length)
-        
-        # Upload directly to S3
-        fileobj = BytesIO(content)
-        s3_url = s3_image_manager.upload_fileobj(
-            fileobj=fileobj,
-            file_name=file.filename,
-            content_type=content_type,
+        # Validate and stream the file to S3 off the event loop, with thumbnails
+        uploaded = await image_upload_service.upload(
+            file,
             image_type="service_image",
-            related_id=str(service_id)
+            related_id=str(service_id),
+            variants=True
         )
+        s3_url = uploaded.s3_url
         
         # Create image record
         image = Image(
             id=uuid4(),
             s3_url=s3_url,
+            thumbnail_url=uploaded.thumbnail_url,
+            medium_url=uploaded.medium_url,
             file_name=file.filename,
-            file_size=content_length,
+            file_size=uploaded.size,
             image_type=ImageType.SERVICE_IMAGE,
             related_id=service_id,
             display_order=display_order or 0
         )
         
         created_image = await merchant_repo.create_service_image(image)
+        # Main images are shown in service listings
+        await response_cache.invalidate(TAG_SERVICES)
         
         return ImageUploadResponse(
             success=True,
             message="Service image uploaded successfully",
             image_id=created_image.id,
             s3_url=s3_url,
+            thumbnail_url=uploaded.thumbnail_url,
             presigned_url=None
         )
     
@@ -609,11 +723,124 @@ async def upload_service_image(
         )
 
 
+@router.post("/{service_id}/images/upload-url", response_model=PresignedUploadResponse)
+async def request_service_image_upload_url(
+    service_id: str,
+    upload_request: PresignedUploadRequest,
+    current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Get a presigned URL to upload a service image directly to S3.
+    
+    The tariff limit is checked before the URL is issued; pending uploads
+    count against it until they are confirmed or expire.
+    
+    Args:
+        service_id: 9-digit numeric string ID of the service
+        upload_request: File name, content type and display order
+        current_user: Current authenticated merchant user
+        identity: Current merchant identity
+        db: Database session
+        
+    Returns:
+        PresignedUploadResponse: Upload URL and upload ID to confirm with
+    """
+    try:
+        upload_manager = ImageUploadManager(db, identity)
+        pending, upload_url = await upload_manager.request_upload(
+            current_user.id,
+            ImageType.SERVICE_IMAGE,
+            file_name=upload_request.file_name,
+            content_type=upload_request.content_type,
+            display_order=upload_request.display_order,
+            service_id=service_id
+        )
+        
+        return PresignedUploadResponse(
+            upload_id=pending.id,
+            upload_url=upload_url,
+            s3_url=upload_manager.s3.get_public_url(pending.s3_key),
+            content_type=pending.content_type,
+            expires_at=pending.expires_at
+        )
+    
+    except (PaymentRequiredError, ForbiddenError, NotFoundError, ValidationError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN if isinstance(e, ForbiddenError)
+            else status.HTTP_402_PAYMENT_REQUIRED if isinstance(e, PaymentRequiredError)
+            else status.HTTP_404_NOT_FOUND if isinstance(e, NotFoundError)
+            else status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create service image upload URL: {str(e)}"
+        )
+
+
+@router.post("/{service_id}/images/upload-confirm", response_model=ImageUploadResponse)
+async def confirm_service_image_upload(
+    service_id: str,
+    confirm_request: ConfirmUploadRequest,
+    current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Confirm a service image uploaded with a presigned URL.
+    
+    Args:
+        service_id: 9-digit numeric string ID of the service
+        confirm_request: Upload ID returned with the upload URL
+        current_user: Current authenticated merchant user
+        identity: Current merchant identity
+        db: Database session
+        
+    Returns:
+        ImageUploadResponse: Created service image
+    """
+    try:
+        upload_manager = ImageUploadManager(db, identity)
+        image = await upload_manager.confirm_upload(
+            current_user.id,
+            confirm_request.upload_id,
+            ImageType.SERVICE_IMAGE,
+            service_id=service_id
+        )
+        
+        return ImageUploadResponse(
+            success=True,
+            message="Service image uploaded successfully",
+            image_id=image.id,
+            s3_url=image.s3_url,
+            thumbnail_url=image.thumbnail_url,
+            presigned_url=None
+        )
+    
+    except (PaymentRequiredError, ForbiddenError, NotFoundError, ValidationError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN if isinstance(e, ForbiddenError)
+            else status.HTTP_402_PAYMENT_REQUIRED if isinstance(e, PaymentRequiredError)
+            else status.HTTP_404_NOT_FOUND if isinstance(e, NotFoundError)
+            else status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to confirm service image upload: {str(e)}"
+        )
+
+
 @router.delete("/{service_id}/images/{image_id}", response_model=SuccessResponse)
 async def delete_service_image(
     service_id: str,
     image_id: UUID,
     current_user: User = Depends(get_current_merchant_user),
+    identity: RequestIdentity = Depends(get_current_merchant_identity),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
@@ -623,18 +850,19 @@ async def delete_service_image(
         service_id: 9-digit numeric string ID of the service
         image_id: UUID of the image to delete
         current_user: Current authenticated merchant user
+        identity: Current merchant identity
         db: Database session
         
     Returns:
         SuccessResponse: Confirmation of deletion
     """
     try:
-        merchant_manager = MerchantManager(db)
+        merchant_manager = MerchantManager(db, identity)
         merchant_repo = merchant_manager.merchant_repo
         service_repo = ServiceRepository(db)
         
         # Get merchant
-        merchant = await merchant_repo.get_merchant_by_user_id(current_user.id)
+        merchant = await merchant_manager.get_merchant(current_user.id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -661,6 +889,7 @@ async def delete_service_image(
         image.is_active = False
         merchant_repo.db.add(image)
         await merchant_repo.db.commit()
+        await response_cache.invalidate(TAG_SERVICES)
         
         return SuccessResponse(
             success=True,
@@ -12,7 +12,8 @@ from app.core.security import verify_phone_number, normalize_phone_number
 from app.models import UserType
 from app.services.merchant_manager import MerchantManager
 from app.services.auth_service import AuthService
-from app.utils.s3_client import s3_image_manager
+from app.utils.image_upload import image_upload_service
+from app.utils.s3_deletion_queue import s3_deletion_queue
 from app.schemas.merchant_schema import ImageUploadResponse
 
 router = APIRouter()
@@ -29,6 +30,7 @@ async def get_user_profile(
         phone_number=current_user.phone_number,
         name=current_user.name,
         avatar_url=current_user.avatar_url,
+        avatar_thumbnail_url=current_user.avatar_thumbnail_url,
         user_type=current_user.user_type,
         created_at=current_user.created_at
     )
@@ -81,6 +83,7 @@ async def update_user_profile(
             phone_number=current_user.phone_number,
             name=current_user.name,
             avatar_url=current_user.avatar_url,
+            avatar_thumbnail_url=current_user.avatar_thumbnail_url,
             user_type=current_user.user_type,
             created_at=current_user.created_at
         )
@@ -101,36 +104,30 @@ async def upload_avatar(
 ):
     """Upload user avatar directly to S3 and update user's avatar_url."""
     try:
-        # Read a small amount to validate content type and size
-        content = await file.read()
-        content_type = file.content_type or 'application/octet-stream'
-        content_length = len(content)
-
-        # Validate image constraints
-        s3_image_manager.validate_image_constraints(content_type, content_length)
-
-        # Upload file object to S3
-        # Create a BytesIO stream from content for upload_fileobj
-        from io import BytesIO
-        fileobj = BytesIO(content)
-
-        s3_url = s3_image_manager.upload_fileobj(
-            fileobj=fileobj,
-            file_name=file.filename,
-            content_type=content_type,
+        # Validate and stream the file to S3 off the event loop, with thumbnails
+        uploaded = await image_upload_service.upload(
+            file,
             image_type="user_avatar",
-            related_id=str(current_user.id)
+            related_id=str(current_user.id),
+            variants=True
         )
+        s3_url = uploaded.s3_url
 
         # Persist avatar URL on user
         user_repo = UserRepository(db)
+        old_urls = (current_user.avatar_url, current_user.avatar_thumbnail_url)
         current_user.avatar_url = s3_url
+        current_user.avatar_thumbnail_url = uploaded.thumbnail_url
         await user_repo.update(current_user)
+        
+        # Delete the replaced avatar from S3 in the background
+        s3_deletion_queue.enqueue(*old_urls)
 
         return ImageUploadResponse(
             success=True,
             message="Avatar uploaded successfully",
             s3_url=s3_url,
+            thumbnail_url=uploaded.thumbnail_url,
             presigned_url=None
         )
 
@@ -148,19 +145,16 @@ async def delete_avatar(
     """Delete user avatar from S3 and clear avatar_url."""
     try:
         user_repo = UserRepository(db)
-
-        # Delete from S3 if exists
-        if current_user.avatar_url:
-            try:
-                s3_image_manager.delete_image(current_user.avatar_url)
-            except Exception:
-                # Log error but continue - S3 deletion is not critical
-                pass
+        old_urls = (current_user.avatar_url, current_user.avatar_thumbnail_url)
 
         # Clear avatar URL
         current_user.avatar_url = None
+        current_user.avatar_thumbnail_url = None
         await user_repo.update(current_user)
 
+        # Delete from S3 in the background
+        s3_deletion_queue.enqueue(*old_urls)
+
         return SuccessResponse(
             success=True,
             message="Avatar deleted successfully"
@@ -199,24 +193,31 @@ async def get_user_interactions(
         # Get all user interactions (likes and saves)
         interactions = await service_repo.get_user_interactions(current_user.id)
         
+        # Hydrate every distinct service once for the whole list
+        unique_services = list({service.id: service for _, service in interactions}.values())
+        service_items = await service_manager._build_service_list_items(
+            unique_services, user_id=current_user.id
+        )
+        items_by_id = {item.id: item for item in service_items}
+        
         # Separate liked and saved services
         liked_items = []
         saved_items = []
         
         for interaction, service in interactions:
-            # Convert service to ServiceListItem with user_id to get interaction status
-            service_item = await service_manager._convert_to_service_list_item(service, user_id=current_user.id)
-            
             # Explicitly set interaction status based on interaction type
-            # Pydantic models allow attribute assignment in newer versions
             if interaction.interaction_type == InteractionType.LIKE:
-                # For liked services, ensure is_liked is True
-                service_item.is_liked = True
-                service_item.is_saved = False  # Clear save status for liked items
+                # For liked services, ensure is_liked is True and clear save status
+                service_item = items_by_id[service.id].model_copy(
+                    update={"is_liked": True, "is_saved": False}
+                )
             elif interaction.interaction_type == InteractionType.SAVE:
-                # For saved services, ensure is_saved is True
-                service_item.is_saved = True
-                service_item.is_liked = False  # Clear like status for saved items
+                # For saved services, ensure is_saved is True and clear like status
+                service_item = items_by_id[service.id].model_copy(
+                    update={"is_saved": True, "is_liked": False}
+                )
+            else:
+                service_item = items_by_id[service.id]
             
             interaction_item = UserInteractionItem(
                 interaction_type=interaction.interaction_type,
@@ -42,23 +42,64 @@ class Settings(BaseSettings):
     DATABASE_POOL_SIZE: int = 10
     DATABASE_MAX_OVERFLOW: int = 20
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_POOL_MAX_CONNECTIONS: int = 50  # Shared by all Redis users in a worker
+    REDIS_POOL_TIMEOUT_SECONDS: int = 5  # Wait for a free connection before failing
+    COUNTER_FLUSH_INTERVAL_SECONDS: int = 5  # Write-behind flush interval for service counters
+
+    # Public catalogue response cache (in-process LRU + Redis)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_LOCAL_TTL_SECONDS: int = 5
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 60  # Cache-Control max-age for public catalogue responses
+
+    # Authenticated user cache (in-process, optionally shared through Redis)
+    AUTH_USER_CACHE_ENABLED: bool = True
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_USER_CACHE_USE_REDIS: bool = False
+
+    # Trending popularity score (weights per interaction, decayed by half-life)
+    POPULARITY_VIEW_WEIGHT: float = 1.0
+    POPULARITY_LIKE_WEIGHT: float = 3.0
+    POPULARITY_SAVE_WEIGHT: float = 4.0
+    POPULARITY_SHARE_WEIGHT: float = 5.0
+    POPULARITY_HALF_LIFE_HOURS: float = 72.0
+    POPULARITY_BATCH_SIZE: int = 1000
 
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # Decoded JWT payloads kept in memory
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30 
 
     # SMS Service
     ESKIZ_BASE_URL: str = "https://notify.eskiz.uz/api"
     ESKIZ_EMAIL: str
     ESKIZ_PASSWORD: str
+    SMS_PROVIDER: str = "eskiz"  # "eskiz" or "stub" (logs messages instead of sending)
+    SMS_HTTP_TIMEOUT_SECONDS: float = 10.0
+    SMS_HTTP_MAX_CONNECTIONS: int = 20  # Keep-alive connections to the provider per worker
+    SMS_QUEUE_ENABLED: bool = True  # Deliver through the Redis stream queue instead of inline
+    SMS_QUEUE_CONCURRENCY: int = 10  # Deliveries in flight per worker
+    SMS_MAX_ATTEMPTS: int = 5  # Before a message is dead-lettered
+    SMS_RETRY_BASE_DELAY_SECONDS: float = 2.0  # Doubled after every failed attempt
+    SMS_BATCH_SIZE: int = 100  # Notifications per provider batch request
 
     # AWS S3
     AWS_ACCESS_KEY_ID: str
     AWS_SECRET_ACCESS_KEY: str
     AWS_BUCKET_NAME: str
     AWS_REGION: str = "eu-north-1"
+    AWS_S3_ENDPOINT_URL: Optional[str] = None  # S3-compatible server (MinIO, LocalStack) instead of AWS
+    S3_IO_MAX_WORKERS: int = 8  # Threads for blocking S3 calls per worker
+    IMAGE_PROCESS_WORKERS: int = 2  # Processes rendering image thumbnails per worker
+    PRESIGNED_UPLOAD_EXPIRE_SECONDS: int = 900  # Lifetime of direct-to-S3 upload URLs
+    PRESIGNED_UPLOAD_CONFIRM_GRACE_SECONDS: int = 600  # Time after expiry an upload can still be confirmed before it is reaped
+    S3_DELETE_FLUSH_INTERVAL_SECONDS: int = 5  # Batched background deletion of replaced/removed images
+    S3_DELETE_MAX_ATTEMPTS: int = 3  # Before a key is left for the orphan collector
+    S3_ORPHAN_MIN_AGE_HOURS: int = 24  # Unreferenced objects younger than this are kept (uploads in flight)
 
     # Payment Providers
     PAYME_TARIFF_SECRET_KEY: Optional[str] = None
@@ -79,6 +120,15 @@ class Settings(BaseSettings):
     # UZUMBANK_MERCHANT_ID: str
     UZUMBANK_API_URL: str = "https://api.uzumbank.uz"
     UZUMBANK_TEST_API_URL: str = "https://api.uzumbank.uz"
+    PAYMENT_STATS_CACHE_TTL_SECONDS: int = 30  # Admin payment statistics and revenue charts
+
+    # Payment webhook inbox (stored on receipt, applied by background workers)
+    WEBHOOK_WORKER_CONCURRENCY: int = 4  # Events processed at once per worker
+    WEBHOOK_POLL_INTERVAL_SECONDS: float = 2.0  # Checks for retries and events accepted by other workers
+    WEBHOOK_MAX_ATTEMPTS: int = 8  # Before an event is marked failed
+    WEBHOOK_RETRY_BASE_DELAY_SECONDS: float = 5.0  # Doubled after every failed attempt
+    WEBHOOK_LEASE_SECONDS: int = 300  # Events held longer by a crashed worker are processed again
+    WEBHOOK_EVENT_RETENTION_DAYS: int = 30  # Processed events kept for deduplication
 
     # Deep Links / Universal Links
     ANDROID_PACKAGE_NAME: str = "uz.wedy.app"
@@ -1,4 +1,10 @@
+from pathlib import Path
 from typing import AsyncGenerator
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
@@ -6,6 +12,12 @@ from sqlmodel import SQLModel
 from app.core.config import settings
 
 
+# Directory holding alembic.ini and the alembic/ migration scripts
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Advisory lock key serializing migrations of concurrently starting workers
+MIGRATION_LOCK_KEY = 720_194_001
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
@@ -39,15 +51,36 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
 
 async def create_db_and_tables() -> None:
     """
-    Create database tables.
+    Create or migrate database tables.
     This should be called during application startup.
+    
+    PostgreSQL databases are upgraded to the latest Alembic revision (the
+    baseline revision creates missing tables); other databases, such as
+    SQLite in development, are created directly from the models.
     """
     async with engine.begin() as conn:
         # Import all models to ensure they are registered with SQLModel
-        from app.models import User, Service, Payment, Review, DailyServiceMetrics, MerchantDailyMetrics  # noqa
+        from app.models import User, Service, Payment, Review, DailyServiceMetrics, MerchantDailyMetrics, MetricsRollupState  # noqa
         
-        # Create all tables
-        await conn.run_sync(SQLModel.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            await conn.run_sync(run_migrations)
+        else:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+
+def run_migrations(connection: Connection) -> None:
+    """
+    Upgrade the database to the latest Alembic revision on a connection.
+    
+    Args:
+        connection: Synchronous connection (from AsyncConnection.run_sync)
+    """
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    config.attributes["connection"] = connection
+    
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    command.upgrade(config, "head")
 
 
 async def close_db_connection() -> None:
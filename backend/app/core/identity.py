@@ -0,0 +1,32 @@
+from typing import Optional
+
+from app.models import User, Merchant, MerchantSubscription, TariffPlan
+
+
+class RequestIdentity:
+    """
+    The authenticated caller, resolved once per request.
+    
+    Holds the user and, for merchants, the merchant profile and the active
+    subscription with its tariff plan, all loaded by a single joined query
+    when the request is authenticated. It is a snapshot from the start of
+    the request: code that changes the subscription must not rely on it
+    afterwards.
+    """
+    
+    def __init__(
+        self,
+        user: User,
+        merchant: Optional[Merchant] = None,
+        subscription: Optional[MerchantSubscription] = None,
+        tariff_plan: Optional[TariffPlan] = None
+    ):
+        self.user = user
+        self.merchant = merchant
+        self.subscription = subscription
+        self.tariff_plan = tariff_plan
+    
+    @property
+    def has_active_subscription(self) -> bool:
+        """Whether the merchant has an active subscription with a tariff plan."""
+        return self.subscription is not None and self.tariff_plan is not None
@@ -1,3 +1,6 @@
+import hashlib
+from calendar import timegm
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import jwt, JWTError
@@ -9,6 +12,9 @@ from app.core.config import settings
 # Password hashing context (for future use if needed)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Decoded payloads of recently verified tokens, keyed by token hash
+_token_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
 
 def create_access_token(
     subject: str, 
@@ -80,21 +86,38 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Verify and decode a JWT token.
     
+    Valid tokens are remembered by hash until they expire, so repeated
+    requests with the same token skip signature verification.
+    
     Args:
         token: JWT token to verify
         
     Returns:
         Optional[Dict[str, Any]]: Decoded token payload or None if invalid
     """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = _token_cache.get(key)
+    if payload is not None:
+        # Same clock as python-jose's exp check
+        if "exp" in payload and payload["exp"] <= timegm(datetime.utcnow().utctimetuple()):
+            _token_cache.pop(key, None)
+            return None
+        _token_cache.move_to_end(key)
+        return dict(payload)
+    
     try:
         payload = jwt.decode(
             token, 
             settings.SECRET_KEY, 
             algorithms=[settings.ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
+    
+    _token_cache[key] = payload
+    while len(_token_cache) > settings.TOKEN_CACHE_MAX_ENTRIES:
+        _token_cache.popitem(last=False)
+    return dict(payload)
 
 
 def get_subject_from_token(token: str) -> Optional[str]:
@@ -5,8 +5,16 @@ from fastapi.responses import JSONResponse
 import logging
 
 from app.core.config import settings
-from app.core.database import create_db_and_tables, close_db_connection
+from app.core.database import create_db_and_tables, close_db_connection, AsyncSessionLocal
 from app.core.exceptions import WedyException, map_exception_to_http
+from app.utils.counter_buffer import service_counter_buffer
+from app.utils.user_cache import auth_user_cache
+from app.services.sms_providers import close_sms_provider
+from app.services.sms_queue import sms_queue
+from app.services.payment_webhook_worker import payment_webhook_worker
+from app.utils.image_upload import image_upload_service
+from app.utils.s3_deletion_queue import s3_deletion_queue
+from app.utils.redis_client import init_redis_pool, close_redis_pool, redis_pool_stats
 from app.api.v1 import auth, categories, users, services, merchants, merchants_cover_image, merchants_gallery, merchants_contacts, payments, reviews, tariffs, deep_links
 
 # Configure logging
@@ -28,10 +36,38 @@ async def lifespan(app: FastAPI):
     await create_db_and_tables()
     logger.info("Database tables created successfully")
     
+    # One bounded Redis connection pool for the whole worker
+    init_redis_pool()
+    
+    # Start periodic flush of buffered service counters
+    service_counter_buffer.start(AsyncSessionLocal)
+    
+    # Drop cached users when other workers change them
+    auth_user_cache.start()
+    
+    # Deliver queued SMS in the background
+    sms_queue.start()
+    
+    # Delete replaced and removed images from S3 in batches
+    s3_deletion_queue.start()
+    
+    # Apply payment webhooks stored in the inbox
+    payment_webhook_worker.start(AsyncSessionLocal)
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Wedy API...")
+    await payment_webhook_worker.stop()
+    await auth_user_cache.stop()
+    await sms_queue.stop()
+    await close_sms_provider()
+    await s3_deletion_queue.stop()
+    image_upload_service.shutdown()
+    await close_redis_pool()
+    logger.info("Redis connection pool closed")
+    await service_counter_buffer.stop()
+    logger.info("Service counters flushed")
     await close_db_connection()
     logger.info("Database connection closed")
 
@@ -118,7 +154,8 @@ async def health_check():
         "status": "healthy",
         "app_name": settings.APP_NAME,
         "version": settings.APP_VERSION,
-        "environment": "development" if settings.DEBUG else "production"
+        "environment": "development" if settings.DEBUG else "production",
+        "redis_pool": redis_pool_stats()
     }
 
 
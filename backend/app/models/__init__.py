@@ -24,6 +24,7 @@ from app.models.service_model import (
 from app.models.image_model import (
     Image,
     ImageType,
+    PendingImageUpload,
 )
 
 from app.models.feature_model import (
@@ -41,6 +42,8 @@ from app.models.payment_model import (
     PaymentMethod,
     PaymentStatus,
     SubscriptionStatus,
+    PaymentWebhookEvent,
+    WebhookEventStatus,
 )
 
 from app.models.merchant_subscription_model import (
@@ -59,6 +62,7 @@ from app.models.user_interaction_model import (
 from app.models.analytics_model import (
     DailyServiceMetrics,
     MerchantDailyMetrics,
+    MetricsRollupState,
 )
 
 # Export all models for easy importing
@@ -75,6 +79,7 @@ __all__ = [
     "Service",
     "Image",
     "ImageType",
+    "PendingImageUpload",
     "FeaturedService",
     "FeatureType",
     
@@ -86,6 +91,8 @@ __all__ = [
     "PaymentStatus",
     "MerchantSubscription",
     "SubscriptionStatus",
+    "PaymentWebhookEvent",
+    "WebhookEventStatus",
     
     # Review models
     "Review",
@@ -95,4 +102,5 @@ __all__ = [
     # Analytics models
     "DailyServiceMetrics",
     "MerchantDailyMetrics",
+    "MetricsRollupState",
 ]
\ No newline at end of file
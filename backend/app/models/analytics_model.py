@@ -2,6 +2,7 @@ from datetime import datetime, date
 from typing import Optional
 from uuid import UUID, uuid4
 
+from sqlalchemy import UniqueConstraint
 from sqlmodel import SQLModel, Field
 
 
@@ -40,6 +41,11 @@ class DailyServiceMetrics(SQLModel, table=True):
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
+    
+    # One row per service per day (rollup upsert target)
+    __table_args__ = (
+        UniqueConstraint("service_id", "metric_date", name="uq_daily_service_metrics_service_date"),
+    )
 
 
 class MerchantDailyMetrics(SQLModel, table=True):
@@ -64,7 +70,7 @@ class MerchantDailyMetrics(SQLModel, table=True):
     total_reviews_today: int = Field(default=0, description="Total reviews across all services")
     
     # Service counts
-    active_services: int = Field(default=0, description="Number of active services")
+    active_services: int = Field(default=0, description="Number of active services (snapshot, only set on the day itself)")
     featured_services: int = Field(default=0, description="Number of featured services")
     
     # Average rating across all services
@@ -72,4 +78,24 @@ class MerchantDailyMetrics(SQLModel, table=True):
     
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
+    updated_at: datetime = Field(default_factory=datetime.now)
+    
+    # One row per merchant per day (rollup upsert target)
+    __table_args__ = (
+        UniqueConstraint("merchant_id", "metric_date", name="uq_merchant_daily_metrics_merchant_date"),
+    )
+
+
+class MetricsRollupState(SQLModel, table=True):
+    """Watermark of the incremental daily metrics rollup."""
+    
+    __tablename__ = "metrics_rollup_state"
+    
+    # Rollup name (one row per rollup job)
+    name: str = Field(primary_key=True, max_length=50)
+    
+    # Interactions/reviews created before this moment have been rolled up
+    watermark: datetime = Field(description="Source rows created before this time are processed")
+    
+    # Timestamps
+    updated_at: datetime = Field(default_factory=datetime.now)
@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import Optional
 from uuid import UUID, uuid4
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 
@@ -16,6 +17,25 @@ class FeaturedService(SQLModel, table=True):
     
     __tablename__ = "featured_services"
     
+    __table_args__ = (
+        # "Is this service featured now" lookups
+        Index(
+            "ix_featured_services_service_window",
+            "service_id",
+            "end_date",
+            "start_date",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # Currently featured listing
+        Index(
+            "ix_featured_services_active_end_date",
+            "end_date",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
+    
     # Primary key
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     
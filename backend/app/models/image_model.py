@@ -2,6 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 from uuid import UUID, uuid4
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship
 
 class ImageType(str, Enum):
@@ -18,6 +19,18 @@ class Image(SQLModel, table=True):
     
     __tablename__ = "images"
     
+    __table_args__ = (
+        # Active images of an entity in display order
+        Index(
+            "ix_images_related_type_order",
+            "related_id",
+            "image_type",
+            "display_order",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
+    
     # Primary key
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     
@@ -26,6 +39,10 @@ class Image(SQLModel, table=True):
     file_name: str = Field(max_length=255, description="Original file name")
     file_size: Optional[int] = Field(default=None, description="File size in bytes")
     
+    # Resized WebP variants, generated at upload time (None for older images)
+    thumbnail_url: Optional[str] = Field(default=None, description="AWS S3 URL of the thumbnail variant")
+    medium_url: Optional[str] = Field(default=None, description="AWS S3 URL of the medium variant")
+    
     # Classification
     image_type: ImageType = Field(description="Type of image")
     related_id: str = Field(
@@ -49,3 +66,34 @@ class Image(SQLModel, table=True):
             "foreign_keys": "[Image.related_id]"
         }
     )
+
+
+class PendingImageUpload(SQLModel, table=True):
+    """
+    Presigned direct-to-S3 upload that has not been confirmed yet.
+    
+    Created when a client requests an upload URL and replaced by an Image
+    row when the client confirms the upload. Rows left unconfirmed after
+    expiry are removed, together with any uploaded object, by
+    scripts/reap_pending_uploads.py.
+    """
+    
+    __tablename__ = "pending_image_uploads"
+    
+    # Primary key
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    
+    # Upload target
+    s3_key: str = Field(max_length=512, unique=True, description="S3 key the client uploads to")
+    content_type: str = Field(max_length=50, description="MIME type the upload URL is signed for")
+    file_name: str = Field(max_length=255, description="Original file name")
+    
+    # Image the upload will become
+    image_type: ImageType = Field(description="Type of image")
+    related_id: str = Field(max_length=50, description="ID of related entity as string")
+    display_order: int = Field(default=0, description="Order for display")
+    
+    # Owner and lifetime
+    user_id: str = Field(max_length=9, index=True, description="User who requested the upload")
+    expires_at: datetime = Field(index=True, description="When the upload URL expires")
+    created_at: datetime = Field(default_factory=datetime.now)
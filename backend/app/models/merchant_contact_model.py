@@ -34,6 +34,7 @@ class MerchantContact(SQLModel, table=True):
     
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: Optional[datetime] = Field(default=None)
     
     # Relationships
     merchant: "Merchant" = Relationship(back_populates="contacts")
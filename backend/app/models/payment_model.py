@@ -3,6 +3,7 @@ from enum import Enum
 from typing import List, Optional, Dict, Any
 from uuid import UUID, uuid4
 
+from sqlalchemy import BigInteger, Index, UniqueConstraint
 from sqlmodel import SQLModel, Field, Relationship, Column, JSON
 
 
@@ -33,11 +34,33 @@ class SubscriptionStatus(str, Enum):
     EXPIRED = "expired"
     CANCELLED = "cancelled"
 
+
+class WebhookEventStatus(str, Enum):
+    """Payment webhook inbox event status enumeration."""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
 class Payment(SQLModel, table=True):
     """Payment model for all payment transactions."""
     
     __tablename__ = "payments"
     
+    __table_args__ = (
+        # Provider transaction lookups (webhooks)
+        Index("ix_payments_method_transaction", "payment_method", "transaction_id"),
+        # Payme Merchant API lookups (CheckTransaction, PerformTransaction, CancelTransaction)
+        Index("ix_payments_payme_transaction_id", "payme_transaction_id"),
+        # Payme GetStatement range scans
+        Index("ix_payments_payme_create_time", "payme_create_time"),
+        # Matching provider account requisites to pending payments
+        Index("ix_payments_tariff_account", "payment_type", "status", "tariff_plan_id", "duration_months"),
+        Index("ix_payments_boost_account", "payment_type", "status", "service_id", "duration_days"),
+        # Admin revenue statistics (completed payments by completion time)
+        Index("ix_payments_status_completed_at", "status", "completed_at"),
+    )
+    
     # Primary key
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     
@@ -54,12 +77,28 @@ class Payment(SQLModel, table=True):
         default=None, 
         description="Transaction ID from payment provider"
     )
+    payme_transaction_id: Optional[str] = Field(
+        default=None,
+        max_length=64,
+        description="Payme transaction ID, set by CreateTransaction"
+    )
+    # Payme transaction timestamps (milliseconds since epoch, as sent to Payme)
+    payme_create_time: Optional[int] = Field(default=None, sa_type=BigInteger, description="Set by CreateTransaction")
+    payme_perform_time: Optional[int] = Field(default=None, sa_type=BigInteger, description="Set by PerformTransaction")
+    payme_cancel_time: Optional[int] = Field(default=None, sa_type=BigInteger, description="Set by CancelTransaction")
+    payme_cancel_reason: Optional[int] = Field(default=None, description="Payme cancellation reason code")
     status: PaymentStatus = Field(default=PaymentStatus.PENDING)
     payment_url: Optional[str] = Field(
         default=None, 
         description="Payment URL for external payment"
     )
     
+    # Account requisites, matched against provider requests (also kept in payment_metadata)
+    tariff_plan_id: Optional[UUID] = Field(default=None, description="Tariff plan paid for (tariff subscriptions)")
+    duration_months: Optional[int] = Field(default=None, description="Subscription length (tariff subscriptions)")
+    service_id: Optional[str] = Field(default=None, max_length=9, description="Service boosted (featured services)")
+    duration_days: Optional[int] = Field(default=None, description="Boost length (featured services)")
+    
     # Webhook data storage
     webhook_data: Optional[Dict[str, Any]] = Field(
         default=None, 
@@ -85,3 +124,45 @@ class Payment(SQLModel, table=True):
     user: "User" = Relationship(back_populates="payments")
     subscriptions: List["MerchantSubscription"] = Relationship(back_populates="payment")
     featured_services: List["FeaturedService"] = Relationship(back_populates="payment")
+
+
+class PaymentWebhookEvent(SQLModel, table=True):
+    """
+    Provider webhook notification accepted into the inbox.
+    
+    The webhook endpoint only stores the payload, keyed by provider and
+    event ID so redelivered notifications are stored once, and returns.
+    PaymentWebhookWorker applies events to their payments in the
+    background: one at a time and in arrival order per transaction,
+    retrying failures with backoff until WEBHOOK_MAX_ATTEMPTS.
+    """
+    
+    __tablename__ = "payment_webhook_events"
+    
+    __table_args__ = (
+        UniqueConstraint("provider", "event_id", name="uq_payment_webhook_events_provider_event"),
+        # Worker polling for due events
+        Index("ix_payment_webhook_events_status_next_attempt", "status", "next_attempt_at"),
+        # Per-transaction ordering checks
+        Index("ix_payment_webhook_events_transaction", "provider", "transaction_id", "created_at"),
+    )
+    
+    # Primary key
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    
+    # Event identity
+    provider: PaymentMethod = Field(description="Payment provider that sent the webhook")
+    event_id: str = Field(max_length=128, description="Provider event ID, or a hash of the payload")
+    transaction_id: Optional[str] = Field(default=None, max_length=128, description="Provider transaction ID")
+    payload: Dict[str, Any] = Field(sa_column=Column(JSON), description="Raw webhook data")
+    
+    # Processing state
+    status: WebhookEventStatus = Field(default=WebhookEventStatus.PENDING)
+    attempts: int = Field(default=0, description="Processing attempts so far")
+    next_attempt_at: datetime = Field(default_factory=datetime.now, description="When the event is next due")
+    locked_until: Optional[datetime] = Field(default=None, description="Lease of the worker processing the event")
+    last_error: Optional[str] = Field(default=None, max_length=1000)
+    
+    # Timestamps
+    created_at: datetime = Field(default_factory=datetime.now)
+    processed_at: Optional[datetime] = Field(default=None)
@@ -3,6 +3,7 @@ from enum import Enum
 from typing import Optional
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship
 
 
@@ -11,6 +12,17 @@ class Review(SQLModel, table=True):
     
     __tablename__ = "reviews"
     
+    __table_args__ = (
+        # Active reviews of a service, newest first
+        Index(
+            "ix_reviews_service_created",
+            "service_id",
+            "created_at",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
+    
     # Primary key
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     
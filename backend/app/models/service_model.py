@@ -3,6 +3,7 @@ from enum import Enum
 from typing import List, Optional
 from uuid import UUID
 
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship
 
 from app.utils.id_generator import generate_6digit_id
@@ -13,6 +14,32 @@ class Service(SQLModel, table=True):
     
     __tablename__ = "services"
     
+    __table_args__ = (
+        # Bounding-box prefilter for geo radius search
+        Index("ix_services_latitude_longitude", "latitude", "longitude"),
+        # Trending listings filtered by category and/or region
+        Index(
+            "ix_services_category_region_popularity",
+            "category_id",
+            "location_region",
+            "popularity_score",
+        ),
+        # Default browse order (newest active services), overall and per category
+        Index(
+            "ix_services_active_created",
+            "created_at",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        Index(
+            "ix_services_category_active_created",
+            "category_id",
+            "created_at",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
+    
     # Primary key - 9-digit numeric string
     id: str = Field(
         default_factory=lambda: generate_6digit_id(),
@@ -46,6 +73,10 @@ class Service(SQLModel, table=True):
     save_count: int = Field(default=0, description="Total saves")
     share_count: int = Field(default=0, description="Total shares")
     
+    # Time-decayed engagement score, maintained by scripts/recompute_popularity_scores.py
+    popularity_score: float = Field(default=0.0, index=True, description="Trending popularity score")
+    popularity_updated_at: Optional[datetime] = Field(default=None, description="Last popularity score refresh")
+    
     # Ratings
     overall_rating: float = Field(default=0.0, description="Calculated overall rating")
     total_reviews: int = Field(default=0, description="Total number of reviews")
@@ -3,6 +3,7 @@ from enum import Enum
 from typing import Optional
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship
 
 class InteractionType(str, Enum):
@@ -37,6 +38,19 @@ class UserInteraction(SQLModel, table=True):
     
     # Composite indexes for performance
     __table_args__ = (
+        # One like/save/view per user and service; shares may repeat.
+        # Backs the single-statement ON CONFLICT toggle.
+        Index(
+            "uq_user_interactions_user_service_type",
+            "user_id",
+            "service_id",
+            "interaction_type",
+            unique=True,
+            postgresql_where=text("interaction_type <> 'SHARE'"),
+            sqlite_where=text("interaction_type <> 'SHARE'"),
+        ),
+        # Per-service activity windows (popularity score refresh)
+        Index("ix_user_interactions_service_created", "service_id", "created_at"),
         # Index for finding user's interactions
         {"sqlite_autoincrement": True},
     )
\ No newline at end of file
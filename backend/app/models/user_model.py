@@ -35,6 +35,7 @@ class User(SQLModel, table=True):
     )
     name: str = Field(max_length=255, description="User's full name")
     avatar_url: Optional[str] = Field(default=None, description="AWS S3 URL for avatar")
+    avatar_thumbnail_url: Optional[str] = Field(default=None, description="AWS S3 URL of the avatar thumbnail (WebP)")
     
     # User classification
     user_type: UserType = Field(description="Type of user account")
@@ -0,0 +1,283 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import Date, DateTime, bindparam, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.models import DailyServiceMetrics, MetricsRollupState, UserInteraction, Review
+from app.repositories.base import BaseRepository
+
+
+class AnalyticsRepository(BaseRepository[DailyServiceMetrics]):
+    """
+    Repository for the daily metrics rollup.
+
+    All rollup statements are set-based INSERT ... SELECT ... GROUP BY with
+    ON CONFLICT upserts, so a day range is processed in a constant number of
+    statements regardless of how many services or interactions it covers.
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(DailyServiceMetrics, db)
+
+    def _is_postgresql(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def _day(self, column: str) -> str:
+        """SQL expression truncating a timestamp column to its date."""
+        return f"CAST({column} AS DATE)" if self._is_postgresql() else f"date({column})"
+
+    def _new_id(self) -> str:
+        """SQL expression generating a row UUID in the column's storage format."""
+        return "gen_random_uuid()" if self._is_postgresql() else "lower(hex(randomblob(16)))"
+
+    async def get_watermark(self, name: str) -> Optional[datetime]:
+        """
+        Get the stored watermark of a rollup.
+
+        Args:
+            name: Rollup name
+
+        Returns:
+            Watermark timestamp or None if the rollup never ran
+        """
+        state = await self.db.get(MetricsRollupState, name)
+        return state.watermark if state else None
+
+    async def set_watermark(self, name: str, watermark: datetime) -> None:
+        """
+        Store the watermark of a rollup (not committed).
+
+        Args:
+            name: Rollup name
+            watermark: Source rows created before this time are processed
+        """
+        state = await self.db.get(MetricsRollupState, name)
+        if state:
+            state.watermark = watermark
+            state.updated_at = datetime.now()
+        else:
+            self.db.add(MetricsRollupState(name=name, watermark=watermark))
+        await self.db.flush()
+
+    async def get_earliest_activity_date(self) -> Optional[date]:
+        """
+        Get the date of the oldest interaction or review.
+
+        Returns:
+            Earliest activity date or None if there is no activity
+        """
+        interaction_result = await self.db.execute(select(func.min(UserInteraction.created_at)))
+        review_result = await self.db.execute(select(func.min(Review.created_at)))
+        candidates = [
+            value for value in (interaction_result.scalar_one(), review_result.scalar_one())
+            if value is not None
+        ]
+        return min(candidates).date() if candidates else None
+
+    async def upsert_service_days(self, start_date: date, end_date: date, run_at: datetime) -> int:
+        """
+        Recompute daily per-service counts for a date range (not committed).
+
+        Days are recomputed in full from user_interactions and active reviews,
+        so re-running a range is idempotent. Rows in the range that no longer
+        have any activity (e.g. every like was removed) are reset to zero.
+
+        Args:
+            start_date: First day to recompute
+            end_date: Last day to recompute (inclusive)
+            run_at: Rollup run timestamp, stored as updated_at
+
+        Returns:
+            Number of service-day rows upserted
+        """
+        day_counts = ", ".join(
+            f"SUM(CASE WHEN interaction_type = '{name}' THEN 1 ELSE 0 END) AS {column}"
+            for name, column in (
+                ("VIEW", "views"), ("LIKE", "likes"), ("SAVE", "saves"), ("SHARE", "shares")
+            )
+        )
+        upsert = text(f"""
+            INSERT INTO daily_service_metrics (
+                id, service_id, merchant_id, metric_date,
+                views_today, likes_today, saves_today, shares_today, reviews_today,
+                total_views, total_likes, total_saves, total_shares, total_reviews,
+                average_rating, created_at, updated_at
+            )
+            SELECT
+                {self._new_id()}, a.service_id, s.merchant_id, a.metric_date,
+                SUM(a.views), SUM(a.likes), SUM(a.saves), SUM(a.shares), SUM(a.reviews),
+                0, 0, 0, 0, 0,
+                0, :run_at, :run_at
+            FROM (
+                SELECT service_id, {self._day("created_at")} AS metric_date,
+                       {day_counts}, 0 AS reviews
+                FROM user_interactions
+                WHERE created_at >= :start_at AND created_at < :end_at
+                GROUP BY service_id, {self._day("created_at")}
+                UNION ALL
+                SELECT service_id, {self._day("created_at")} AS metric_date,
+                       0, 0, 0, 0, COUNT(*)
+                FROM reviews
+                WHERE is_active = TRUE AND created_at >= :start_at AND created_at < :end_at
+                GROUP BY service_id, {self._day("created_at")}
+            ) AS a
+            JOIN services s ON s.id = a.service_id
+            WHERE TRUE
+            GROUP BY a.service_id, s.merchant_id, a.metric_date
+            ON CONFLICT (service_id, metric_date) DO UPDATE SET
+                views_today = excluded.views_today,
+                likes_today = excluded.likes_today,
+                saves_today = excluded.saves_today,
+                shares_today = excluded.shares_today,
+                reviews_today = excluded.reviews_today,
+                updated_at = excluded.updated_at
+        """).bindparams(
+            bindparam("start_at", type_=DateTime),
+            bindparam("end_at", type_=DateTime),
+            bindparam("run_at", type_=DateTime),
+        )
+        params = {
+            "start_at": datetime.combine(start_date, time.min),
+            "end_at": datetime.combine(end_date + timedelta(days=1), time.min),
+            "run_at": run_at,
+        }
+        result = await self.db.execute(upsert, params)
+
+        reset_stale = text("""
+            UPDATE daily_service_metrics SET
+                views_today = 0, likes_today = 0, saves_today = 0,
+                shares_today = 0, reviews_today = 0, updated_at = :run_at
+            WHERE metric_date >= :start_date AND metric_date <= :end_date
+              AND updated_at < :run_at
+        """).bindparams(
+            bindparam("start_date", type_=Date),
+            bindparam("end_date", type_=Date),
+            bindparam("run_at", type_=DateTime),
+        )
+        await self.db.execute(
+            reset_stale, {"start_date": start_date, "end_date": end_date, "run_at": run_at}
+        )
+        return result.rowcount
+
+    async def update_service_totals(self, start_date: date) -> None:
+        """
+        Recompute cumulative per-service totals from a date onwards (not committed).
+
+        Totals are a running window sum of the daily counts, seeded with the
+        totals of the last row before start_date, so history before the range
+        is never rescanned. The average rating is the running average of active
+        reviews up to each day.
+
+        Args:
+            start_date: First day whose totals may have changed
+        """
+        fields = ("views", "likes", "saves", "shares", "reviews")
+        running_totals = ",\n".join(
+            f"SUM(m.{field}_today) OVER w + COALESCE(b.total_{field}, 0) AS total_{field}"
+            for field in fields
+        )
+        assignments = ", ".join(f"total_{field} = c.total_{field}" for field in fields)
+        statement = text(f"""
+            UPDATE daily_service_metrics SET {assignments}, average_rating = c.average_rating
+            FROM (
+                SELECT
+                    m.id,
+                    {running_totals},
+                    (
+                        SELECT COALESCE(AVG(r.rating), 0)
+                        FROM reviews r
+                        WHERE r.service_id = m.service_id
+                          AND r.is_active = TRUE
+                          AND {self._day("r.created_at")} <= m.metric_date
+                    ) AS average_rating
+                FROM daily_service_metrics m
+                LEFT JOIN daily_service_metrics b
+                    ON b.service_id = m.service_id
+                   AND b.metric_date = (
+                        SELECT MAX(p.metric_date)
+                        FROM daily_service_metrics p
+                        WHERE p.service_id = m.service_id AND p.metric_date < :start_date
+                   )
+                WHERE m.metric_date >= :start_date
+                WINDOW w AS (PARTITION BY m.service_id ORDER BY m.metric_date)
+            ) AS c
+            WHERE daily_service_metrics.id = c.id
+        """).bindparams(bindparam("start_date", type_=Date))
+        await self.db.execute(statement, {"start_date": start_date})
+
+    async def upsert_merchant_days(self, start_date: date, end_date: date, run_at: datetime) -> int:
+        """
+        Recompute per-merchant daily rows from the per-service rows (not committed).
+
+        active_services is a snapshot: services only record whether they are
+        active now, not since when, so the count is only written for the
+        run's own day. Earlier days keep the value stored when they were
+        current, and days first written by a backfill keep the default 0.
+
+        Args:
+            start_date: First day to recompute
+            end_date: Last day to recompute (inclusive)
+            run_at: Rollup run timestamp, stored as updated_at
+
+        Returns:
+            Number of merchant-day rows upserted
+        """
+        statement = text(f"""
+            INSERT INTO merchant_daily_metrics (
+                id, merchant_id, metric_date,
+                total_views_today, total_likes_today, total_saves_today,
+                total_shares_today, total_reviews_today,
+                active_services, featured_services, overall_rating,
+                created_at, updated_at
+            )
+            SELECT
+                {self._new_id()}, d.merchant_id, d.metric_date,
+                SUM(d.views_today), SUM(d.likes_today), SUM(d.saves_today),
+                SUM(d.shares_today), SUM(d.reviews_today),
+                CASE WHEN d.metric_date = :today THEN (
+                    SELECT COUNT(*) FROM services s
+                    WHERE s.merchant_id = d.merchant_id AND s.is_active = TRUE
+                ) ELSE 0 END,
+                (
+                    SELECT COUNT(*) FROM featured_services f
+                    WHERE f.merchant_id = d.merchant_id
+                      AND f.is_active = TRUE
+                      AND {self._day("f.start_date")} <= d.metric_date
+                      AND {self._day("f.end_date")} >= d.metric_date
+                ),
+                (
+                    SELECT COALESCE(AVG(r.rating), 0) FROM reviews r
+                    WHERE r.merchant_id = d.merchant_id
+                      AND r.is_active = TRUE
+                      AND {self._day("r.created_at")} <= d.metric_date
+                ),
+                :run_at, :run_at
+            FROM daily_service_metrics d
+            WHERE d.metric_date >= :start_date AND d.metric_date <= :end_date
+            GROUP BY d.merchant_id, d.metric_date
+            ON CONFLICT (merchant_id, metric_date) DO UPDATE SET
+                total_views_today = excluded.total_views_today,
+                total_likes_today = excluded.total_likes_today,
+                total_saves_today = excluded.total_saves_today,
+                total_shares_today = excluded.total_shares_today,
+                total_reviews_today = excluded.total_reviews_today,
+                active_services = CASE
+                    WHEN excluded.metric_date = :today THEN excluded.active_services
+                    ELSE merchant_daily_metrics.active_services
+                END,
+                featured_services = excluded.featured_services,
+                overall_rating = excluded.overall_rating,
+                updated_at = excluded.updated_at
+        """).bindparams(
+            bindparam("start_date", type_=Date),
+            bindparam("end_date", type_=Date),
+            bindparam("today", type_=Date),
+            bindparam("run_at", type_=DateTime),
+        )
+        result = await self.db.execute(
+            statement,
+            {"start_date": start_date, "end_date": end_date, "today": run_at.date(), "run_at": run_at}
+        )
+        return result.rowcount
@@ -0,0 +1,195 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import and_, delete, func, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.models import Image, ImageType, Merchant, PendingImageUpload, ServiceCategory, User
+from app.repositories.base import BaseRepository
+
+
+class ImageUploadRepository(BaseRepository[PendingImageUpload]):
+    """Repository for presigned (direct-to-S3) image uploads and stored image URLs."""
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(PendingImageUpload, db)
+
+    async def create_pending_upload(self, pending: PendingImageUpload) -> PendingImageUpload:
+        """
+        Record an issued upload URL.
+
+        Args:
+            pending: PendingImageUpload instance
+
+        Returns:
+            Created pending upload
+        """
+        self.db.add(pending)
+        await self.db.commit()
+        await self.db.refresh(pending)
+        return pending
+
+    async def get_pending_upload(self, upload_id: UUID, user_id: str) -> Optional[PendingImageUpload]:
+        """
+        Get a pending upload requested by a user.
+
+        Args:
+            upload_id: UUID of the pending upload
+            user_id: 9-digit numeric string ID of the requesting user
+
+        Returns:
+            Pending upload or None if not found
+        """
+        statement = select(PendingImageUpload).where(
+            and_(
+                PendingImageUpload.id == upload_id,
+                PendingImageUpload.user_id == user_id
+            )
+        )
+        result = await self.db.execute(statement)
+        return result.scalar_one_or_none()
+
+    async def count_open_uploads(self, related_id: str, image_type: ImageType, now: datetime) -> int:
+        """
+        Count unexpired pending uploads for an entity.
+
+        They count against tariff image limits, so a client cannot exceed a
+        limit by requesting many upload URLs before confirming any.
+
+        Args:
+            related_id: ID of the related entity as string
+            image_type: Type of image
+            now: Current time
+
+        Returns:
+            Count of unexpired pending uploads
+        """
+        statement = select(func.count(PendingImageUpload.id)).where(
+            and_(
+                PendingImageUpload.related_id == str(related_id),
+                PendingImageUpload.image_type == image_type,
+                PendingImageUpload.expires_at > now
+            )
+        )
+        result = await self.db.execute(statement)
+        return result.scalar_one()
+
+    async def confirm_upload(self, pending: PendingImageUpload, image: Image) -> Image:
+        """
+        Replace a pending upload with its Image row in one transaction.
+
+        Args:
+            pending: Pending upload being confirmed
+            image: Image record for the uploaded object
+
+        Returns:
+            Created image record
+        """
+        self.db.add(image)
+        await self.db.delete(pending)
+        await self.db.commit()
+        await self.db.refresh(image)
+        return image
+
+    async def delete_pending_upload(self, pending: PendingImageUpload) -> None:
+        """
+        Delete a pending upload.
+
+        Args:
+            pending: Pending upload to delete
+        """
+        await self.db.delete(pending)
+        await self.db.commit()
+
+    async def get_expired_uploads(self, before: datetime, limit: int) -> List[PendingImageUpload]:
+        """
+        Get pending uploads that expired before a point in time, oldest first.
+
+        Args:
+            before: Expiry cutoff
+            limit: Maximum number of uploads to return
+
+        Returns:
+            List of expired pending uploads
+        """
+        statement = (
+            select(PendingImageUpload)
+            .where(PendingImageUpload.expires_at < before)
+            .order_by(PendingImageUpload.expires_at)
+            .limit(limit)
+        )
+        result = await self.db.execute(statement)
+        return result.scalars().all()
+
+    async def delete_pending_uploads(self, upload_ids: List[UUID]) -> int:
+        """
+        Delete pending uploads by ID.
+
+        Args:
+            upload_ids: UUIDs of the pending uploads
+
+        Returns:
+            Number of deleted rows
+        """
+        if not upload_ids:
+            return 0
+
+        result = await self.db.execute(
+            delete(PendingImageUpload).where(PendingImageUpload.id.in_(upload_ids))
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def iter_referenced_urls(self, fragment: str, batch_size: int = 1000) -> AsyncIterator[str]:
+        """
+        Stream the stored image URLs containing a fragment.
+
+        Checks images (original and variants), user avatars, merchant cover
+        images and category icons, including inactive rows. The URL columns
+        are not indexed, so each call scans the tables once; callers fetch
+        all URLs of a prefix in one pass instead of looking keys up per page.
+
+        Args:
+            fragment: Substring the URLs must contain, e.g. "/service_image/"
+            batch_size: Rows fetched per round trip
+
+        Yields:
+            Stored URLs, in no particular order
+        """
+        columns = (
+            Image.s3_url,
+            Image.thumbnail_url,
+            Image.medium_url,
+            User.avatar_url,
+            User.avatar_thumbnail_url,
+            Merchant.cover_image_url,
+            ServiceCategory.icon_url,
+        )
+        statement = union_all(
+            *(select(column).where(column.contains(fragment, autoescape=True)) for column in columns)
+        ).execution_options(yield_per=batch_size)
+        result = await self.db.stream_scalars(statement)
+        try:
+            async for url in result:
+                yield url
+        finally:
+            await result.close()
+
+    async def get_pending_keys(self, s3_keys: List[str]) -> Set[str]:
+        """
+        Get which of the given S3 keys belong to pending uploads.
+
+        Args:
+            s3_keys: S3 keys
+
+        Returns:
+            Set of the keys with a pending upload
+        """
+        if not s3_keys:
+            return set()
+
+        statement = select(PendingImageUpload.s3_key).where(PendingImageUpload.s3_key.in_(s3_keys))
+        result = await self.db.execute(statement)
+        return set(result.scalars().all())
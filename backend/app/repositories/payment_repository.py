@@ -1,8 +1,9 @@
+import re
 from datetime import date, datetime, timedelta
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import String, cast, select, func, and_, or_, update
 
 from app.models import (
     TariffPlan,
@@ -22,6 +23,9 @@ from app.models import (
     ContactType
 )
 
+# Payme transaction IDs are 24-character hex strings (our payment IDs are UUIDs)
+PAYME_TRANSACTION_ID_PATTERN = re.compile(r"^[0-9a-f]{24}$", re.IGNORECASE)
+
 class PaymentRepository:
     """Repository for payment-related database operations."""
     
@@ -172,139 +176,309 @@ class PaymentRepository:
         result = await self.session.execute(statement)
         return result.scalar_one_or_none()
     
-    async def get_payment_by_tariff_params(
+    async def get_payment_by_payme_transaction_id(self, payme_transaction_id: str) -> Optional[Payment]:
+        """
+        Get a Payme payment by Payme's transaction ID with one indexed lookup.
+        
+        payme_transaction_id is matched, and transaction_id as well so
+        payments created before the column existed are found until
+        scripts/backfill_payme_transaction_ids.py has run.
+        """
+        statement = (
+            select(Payment)
+            .where(
+                and_(
+                    Payment.payment_method == PaymentMethod.PAYME,
+                    or_(
+                        Payment.payme_transaction_id == payme_transaction_id,
+                        Payment.transaction_id == payme_transaction_id
+                    )
+                )
+            )
+            .limit(1)
+        )
+        result = await self.session.execute(statement)
+        return result.scalars().first()
+    
+    async def backfill_payme_transaction_ids(
         self,
-        phone_number: str,
-        tariff_id: str,
-        month_count: int
-    ) -> Optional[Payment]:
+        after_id: Optional[UUID] = None,
+        batch_size: int = 1000
+    ) -> Tuple[int, Optional[UUID]]:
         """
-        Get pending payment by tariff payment parameters.
+        Fill payme_transaction_id for one chunk of older Payme payments.
+        
+        The ID is taken from transaction_id when it holds a Payme ID, else
+        from payment_metadata. Each chunk is its own short transaction, so
+        the table is never locked for long.
         
         Args:
-            phone_number: User's phone number (with or without +998 prefix)
-            tariff_id: Tariff plan ID (UUID string)
-            month_count: Number of months (duration)
+            after_id: Continue after this payment ID (None to start)
+            batch_size: Payments examined per chunk
             
         Returns:
-            Payment instance or None if not found
+            Tuple of (payments updated, ID to continue after or None when done)
         """
-        from app.models.user_model import User
+        statement = (
+            select(Payment.id, Payment.transaction_id, Payment.payment_metadata)
+            .where(
+                and_(
+                    Payment.payment_method == PaymentMethod.PAYME,
+                    Payment.payme_transaction_id.is_(None)
+                )
+            )
+            .order_by(Payment.id)
+            .limit(batch_size)
+        )
+        if after_id is not None:
+            statement = statement.where(Payment.id > after_id)
+        
+        rows = (await self.session.execute(statement)).all()
+        if not rows:
+            return 0, None
+        
+        updates = []
+        for payment_id, transaction_id, payment_metadata in rows:
+            payme_transaction_id = None
+            if transaction_id and PAYME_TRANSACTION_ID_PATTERN.match(transaction_id):
+                payme_transaction_id = transaction_id
+            elif payment_metadata and payment_metadata.get("payme_transaction_id"):
+                payme_transaction_id = str(payment_metadata["payme_transaction_id"])
+            if payme_transaction_id:
+                updates.append({"id": payment_id, "payme_transaction_id": payme_transaction_id})
+        
+        if updates:
+            await self.session.execute(update(Payment), updates)
+        await self.session.commit()
+        return len(updates), rows[-1][0]
+    
+    async def backfill_payme_transaction_times(
+        self,
+        after_id: Optional[UUID] = None,
+        batch_size: int = 1000
+    ) -> Tuple[int, Optional[UUID]]:
+        """
+        Fill the payme_* time columns for one chunk of older Payme payments.
         
-        import logging
-        logger = logging.getLogger(__name__)
-
-        # Normalize phone number (remove country code prefix only, keep 9 digits)
-        if phone_number.startswith("+998"):
-            normalized_phone = phone_number[4:].strip()
-        elif phone_number.startswith("998"):
-            normalized_phone = phone_number[3:].strip()
-        else:
-            normalized_phone = phone_number.strip()
-
-        # Helper function to check if payment matches
-        def payment_matches(payment: Payment) -> bool:
-            metadata = payment.payment_metadata or {}
-            stored_tariff_id = str(metadata.get("tariff_plan_id", ""))
-            stored_duration = metadata.get("duration_months")
-            
-            # Convert stored_duration to int if it's a string
-            if isinstance(stored_duration, str):
-                try:
-                    stored_duration = int(stored_duration)
-                except (ValueError, TypeError):
-                    return False
+        Only payments that went through CreateTransaction are updated. The
+        times and cancel reason are taken from payment_metadata; without a
+        stored create time, created_at is used, as GetStatement did.
+        Malformed metadata values are skipped. Each chunk is its own short
+        transaction, so the table is never locked for long.
+        
+        Args:
+            after_id: Continue after this payment ID (None to start)
+            batch_size: Payments examined per chunk
             
-            # Match tariff_id - handle both full UUID and truncated versions
-            # Payme might send truncated UUID, so check if stored_tariff_id starts with tariff_id
-            # or if tariff_id starts with stored_tariff_id
-            tariff_id_match = (
-                stored_tariff_id == str(tariff_id) or
-                stored_tariff_id.startswith(str(tariff_id)) or
-                str(tariff_id).startswith(stored_tariff_id)
+        Returns:
+            Tuple of (payments updated, ID to continue after or None when done)
+        """
+        statement = (
+            select(
+                Payment.id,
+                Payment.transaction_id,
+                Payment.payme_transaction_id,
+                Payment.payment_metadata,
+                Payment.created_at,
+                Payment.payme_perform_time,
+                Payment.payme_cancel_time,
+                Payment.payme_cancel_reason
             )
+            .where(
+                and_(
+                    Payment.payment_method == PaymentMethod.PAYME,
+                    Payment.payme_create_time.is_(None)
+                )
+            )
+            .order_by(Payment.id)
+            .limit(batch_size)
+        )
+        if after_id is not None:
+            statement = statement.where(Payment.id > after_id)
+        
+        rows = (await self.session.execute(statement)).all()
+        if not rows:
+            return 0, None
+        
+        def metadata_int(payment_metadata: dict, key: str, max_digits: int) -> Optional[int]:
+            value = str(payment_metadata.get(key, ""))
+            return int(value) if value.isdigit() and len(value) <= max_digits else None
+        
+        updates = []
+        for payment in rows:
+            payment_metadata = payment.payment_metadata or {}
+            if not (
+                payment.payme_transaction_id
+                or (payment.transaction_id and PAYME_TRANSACTION_ID_PATTERN.match(payment.transaction_id))
+                or payment_metadata.get("payme_transaction_id")
+            ):
+                continue
             
-            return tariff_id_match and stored_duration == month_count
+            create_time = metadata_int(payment_metadata, "payme_create_time", 15)
+            updates.append({
+                "id": payment.id,
+                "payme_create_time": (
+                    create_time if create_time is not None else int(payment.created_at.timestamp() * 1000)
+                ),
+                "payme_perform_time": (
+                    payment.payme_perform_time or metadata_int(payment_metadata, "payme_perform_time", 15)
+                ),
+                "payme_cancel_time": (
+                    payment.payme_cancel_time or metadata_int(payment_metadata, "payme_cancel_time", 15)
+                ),
+                "payme_cancel_reason": (
+                    payment.payme_cancel_reason or metadata_int(payment_metadata, "payme_cancel_reason", 4)
+                ),
+            })
+        
+        if updates:
+            await self.session.execute(update(Payment), updates)
+        await self.session.commit()
+        return len(updates), rows[-1].id
+    
+    async def backfill_payment_account_columns(
+        self,
+        after_id: Optional[UUID] = None,
+        batch_size: int = 1000
+    ) -> Tuple[int, Optional[UUID]]:
+        """
+        Fill the typed account columns for one chunk of older pending payments.
         
-        # First, try to find by phone number (preferred method)
-        if len(normalized_phone) == 9 and normalized_phone.isdigit():
-            # Find user by phone number
-            user_statement = select(User).where(User.phone_number == normalized_phone)
-            user_result = await self.session.execute(user_statement)
-            user = user_result.scalar_one_or_none()
+        The tariff plan and months, or service and days, are taken from
+        payment_metadata; malformed values are skipped. Completed, failed and
+        cancelled payments are never matched and keep metadata only. Each
+        chunk is its own short transaction, so the table is never locked for
+        long.
+        
+        Args:
+            after_id: Continue after this payment ID (None to start)
+            batch_size: Payments examined per chunk
             
-            if user:
-                # Find pending payment for this user with matching tariff plan and duration
-                statement = select(Payment).where(
-                    and_(
-                        Payment.user_id == user.id,
-                        Payment.payment_type == PaymentType.TARIFF_SUBSCRIPTION,
-                        Payment.status == PaymentStatus.PENDING
-                    )
-                )
-                result = await self.session.execute(statement)
-                payments = result.scalars().all()
-                
-                # Filter by metadata (tariff_plan_id and duration_months)
-                for payment in payments:
-                    logger.debug(
-                        f"Comparing payment metadata: "
-                        f"payment_id={payment.id}, "
-                        f"stored_tariff_id={str((payment.payment_metadata or {}).get('tariff_plan_id', ''))}, "
-                        f"requested_tariff_id={tariff_id}, "
-                        f"stored_duration={(payment.payment_metadata or {}).get('duration_months')}, "
-                        f"requested_month_count={month_count}"
-                    )
-                    
-                    if payment_matches(payment):
-                        logger.info(
-                            f"Found matching payment by phone number: payment_id={payment.id}, "
-                            f"tariff_id={tariff_id}, month_count={month_count}, user_id={user.id}"
+        Returns:
+            Tuple of (payments updated, ID to continue after or None when done)
+        """
+        statement = (
+            select(Payment.id, Payment.payment_type, Payment.payment_metadata)
+            .where(
+                and_(
+                    Payment.status == PaymentStatus.PENDING,
+                    or_(
+                        and_(
+                            Payment.payment_type == PaymentType.TARIFF_SUBSCRIPTION,
+                            Payment.tariff_plan_id.is_(None)
+                        ),
+                        and_(
+                            Payment.payment_type == PaymentType.FEATURED_SERVICE,
+                            Payment.service_id.is_(None)
                         )
-                        return payment
-                
-                logger.debug(
-                    f"No matching payment found for user {user.id}: "
-                    f"Found {len(payments)} pending payments, but none matched metadata."
+                    )
                 )
-        
-        # Fallback: If phone number lookup fails (e.g., Sandbox uses different phone numbers),
-        # try to find payment by tariff_id and month_count only (without phone number filter)
-        # This is useful for Sandbox testing where Payme might use test phone numbers
-        logger.debug(
-            f"Phone number lookup failed or no match found. "
-            f"Trying fallback: search by tariff_id={tariff_id}, month_count={month_count} only..."
-        )
-        
-        # Find all pending tariff subscription payments
-        statement = select(Payment).where(
-            and_(
-                Payment.payment_type == PaymentType.TARIFF_SUBSCRIPTION,
-                Payment.status == PaymentStatus.PENDING
             )
+            .order_by(Payment.id)
+            .limit(batch_size)
         )
-        result = await self.session.execute(statement)
-        all_pending_payments = result.scalars().all()
+        if after_id is not None:
+            statement = statement.where(Payment.id > after_id)
         
-        logger.debug(f"Found {len(all_pending_payments)} total pending tariff payments")
+        rows = (await self.session.execute(statement)).all()
+        if not rows:
+            return 0, None
         
-        # Filter by metadata (tariff_plan_id and duration_months)
-        for payment in all_pending_payments:
-            if payment_matches(payment):
-                logger.info(
-                    f"Found matching payment by tariff_id and month_count (fallback): "
-                    f"payment_id={payment.id}, tariff_id={tariff_id}, month_count={month_count}, "
-                    f"user_id={payment.user_id}"
-                )
-                return payment
+        def metadata_int(payment_metadata: dict, key: str, max_digits: int) -> Optional[int]:
+            value = str(payment_metadata.get(key, ""))
+            return int(value) if value.isdigit() and len(value) <= max_digits else None
+        
+        updates = []
+        for payment_id, payment_type, payment_metadata in rows:
+            payment_metadata = payment_metadata or {}
+            if payment_type == PaymentType.TARIFF_SUBSCRIPTION:
+                try:
+                    tariff_plan_id = UUID(str(payment_metadata.get("tariff_plan_id")))
+                except ValueError:
+                    continue
+                duration_months = metadata_int(payment_metadata, "duration_months", 4)
+                if duration_months is not None:
+                    updates.append({
+                        "id": payment_id,
+                        "tariff_plan_id": tariff_plan_id,
+                        "duration_months": duration_months
+                    })
+            else:
+                service_id = str(payment_metadata.get("service_id", ""))
+                duration_days = metadata_int(payment_metadata, "duration_days", 4)
+                if service_id.isdigit() and len(service_id) <= 9 and duration_days is not None:
+                    updates.append({"id": payment_id, "service_id": service_id, "duration_days": duration_days})
+        
+        if updates:
+            await self.session.execute(update(Payment), updates)
+        await self.session.commit()
+        return len(updates), rows[-1][0]
+    
+    async def stream_payme_payments_by_create_time(
+        self,
+        from_time: int,
+        to_time: int,
+        batch_size: int = 500
+    ) -> AsyncIterator[Payment]:
+        """
+        Stream Payme payments created in Payme between two timestamps, oldest first.
+        
+        A range scan of ix_payments_payme_create_time read through a
+        server-side cursor, so only one batch of rows is held at a time.
         
-        logger.warning(
-            f"No matching payment found for: "
-            f"phone_number={phone_number}, tariff_id={tariff_id}, month_count={month_count}. "
-            f"Checked {len(all_pending_payments)} pending payments total."
+        Args:
+            from_time: Start of the period in milliseconds (inclusive)
+            to_time: End of the period in milliseconds (inclusive)
+            batch_size: Rows fetched from the cursor at a time
+        """
+        statement = (
+            select(Payment)
+            .where(
+                and_(
+                    Payment.payme_create_time >= from_time,
+                    Payment.payme_create_time <= to_time,
+                    Payment.payment_method == PaymentMethod.PAYME
+                )
+            )
+            .order_by(Payment.payme_create_time, Payment.id)
+            .execution_options(yield_per=batch_size)
         )
+        result = await self.session.stream_scalars(statement)
+        try:
+            async for payment in result:
+                yield payment
+        finally:
+            await result.close()
+    
+    async def get_payment_by_tariff_params(
+        self,
+        phone_number: str,
+        tariff_id: str,
+        month_count: int
+    ) -> Optional[Payment]:
+        """
+        Get pending payment by tariff payment parameters.
         
-        return None
+        Args:
+            phone_number: User's phone number (with or without +998 prefix)
+            tariff_id: Tariff plan ID (UUID string, possibly truncated by Payme)
+            month_count: Number of months (duration)
+            
+        Returns:
+            Payment instance or None if not found
+        """
+        try:
+            tariff_condition = Payment.tariff_plan_id == UUID(str(tariff_id))
+        except ValueError:
+            # Payme might send a truncated UUID; match it as a prefix
+            tariff_condition = cast(Payment.tariff_plan_id, String).startswith(str(tariff_id), autoescape=True)
+        
+        return await self._find_pending_payment(
+            phone_number,
+            PaymentType.TARIFF_SUBSCRIPTION,
+            tariff_condition,
+            Payment.duration_months == month_count
+        )
     
     async def get_payment_by_service_boost_params(
         self,
@@ -320,6 +494,35 @@ class PaymentRepository:
             service_id: Service ID (9-digit numeric string)
             days_count: Number of days (duration)
             
+        Returns:
+            Payment instance or None if not found
+        """
+        return await self._find_pending_payment(
+            phone_number,
+            PaymentType.FEATURED_SERVICE,
+            Payment.service_id == str(service_id).strip(),
+            Payment.duration_days == days_count
+        )
+    
+    async def _find_pending_payment(
+        self,
+        phone_number: str,
+        payment_type: PaymentType,
+        *account_conditions
+    ) -> Optional[Payment]:
+        """
+        Find the newest pending payment matching account requisites.
+        
+        The requisites are matched in SQL against the typed account columns
+        (ix_payments_tariff_account / ix_payments_boost_account). Only the
+        payer's own payments are considered, so a payment can never be
+        attached to another user's pending subscription or boost.
+        
+        Args:
+            phone_number: User's phone number (with or without +998 prefix)
+            payment_type: Type of payment
+            account_conditions: SQL conditions on the account columns
+            
         Returns:
             Payment instance or None if not found
         """
@@ -327,7 +530,7 @@ class PaymentRepository:
         
         import logging
         logger = logging.getLogger(__name__)
-
+        
         # Normalize phone number (remove country code prefix only, keep 9 digits)
         if phone_number.startswith("+998"):
             normalized_phone = phone_number[4:].strip()
@@ -335,106 +538,35 @@ class PaymentRepository:
             normalized_phone = phone_number[3:].strip()
         else:
             normalized_phone = phone_number.strip()
-
-        # Normalize service_id to string (ensure it's 9 digits)
-        service_id_str = str(service_id).strip()
-        
-        # Helper function to check if payment matches
-        def payment_matches(payment: Payment) -> bool:
-            metadata = payment.payment_metadata or {}
-            stored_service_id = str(metadata.get("service_id", ""))
-            stored_duration = metadata.get("duration_days")
-            
-            # Convert stored_duration to int if it's a string
-            if isinstance(stored_duration, str):
-                try:
-                    stored_duration = int(stored_duration)
-                except (ValueError, TypeError):
-                    return False
-            
-            # Match service_id (should be exact match for 9-digit IDs)
-            service_id_match = stored_service_id == service_id_str
-            
-            return service_id_match and stored_duration == days_count
         
-        # First, try to find by phone number (preferred method)
+        user_id = None
         if len(normalized_phone) == 9 and normalized_phone.isdigit():
-            # Find user by phone number
-            user_statement = select(User).where(User.phone_number == normalized_phone)
-            user_result = await self.session.execute(user_statement)
-            user = user_result.scalar_one_or_none()
-            
-            if user:
-                # Find pending payment for this user with matching service and duration
-                statement = select(Payment).where(
-                    and_(
-                        Payment.user_id == user.id,
-                        Payment.payment_type == PaymentType.FEATURED_SERVICE,
-                        Payment.status == PaymentStatus.PENDING
-                    )
-                )
-                result = await self.session.execute(statement)
-                payments = result.scalars().all()
-                
-                # Filter by metadata (service_id and duration_days)
-                for payment in payments:
-                    logger.debug(
-                        f"Comparing payment metadata: "
-                        f"payment_id={payment.id}, "
-                        f"stored_service_id={str((payment.payment_metadata or {}).get('service_id', ''))}, "
-                        f"requested_service_id={service_id_str}, "
-                        f"stored_duration={(payment.payment_metadata or {}).get('duration_days')}, "
-                        f"requested_days_count={days_count}"
-                    )
-                    
-                    if payment_matches(payment):
-                        logger.info(
-                            f"Found matching payment by phone number: payment_id={payment.id}, "
-                            f"service_id={service_id_str}, days_count={days_count}, user_id={user.id}"
-                        )
-                        return payment
-                
-                logger.debug(
-                    f"No matching payment found for user {user.id}: "
-                    f"Found {len(payments)} pending payments, but none matched metadata."
-                )
-        
-        # Fallback: If phone number lookup fails (e.g., Sandbox uses different phone numbers),
-        # try to find payment by service_id and days_count only (without phone number filter)
-        logger.debug(
-            f"Phone number lookup failed or no match found. "
-            f"Trying fallback: search by service_id={service_id_str}, days_count={days_count} only..."
-        )
+            user_statement = select(User.id).where(User.phone_number == normalized_phone)
+            user_id = (await self.session.execute(user_statement)).scalar_one_or_none()
+        if not user_id:
+            logger.warning(f"No user found for phone_number={phone_number}")
+            return None
         
-        # Find all pending featured service payments
-        statement = select(Payment).where(
-            and_(
-                Payment.payment_type == PaymentType.FEATURED_SERVICE,
-                Payment.status == PaymentStatus.PENDING
+        statement = (
+            select(Payment)
+            .where(
+                and_(
+                    Payment.user_id == user_id,
+                    Payment.payment_type == payment_type,
+                    Payment.status == PaymentStatus.PENDING,
+                    *account_conditions
+                )
             )
+            .order_by(Payment.created_at.desc())
+            .limit(1)
         )
         result = await self.session.execute(statement)
-        all_pending_payments = result.scalars().all()
-        
-        logger.debug(f"Found {len(all_pending_payments)} total pending featured service payments")
-        
-        # Filter by metadata (service_id and duration_days)
-        for payment in all_pending_payments:
-            if payment_matches(payment):
-                logger.info(
-                    f"Found matching payment by service_id and days_count (fallback): "
-                    f"payment_id={payment.id}, service_id={service_id_str}, days_count={days_count}, "
-                    f"user_id={payment.user_id}"
-                )
-                return payment
-        
-        logger.warning(
-            f"No matching payment found for: "
-            f"phone_number={phone_number}, service_id={service_id_str}, days_count={days_count}. "
-            f"Checked {len(all_pending_payments)} pending payments total."
-        )
-        
-        return None
+        payment = result.scalars().first()
+        if payment:
+            logger.info(f"Found matching payment by phone number: payment_id={payment.id}, user_id={user_id}")
+        else:
+            logger.warning(f"No matching {payment_type.value} payment found for phone_number={phone_number}")
+        return payment
     
     async def get_payments_by_user_id(
         self, 
@@ -461,7 +593,12 @@ class PaymentRepository:
         completed_at: Optional[datetime] = None,
         webhook_data: Optional[dict] = None
     ) -> Optional[Payment]:
-        """Update payment status."""
+        """
+        Update payment status (flushed, not committed).
+        
+        The caller commits, so a completed payment is stored together with
+        the subscription or boost it activates.
+        """
         payment = await self.session.get(Payment, payment_id)
         if not payment:
             return None
@@ -472,10 +609,23 @@ class PaymentRepository:
         if webhook_data:
             payment.webhook_data = webhook_data
         
-        await self.session.commit()
+        await self.session.flush()  # Flush instead of commit to allow parent transaction to commit
         await self.session.refresh(payment)
         return payment
     
+    async def is_payment_activated(self, payment: Payment) -> bool:
+        """Check whether the subscription or boost bought by a payment exists."""
+        if payment.payment_type == PaymentType.TARIFF_SUBSCRIPTION:
+            model = MerchantSubscription
+        elif payment.payment_type == PaymentType.FEATURED_SERVICE:
+            model = FeaturedService
+        else:
+            return True
+        
+        statement = select(model.id).where(model.payment_id == payment.id).limit(1)
+        result = await self.session.execute(statement)
+        return result.scalar_one_or_none() is not None
+    
     async def get_pending_payments(self, older_than_minutes: int = 30) -> List[Payment]:
         """Get pending payments older than specified minutes."""
         cutoff_time = datetime.now() - timedelta(minutes=older_than_minutes)
@@ -659,6 +809,14 @@ class PaymentRepository:
         return result.scalar_one() or 0
     
     # Analytics and reporting
+    # All statistics are computed in the database; results have a fixed number
+    # of rows (or one per period bucket), whatever the size of the tables.
+    def _period_start(self, column, period: str):
+        """SQL expression for the 'YYYY-MM-DD' start of the day or month of a timestamp column."""
+        if self.session.get_bind().dialect.name == "postgresql":
+            return func.to_char(column, "YYYY-MM-DD" if period == "day" else "YYYY-MM-01")
+        return func.strftime("%Y-%m-%d" if period == "day" else "%Y-%m-01", column)
+    
     async def get_revenue_by_period(
         self, 
         start_date: date, 
@@ -669,7 +827,7 @@ class PaymentRepository:
         start_datetime = datetime.combine(start_date, datetime.min.time())
         end_datetime = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
         
-        statement = select(Payment).where(
+        statement = select(func.coalesce(func.sum(Payment.amount), 0.0)).where(
             and_(
                 Payment.status == PaymentStatus.COMPLETED,
                 Payment.completed_at >= start_datetime,
@@ -681,40 +839,152 @@ class PaymentRepository:
             statement = statement.where(Payment.payment_type == payment_type)
 
         result = await self.session.execute(statement)
-        payments = result.scalars().all()
-        return sum(payment.amount for payment in payments)
+        return float(result.scalar_one())
     
-    async def get_payment_stats(self) -> dict:
-        """Get payment statistics."""
-        statement = select(Payment)
+    async def get_revenue_series(
+        self,
+        start_date: date,
+        end_date: date,
+        period: str = "day",
+        payment_type: Optional[PaymentType] = None
+    ) -> List[dict]:
+        """
+        Get completed payment counts and revenue per day or month.
+        
+        Args:
+            start_date: First day of the range
+            end_date: Last day of the range (inclusive)
+            period: "day" or "month"
+            payment_type: Only count payments of this type
+            
+        Returns:
+            One dict per period that has payments (period_start as
+            'YYYY-MM-DD', payments, revenue), oldest first
+        """
+        start_datetime = datetime.combine(start_date, datetime.min.time())
+        end_datetime = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+        period_start = self._period_start(Payment.completed_at, period).label("period_start")
+        
+        statement = (
+            select(period_start, func.count(Payment.id), func.sum(Payment.amount))
+            .where(
+                and_(
+                    Payment.status == PaymentStatus.COMPLETED,
+                    Payment.completed_at >= start_datetime,
+                    Payment.completed_at < end_datetime
+                )
+            )
+            .group_by(period_start)
+            .order_by(period_start)
+        )
+        if payment_type:
+            statement = statement.where(Payment.payment_type == payment_type)
+        
         result = await self.session.execute(statement)
-        total_payments = result.scalars().all()
-        total_list = list(total_payments)
-
-        stats = {
-            "total_payments": len(total_list),
-            "completed_payments": len([p for p in total_list if p.status == PaymentStatus.COMPLETED]),
-            "pending_payments": len([p for p in total_list if p.status == PaymentStatus.PENDING]),
-            "failed_payments": len([p for p in total_list if p.status == PaymentStatus.FAILED]),
-            "total_revenue": sum(p.amount for p in total_list if p.status == PaymentStatus.COMPLETED),
-            "tariff_payments": len([p for p in total_list if p.payment_type == PaymentType.TARIFF_SUBSCRIPTION]),
-            "featured_payments": len([p for p in total_list if p.payment_type == PaymentType.FEATURED_SERVICE])
+        return [
+            {"period_start": bucket, "payments": count, "revenue": float(revenue or 0)}
+            for bucket, count, revenue in result.all()
+        ]
+    
+    async def get_payment_stats(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> dict:
+        """
+        Get payment counts and revenue in one aggregate query.
+        
+        Args:
+            start_date: Only payments created on or after this day
+            end_date: Only payments created on or before this day
+        """
+        completed = Payment.status == PaymentStatus.COMPLETED
+        statement = select(
+            func.count(Payment.id),
+            func.count(Payment.id).filter(completed),
+            func.count(Payment.id).filter(Payment.status == PaymentStatus.PENDING),
+            func.count(Payment.id).filter(Payment.status == PaymentStatus.FAILED),
+            func.count(Payment.id).filter(Payment.status == PaymentStatus.CANCELLED),
+            func.coalesce(func.sum(Payment.amount).filter(completed), 0.0),
+            func.count(Payment.id).filter(Payment.payment_type == PaymentType.TARIFF_SUBSCRIPTION),
+            func.count(Payment.id).filter(Payment.payment_type == PaymentType.FEATURED_SERVICE)
+        ).where(*self._created_between(start_date, end_date))
+        
+        row = (await self.session.execute(statement)).one()
+        return {
+            "total_payments": row[0],
+            "completed_payments": row[1],
+            "pending_payments": row[2],
+            "failed_payments": row[3],
+            "cancelled_payments": row[4],
+            "total_revenue": float(row[5]),
+            "tariff_payments": row[6],
+            "featured_payments": row[7]
         }
-
-        return stats
     
-    async def get_subscription_stats(self) -> dict:
-        """Get subscription statistics."""
-        statement = select(MerchantSubscription)
+    async def get_payment_breakdown(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[dict]:
+        """
+        Get payment counts and amounts grouped by status, type and method.
+        
+        Args:
+            start_date: Only payments created on or after this day
+            end_date: Only payments created on or before this day
+            
+        Returns:
+            One dict per (status, payment_type, payment_method) combination present
+        """
+        statement = (
+            select(
+                Payment.status,
+                Payment.payment_type,
+                Payment.payment_method,
+                func.count(Payment.id),
+                func.sum(Payment.amount)
+            )
+            .where(*self._created_between(start_date, end_date))
+            .group_by(Payment.status, Payment.payment_type, Payment.payment_method)
+        )
+        
         result = await self.session.execute(statement)
-        all_subscriptions = result.scalars().all()
-        subscriptions_list = list(all_subscriptions)
-
-        stats = {
-            "total_subscriptions": len(subscriptions_list),
-            "active_subscriptions": len([s for s in subscriptions_list if s.status == SubscriptionStatus.ACTIVE]),
-            "expired_subscriptions": len([s for s in subscriptions_list if s.status == SubscriptionStatus.EXPIRED]),
-            "cancelled_subscriptions": len([s for s in subscriptions_list if s.status == SubscriptionStatus.CANCELLED])
+        return [
+            {
+                "status": status,
+                "payment_type": payment_type,
+                "payment_method": payment_method,
+                "payments": count,
+                "amount": float(amount or 0)
+            }
+            for status, payment_type, payment_method, count, amount in result.all()
+        ]
+    
+    async def get_subscription_stats(self) -> dict:
+        """Get subscription counts by status in one aggregate query."""
+        statement = select(
+            func.count(MerchantSubscription.id),
+            func.count(MerchantSubscription.id).filter(MerchantSubscription.status == SubscriptionStatus.ACTIVE),
+            func.count(MerchantSubscription.id).filter(MerchantSubscription.status == SubscriptionStatus.EXPIRED),
+            func.count(MerchantSubscription.id).filter(MerchantSubscription.status == SubscriptionStatus.CANCELLED)
+        )
+        
+        row = (await self.session.execute(statement)).one()
+        return {
+            "total_subscriptions": row[0],
+            "active_subscriptions": row[1],
+            "expired_subscriptions": row[2],
+            "cancelled_subscriptions": row[3]
         }
-
-        return stats
+    
+    def _created_between(self, start_date: Optional[date], end_date: Optional[date]) -> list:
+        """Payment.created_at conditions for an optional inclusive day range."""
+        conditions = []
+        if start_date:
+            conditions.append(Payment.created_at >= datetime.combine(start_date, datetime.min.time()))
+        if end_date:
+            conditions.append(
+                Payment.created_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+            )
+        return conditions
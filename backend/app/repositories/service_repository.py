@@ -1,7 +1,12 @@
+import math
+import re
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
 
-from sqlalchemy import and_, func, or_, text
+from sqlalchemy import (
+    JSON, DateTime, Float, and_, bindparam, case, cast, delete, exists, func, literal, literal_column, or_, text, true, update
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
@@ -13,12 +18,15 @@ from app.models import (
     Image, 
     ImageType,
     FeaturedService,
+    MerchantContact,
     UserInteraction,
     InteractionType
 )
 from app.repositories.base import BaseRepository
 from app.schemas.service_schema import ServiceSearchFilters
 from app.utils.constants import UZBEKISTAN_REGIONS
+from app.utils.counter_buffer import service_counter_buffer
+from app.utils.geo import EARTH_RADIUS_KM, bounding_box
 
 
 class ServiceRepository(BaseRepository[Service]):
@@ -69,6 +77,61 @@ class ServiceRepository(BaseRepository[Service]):
         Returns:
             Tuple of (services_list, total_count)
         """
+        base_query, sort_column = self._build_search_query(filters)
+        
+        # Count query for total results
+        count_statement = select(func.count()).select_from(
+            base_query.subquery()
+        )
+        count_result = await self.db.execute(count_statement)
+        total_count = count_result.scalar_one()
+        
+        base_query = self._apply_sort(base_query, sort_column, filters.sort_order != "asc")
+        
+        # Apply pagination
+        base_query = base_query.offset(offset).limit(limit)
+        
+        # Execute query
+        result = await self.db.execute(base_query)
+        services = result.scalars().all()
+
+        return services, total_count
+    
+    async def search_services_keyset(
+        self,
+        filters: ServiceSearchFilters,
+        after: Optional[Tuple[Any, str]] = None,
+        limit: int = 20
+    ) -> Tuple[List[Tuple[Service, Any]], bool]:
+        """
+        Search services with keyset (cursor) pagination.
+        
+        Instead of OFFSET, the page starts right after the (sort_key, id)
+        position of the previous page's last row, and no total count is run.
+        
+        Args:
+            filters: Search filters
+            after: Optional (sort_key, service_id) of the last row already returned
+            limit: Page size
+            
+        Returns:
+            Tuple of ([(service, sort_key), ...], has_more)
+        """
+        base_query, sort_column = self._build_search_query(filters)
+        return await self._fetch_keyset_page(
+            base_query, sort_column, filters.sort_order != "asc", after, limit
+        )
+    
+    def _build_search_query(self, filters: ServiceSearchFilters):
+        """
+        Build the filtered (unsorted, unpaginated) search query.
+        
+        Args:
+            filters: Search filters
+            
+        Returns:
+            Tuple of (select statement, sort column expression)
+        """
         # Base query with joins
         base_query = (
             select(Service)
@@ -88,14 +151,10 @@ class ServiceRepository(BaseRepository[Service]):
         conditions = []
         
         # Text search in name and description
+        relevance = None
         if filters.query:
-            search_term = f"%{filters.query.lower()}%"
-            conditions.append(
-                or_(
-                    func.lower(Service.name).contains(search_term),
-                    func.lower(Service.description).contains(search_term)
-                )
-            )
+            search_condition, relevance = self._build_text_search(filters.query)
+            conditions.append(search_condition)
         
         # Category filter
         if filters.category_id:
@@ -105,6 +164,20 @@ class ServiceRepository(BaseRepository[Service]):
         if filters.location_region:
             conditions.append(Service.location_region == filters.location_region)
         
+        # Geo filter: bounding-box prefilter (latitude/longitude index), then exact radius
+        distance = None
+        if filters.latitude is not None and filters.longitude is not None:
+            distance = self._build_distance(filters.latitude, filters.longitude)
+            conditions.append(Service.latitude.is_not(None))
+            conditions.append(Service.longitude.is_not(None))
+            if filters.radius_km is not None:
+                min_lat, max_lat, min_lng, max_lng = bounding_box(
+                    filters.latitude, filters.longitude, filters.radius_km
+                )
+                conditions.append(Service.latitude.between(min_lat, max_lat))
+                conditions.append(Service.longitude.between(min_lng, max_lng))
+                conditions.append(distance <= filters.radius_km)
+        
         # Price range filters
         if filters.min_price is not None:
             conditions.append(Service.price >= filters.min_price)
@@ -123,38 +196,147 @@ class ServiceRepository(BaseRepository[Service]):
         if conditions:
             base_query = base_query.where(and_(*conditions))
         
-        # Count query for total results
-        count_statement = select(func.count()).select_from(
-            base_query.subquery()
-        )
-        count_result = await self.db.execute(count_statement)
-        total_count = count_result.scalar_one()
-        
-        # Apply sorting
+        # Sort column
         if filters.sort_by == "price":
             sort_column = Service.price
         elif filters.sort_by == "rating":
             sort_column = Service.overall_rating
         elif filters.sort_by == "popularity":
-            sort_column = Service.view_count + Service.like_count
+            sort_column = Service.popularity_score
         elif filters.sort_by == "name":
             sort_column = Service.name
+        elif filters.sort_by == "relevance" and relevance is not None:
+            sort_column = relevance
+        elif filters.sort_by == "distance" and distance is not None:
+            sort_column = distance
         else:  # Default to created_at
             sort_column = Service.created_at
         
-        if filters.sort_order == "asc":
-            base_query = base_query.order_by(sort_column.asc())
-        else:
-            base_query = base_query.order_by(sort_column.desc())
+        return base_query, sort_column
+    
+    def _build_distance(self, latitude: float, longitude: float):
+        """
+        Build the haversine distance (km) from a point to each service, in SQL.
         
-        # Apply pagination
-        base_query = base_query.offset(offset).limit(limit)
+        Args:
+            latitude: Search point latitude in degrees
+            longitude: Search point longitude in degrees
+            
+        Returns:
+            SQL expression for the great-circle distance in kilometres
+        """
+        d_lat = func.radians(Service.latitude - latitude) / 2
+        d_lng = func.radians(Service.longitude - longitude) / 2
+        a = (
+            func.sin(d_lat) * func.sin(d_lat)
+            + math.cos(math.radians(latitude))
+            * func.cos(func.radians(Service.latitude))
+            * func.sin(d_lng) * func.sin(d_lng)
+        )
+        return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(a))
+    
+    def _apply_sort(self, statement, sort_column, descending: bool):
+        """
+        Order by the sort column with Service.id as a stable tie-breaker.
         
-        # Execute query
-        result = await self.db.execute(base_query)
-        services = result.scalars().all()
-
-        return services, total_count
+        Args:
+            statement: Select statement to order
+            sort_column: Primary sort expression
+            descending: Whether to sort descending
+            
+        Returns:
+            Ordered select statement
+        """
+        if descending:
+            return statement.order_by(sort_column.desc(), Service.id.desc())
+        return statement.order_by(sort_column.asc(), Service.id.asc())
+    
+    async def _fetch_keyset_page(
+        self,
+        statement,
+        sort_column,
+        descending: bool,
+        after: Optional[Tuple[Any, str]],
+        limit: int
+    ) -> Tuple[List[Tuple[Service, Any]], bool]:
+        """
+        Fetch one keyset page of a Service query ordered by (sort_column, id).
+        
+        Args:
+            statement: Filtered select(Service) statement
+            sort_column: Primary sort expression
+            descending: Whether to sort descending
+            after: Optional (sort_key, service_id) of the last row already returned
+            limit: Page size
+            
+        Returns:
+            Tuple of ([(service, sort_key), ...], has_more)
+        """
+        if after is not None:
+            sort_key, last_id = after
+            if descending:
+                statement = statement.where(or_(
+                    sort_column < sort_key,
+                    and_(sort_column == sort_key, Service.id < last_id)
+                ))
+            else:
+                statement = statement.where(or_(
+                    sort_column > sort_key,
+                    and_(sort_column == sort_key, Service.id > last_id)
+                ))
+        
+        statement = self._apply_sort(
+            statement.add_columns(sort_column.label("sort_key")), sort_column, descending
+        )
+        
+        # Fetch one extra row to know whether another page exists
+        result = await self.db.execute(statement.limit(limit + 1))
+        rows = [(row[0], row[1]) for row in result.all()]
+        return rows[:limit], len(rows) > limit
+    
+    def _build_text_search(self, query: str):
+        """
+        Build the search condition and relevance expression for a text query.
+        
+        On PostgreSQL the generated ``services.search_vector`` column (GIN) is
+        matched with a prefix tsquery, and substring matches on name/description
+        are served by the ``pg_trgm`` indexes; relevance is ``ts_rank``. Other
+        dialects (SQLite in tests) fall back to plain substring matching with a
+        simple name-first relevance score.
+        
+        Args:
+            query: Raw search query
+            
+        Returns:
+            Tuple of (where condition, relevance expression)
+        """
+        search_term = query.lower()
+        substring_match = or_(
+            func.lower(Service.name).contains(search_term, autoescape=True),
+            func.lower(Service.description).contains(search_term, autoescape=True)
+        )
+        
+        if self.db.get_bind().dialect.name != "postgresql":
+            relevance = case(
+                (func.lower(Service.name).startswith(search_term, autoescape=True), 3),
+                (func.lower(Service.name).contains(search_term, autoescape=True), 2),
+                (func.lower(Service.description).contains(search_term, autoescape=True), 1),
+                else_=0
+            )
+            return substring_match, relevance
+        
+        # Prefix tsquery ("wed photo" -> "wed:* & photo:*") so results update per keystroke
+        tokens = re.findall(r"\w+", search_term)
+        if not tokens:
+            return substring_match, func.similarity(func.lower(Service.name), search_term)
+        
+        ts_query = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+        search_vector = literal_column("services.search_vector")
+        relevance = (
+            func.ts_rank(search_vector, ts_query)
+            + func.similarity(func.lower(Service.name), search_term)
+        )
+        return or_(search_vector.op("@@")(ts_query), substring_match), relevance
     
     async def get_featured_services(
         self, 
@@ -224,6 +406,220 @@ class ServiceRepository(BaseRepository[Service]):
 
         return service
     
+    async def load_service_detail(
+        self,
+        service_id: str,
+        user_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Load everything the service detail page shows in one statement.
+        
+        The merchant, category and merchant user are joined; the featured
+        period, the user's like/save flags, the images and the merchant's
+        contacts are correlated subqueries (images and contacts aggregated to
+        JSON arrays), so the page costs a single database round-trip.
+        
+        Args:
+            service_id: 9-digit numeric string ID of the service
+            user_id: Optional user ID for the is_liked/is_saved flags
+            
+        Returns:
+            Dict with service, merchant, category_name, merchant_user_id,
+            avatar_url, avatar_thumbnail_url, featured_until, is_liked, is_saved, images and
+            contacts (lists of dicts in display order), or None if the
+            service does not exist or is inactive. merchant/category_name/
+            merchant_user_id are None if the related rows are missing.
+        """
+        images = self._json_array(
+            {
+                "id": Image.id,
+                "s3_url": Image.s3_url,
+                "thumbnail_url": Image.thumbnail_url,
+                "medium_url": Image.medium_url,
+                "file_name": Image.file_name,
+                "display_order": Image.display_order,
+                "created_at": Image.created_at,
+            },
+            Image.related_id == Service.id,
+            Image.image_type == ImageType.SERVICE_IMAGE,
+            Image.is_active == True
+        )
+        contacts = self._json_array(
+            {
+                "id": MerchantContact.id,
+                "contact_type": MerchantContact.contact_type,
+                "contact_value": MerchantContact.contact_value,
+                "platform_name": MerchantContact.platform_name,
+                "display_order": MerchantContact.display_order,
+                "created_at": MerchantContact.created_at,
+            },
+            MerchantContact.merchant_id == Service.merchant_id,
+            MerchantContact.is_active == True
+        )
+        
+        statement = (
+            select(
+                Service,
+                Merchant,
+                ServiceCategory.name.label("category_name"),
+                User.id.label("merchant_user_id"),
+                User.avatar_url.label("avatar_url"),
+                User.avatar_thumbnail_url.label("avatar_thumbnail_url"),
+                self._featured_until().label("featured_until"),
+                self._has_interaction(user_id, InteractionType.LIKE).label("is_liked"),
+                self._has_interaction(user_id, InteractionType.SAVE).label("is_saved"),
+                images.label("images"),
+                contacts.label("contacts")
+            )
+            .outerjoin(Merchant, Merchant.id == Service.merchant_id)
+            .outerjoin(ServiceCategory, ServiceCategory.id == Service.category_id)
+            .outerjoin(User, User.id == Merchant.user_id)
+            .where(
+                and_(
+                    Service.id == service_id,
+                    Service.is_active == True
+                )
+            )
+        )
+        
+        result = await self.db.execute(statement)
+        row = result.one_or_none()
+        if row is None:
+            return None
+        
+        detail = dict(row._mapping)
+        detail["service"] = detail.pop("Service")
+        detail["merchant"] = detail.pop("Merchant")
+        detail["is_liked"] = bool(detail["is_liked"])
+        detail["is_saved"] = bool(detail["is_saved"])
+        for key in ("images", "contacts"):
+            # JSON aggregates have no guaranteed order; sort like the list queries
+            detail[key] = sorted(
+                detail[key] or [],
+                key=lambda item: (item["display_order"], str(item["created_at"]))
+            )
+        return detail
+    
+    async def get_service_detail_version(
+        self,
+        service_id: str,
+        user_id: Optional[str] = None
+    ) -> Optional[Tuple[Any, ...]]:
+        """
+        Get the values the service detail page content depends on.
+        
+        A cheap alternative to load_service_detail for conditional requests:
+        one indexed row plus counts and timestamps of the images and contacts,
+        without building the JSON arrays. View counts are left out since they
+        change with every visit.
+        
+        Args:
+            service_id: 9-digit numeric string ID of the service
+            user_id: Optional user ID (the like/save flags are per user)
+            
+        Returns:
+            Tuple of version values, or None if the service does not exist or
+            is inactive
+        """
+        image_filter = and_(
+            Image.related_id == Service.id,
+            Image.image_type == ImageType.SERVICE_IMAGE,
+            Image.is_active == True
+        )
+        contact_filter = and_(
+            MerchantContact.merchant_id == Service.merchant_id,
+            MerchantContact.is_active == True
+        )
+        contact_changed_at = func.coalesce(MerchantContact.updated_at, MerchantContact.created_at)
+        
+        statement = (
+            select(
+                Service.updated_at,
+                Service.like_count,
+                Service.save_count,
+                Service.share_count,
+                Service.overall_rating,
+                Service.total_reviews,
+                Service.category_id,
+                ServiceCategory.name,
+                Merchant.business_name,
+                Merchant.overall_rating,
+                Merchant.total_reviews,
+                Merchant.location_region,
+                Merchant.is_verified,
+                User.id,
+                User.avatar_url,
+                self._featured_until(),
+                select(func.count(Image.id)).where(image_filter).scalar_subquery(),
+                select(func.max(Image.created_at)).where(image_filter).scalar_subquery(),
+                select(func.count(MerchantContact.id)).where(contact_filter).scalar_subquery(),
+                select(func.max(contact_changed_at)).where(contact_filter).scalar_subquery(),
+                self._has_interaction(user_id, InteractionType.LIKE),
+                self._has_interaction(user_id, InteractionType.SAVE)
+            )
+            .outerjoin(Merchant, Merchant.id == Service.merchant_id)
+            .outerjoin(ServiceCategory, ServiceCategory.id == Service.category_id)
+            .outerjoin(User, User.id == Merchant.user_id)
+            .where(
+                and_(
+                    Service.id == service_id,
+                    Service.is_active == True
+                )
+            )
+        )
+        
+        result = await self.db.execute(statement)
+        row = result.one_or_none()
+        return tuple(row) if row is not None else None
+    
+    def _featured_until(self):
+        """Correlated subquery for the end of the service's current featured period."""
+        now = datetime.now()
+        return (
+            select(FeaturedService.end_date)
+            .where(
+                and_(
+                    FeaturedService.service_id == Service.id,
+                    FeaturedService.is_active == True,
+                    FeaturedService.start_date <= now,
+                    FeaturedService.end_date > now
+                )
+            )
+            .order_by(FeaturedService.end_date.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+    
+    def _has_interaction(self, user_id: Optional[str], interaction_type: InteractionType):
+        """Correlated EXISTS for a user's like/save of the service (False without a user)."""
+        if user_id is None:
+            return literal(False)
+        return exists().where(
+            and_(
+                UserInteraction.user_id == user_id,
+                UserInteraction.service_id == Service.id,
+                UserInteraction.interaction_type == interaction_type
+            )
+        )
+    
+    def _json_array(self, fields: Dict[str, Any], *conditions):
+        """
+        Build a correlated subquery aggregating matching rows to a JSON array.
+        
+        Args:
+            fields: Output key to column mapping for each JSON object
+            conditions: WHERE conditions (may reference the outer query)
+            
+        Returns:
+            Scalar subquery returning a JSON array of objects (NULL if no rows)
+        """
+        pairs = [element for key, column in fields.items() for element in (literal(key), column)]
+        if self.db.get_bind().dialect.name == "postgresql":
+            aggregate = func.json_agg(func.json_build_object(*pairs), type_=JSON)
+        else:
+            aggregate = func.json_group_array(func.json_object(*pairs), type_=JSON)
+        return select(aggregate).where(and_(*conditions)).scalar_subquery()
+    
     async def get_service_images(self, service_id: str) -> List[Image]:
         """
         Get all images for a service ordered by display_order.
@@ -319,18 +715,191 @@ class ServiceRepository(BaseRepository[Service]):
 
         return (end_date is not None, end_date)
     
+    async def get_merchants_with_users(
+        self,
+        merchant_ids: Iterable[UUID]
+    ) -> Dict[UUID, Tuple[Merchant, Optional[User]]]:
+        """
+        Get merchants and their user rows for a batch of merchant IDs.
+        
+        Args:
+            merchant_ids: UUIDs of the merchants
+            
+        Returns:
+            Dict mapping merchant ID to (Merchant, User or None)
+        """
+        ids = set(merchant_ids)
+        if not ids:
+            return {}
+        
+        statement = (
+            select(Merchant, User)
+            .outerjoin(User, Merchant.user_id == User.id)
+            .where(Merchant.id.in_(ids))
+        )
+        
+        result = await self.db.execute(statement)
+        return {merchant.id: (merchant, user) for merchant, user in result.all()}
+    
+    async def get_categories_by_ids(
+        self,
+        category_ids: Iterable[int]
+    ) -> Dict[int, ServiceCategory]:
+        """
+        Get categories for a batch of category IDs.
+        
+        Args:
+            category_ids: Integer IDs of the categories
+            
+        Returns:
+            Dict mapping category ID to ServiceCategory
+        """
+        ids = set(category_ids)
+        if not ids:
+            return {}
+        
+        statement = select(ServiceCategory).where(ServiceCategory.id.in_(ids))
+        
+        result = await self.db.execute(statement)
+        return {category.id: category for category in result.scalars().all()}
+    
+    async def get_main_image_urls(self, service_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the first active image URL (by display_order) for a batch of services.
+        
+        Args:
+            service_ids: 9-digit numeric string IDs of the services
+            
+        Returns:
+            Dict mapping service ID to main image URL (services without images are omitted)
+        """
+        main_images = await self.get_main_images(service_ids)
+        return {service_id: s3_url for service_id, (s3_url, _) in main_images.items()}
+    
+    async def get_main_images(self, service_ids: Iterable[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+        """
+        Get the first active image (by display_order) for a batch of services.
+        
+        Args:
+            service_ids: 9-digit numeric string IDs of the services
+            
+        Returns:
+            Dict mapping service ID to (image URL, thumbnail URL or None);
+            services without images are omitted
+        """
+        ids = {str(service_id) for service_id in service_ids}
+        if not ids:
+            return {}
+        
+        ranked = (
+            select(
+                Image.related_id,
+                Image.s3_url,
+                Image.thumbnail_url,
+                func.row_number().over(
+                    partition_by=Image.related_id,
+                    order_by=(Image.display_order, Image.created_at)
+                ).label("position")
+            )
+            .where(
+                and_(
+                    Image.related_id.in_(ids),
+                    Image.image_type == ImageType.SERVICE_IMAGE,
+                    Image.is_active == True
+                )
+            )
+            .subquery()
+        )
+        statement = (
+            select(ranked.c.related_id, ranked.c.s3_url, ranked.c.thumbnail_url)
+            .where(ranked.c.position == 1)
+        )
+        
+        result = await self.db.execute(statement)
+        return {
+            related_id: (s3_url, thumbnail_url)
+            for related_id, s3_url, thumbnail_url in result.all()
+        }
+    
+    async def get_featured_service_ids(self, service_ids: Iterable[str]) -> Set[str]:
+        """
+        Get which services in a batch are currently featured.
+        
+        Args:
+            service_ids: 9-digit numeric string IDs of the services
+            
+        Returns:
+            Set of service IDs that have an active featured period
+        """
+        ids = set(service_ids)
+        if not ids:
+            return set()
+        
+        now = datetime.now()
+        
+        statement = (
+            select(FeaturedService.service_id)
+            .where(
+                and_(
+                    FeaturedService.service_id.in_(ids),
+                    FeaturedService.is_active == True,
+                    FeaturedService.start_date <= now,
+                    FeaturedService.end_date > now
+                )
+            )
+            .distinct()
+        )
+        
+        result = await self.db.execute(statement)
+        return set(result.scalars().all())
+    
+    async def get_user_interaction_types(
+        self,
+        user_id: str,
+        service_ids: Iterable[str]
+    ) -> Dict[str, Set[InteractionType]]:
+        """
+        Get the user's like/save interactions for a batch of services.
+        
+        Args:
+            user_id: 9-digit numeric string ID of the user
+            service_ids: 9-digit numeric string IDs of the services
+            
+        Returns:
+            Dict mapping service ID to the set of interaction types the user has
+        """
+        ids = set(service_ids)
+        if not ids:
+            return {}
+        
+        statement = (
+            select(UserInteraction.service_id, UserInteraction.interaction_type)
+            .where(
+                and_(
+                    UserInteraction.user_id == user_id,
+                    UserInteraction.service_id.in_(ids),
+                    UserInteraction.interaction_type.in_([InteractionType.LIKE, InteractionType.SAVE])
+                )
+            )
+        )
+        
+        result = await self.db.execute(statement)
+        interactions: Dict[str, Set[InteractionType]] = {}
+        for service_id, interaction_type in result.all():
+            interactions.setdefault(service_id, set()).add(interaction_type)
+        return interactions
+    
     async def increment_view_count(self, service_id: str) -> None:
         """
         Increment the view count for a service.
         
+        The increment is buffered and written to the services table by the
+        periodic counter flush, so this does not touch the database.
+        
         Args:
             service_id: 9-digit numeric string ID of the service
         """
-        statement = text(
-            "UPDATE services SET view_count = view_count + 1 WHERE id = :service_id"
-        )
-        await self.db.execute(statement, {"service_id": service_id})
-        await self.db.commit()
+        service_counter_buffer.add(service_id, "view_count")
     
     async def record_user_interaction(
         self, 
@@ -351,84 +920,229 @@ class ServiceRepository(BaseRepository[Service]):
         Returns:
             bool: True if interaction was created/added, False if it was removed
         """
-        # Check if interaction already exists for like/save/view
-        if interaction_type in [InteractionType.LIKE, InteractionType.SAVE, InteractionType.VIEW]:
-            existing_statement = select(UserInteraction).where(
-                and_(
-                    UserInteraction.user_id == user_id,
-                    UserInteraction.service_id == service_id,
-                    UserInteraction.interaction_type == interaction_type
-                )
-            )
-            existing_result = await self.db.execute(existing_statement)
-            existing_interaction = existing_result.scalar_one_or_none()
+        result = await self.apply_user_interaction(user_id, service_id, interaction_type)
+        return result[0] if result else False
+    
+    async def apply_user_interaction(
+        self,
+        user_id: str,
+        service_id: str,
+        interaction_type: InteractionType
+    ) -> Optional[Tuple[bool, int]]:
+        """
+        Atomically record or toggle an interaction and return the new counter value.
+        
+        LIKE and SAVE toggle: the existing row is deleted, or a new one is
+        inserted, and the service counter is adjusted in the same transaction.
+        VIEW is recorded once per user (ON CONFLICT DO NOTHING) and SHARE always
+        inserts; their counters go through the write-behind buffer.
+        
+        On PostgreSQL this is a single statement built from data-modifying CTEs
+        (DELETE ... RETURNING, INSERT ... ON CONFLICT DO NOTHING, UPDATE ...
+        RETURNING) relying on the unique (user_id, service_id, interaction_type)
+        index, so concurrent taps can neither double-insert nor double-count.
+        
+        Args:
+            user_id: 9-digit numeric string ID of the user
+            service_id: 9-digit numeric string ID of the service
+            interaction_type: Type of interaction
             
-            # For LIKE and SAVE, toggle (delete if exists)
-            if existing_interaction and interaction_type in [InteractionType.LIKE, InteractionType.SAVE]:
-                # Delete existing interaction
-                await self.db.delete(existing_interaction)
-                await self.db.commit()
-                
-                # Decrement counter
-                if interaction_type == InteractionType.LIKE:
-                    await self._decrement_counter(service_id, "like_count")
-                elif interaction_type == InteractionType.SAVE:
-                    await self._decrement_counter(service_id, "save_count")
-                
-                return False  # Interaction was removed
-            elif existing_interaction:
-                # VIEW already exists, don't duplicate
-                return False
-        
-        # Create new interaction
-        interaction = UserInteraction(
-            user_id=user_id,
-            service_id=service_id,
-            interaction_type=interaction_type
-        )
-        
-        self.db.add(interaction)
+        Returns:
+            Tuple of (is_active, new_count), or None if the user does not exist
+            or the service does not exist or is inactive
+        """
+        counter_field = f"{interaction_type.value}_count"
+        toggles = interaction_type in (InteractionType.LIKE, InteractionType.SAVE)
+        
+        if self.db.get_bind().dialect.name == "postgresql":
+            row = await self._apply_interaction_statement(
+                user_id, service_id, interaction_type, counter_field, toggles
+            )
+        else:
+            row = await self._apply_interaction_steps(
+                user_id, service_id, interaction_type, counter_field, toggles
+            )
+        
+        if row is None:
+            await self.db.rollback()
+            return None
+        
         await self.db.commit()
         
-        # Update service counters
-        if interaction_type == InteractionType.LIKE:
-            await self._increment_counter(service_id, "like_count")
-        elif interaction_type == InteractionType.SAVE:
-            await self._increment_counter(service_id, "save_count")
-        elif interaction_type == InteractionType.SHARE:
-            await self._increment_counter(service_id, "share_count")
-        elif interaction_type == InteractionType.VIEW:
-            await self._increment_counter(service_id, "view_count")
+        was_added, count = bool(row[0]), row[1]
+        if toggles:
+            return was_added, count
         
-        return True  # Interaction was created
+        # View/share counters stay write-behind
+        if was_added:
+            service_counter_buffer.add(service_id, counter_field, 1)
+        pending = service_counter_buffer.get_pending(service_id)[counter_field]
+        return was_added, max(count + pending, 0)
+    
+    def _interaction_target(self, user_id: str, service_id: str):
+        """Build the WHERE clause selecting an active service the (existing) user can interact with."""
+        return and_(
+            Service.id == service_id,
+            Service.is_active == True,
+            exists(select(User.id).where(User.id == user_id))
+        )
+    
+    def _interaction_match(self, user_id: str, service_id: str, interaction_type: InteractionType):
+        """Build the WHERE clause identifying one user's interaction with a service."""
+        return and_(
+            UserInteraction.user_id == user_id,
+            UserInteraction.service_id == service_id,
+            UserInteraction.interaction_type == interaction_type
+        )
     
-    async def _increment_counter(self, service_id: str, counter_field: str) -> None:
+    def _interaction_insert(self, source, user_id: str, service_id: str, interaction_type: InteractionType):
         """
-        Increment a specific counter field for a service.
+        Build an INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING for one interaction.
         
         Args:
+            source: Selectable the new row is selected from (empty to skip the insert)
+            user_id: 9-digit numeric string ID of the user
             service_id: 9-digit numeric string ID of the service
-            counter_field: Field name to increment
+            interaction_type: Type of interaction
         """
-        statement = text(
-            f"UPDATE services SET {counter_field} = {counter_field} + 1 WHERE id = :service_id"
+        columns = UserInteraction.__table__.c
+        is_postgresql = self.db.get_bind().dialect.name == "postgresql"
+        if is_postgresql:
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        
+        params = []
+        for value, column in (
+            (uuid4(), columns.id),
+            (user_id, columns.user_id),
+            (service_id, columns.service_id),
+            (interaction_type, columns.interaction_type),
+            (datetime.now(), columns.created_at),
+        ):
+            param = literal(value, column.type)
+            # PostgreSQL needs the selected parameters typed (enum, timestamp)
+            params.append(cast(param, column.type) if is_postgresql else param)
+        
+        # SQLite needs a WHERE clause before ON CONFLICT in INSERT ... SELECT
+        values = select(*params).select_from(source).where(true())
+        
+        return (
+            insert(UserInteraction)
+            .from_select(["id", "user_id", "service_id", "interaction_type", "created_at"], values)
+            .on_conflict_do_nothing()
+            .returning(columns.id)
         )
-        await self.db.execute(statement, {"service_id": service_id})
-        await self.db.commit()
     
-    async def _decrement_counter(self, service_id: str, counter_field: str) -> None:
+    async def _apply_interaction_statement(
+        self,
+        user_id: str,
+        service_id: str,
+        interaction_type: InteractionType,
+        counter_field: str,
+        toggles: bool
+    ) -> Optional[Tuple[int, int]]:
         """
-        Decrement a specific counter field for a service (with floor at 0).
+        Apply an interaction as one CTE statement (PostgreSQL).
         
-        Args:
-            service_id: 9-digit numeric string ID of the service
-            counter_field: Field name to decrement
+        Returns:
+            Row of (added_count, counter_value) or None if the user or service is missing
         """
-        statement = text(
-            f"UPDATE services SET {counter_field} = GREATEST({counter_field} - 1, 0) WHERE id = :service_id"
+        counter = getattr(Service, counter_field)
+        active_service = (
+            select(Service.id, counter.label("count"))
+            .where(self._interaction_target(user_id, service_id))
+            .cte("active_service")
         )
-        await self.db.execute(statement, {"service_id": service_id})
-        await self.db.commit()
+        
+        if not toggles:
+            added = self._interaction_insert(
+                active_service, user_id, service_id, interaction_type
+            ).cte("added")
+            statement = select(
+                select(func.count()).select_from(added).scalar_subquery(),
+                active_service.c.count
+            )
+            result = await self.db.execute(statement)
+            return result.first()
+        
+        removed = (
+            delete(UserInteraction)
+            .where(self._interaction_match(user_id, service_id, interaction_type))
+            .where(exists(select(active_service.c.id)))
+            .returning(UserInteraction.id)
+            .cte("removed")
+        )
+        added = self._interaction_insert(
+            select(active_service.c.id).where(~exists(select(removed.c.id))).subquery(),
+            user_id, service_id, interaction_type
+        ).cte("added")
+        
+        added_count = select(func.count()).select_from(added).scalar_subquery()
+        removed_count = select(func.count()).select_from(removed).scalar_subquery()
+        bumped = (
+            update(Service)
+            .where(Service.id.in_(select(active_service.c.id)))
+            .values({counter_field: func.greatest(counter + added_count - removed_count, 0)})
+            .returning(counter.label("count"))
+            .cte("bumped")
+        )
+        
+        statement = select(added_count, bumped.c.count)
+        result = await self.db.execute(statement)
+        return result.first()
+    
+    async def _apply_interaction_steps(
+        self,
+        user_id: str,
+        service_id: str,
+        interaction_type: InteractionType,
+        counter_field: str,
+        toggles: bool
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Apply an interaction as sequential statements in one transaction.
+        
+        Used on databases without data-modifying CTEs (SQLite in tests).
+        
+        Returns:
+            Row of (added_count, counter_value) or None if the user or service is missing
+        """
+        counter = getattr(Service, counter_field)
+        service_result = await self.db.execute(
+            select(Service.id, counter).where(self._interaction_target(user_id, service_id))
+        )
+        service_row = service_result.first()
+        if service_row is None:
+            return None
+        
+        removed = 0
+        if toggles:
+            delete_result = await self.db.execute(
+                delete(UserInteraction)
+                .where(self._interaction_match(user_id, service_id, interaction_type))
+                .returning(UserInteraction.id)
+            )
+            removed = len(delete_result.all())
+        
+        added = 0
+        if not removed:
+            source = select(Service.id).where(Service.id == service_id).subquery()
+            insert_result = await self.db.execute(
+                self._interaction_insert(source, user_id, service_id, interaction_type)
+            )
+            added = len(insert_result.all())
+        
+        if not toggles:
+            return added, service_row[1]
+        
+        update_result = await self.db.execute(
+            update(Service)
+            .where(Service.id == service_id)
+            .values({counter_field: case((counter + added - removed < 0, 0), else_=counter + added - removed)})
+            .returning(counter)
+        )
+        return added, update_result.scalar_one()
     
     async def get_services_by_category(
         self, 
@@ -461,7 +1175,7 @@ class ServiceRepository(BaseRepository[Service]):
         statement = (
             select(Service)
             .where(base_conditions)
-            .order_by(Service.created_at.desc())
+            .order_by(Service.created_at.desc(), Service.id.desc())
             .offset(offset)
             .limit(limit)
         )
@@ -471,6 +1185,33 @@ class ServiceRepository(BaseRepository[Service]):
 
         return services, total_count
     
+    async def get_services_by_category_keyset(
+        self,
+        category_id: int,
+        after: Optional[Tuple[Any, str]] = None,
+        limit: int = 20
+    ) -> Tuple[List[Tuple[Service, Any]], bool]:
+        """
+        Get services by category with keyset (cursor) pagination, newest first.
+        
+        Args:
+            category_id: Integer ID of the category
+            after: Optional (created_at, service_id) of the last row already returned
+            limit: Page size
+            
+        Returns:
+            Tuple of ([(service, created_at), ...], has_more)
+        """
+        statement = select(Service).where(
+            and_(
+                Service.category_id == category_id,
+                Service.is_active == True
+            )
+        )
+        return await self._fetch_keyset_page(
+            statement, Service.created_at, True, after, limit
+        )
+    
     async def get_user_interactions_for_service(
         self,
         user_id: str,
@@ -538,3 +1279,118 @@ class ServiceRepository(BaseRepository[Service]):
         
         result = await self.db.execute(statement)
         return result.all()
+    
+    async def get_service_id_batch(self, after_id: Optional[str], limit: int) -> List[str]:
+        """
+        Get the next batch of service IDs in ID order.
+        
+        Args:
+            after_id: Last ID of the previous batch (None for the first batch)
+            limit: Batch size
+            
+        Returns:
+            List of service IDs
+        """
+        statement = select(Service.id).order_by(Service.id).limit(limit)
+        if after_id is not None:
+            statement = statement.where(Service.id > after_id)
+        
+        result = await self.db.execute(statement)
+        return list(result.scalars().all())
+    
+    async def refresh_popularity_scores(
+        self,
+        first_id: str,
+        last_id: str,
+        run_at: datetime,
+        weights: Dict[InteractionType, float],
+        decay_rate: float,
+        full: bool = False,
+        min_score: float = 0.001
+    ) -> int:
+        """
+        Decay and bump the popularity score of a range of services (not committed).
+        
+        One set-based UPDATE per range: each score is decayed by the time since
+        its last refresh and each interaction created since then (and before
+        run_at) adds its weight decayed by its own age. Re-running with the same
+        run_at is a no-op, so an interrupted job can simply be run again.
+        Services with no score and no new activity are left untouched.
+        
+        Args:
+            first_id: First service ID of the range (inclusive)
+            last_id: Last service ID of the range (inclusive)
+            run_at: Refresh timestamp
+            weights: Score weight per interaction type
+            decay_rate: Exponential decay rate per second (ln 2 / half-life)
+            full: Rebuild from all interactions instead of the stored score
+            min_score: Scores decayed below this are reset to zero
+            
+        Returns:
+            Number of services updated
+        """
+        is_postgresql = self.db.get_bind().dialect.name == "postgresql"
+        
+        def age_seconds(column: str) -> str:
+            if is_postgresql:
+                return f"EXTRACT(EPOCH FROM (:run_at - {column}))"
+            return f"((julianday(:run_at) - julianday({column})) * 86400.0)"
+        
+        def decay(column: str) -> str:
+            # exp() underflows to an error on PostgreSQL, so very old rows decay to 0 directly
+            age = age_seconds(column)
+            return f"(CASE WHEN {age} * :decay_rate > 50 THEN 0 ELSE exp(-({age}) * :decay_rate) END)"
+        
+        weight_cases = " ".join(
+            f"WHEN '{interaction_type.name}' THEN :{interaction_type.name.lower()}_weight"
+            for interaction_type in weights
+        )
+        if full:
+            previous_score = "0"
+            since = ""
+        else:
+            previous_score = f"s.popularity_score * COALESCE({decay('s.popularity_updated_at')}, 1)"
+            since = "AND (s.popularity_updated_at IS NULL OR ui.created_at >= s.popularity_updated_at)"
+        
+        statement = text(f"""
+            UPDATE services SET
+                popularity_score = CASE WHEN c.score < :min_score THEN 0 ELSE c.score END,
+                popularity_updated_at = :run_at
+            FROM (
+                SELECT
+                    s.id,
+                    {previous_score} + COALESCE(SUM(
+                        (CASE ui.interaction_type {weight_cases} ELSE 0 END) * {decay('ui.created_at')}
+                    ), 0) AS score
+                FROM services s
+                LEFT JOIN user_interactions ui
+                    ON ui.service_id = s.id
+                   AND ui.created_at < :run_at
+                   {since}
+                WHERE s.id >= :first_id AND s.id <= :last_id
+                GROUP BY s.id, s.popularity_score, s.popularity_updated_at
+            ) AS c
+            WHERE services.id = c.id
+              AND (services.popularity_score <> 0 OR c.score >= :min_score)
+        """).bindparams(
+            bindparam("run_at", type_=DateTime),
+            bindparam("decay_rate", type_=Float),
+            bindparam("min_score", type_=Float),
+            *(
+                bindparam(f"{interaction_type.name.lower()}_weight", type_=Float)
+                for interaction_type in weights
+            ),
+        )
+        params = {
+            "first_id": first_id,
+            "last_id": last_id,
+            "run_at": run_at,
+            "decay_rate": decay_rate,
+            "min_score": min_score,
+            **{
+                f"{interaction_type.name.lower()}_weight": weight
+                for interaction_type, weight in weights.items()
+            },
+        }
+        result = await self.db.execute(statement, params)
+        return result.rowcount
@@ -1,11 +1,17 @@
-from typing import Optional
+from datetime import date
+from typing import Optional, Tuple
 
+from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from app.models.user_model import User
 from app.models.merchant_model import Merchant
+from app.models.merchant_subscription_model import MerchantSubscription
+from app.models.payment_model import SubscriptionStatus
+from app.models.tariff_model import TariffPlan
 from app.repositories.base import BaseRepository
+from app.utils.user_cache import auth_user_cache
 
 
 class UserRepository(BaseRepository[User]):
@@ -14,6 +20,34 @@ class UserRepository(BaseRepository[User]):
     def __init__(self, db: AsyncSession):
         super().__init__(User, db)
     
+    async def update(self, obj: User) -> User:
+        """
+        Update a user and drop it from the authentication cache.
+        
+        Args:
+            obj: User instance to update
+            
+        Returns:
+            Updated user instance
+        """
+        user = await super().update(obj)
+        await auth_user_cache.invalidate(user.id)
+        return user
+    
+    async def delete(self, id: str) -> bool:
+        """
+        Delete a user and drop it from the authentication cache.
+        
+        Args:
+            id: 9-digit numeric string ID of the user
+            
+        Returns:
+            True if deleted, False if not found
+        """
+        deleted = await super().delete(id)
+        await auth_user_cache.invalidate(id)
+        return deleted
+    
     async def get_by_phone_number(self, phone_number: str) -> Optional[User]:
         """
         Get user by phone number.
@@ -42,6 +76,43 @@ class UserRepository(BaseRepository[User]):
         result = await self.db.execute(statement)
         return result.scalar_one_or_none()
     
+    async def get_user_identity(
+        self,
+        user_id: str
+    ) -> Optional[Tuple[User, Optional[Merchant], Optional[MerchantSubscription], Optional[TariffPlan]]]:
+        """
+        Get an active user with their merchant profile and active subscription.
+        
+        Loads everything needed to authorize a request in one joined query;
+        the merchant, subscription and tariff plan are None when missing.
+        
+        Args:
+            user_id: 9-digit numeric string ID of the user
+            
+        Returns:
+            Tuple of (User, Merchant, MerchantSubscription, TariffPlan) or None
+            if the user does not exist or is inactive
+        """
+        statement = (
+            select(User, Merchant, MerchantSubscription, TariffPlan)
+            .outerjoin(Merchant, Merchant.user_id == User.id)
+            .outerjoin(
+                MerchantSubscription,
+                and_(
+                    MerchantSubscription.merchant_id == Merchant.id,
+                    MerchantSubscription.status == SubscriptionStatus.ACTIVE,
+                    MerchantSubscription.end_date >= date.today()
+                )
+            )
+            .outerjoin(TariffPlan, TariffPlan.id == MerchantSubscription.tariff_plan_id)
+            .where(User.id == user_id, User.is_active == True)
+            .order_by(MerchantSubscription.end_date.desc())
+            .limit(1)
+        )
+        result = await self.db.execute(statement)
+        row = result.first()
+        return (row[0], row[1], row[2], row[3]) if row else None
+    
     async def is_phone_number_taken(self, phone_number: str, exclude_user_id: Optional[str] = None) -> bool:
         """
         Check if phone number is already taken by another user.
@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, delete, exists, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlmodel import select
+
+from app.models import PaymentMethod, PaymentWebhookEvent, WebhookEventStatus
+from app.repositories.base import BaseRepository
+
+# Events not yet applied; they hold back later events of the same transaction
+UNFINISHED_STATUSES = (WebhookEventStatus.PENDING, WebhookEventStatus.PROCESSING)
+
+
+class WebhookEventRepository(BaseRepository[PaymentWebhookEvent]):
+    """Repository for the payment webhook inbox."""
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(PaymentWebhookEvent, db)
+
+    async def add_event(
+        self,
+        provider: PaymentMethod,
+        event_id: str,
+        transaction_id: Optional[str],
+        payload: Dict[str, Any]
+    ) -> bool:
+        """
+        Store a received webhook unless the same event is already stored.
+
+        Args:
+            provider: Payment provider that sent the webhook
+            event_id: Provider event ID
+            transaction_id: Provider transaction ID (orders events per payment)
+            payload: Raw webhook data
+
+        Returns:
+            True if the event is new, False for a redelivery
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        now = datetime.now()
+        statement = (
+            insert(PaymentWebhookEvent)
+            .values(
+                id=uuid4(),
+                provider=provider,
+                event_id=event_id,
+                transaction_id=transaction_id,
+                payload=payload,
+                status=WebhookEventStatus.PENDING,
+                attempts=0,
+                next_attempt_at=now,
+                created_at=now
+            )
+            .on_conflict_do_nothing(index_elements=["provider", "event_id"])
+            .returning(PaymentWebhookEvent.id)
+        )
+        result = await self.db.execute(statement)
+        inserted = result.scalar_one_or_none() is not None
+        await self.db.commit()
+        return inserted
+
+    async def claim_due_events(self, limit: int, lease: timedelta) -> List[UUID]:
+        """
+        Lease due events to this worker, oldest first.
+
+        Only the oldest unfinished event of each transaction is eligible,
+        so events of one payment are applied one at a time and in order.
+        Events whose lease ran out (crashed worker) are due again. The
+        claim is a conditional UPDATE, so concurrent workers never lease
+        the same event.
+
+        Args:
+            limit: Maximum number of events to claim
+            lease: How long the events are reserved for this worker
+
+        Returns:
+            IDs of the claimed events
+        """
+        now = datetime.now()
+        due = or_(
+            and_(
+                PaymentWebhookEvent.status == WebhookEventStatus.PENDING,
+                PaymentWebhookEvent.next_attempt_at <= now
+            ),
+            and_(
+                PaymentWebhookEvent.status == WebhookEventStatus.PROCESSING,
+                PaymentWebhookEvent.locked_until < now
+            )
+        )
+        earlier = aliased(PaymentWebhookEvent)
+        blocked = exists().where(
+            and_(
+                earlier.provider == PaymentWebhookEvent.provider,
+                earlier.transaction_id == PaymentWebhookEvent.transaction_id,
+                earlier.status.in_(UNFINISHED_STATUSES),
+                or_(
+                    earlier.created_at < PaymentWebhookEvent.created_at,
+                    and_(earlier.created_at == PaymentWebhookEvent.created_at, earlier.id < PaymentWebhookEvent.id)
+                )
+            )
+        )
+        candidates = (
+            select(PaymentWebhookEvent.id)
+            .where(and_(due, ~blocked))
+            .order_by(PaymentWebhookEvent.created_at)
+            .limit(limit)
+        )
+        statement = (
+            update(PaymentWebhookEvent)
+            .where(and_(PaymentWebhookEvent.id.in_(candidates.scalar_subquery()), due))
+            .values(
+                status=WebhookEventStatus.PROCESSING,
+                locked_until=now + lease,
+                attempts=PaymentWebhookEvent.attempts + 1
+            )
+            .returning(PaymentWebhookEvent.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(statement)
+        event_ids = list(result.scalars().all())
+        await self.db.commit()
+        return event_ids
+
+    def mark_processed(self, event: PaymentWebhookEvent) -> None:
+        """
+        Mark a claimed event as applied (not committed).
+
+        Committed together with the payment changes the event causes, so
+        an event is never recorded as applied without its effects.
+        """
+        event.status = WebhookEventStatus.PROCESSED
+        event.processed_at = datetime.now()
+        event.locked_until = None
+        event.last_error = None
+        self.db.add(event)
+
+    async def record_failure(self, event_id: UUID, error: str, retry_at: Optional[datetime]) -> None:
+        """
+        Release a claimed event after a failed attempt.
+
+        Args:
+            event_id: UUID of the event
+            error: Error message of the attempt
+            retry_at: When to try again, or None to give up (marked failed)
+        """
+        values = {"locked_until": None, "last_error": error[:1000]}
+        if retry_at is None:
+            values["status"] = WebhookEventStatus.FAILED
+        else:
+            values.update(status=WebhookEventStatus.PENDING, next_attempt_at=retry_at)
+
+        await self.db.execute(
+            update(PaymentWebhookEvent)
+            .where(PaymentWebhookEvent.id == event_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def delete_processed_before(self, cutoff: datetime, batch_size: int = 1000) -> int:
+        """
+        Delete one batch of events applied before a cutoff.
+
+        Args:
+            cutoff: Delete events processed before this time
+            batch_size: Maximum number of events deleted
+
+        Returns:
+            Number of events deleted
+        """
+        batch = (
+            select(PaymentWebhookEvent.id)
+            .where(
+                and_(
+                    PaymentWebhookEvent.status == WebhookEventStatus.PROCESSED,
+                    PaymentWebhookEvent.processed_at < cutoff
+                )
+            )
+            .limit(batch_size)
+        )
+        result = await self.db.execute(
+            delete(PaymentWebhookEvent)
+            .where(PaymentWebhookEvent.id.in_(batch.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
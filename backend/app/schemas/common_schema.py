@@ -5,6 +5,15 @@ class PaginationParams(BaseModel):
     """Standard pagination parameters."""
     page: int = Field(1, ge=1, description="Page number (1-based)")
     limit: int = Field(20, ge=1, le=100, description="Items per page")
+    cursor: Optional[str] = Field(
+        None,
+        description="Keyset cursor from a previous next_cursor; empty string starts cursor mode (page is ignored)"
+    )
+    
+    @property
+    def use_cursor(self) -> bool:
+        """Whether keyset (cursor) pagination was requested."""
+        return self.cursor is not None
     
     @property
     def offset(self) -> int:
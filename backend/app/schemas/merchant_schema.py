@@ -30,6 +30,7 @@ class MerchantProfileResponse(BaseModel):
     name: str
     phone_number: str
     avatar_url: Optional[str] = None
+    avatar_thumbnail_url: Optional[str] = None
     
     # Current subscription info
     subscription: Optional["ActiveSubscriptionInfo"] = None
@@ -102,6 +103,8 @@ class MerchantGalleryResponse(BaseModel):
     """Merchant gallery image response."""
     id: UUID
     s3_url: str
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
     file_name: str
     file_size: Optional[int] = None
     display_order: int
@@ -172,6 +175,7 @@ class MerchantServiceResponse(BaseModel):
 
     # Main image URL (first image by display_order)
     main_image_url: Optional[str] = None
+    main_image_thumbnail_url: Optional[str] = None
 
     # Featured status
     is_featured: bool = False
@@ -260,9 +264,36 @@ class ImageUploadResponse(BaseModel):
     message: str
     image_id: Optional[UUID] = None
     s3_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
     presigned_url: Optional[str] = None
 
 
+class PresignedUploadRequest(BaseModel):
+    """Request for a direct-to-S3 image upload URL."""
+    file_name: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field(..., description="image/jpeg, image/png or image/webp")
+    display_order: Optional[int] = Field(0, ge=0)
+
+
+class PresignedUploadResponse(BaseModel):
+    """
+    Presigned upload URL.
+    
+    PUT the file to upload_url with the same Content-Type header before
+    expires_at, then confirm the upload with upload_id.
+    """
+    upload_id: UUID
+    upload_url: str
+    s3_url: str
+    content_type: str
+    expires_at: datetime
+
+
+class ConfirmUploadRequest(BaseModel):
+    """Request to confirm a direct-to-S3 image upload."""
+    upload_id: UUID
+
+
 class TariffLimitError(BaseModel):
     """Error response for tariff limit violations."""
     error: str
@@ -160,3 +160,58 @@ class TariffListResponse(BaseModel):
     limit: int
     has_more: bool
     total_pages: int
+
+
+class PaymentStatsSummary(BaseModel):
+    """Payment counts and revenue."""
+    total_payments: int
+    completed_payments: int
+    pending_payments: int
+    failed_payments: int
+    cancelled_payments: int
+    total_revenue: float
+    tariff_payments: int
+    featured_payments: int
+
+
+class PaymentBreakdownItem(BaseModel):
+    """Payment count and amount for one status, type and method."""
+    status: PaymentStatus
+    payment_type: PaymentType
+    payment_method: PaymentMethod
+    payments: int
+    amount: float
+
+
+class SubscriptionStatsSummary(BaseModel):
+    """Subscription counts by status."""
+    total_subscriptions: int
+    active_subscriptions: int
+    expired_subscriptions: int
+    cancelled_subscriptions: int
+
+
+class PaymentStatsResponse(BaseModel):
+    """Admin payment and subscription statistics."""
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    payments: PaymentStatsSummary
+    breakdown: List[PaymentBreakdownItem]
+    subscriptions: SubscriptionStatsSummary
+
+
+class RevenuePoint(BaseModel):
+    """Completed payments and revenue for one day or month."""
+    period_start: date
+    payments: int
+    revenue: float
+
+
+class RevenueSeriesResponse(BaseModel):
+    """Revenue time series for admin charts."""
+    period: str
+    start_date: date
+    end_date: date
+    payment_type: Optional[PaymentType] = None
+    total_revenue: float
+    points: List[RevenuePoint]
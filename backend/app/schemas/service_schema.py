@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class ServiceCategoryResponse(BaseModel):
@@ -25,6 +25,8 @@ class ServiceImageResponse(BaseModel):
     """Service image response schema."""
     id: UUID  # Image.id is UUID, Pydantic will serialize to string in JSON
     s3_url: str
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
     file_name: str
     display_order: int
 
@@ -47,6 +49,7 @@ class MerchantBasicInfo(BaseModel):
     location_region: str
     is_verified: bool
     avatar_url: Optional[str] = None
+    avatar_thumbnail_url: Optional[str] = None
 
 
 class ServiceListItem(BaseModel):
@@ -71,8 +74,9 @@ class ServiceListItem(BaseModel):
     category_id: int
     category_name: str
     
-    # Main image
+    # Main image (thumbnail_url is a small WebP copy for list cards)
     main_image_url: Optional[str] = None
+    main_image_thumbnail_url: Optional[str] = None
     
     # Featured status
     is_featured: bool = False
@@ -80,6 +84,9 @@ class ServiceListItem(BaseModel):
     # User interaction status (only populated if user is authenticated)
     is_liked: bool = False
     is_saved: bool = False
+    
+    # Distance from the search point (only populated for geo searches)
+    distance_km: Optional[float] = None
 
 
 class ServiceDetailResponse(BaseModel):
@@ -141,24 +148,35 @@ class ServiceSearchFilters(BaseModel):
     max_price: Optional[float] = Field(None, ge=0, description="Maximum price in UZS")
     min_rating: Optional[float] = Field(None, ge=0, le=5, description="Minimum rating")
     is_verified_merchant: Optional[bool] = Field(None, description="Only verified merchants")
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Search point latitude")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Search point longitude")
+    radius_km: Optional[float] = Field(None, gt=0, le=1000, description="Search radius in km around the point")
     sort_by: Optional[str] = Field(
         "created_at", 
-        description="Sort by: created_at, price, rating, popularity"
+        description="Sort by: created_at, price, rating, popularity, name, relevance, distance"
     )
     sort_order: Optional[str] = Field(
-        "desc", 
-        description="Sort order: asc, desc"
+        None, 
+        description="Sort order: asc, desc (default: asc for distance, desc otherwise)"
     )
+    
+    @model_validator(mode="after")
+    def default_sort_order(self) -> "ServiceSearchFilters":
+        """Default to nearest first for distance and to descending for everything else."""
+        if self.sort_order is None:
+            self.sort_order = "asc" if self.sort_by == "distance" else "desc"
+        return self
 
 
 class PaginatedServiceResponse(BaseModel):
     """Paginated service list response."""
     services: List[ServiceListItem]
-    total: int
+    total: Optional[int] = None  # Not computed in cursor mode
     page: int
     limit: int
     has_more: bool
-    total_pages: int
+    total_pages: Optional[int] = None  # Not computed in cursor mode
+    next_cursor: Optional[str] = None  # Only set in cursor mode when has_more
 
 
 class FeaturedServicesResponse(BaseModel):
@@ -56,6 +56,7 @@ class UserProfileResponse(BaseModel):
     phone_number: str
     name: str
     avatar_url: Optional[str] = None
+    avatar_thumbnail_url: Optional[str] = None
     user_type: UserType
     created_at: datetime
 
@@ -32,7 +32,7 @@ from app.schemas.auth_schema import (
     TokenResponse
 )
 from app.services.sms_service import SMSService
-from app.utils.redis_client import RedisClient
+from app.utils.otp_store import OTPStore
 
 
 class AuthService:
@@ -41,7 +41,7 @@ class AuthService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.sms_service = SMSService()
-        self.redis_client = RedisClient()
+        self.otp_store = OTPStore()
     
     async def send_otp(self, phone_number: str) -> SendOTPResponse:
         """
@@ -60,27 +60,13 @@ class AuthService:
         # Normalize phone number
         normalized_phone = normalize_phone_number(phone_number)
         
-        # Check rate limiting
-        attempts_key = f"otp_attempts:{normalized_phone}"
-        attempts = await self.redis_client.get(attempts_key)
-        
-        if attempts and int(attempts) >= settings.OTP_MAX_ATTEMPTS:
-            raise ValidationError("Maximum OTP attempts exceeded. Please try again later.")
-        
         # Generate OTP
         otp_code = self._generate_otp() if not settings.DEBUG else '123456'
         
-        # Store OTP in Redis with expiration
-        otp_key = f"otp:{normalized_phone}"
-        await self.redis_client.setex(
-            otp_key, 
-            settings.OTP_EXPIRE_MINUTES * 60, 
-            otp_code
-        )
-        
-        # Increment attempts counter
-        await self.redis_client.incr(attempts_key)
-        await self.redis_client.expire(attempts_key, 3600)  # 1 hour
+        # Store OTP and count the send, unless the rate limit is reached
+        issued = await self.otp_store.issue(normalized_phone, otp_code)
+        if not issued:
+            raise ValidationError("Maximum OTP attempts exceeded. Please try again later.")
         
         # Send SMS
         await self.sms_service.send_otp(normalized_phone, otp_code)
@@ -106,16 +92,9 @@ class AuthService:
         # Normalize phone number
         normalized_phone = normalize_phone_number(phone_number)
         
-        # Get stored OTP
-        otp_key = f"otp:{normalized_phone}"
-        stored_otp = await self.redis_client.get(otp_key)
-        
-        if not stored_otp or stored_otp != otp_code:
+        # Check and remove OTP (and send attempts) in one atomic step
+        if not await self.otp_store.consume(normalized_phone, otp_code):
             raise AuthenticationError("Invalid or expired OTP")
-        
-        # Remove OTP and attempts after successful verification
-        await self.redis_client.delete(otp_key)
-        await self.redis_client.delete(f"otp_attempts:{normalized_phone}")
     
     async def verify_otp(self, phone_number: str, otp_code: str) -> VerifyOTPResponse:
         """
@@ -134,17 +113,10 @@ class AuthService:
         # Normalize phone number
         normalized_phone = normalize_phone_number(phone_number)
         
-        # Get stored OTP
-        otp_key = f"otp:{normalized_phone}"
-        stored_otp = await self.redis_client.get(otp_key)
-        
-        if not stored_otp or stored_otp != otp_code:
+        # Check and remove OTP (and send attempts) in one atomic step
+        if not await self.otp_store.consume(normalized_phone, otp_code):
             raise AuthenticationError("Invalid or expired OTP")
         
-        # Remove OTP and attempts after successful verification
-        await self.redis_client.delete(otp_key)
-        await self.redis_client.delete(f"otp_attempts:{normalized_phone}")
-        
         # Check if user exists
         statement = select(User).where(User.phone_number == normalized_phone)
         result = await self.db.execute(statement)
@@ -13,6 +13,7 @@ from app.schemas.category_schema import (
     CategoryListResponse
 )
 from app.schemas.common_schema import PaginationParams
+from app.utils.response_cache import response_cache, TAG_CATEGORIES, TAG_SERVICES
 
 
 class CategoryService:
@@ -130,6 +131,7 @@ class CategoryService:
         )
         
         category = await self.category_repo.create_category(category)
+        await response_cache.invalidate(TAG_CATEGORIES)
         
         return CategoryDetailResponse(
             id=category.id,
@@ -183,6 +185,8 @@ class CategoryService:
             category.is_active = request.is_active
         
         category = await self.category_repo.update_category(category)
+        # Category names are embedded in service listings
+        await response_cache.invalidate(TAG_CATEGORIES, TAG_SERVICES)
         
         service_count = await self.category_repo.get_category_service_count(category_id)
         
@@ -218,4 +222,6 @@ class CategoryService:
             raise NotFoundError(f"Category with ID {category_id} not found")
         
         # Repository method handles soft/hard delete logic
-        return await self.category_repo.delete_category(category_id)
+        deleted = await self.category_repo.delete_category(category_id)
+        await response_cache.invalidate(TAG_CATEGORIES, TAG_SERVICES)
+        return deleted
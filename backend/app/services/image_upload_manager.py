@@ -0,0 +1,281 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import ForbiddenError, NotFoundError, PaymentRequiredError, ValidationError
+from app.core.identity import RequestIdentity
+from app.models import Image, ImageType, Merchant, PendingImageUpload
+from app.repositories.image_upload_repository import ImageUploadRepository
+from app.repositories.service_repository import ServiceRepository
+from app.services.merchant_manager import MerchantManager
+from app.utils.image_upload import ImageUploadService, detect_image_type, image_upload_service
+from app.utils.response_cache import response_cache, TAG_SERVICES
+
+logger = logging.getLogger(__name__)
+
+
+class ImageUploadManager:
+    """
+    Direct-to-S3 image uploads with server-side confirmation.
+
+    request_upload() checks the tariff limit and returns a presigned PUT
+    URL, so image bytes never pass through the API. Unexpired pending
+    uploads count against the limit. confirm_upload() checks the object
+    with a HEAD request and records the Image. Uploads never confirmed are
+    removed by reap_expired_uploads().
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        identity: Optional[RequestIdentity] = None,
+        upload_service: Optional[ImageUploadService] = None
+    ):
+        self.db = db
+        self.merchant_manager = MerchantManager(db, identity)
+        self.merchant_repo = self.merchant_manager.merchant_repo
+        self.upload_repo = ImageUploadRepository(db)
+        self.upload_service = upload_service or image_upload_service
+        self.s3 = self.upload_service.s3
+
+    async def request_upload(
+        self,
+        user_id: str,
+        image_type: ImageType,
+        file_name: str,
+        content_type: str,
+        display_order: int = 0,
+        service_id: Optional[str] = None
+    ) -> Tuple[PendingImageUpload, str]:
+        """
+        Issue a presigned upload URL for a service or gallery image.
+
+        Args:
+            user_id: 9-digit numeric string ID of the merchant user
+            image_type: SERVICE_IMAGE or MERCHANT_GALLERY
+            file_name: Original file name
+            content_type: MIME type the client will upload
+            display_order: Display order for the image
+            service_id: 9-digit numeric string ID of the service (service images)
+
+        Returns:
+            Tuple of (pending upload, presigned URL)
+
+        Raises:
+            NotFoundError: If merchant or service not found
+            PaymentRequiredError: If no active subscription
+            ForbiddenError: If the tariff image limit is reached
+            ValidationError: If the content type is not allowed
+        """
+        if content_type not in self.s3.ALLOWED_CONTENT_TYPES:
+            raise ValidationError(
+                f"Content type {content_type} not allowed. Allowed types: {self.s3.ALLOWED_CONTENT_TYPES}"
+            )
+
+        merchant = await self._get_merchant(user_id)
+        related_id, max_images = await self._get_upload_target(merchant, image_type, service_id)
+
+        now = datetime.now()
+        current_count = await self._count_images(related_id, image_type)
+        open_uploads = await self.upload_repo.count_open_uploads(related_id, image_type, now)
+        if current_count + open_uploads >= max_images:
+            raise ForbiddenError(
+                f"Image limit exceeded. Current: {current_count}, pending uploads: {open_uploads}, "
+                f"Max allowed: {max_images}"
+            )
+
+        expires_in = settings.PRESIGNED_UPLOAD_EXPIRE_SECONDS
+        s3_key = self.s3.build_key(image_type.value, related_id, content_type)
+        _, presigned_url = self.s3.generate_presigned_upload_url(
+            file_name=file_name,
+            content_type=content_type,
+            image_type=image_type.value,
+            related_id=related_id,
+            expires_in=expires_in,
+            s3_key=s3_key
+        )
+
+        pending = await self.upload_repo.create_pending_upload(PendingImageUpload(
+            s3_key=s3_key,
+            content_type=content_type,
+            file_name=file_name,
+            image_type=image_type,
+            related_id=related_id,
+            display_order=display_order or 0,
+            user_id=user_id,
+            expires_at=now + timedelta(seconds=expires_in)
+        ))
+        return pending, presigned_url
+
+    async def confirm_upload(
+        self,
+        user_id: str,
+        upload_id: UUID,
+        image_type: ImageType,
+        service_id: Optional[str] = None
+    ) -> Image:
+        """
+        Confirm a presigned upload and record its Image.
+
+        The object must exist, match the allowed types and sizes, and its
+        first bytes must be an image of the type it was uploaded as (the
+        Content-Type and size are set by the client). An invalid object, or
+        one that no longer fits the tariff limit, is deleted together with
+        its pending upload.
+
+        Args:
+            user_id: 9-digit numeric string ID of the merchant user
+            upload_id: UUID of the pending upload
+            image_type: Expected image type
+            service_id: 9-digit numeric string ID of the service (service images)
+
+        Returns:
+            Created image record
+
+        Raises:
+            NotFoundError: If the upload, merchant or service is not found
+            PaymentRequiredError: If no active subscription
+            ForbiddenError: If the tariff image limit is reached
+            ValidationError: If the object is missing or invalid
+        """
+        pending = await self.upload_repo.get_pending_upload(upload_id, user_id)
+        if (
+            not pending
+            or pending.image_type != image_type
+            or (service_id is not None and pending.related_id != service_id)
+        ):
+            raise NotFoundError("Upload not found")
+
+        grace = timedelta(seconds=settings.PRESIGNED_UPLOAD_CONFIRM_GRACE_SECONDS)
+        if datetime.now() > pending.expires_at + grace:
+            raise NotFoundError("Upload expired")
+
+        s3_url = self.s3.get_public_url(pending.s3_key)
+        info = await self.upload_service.run_in_s3_pool(self.s3.get_image_info, s3_url)
+        if info is None:
+            # Keep the pending upload so the client can retry after uploading
+            raise ValidationError("Image has not been uploaded yet")
+
+        try:
+            self.s3.validate_image_constraints(info["content_type"], info["content_length"])
+        except ValueError as e:
+            await self._discard(pending)
+            raise ValidationError(str(e))
+
+        header = await self.upload_service.run_in_s3_pool(self.s3.read_object_header, pending.s3_key)
+        if header is None:
+            raise ValidationError("Image has not been uploaded yet")
+        if detect_image_type(header) != info["content_type"]:
+            await self._discard(pending)
+            raise ValidationError(f"File content is not a valid {info['content_type']} image")
+
+        merchant = await self._get_merchant(user_id)
+        _, max_images = await self._get_upload_target(merchant, image_type, service_id or pending.related_id)
+        current_count = await self._count_images(pending.related_id, image_type)
+        if current_count >= max_images:
+            await self._discard(pending)
+            raise ForbiddenError(
+                f"Image limit exceeded. Current: {current_count}, Max allowed: {max_images}"
+            )
+
+        image = await self.upload_repo.confirm_upload(pending, Image(
+            s3_url=s3_url,
+            file_name=pending.file_name,
+            file_size=info["content_length"],
+            image_type=image_type,
+            related_id=pending.related_id,
+            display_order=pending.display_order
+        ))
+
+        if image_type == ImageType.SERVICE_IMAGE:
+            # Main images are shown in service listings
+            await response_cache.invalidate(TAG_SERVICES)
+        return image
+
+    async def reap_expired_uploads(self, batch_size: int = 500) -> dict:
+        """
+        Delete uploads left unconfirmed past their grace period, with their objects.
+
+        Objects are removed with batched DeleteObjects requests; pending rows
+        whose object could not be deleted are kept for the next run.
+
+        Args:
+            batch_size: Pending uploads handled per batch
+
+        Returns:
+            Dict with reaped and failed counts
+        """
+        cutoff = datetime.now() - timedelta(seconds=settings.PRESIGNED_UPLOAD_CONFIRM_GRACE_SECONDS)
+        reaped = 0
+        failed = 0
+
+        while True:
+            expired = await self.upload_repo.get_expired_uploads(cutoff, batch_size)
+            if not expired:
+                break
+
+            failed_keys = set(await self.upload_service.run_in_s3_pool(
+                self.s3.delete_objects, [pending.s3_key for pending in expired]
+            ))
+            reaped += await self.upload_repo.delete_pending_uploads(
+                [pending.id for pending in expired if pending.s3_key not in failed_keys]
+            )
+            failed += len(failed_keys)
+
+            # Stop on a short batch, or when only undeletable uploads remain
+            if len(expired) < batch_size or len(failed_keys) == len(expired):
+                break
+
+        if failed:
+            logger.warning("Could not delete %d expired upload object(s) from S3", failed)
+        return {"reaped": reaped, "failed": failed}
+
+    async def _get_merchant(self, user_id: str) -> Merchant:
+        """Get the caller's merchant profile."""
+        merchant = await self.merchant_manager.get_merchant(user_id)
+        if not merchant:
+            raise NotFoundError("Merchant profile not found")
+        return merchant
+
+    async def _get_upload_target(
+        self,
+        merchant: Merchant,
+        image_type: ImageType,
+        service_id: Optional[str]
+    ) -> Tuple[str, int]:
+        """
+        Resolve the related entity and tariff image limit for an upload.
+
+        Returns:
+            Tuple of (related_id, max images allowed)
+        """
+        subscription_data = await self.merchant_manager.get_active_subscription(merchant.id)
+        if not subscription_data:
+            raise PaymentRequiredError("Active subscription required")
+        _, tariff_plan = subscription_data
+
+        if image_type == ImageType.SERVICE_IMAGE:
+            service = await ServiceRepository(self.db).get_by_id(service_id) if service_id else None
+            if not service or service.merchant_id != merchant.id:
+                raise NotFoundError("Service not found or not owned by merchant")
+            return str(service.id), tariff_plan.max_images_per_service
+
+        if image_type == ImageType.MERCHANT_GALLERY:
+            return str(merchant.id), tariff_plan.max_gallery_images
+
+        raise ValidationError(f"Direct uploads are not supported for {image_type.value} images")
+
+    async def _count_images(self, related_id: str, image_type: ImageType) -> int:
+        """Count active images of an entity that count against the tariff."""
+        if image_type == ImageType.SERVICE_IMAGE:
+            return await self.merchant_repo.count_service_images(related_id)
+        return await self.merchant_repo.count_gallery_images(UUID(related_id))
+
+    async def _discard(self, pending: PendingImageUpload) -> None:
+        """Delete a rejected upload's object and pending row."""
+        await self.upload_service.run_in_s3_pool(self.s3.delete_objects, [pending.s3_key])
+        await self.upload_repo.delete_pending_upload(pending)
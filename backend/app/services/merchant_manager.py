@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_
 
 from app.core.exceptions import NotFoundError, ValidationError, ForbiddenError, PaymentRequiredError
+from app.core.identity import RequestIdentity
 from app.models import (
     User,
     Merchant,
@@ -22,6 +23,8 @@ from app.models import (
 from app.repositories.merchant_repository import MerchantRepository
 from app.repositories.user_repository import UserRepository
 from app.repositories.service_repository import ServiceRepository
+from app.utils.counter_buffer import service_counter_buffer
+from app.utils.response_cache import response_cache, TAG_SERVICES, TAG_CATEGORIES, TAG_FEATURED
 from app.schemas.merchant_schema import (
     MerchantProfileResponse,
     ActiveSubscriptionInfo,
@@ -43,10 +46,17 @@ from app.utils.constants import UZBEKISTAN_REGIONS
 
 
 class MerchantManager:
-    """Merchant business logic manager with tariff enforcement."""
+    """
+    Merchant business logic manager with tariff enforcement.
     
-    def __init__(self, db: AsyncSession):
+    When constructed with the request identity, the caller's user, merchant
+    profile and active subscription are taken from it instead of being
+    fetched again.
+    """
+    
+    def __init__(self, db: AsyncSession, identity: Optional[RequestIdentity] = None):
         self.db = db
+        self.identity = identity
         self.merchant_repo = MerchantRepository(db)
         self.user_repo = UserRepository(db)
         self.service_repo = ServiceRepository(db)
@@ -65,17 +75,17 @@ class MerchantManager:
             NotFoundError: If merchant profile not found
         """
         # Get merchant with user data
-        merchant = await self.merchant_repo.get_merchant_by_user_id(user_id)
+        merchant = await self.get_merchant(user_id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
-        user = await self.user_repo.get_by_id(user_id)
+        user = await self._get_user(user_id)
         if not user:
             raise NotFoundError("User not found")
         
         # Get active subscription
         subscription_info = None
-        subscription_data = await self.merchant_repo.get_active_subscription(merchant.id)
+        subscription_data = await self.get_active_subscription(merchant.id)
         
         if subscription_data:
             subscription, tariff_plan = subscription_data
@@ -126,6 +136,7 @@ class MerchantManager:
             name=user.name,
             phone_number=user.phone_number,
             avatar_url=user.avatar_url,
+            avatar_thumbnail_url=user.avatar_thumbnail_url,
             subscription=subscription_info,
             current_services_count=current_services_count,
             current_gallery_images_count=current_gallery_images_count,
@@ -154,7 +165,7 @@ class MerchantManager:
             ForbiddenError: If trying to set website without permission
             ValidationError: If data validation fails
         """
-        merchant = await self.merchant_repo.get_merchant_by_user_id(user_id)
+        merchant = await self.get_merchant(user_id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -167,7 +178,7 @@ class MerchantManager:
         
         # Check website permission
         if update_data.website_url is not None:
-            subscription_data = await self.merchant_repo.get_active_subscription(merchant.id)
+            subscription_data = await self.get_active_subscription(merchant.id)
             if subscription_data:
                 _, tariff_plan = subscription_data
                 if not tariff_plan.allow_website:
@@ -188,6 +199,8 @@ class MerchantManager:
             merchant.website_url = update_data.website_url
         
         await self.merchant_repo.update(merchant)
+        # Merchant info is embedded in service listings
+        await response_cache.invalidate(TAG_SERVICES)
         
         # Return updated profile
         return await self.get_merchant_profile(user_id)
@@ -202,7 +215,7 @@ class MerchantManager:
         Returns:
             List of merchant contacts
         """
-        merchant = await self.merchant_repo.get_merchant_by_user_id(user_id)
+        merchant = await self.get_merchant(user_id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -241,7 +254,7 @@ class MerchantManager:
             PaymentRequiredError: If subscription expired
             ForbiddenError: If tariff limit exceeded
         """
-        merchant = await self.merchant_repo.get_merchant_by_user_id(user_id)
+        merchant = await self.get_merchant(user_id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -299,7 +312,7 @@ class MerchantManager:
         Returns:
             Merchant services with statistics
         """
-        merchant = await self.merchant_repo.get_merchant_by_user_id(user_id)
+        merchant = await self.get_merchant(user_id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
 
@@ -315,9 +328,11 @@ class MerchantManager:
 
                 # Get main image (first image by display_order)
                 main_image_url = None
+                main_image_thumbnail_url = None
                 service_images = await self.service_repo.get_service_images(str(service.id))
                 if service_images and len(service_images) > 0:
                     main_image_url = service_images[0].s3_url
+                    main_image_thumbnail_url = service_images[0].thumbnail_url
 
                 # Check if featured
                 is_featured, featured_until = await self.service_repo.is_service_featured(str(service.id))
@@ -328,9 +343,11 @@ class MerchantManager:
                 logger.error(f"Error processing service {service.id}: {str(e)}")
                 images_count = 0
                 main_image_url = None
+                main_image_thumbnail_url = None
                 is_featured = False
                 featured_until = None
 
+            counts = service_counter_buffer.merged_counts(service)
             service_response = MerchantServiceResponse(
                 id=service.id,
                 name=service.name,
@@ -340,10 +357,10 @@ class MerchantManager:
                 location_region=service.location_region,
                 latitude=service.latitude,
                 longitude=service.longitude,
-                view_count=service.view_count,
-                like_count=service.like_count,
-                save_count=service.save_count,
-                share_count=service.share_count,
+                view_count=counts["view_count"],
+                like_count=counts["like_count"],
+                save_count=counts["save_count"],
+                share_count=counts["share_count"],
                 overall_rating=service.overall_rating,
                 total_reviews=service.total_reviews,
                 is_active=service.is_active,
@@ -353,6 +370,7 @@ class MerchantManager:
                 category_name=category.name,
                 images_count=images_count,
                 main_image_url=main_image_url,
+                main_image_thumbnail_url=main_image_thumbnail_url,
                 is_featured=is_featured,
                 featured_until=featured_until
             )
@@ -389,7 +407,7 @@ class MerchantManager:
             ForbiddenError: If service limit exceeded
             ValidationError: If data validation fails
         """
-        merchant = await self.merchant_repo.get_merchant_by_user_id(user_id)
+        merchant = await self.get_merchant(user_id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -431,6 +449,7 @@ class MerchantManager:
         )
         
         created_service = await self.service_repo.create(service)
+        await response_cache.invalidate(TAG_SERVICES, TAG_CATEGORIES)
 
         return MerchantServiceResponse(
             id=created_service.id,
@@ -466,7 +485,7 @@ class MerchantManager:
         Returns:
             Merchant analytics dashboard data
         """
-        merchant = await self.merchant_repo.get_merchant_by_user_id(user_id)
+        merchant = await self.get_merchant(user_id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -480,13 +499,14 @@ class MerchantManager:
         rated_services = 0
         
         for service, review_count, daily_metrics in analytics_data:
+            counts = service_counter_buffer.merged_counts(service)
             service_analysis = ServiceAnalyticsResponse(
                 service_id=service.id,
                 service_name=service.name,
-                view_count_total=service.view_count,
-                like_count_total=service.like_count,
-                save_count_total=service.save_count,
-                share_count_total=service.share_count,
+                view_count_total=counts["view_count"],
+                like_count_total=counts["like_count"],
+                save_count_total=counts["save_count"],
+                share_count_total=counts["share_count"],
                 review_count_total=review_count,
                 view_count_today=daily_metrics.views_today if daily_metrics else 0,
                 like_count_today=daily_metrics.likes_today if daily_metrics else 0,
@@ -498,10 +518,10 @@ class MerchantManager:
             service_analytics.append(service_analysis)
             
             # Accumulate totals
-            total_views += service.view_count
-            total_likes += service.like_count
-            total_saves += service.save_count
-            total_shares += service.share_count
+            total_views += counts["view_count"]
+            total_likes += counts["like_count"]
+            total_saves += counts["save_count"]
+            total_shares += counts["share_count"]
             total_reviews += review_count
             
             if daily_metrics:
@@ -541,7 +561,7 @@ class MerchantManager:
         Returns:
             Featured services tracking data
         """
-        merchant = await self.merchant_repo.get_merchant_by_user_id(user_id)
+        merchant = await self.get_merchant(user_id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -578,7 +598,7 @@ class MerchantManager:
             featured_responses.append(featured_response)
         
         # Get remaining free slots (monthly allocations used this month)
-        subscription_data = await self.merchant_repo.get_active_subscription(merchant.id)
+        subscription_data = await self.get_active_subscription(merchant.id)
         remaining_free_slots = 0
         if subscription_data:
             _, tariff_plan = subscription_data
@@ -616,7 +636,7 @@ class MerchantManager:
             PaymentRequiredError: If subscription expired
             ForbiddenError: If monthly allocation limit exceeded
         """
-        merchant = await self.merchant_repo.get_merchant_by_user_id(user_id)
+        merchant = await self.get_merchant(user_id)
         if not merchant:
             raise NotFoundError("Merchant profile not found")
         
@@ -667,6 +687,8 @@ class MerchantManager:
         )
         
         created_featured = await self.merchant_repo.create_featured_service(featured_service)
+        # Featured flags are also shown in service listings
+        await response_cache.invalidate(TAG_FEATURED, TAG_SERVICES)
         
         return FeaturedServiceResponse(
             id=created_featured.id,
@@ -736,6 +758,8 @@ class MerchantManager:
         )
         
         created_featured = await self.merchant_repo.create_featured_service(featured_service)
+        # Featured flags are also shown in service listings
+        await response_cache.invalidate(TAG_FEATURED, TAG_SERVICES)
         
         return FeaturedServiceResponse(
             id=created_featured.id,
@@ -750,6 +774,27 @@ class MerchantManager:
             created_at=created_featured.created_at
         )
     
+    async def _get_user(self, user_id: str) -> Optional[User]:
+        """Get a user, from the request identity when it is the caller."""
+        if self.identity and self.identity.user.id == user_id:
+            return self.identity.user
+        return await self.user_repo.get_by_id(user_id)
+    
+    async def get_merchant(self, user_id: str) -> Optional[Merchant]:
+        """Get a user's merchant profile, from the request identity when it is the caller."""
+        if self.identity and self.identity.user.id == user_id and self.identity.merchant:
+            return self.identity.merchant
+        return await self.merchant_repo.get_merchant_by_user_id(user_id)
+    
+    async def get_active_subscription(self, merchant_id: UUID) -> Optional[tuple]:
+        """Get a merchant's active subscription and tariff plan, from the request identity when it is the caller."""
+        identity = self.identity
+        if identity and identity.merchant and identity.merchant.id == merchant_id:
+            if identity.has_active_subscription:
+                return identity.subscription, identity.tariff_plan
+            return None
+        return await self.merchant_repo.get_active_subscription(merchant_id)
+    
     async def _ensure_active_subscription(self, merchant_id: UUID) -> tuple:
         """
         Ensure merchant has active subscription.
@@ -763,7 +808,7 @@ class MerchantManager:
         Raises:
             PaymentRequiredError: If subscription expired or not found
         """
-        subscription_data = await self.merchant_repo.get_active_subscription(merchant_id)
+        subscription_data = await self.get_active_subscription(merchant_id)
         
         if not subscription_data:
             raise PaymentRequiredError(
@@ -0,0 +1,94 @@
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import ValidationError
+from app.repositories.analytics_repository import AnalyticsRepository
+
+
+class MetricsRollupService:
+    """
+    Service rolling user interactions and reviews up into daily metrics.
+
+    The incremental run recomputes every day from the stored watermark's day
+    up to today, so late rows within a day and removed likes/saves are
+    picked up on the next run. Changes to older rows (e.g. a review
+    deactivated weeks later) need a backfill of the affected range. The
+    merchant active_services count is a snapshot of the current day and is
+    never backfilled.
+    """
+
+    ROLLUP_NAME = "daily_metrics"
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.analytics_repo = AnalyticsRepository(db)
+
+    async def run_incremental(self) -> dict:
+        """
+        Roll up activity created since the stored watermark.
+
+        The first run starts from the oldest interaction or review.
+
+        Returns:
+            Dict with the processed date range and upserted row counts
+        """
+        run_at = datetime.now()
+        watermark = await self.analytics_repo.get_watermark(self.ROLLUP_NAME)
+        if watermark:
+            start_date = watermark.date()
+        else:
+            start_date = await self.analytics_repo.get_earliest_activity_date() or run_at.date()
+
+        return await self._rollup(start_date, run_at.date(), run_at)
+
+    async def backfill(self, start_date: date, end_date: Optional[date] = None) -> dict:
+        """
+        Recompute a historical date range in bulk.
+
+        Args:
+            start_date: First day to recompute
+            end_date: Last day to recompute (defaults to today)
+
+        Returns:
+            Dict with the processed date range and upserted row counts
+
+        Raises:
+            ValidationError: If the range is empty
+        """
+        run_at = datetime.now()
+        end_date = end_date or run_at.date()
+        if end_date < start_date:
+            raise ValidationError("Backfill end date must not be before start date")
+
+        return await self._rollup(start_date, end_date, run_at)
+
+    async def _rollup(self, start_date: date, end_date: date, run_at: datetime) -> dict:
+        """
+        Upsert service and merchant rows for a range in one transaction.
+
+        The watermark only moves forward, so a backfill of an old range does not
+        cause the next incremental run to reprocess everything after it.
+        """
+        try:
+            service_rows = await self.analytics_repo.upsert_service_days(start_date, end_date, run_at)
+            await self.analytics_repo.update_service_totals(start_date)
+            merchant_rows = await self.analytics_repo.upsert_merchant_days(start_date, end_date, run_at)
+
+            watermark = await self.analytics_repo.get_watermark(self.ROLLUP_NAME)
+            if end_date >= run_at.date() and (watermark is None or watermark < run_at):
+                await self.analytics_repo.set_watermark(self.ROLLUP_NAME, run_at)
+
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "days": (end_date - start_date).days + 1,
+            "service_rows": service_rows,
+            "merchant_rows": merchant_rows,
+        }
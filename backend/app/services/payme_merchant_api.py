@@ -10,7 +10,7 @@ import hashlib
 import hmac
 import json
 import time
-from typing import Dict, Any, Optional, Tuple
+from typing import AsyncIterator, Callable, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from uuid import UUID
@@ -24,8 +24,9 @@ from app.models.payment_model import Payment, PaymentStatus, PaymentMethod, Paym
 from app.models.merchant_model import Merchant
 from app.models.merchant_subscription_model import MerchantSubscription
 from app.models.service_model import Service
-from app.repositories.payment_repository import PaymentRepository
+from app.repositories.payment_repository import PAYME_TRANSACTION_ID_PATTERN, PaymentRepository
 from app.services.payment_providers import PaymentProviderError
+from app.utils.response_cache import response_cache, TAG_FEATURED, TAG_SERVICES
 
 
 settings = get_settings()
@@ -68,6 +69,9 @@ class PaymeMerchantAPI:
     STATE_CANCELLED = -1
     STATE_CANCELLED_AFTER_COMPLETION = -2
     
+    # GetStatement responses are streamed in chunks of about this many bytes
+    STATEMENT_CHUNK_SIZE = 64 * 1024
+    
     def __init__(self, session: AsyncSession, secret_key: str):
         self.session = session
         self.secret_key = secret_key
@@ -817,9 +821,9 @@ class PaymeMerchantAPI:
         # Store Payme transaction ID in payment metadata
         payment_metadata = payment.payment_metadata or {}
         
-        # Check both transaction_id field and metadata for existing Payme transaction ID
-        existing_payme_id = None
-        if payment.transaction_id:
+        # Check payme_transaction_id, then transaction_id and metadata (older payments)
+        existing_payme_id = payment.payme_transaction_id
+        if not existing_payme_id and payment.transaction_id:
             # Check if transaction_id contains a Payme transaction ID (not our payment UUID)
             # Payme transaction IDs are typically 24-character hex strings
             # Our payment UUIDs are UUID format (with dashes)
@@ -889,6 +893,11 @@ class PaymeMerchantAPI:
         # Create transaction - update payment with Payme transaction ID
         # Store Payme transaction ID in both transaction_id field and metadata
         payment.transaction_id = transaction_id  # Use Payme's transaction ID
+        payment.payme_transaction_id = transaction_id  # Indexed for the Payme lookups
+        # Indexed for GetStatement, with the same fallback as the create_time returned below
+        payment.payme_create_time = (
+            time_param if isinstance(time_param, int) else int(payment.created_at.timestamp() * 1000)
+        )
         payment_metadata["payme_transaction_id"] = transaction_id
         payment_metadata["payme_create_time"] = time_param
         
@@ -986,6 +995,7 @@ class PaymeMerchantAPI:
         payment.status = PaymentStatus.COMPLETED
         payment.completed_at = datetime.now()
         
+        payment.payme_perform_time = perform_time
         payment_metadata = payment.payment_metadata or {}
         payment_metadata["payme_perform_time"] = perform_time
         payment.payment_metadata = payment_metadata
@@ -999,6 +1009,8 @@ class PaymeMerchantAPI:
         try:
             await self._process_completed_payment(payment)
             await self.session.commit()
+            if payment.payment_type == PaymentType.FEATURED_SERVICE:
+                await response_cache.invalidate(TAG_FEATURED, TAG_SERVICES)
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
@@ -1091,6 +1103,8 @@ class PaymeMerchantAPI:
             
             # Save metadata if it was updated
             if metadata_needs_update:
+                payment.payme_cancel_time = cancel_time
+                payment.payme_cancel_reason = payment_metadata.get("payme_cancel_reason")
                 payment.payment_metadata = payment_metadata
                 # Mark the JSON field as modified so SQLAlchemy persists it
                 flag_modified(payment, "payment_metadata")
@@ -1123,10 +1137,12 @@ class PaymeMerchantAPI:
             payment.status = PaymentStatus.CANCELLED
             state = self.STATE_CANCELLED
         
+        payment.payme_cancel_time = cancel_time
+        payment.payme_cancel_reason = int(reason) if reason is not None else None
         payment_metadata = payment.payment_metadata or {}
         payment_metadata["payme_cancel_time"] = cancel_time
         # Ensure reason is stored as integer
-        payment_metadata["payme_cancel_reason"] = int(reason) if reason is not None else None
+        payment_metadata["payme_cancel_reason"] = payment.payme_cancel_reason
         payment.payment_metadata = payment_metadata
         # Mark the JSON field as modified so SQLAlchemy persists it
         flag_modified(payment, "payment_metadata")
@@ -1281,6 +1297,104 @@ class PaymeMerchantAPI:
         Returns:
             List of transactions sorted by creation time (ascending)
         """
+        from_time, to_time = self._validate_statement_params(params)
+        
+        return {
+            "transactions": [
+                transaction async for transaction in self.iter_statement_transactions(from_time, to_time)
+            ]
+        }
+    
+    async def stream_statement(
+        self,
+        request_data: Dict[str, Any],
+        session_factory: Callable[[], AsyncSession]
+    ) -> Optional[AsyncIterator[bytes]]:
+        """
+        GetStatement with the JSON-RPC response serialized incrementally.
+        
+        The body is written as payments are read from the database cursor,
+        so long periods are never held in memory. It reads through its own
+        session from session_factory, closed when the body ends, so it does
+        not depend on the request's session outliving the handler.
+        
+        The first chunk is read before returning, so invalid parameters and
+        database errors up to that point get None and should go through
+        handle_request() for a proper error response. A failure after that
+        can only cut the body short.
+        
+        Args:
+            request_data: GetStatement JSON-RPC 2.0 request object
+            session_factory: Callable returning a new AsyncSession
+            
+        Returns:
+            Async iterator of response body chunks, or None if the statement could not be started
+        """
+        try:
+            from_time, to_time = self._validate_statement_params(request_data.get("params", {}))
+        except PaymeMerchantAPIError:
+            return None
+        
+        body = self._stream_statement_body(request_data.get("id"), from_time, to_time, session_factory)
+        try:
+            first_chunk = await body.__anext__()
+        except Exception as e:
+            import logging
+            logger = logging.getLogger(__name__)
+            logger.error(f"Could not start GetStatement stream: {e}")
+            await body.aclose()
+            return None
+        return self._prepend_chunk(first_chunk, body)
+    
+    async def iter_statement_transactions(
+        self,
+        from_time: int,
+        to_time: int,
+        payment_repo: Optional[PaymentRepository] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield GetStatement transaction objects for a period, sorted by creation time.
+        
+        Payments are selected by the indexed payme_create_time column, so
+        only the requested range is read. They are read through payment_repo
+        when given, else through this handler's session.
+        """
+        payment_repo = payment_repo or self.payment_repo
+        async for payment in payment_repo.stream_payme_payments_by_create_time(from_time, to_time):
+            transaction = self._statement_transaction(payment)
+            if transaction is not None:
+                yield transaction
+    
+    async def _stream_statement_body(
+        self,
+        request_id: Any,
+        from_time: int,
+        to_time: int,
+        session_factory: Callable[[], AsyncSession]
+    ) -> AsyncIterator[bytes]:
+        """Serialize a GetStatement success response in chunks of about STATEMENT_CHUNK_SIZE bytes."""
+        async with session_factory() as session:
+            buffer = bytearray(b'{"id": ' + json.dumps(request_id).encode() + b', "result": {"transactions": [')
+            separator = b""
+            transactions = self.iter_statement_transactions(from_time, to_time, PaymentRepository(session))
+            async for transaction in transactions:
+                buffer += separator + json.dumps(transaction, ensure_ascii=False).encode()
+                separator = b", "
+                if len(buffer) >= self.STATEMENT_CHUNK_SIZE:
+                    yield bytes(buffer)
+                    buffer.clear()
+            buffer += b"]}}"
+            yield bytes(buffer)
+    
+    @staticmethod
+    async def _prepend_chunk(first_chunk: bytes, body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Yield an already read chunk, then the rest of the body."""
+        yield first_chunk
+        async for chunk in body:
+            yield chunk
+    
+    def _validate_statement_params(self, params: Dict[str, Any]) -> Tuple[int, int]:
+        """Validate GetStatement parameters and return the (from, to) period."""
         from_time = params.get("from")
         to_time = params.get("to")
         
@@ -1306,205 +1420,110 @@ class PaymeMerchantAPI:
                 {"reason": "invalid_range", "message": "from must be less than or equal to to"}
             )
         
-        # Query all Payme payments that have a transaction_id
-        # A transaction_id exists only if CreateTransaction succeeded
-        # Payme transaction IDs are 24-character hex strings
-        from sqlalchemy import and_, or_, func
-        import logging
-        logger = logging.getLogger(__name__)
+        return from_time, to_time
+    
+    def _statement_transaction(self, payment: Payment) -> Optional[Dict[str, Any]]:
+        """
+        Build the GetStatement transaction object for a payment.
         
-        # Query Payme payments with transaction_id (meaning CreateTransaction succeeded)
-        # Payme transaction IDs are 24-character hex strings
-        # We query all Payme payments with non-null transaction_id, then filter in Python
-        # to ensure we only include those with valid Payme transaction IDs
-        stmt = select(Payment).where(
-            and_(
-                Payment.payment_method == PaymentMethod.PAYME,
-                Payment.transaction_id.isnot(None)
-            )
-        ).order_by(Payment.created_at.asc())
+        Times come from the payme_* columns, falling back to payment_metadata
+        and the payment dates for payments recorded before the columns
+        existed. Returns None if the payment has no Payme transaction ID.
+        """
+        payment_metadata = payment.payment_metadata or {}
         
-        result = await self.session.execute(stmt)
-        all_payments = result.scalars().all()
+        # Only include payments with a Payme transaction ID (CreateTransaction succeeded)
+        payme_transaction_id = payment.payme_transaction_id
+        if not payme_transaction_id and payment.transaction_id:
+            if PAYME_TRANSACTION_ID_PATTERN.match(payment.transaction_id):
+                payme_transaction_id = payment.transaction_id
+            else:
+                payme_transaction_id = payment_metadata.get("payme_transaction_id")
+        if not payme_transaction_id:
+            return None
         
-        logger.debug(f"GetStatement: Found {len(all_payments)} Payme payments with transaction_id")
+        create_time = payment.payme_create_time
         
-        transactions = []
+        # Set if the payment was performed, even if it was cancelled afterwards
+        perform_time = payment.payme_perform_time
+        if perform_time is None:
+            perform_time = payment_metadata.get("payme_perform_time")
+        if perform_time is None and payment.completed_at:
+            perform_time = int(payment.completed_at.timestamp() * 1000)
         
-        for payment in all_payments:
-            payment_metadata = payment.payment_metadata or {}
-            
-            # Get creation time from metadata (payme_create_time) or fallback to created_at
-            create_time = payment_metadata.get("payme_create_time")
-            if create_time is None:
-                # Fallback to created_at timestamp
-                create_time = int(payment.created_at.timestamp() * 1000)
-            else:
-                # Ensure it's an integer
-                try:
-                    create_time = int(create_time)
-                except (ValueError, TypeError):
-                    create_time = int(payment.created_at.timestamp() * 1000)
-            
-            # Filter by time range: from <= create_time <= to
-            if create_time < from_time or create_time > to_time:
-                continue
-            
-            # Only include if transaction_id is a Payme transaction ID (24-char hex)
-            # This ensures CreateTransaction succeeded
-            payme_transaction_id = None
-            if payment.transaction_id:
-                # Check if it's a Payme transaction ID (24-char hex string)
-                if len(payment.transaction_id) == 24 and all(c in '0123456789abcdef' for c in payment.transaction_id.lower()):
-                    payme_transaction_id = payment.transaction_id
-                elif "payme_transaction_id" in payment_metadata:
-                    payme_transaction_id = payment_metadata.get("payme_transaction_id")
-            
-            # Skip if no valid Payme transaction ID found
-            if not payme_transaction_id:
-                continue
-            
-            # Get perform_time
-            perform_time = 0
-            if payment.status == PaymentStatus.COMPLETED:
-                if "payme_perform_time" in payment_metadata:
-                    perform_time = payment_metadata.get("payme_perform_time")
-                elif payment.completed_at:
-                    perform_time = int(payment.completed_at.timestamp() * 1000)
-            elif payment.status in [PaymentStatus.CANCELLED, PaymentStatus.FAILED]:
-                # If cancelled but was completed before cancellation, show perform_time
-                if "payme_perform_time" in payment_metadata:
-                    perform_time = payment_metadata.get("payme_perform_time")
-                elif payment.completed_at:
-                    perform_time = int(payment.completed_at.timestamp() * 1000)
+        cancel_time = 0
+        reason = None
+        if payment.status == PaymentStatus.COMPLETED:
+            state = self.STATE_COMPLETED
+        elif payment.status in [PaymentStatus.CANCELLED, PaymentStatus.FAILED]:
+            state = self.STATE_CANCELLED_AFTER_COMPLETION if perform_time is not None else self.STATE_CANCELLED
             
-            # Get cancel_time
-            cancel_time = 0
-            if payment.status in [PaymentStatus.CANCELLED, PaymentStatus.FAILED]:
-                if "payme_cancel_time" in payment_metadata:
-                    cancel_time = payment_metadata.get("payme_cancel_time")
-                elif payment.completed_at:
-                    cancel_time = int(payment.completed_at.timestamp() * 1000)
-                else:
-                    cancel_time = int(payment.created_at.timestamp() * 1000)
+            cancel_time = payment.payme_cancel_time
+            if cancel_time is None:
+                cancel_time = payment_metadata.get("payme_cancel_time")
+            if cancel_time is None:
+                cancel_time = int((payment.completed_at or payment.created_at).timestamp() * 1000)
             
-            # Get reason
-            reason = None
-            if payment.status in [PaymentStatus.CANCELLED, PaymentStatus.FAILED]:
+            reason = payment.payme_cancel_reason
+            if reason is None:
                 reason = payment_metadata.get("payme_cancel_reason")
                 if reason is not None:
                     try:
                         reason = int(reason)
                     except (ValueError, TypeError):
                         pass
-            
-            # Determine state
-            if payment.status == PaymentStatus.COMPLETED:
-                state = self.STATE_COMPLETED
-            elif payment.status in [PaymentStatus.CANCELLED, PaymentStatus.FAILED]:
-                was_completed = (
-                    payment.completed_at is not None or 
-                    "payme_perform_time" in payment_metadata
-                )
-                state = self.STATE_CANCELLED_AFTER_COMPLETION if was_completed else self.STATE_CANCELLED
-            else:
-                state = self.STATE_CREATED
-            
-            # Build account information
-            account = {}
-            # Check if we have phone_number, tariff_id, month_count (new format)
-            if "phone_number" in payment_metadata:
-                account["phone_number"] = payment_metadata.get("phone_number")
-            if "tariff_id" in payment_metadata:
-                account["tariff_id"] = payment_metadata.get("tariff_id")
-            if "month_count" in payment_metadata:
-                account["month_count"] = payment_metadata.get("month_count")
-            
-            # If no account info in metadata, try to extract from payment
-            # For legacy payments, we might not have this info
-            if not account:
-                # Try to use payment ID as order_id for backward compatibility
-                account["order_id"] = str(payment.id)
-            
-            # Build transaction object
-            transaction = {
-                "id": payme_transaction_id,
-                "time": create_time,
-                "amount": int(payment.amount * 100),  # Convert to tiyins
-                "account": account,
-                "create_time": create_time,
-                "perform_time": perform_time,
-                "cancel_time": cancel_time,
-                "transaction": str(payment.id),  # Our payment ID (order_id)
-                "state": state,
-                "reason": reason
-            }
-            
-            # Note: receivers field is for split payments (not implemented in our system)
-            # We can add an empty array or omit it
-            
-            transactions.append(transaction)
-        
-        # Sort by create_time ascending (should already be sorted, but ensure it)
-        transactions.sort(key=lambda t: t["create_time"])
-        
-        logger.debug(f"GetStatement: Returning {len(transactions)} transactions for period {from_time} to {to_time}")
-        
+        else:
+            state = self.STATE_CREATED
+            perform_time = None
+        
+        # Build account information
+        account = {}
+        # Check if we have phone_number, tariff_id, month_count (new format)
+        if "phone_number" in payment_metadata:
+            account["phone_number"] = payment_metadata.get("phone_number")
+        if "tariff_id" in payment_metadata:
+            account["tariff_id"] = payment_metadata.get("tariff_id")
+        if "month_count" in payment_metadata:
+            account["month_count"] = payment_metadata.get("month_count")
+        
+        # Legacy payments have no account info; use the payment ID as order_id
+        if not account:
+            account["order_id"] = str(payment.id)
+        
+        # Note: receivers field is for split payments (not implemented in our system)
         return {
-            "transactions": transactions
+            "id": payme_transaction_id,
+            "time": create_time,
+            "amount": int(payment.amount * 100),  # Convert to tiyins
+            "account": account,
+            "create_time": create_time,
+            "perform_time": perform_time or 0,
+            "cancel_time": cancel_time,
+            "transaction": str(payment.id),  # Our payment ID (order_id)
+            "state": state,
+            "reason": reason
         }
     
     async def _find_payment_by_payme_id(self, payme_transaction_id: str) -> Optional[Payment]:
         """
         Find payment by Payme transaction ID.
         
-        First tries to find by transaction_id field (where we store Payme's transaction ID),
-        then falls back to searching metadata for backward compatibility.
+        Uses the indexed payme_transaction_id column. Payments that only had
+        the ID in metadata get the column filled by
+        scripts/backfill_payme_transaction_ids.py.
         """
         import logging
         logger = logging.getLogger(__name__)
-        logger.debug(f"Searching for payment with Payme transaction ID: {payme_transaction_id}")
-        
-        # First, try to find by transaction_id field (where we now store Payme's transaction ID)
-        from sqlalchemy import and_
-        stmt = select(Payment).where(
-            and_(
-                Payment.payment_method == PaymentMethod.PAYME,
-                Payment.transaction_id == payme_transaction_id
-            )
-        )
-        result = await self.session.execute(stmt)
-        payment = result.scalar_one_or_none()
+        
+        payment = await self.payment_repo.get_payment_by_payme_transaction_id(payme_transaction_id)
         
         if payment:
             logger.debug(
-                f"Found payment by transaction_id: Payment ID={payment.id}, "
+                f"Found payment: Payment ID={payment.id}, "
                 f"Payme transaction ID={payme_transaction_id}, Status={payment.status}"
             )
             return payment
         
-        # Fallback: search through metadata for backward compatibility
-        # (in case there are old payments that only have it in metadata)
-        logger.debug("Not found by transaction_id, searching metadata...")
-        stmt = select(Payment).where(
-            Payment.payment_method == PaymentMethod.PAYME
-        )
-        result = await self.session.execute(stmt)
-        payments = result.scalars().all()
-        
-        logger.debug(f"Found {len(payments)} Payme payments to search through")
-        
-        for payment in payments:
-            payment_metadata = payment.payment_metadata or {}
-            stored_transaction_id = payment_metadata.get("payme_transaction_id")
-            if stored_transaction_id == payme_transaction_id:
-                logger.debug(
-                    f"Found payment by metadata: Payment ID={payment.id}, "
-                    f"Payme transaction ID={stored_transaction_id}, "
-                    f"Status={payment.status}"
-                )
-                return payment
-        
         logger.warning(f"No payment found with Payme transaction ID: {payme_transaction_id}")
         return None
 
@@ -1,5 +1,7 @@
+import hashlib
+import json
 from datetime import datetime, date, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -16,8 +18,10 @@ from app.schemas.payment_schema import (
     PaymentResponse, TariffPlanResponse, SubscriptionResponse
 )
 from app.repositories.payment_repository import PaymentRepository
+from app.repositories.webhook_event_repository import WebhookEventRepository
 from app.core.exceptions import PaymentError
 from app.core.config import get_settings
+from app.utils.response_cache import response_cache, TAG_FEATURED, TAG_SERVICES
 
 
 class SubscriptionError(Exception):
@@ -99,6 +103,8 @@ class PaymentService:
                 payment_type=PaymentType.TARIFF_SUBSCRIPTION,
                 payment_method=request.payment_method,
                 status=PaymentStatus.PENDING,
+                tariff_plan_id=request.tariff_plan_id,
+                duration_months=request.duration_months,
                 payment_metadata={
                     'tariff_plan_id': str(request.tariff_plan_id),
                     'duration_months': request.duration_months,
@@ -198,6 +204,8 @@ class PaymentService:
                 payment_type=PaymentType.FEATURED_SERVICE,
                 payment_method=request.payment_method,
                 status=PaymentStatus.PENDING,
+                service_id=str(request.service_id),
+                duration_days=request.duration_days,
                 payment_metadata={
                     'service_id': str(request.service_id),
                     'duration_days': request.duration_days,
@@ -261,12 +269,38 @@ class PaymentService:
             print(f"Traceback: {error_details}")
             raise PaymentError(f"Failed to create featured service payment: {error_msg}")
     
+    async def accept_payment_webhook(
+        self,
+        payment_method: PaymentMethod,
+        webhook_data: Dict[str, Any]
+    ) -> bool:
+        """
+        Store a payment webhook in the inbox for background processing.
+        
+        Only an insert, so providers get their acknowledgement right away;
+        PaymentWebhookWorker applies the event with process_payment_webhook().
+        
+        Returns:
+            True if the event is new, False if it was already received
+        """
+        event_id, transaction_id = self._extract_event_key(payment_method, webhook_data)
+        return await WebhookEventRepository(self.session).add_event(
+            payment_method, event_id, transaction_id, webhook_data
+        )
+    
     async def process_payment_webhook(
         self,
         payment_method: PaymentMethod,
         webhook_data: Dict[str, Any]
     ) -> bool:
-        """Process payment webhook from provider."""
+        """
+        Process payment webhook from provider.
+        
+        The status change and the subscription or boost activation are
+        committed together. A notification delivered again for a completed
+        payment only activates what is missing, so nothing is activated
+        twice and a failed activation is completed by the retry.
+        """
         try:
             # Extract transaction ID from webhook data
             transaction_id = self._extract_transaction_id(payment_method, webhook_data)
@@ -282,17 +316,23 @@ class PaymentService:
             # Verify payment status from webhook
             is_completed = self._is_payment_completed(payment_method, webhook_data)
             
+            if payment.status == PaymentStatus.COMPLETED:
+                # Already paid: only an activation that failed earlier is left to do
+                if not is_completed or await self.payment_repo.is_payment_activated(payment):
+                    return is_completed
+            
             if is_completed:
-                # Update payment status
-                await self.payment_repo.update_payment_status(
-                    payment.id,
-                    PaymentStatus.COMPLETED,
-                    completed_at=datetime.now(),
-                    webhook_data=webhook_data
-                )
-                
-                # Refresh payment to get updated version
-                payment = await self.payment_repo.get_payment_by_id(payment.id)
+                if payment.status != PaymentStatus.COMPLETED:
+                    # Update payment status
+                    await self.payment_repo.update_payment_status(
+                        payment.id,
+                        PaymentStatus.COMPLETED,
+                        completed_at=datetime.now(),
+                        webhook_data=webhook_data
+                    )
+                    
+                    # Refresh payment to get updated version
+                    payment = await self.payment_repo.get_payment_by_id(payment.id)
                 
                 # Process payment based on type
                 if payment.payment_type == PaymentType.TARIFF_SUBSCRIPTION:
@@ -301,6 +341,8 @@ class PaymentService:
                     await self._process_featured_service_payment(payment, webhook_data)
                 
                 await self.session.commit()
+                if payment.payment_type == PaymentType.FEATURED_SERVICE:
+                    await response_cache.invalidate(TAG_FEATURED, TAG_SERVICES)
                 return True
             else:
                 # Handle failed payment
@@ -326,6 +368,31 @@ class PaymentService:
             return webhook_data.get('transaction_id')
         return None
     
+    def _extract_event_key(self, method: PaymentMethod, webhook_data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        """
+        Get the inbox key of a webhook: (event ID, transaction ID).
+        
+        Providers notify once per transaction state, so the event ID is the
+        transaction ID and state. Payloads without them are keyed by a hash
+        of their content, which still collapses identical redeliveries.
+        """
+        transaction_id = self._extract_transaction_id(method, webhook_data)
+        if method == PaymentMethod.PAYME:
+            event_parts = (webhook_data.get('params', {}).get('id'), webhook_data.get('params', {}).get('state'))
+        elif method == PaymentMethod.CLICK:
+            event_parts = (webhook_data.get('click_trans_id'), webhook_data.get('action'))
+        elif method == PaymentMethod.UZUMBANK:
+            event_parts = (webhook_data.get('transaction_id'), webhook_data.get('status'))
+        else:
+            event_parts = (None, None)
+        
+        if all(part is not None for part in event_parts):
+            event_id = ":".join(str(part) for part in event_parts)
+        else:
+            payload = json.dumps(webhook_data, sort_keys=True, default=str)
+            event_id = f"sha256:{hashlib.sha256(payload.encode()).hexdigest()}"
+        return event_id[:128], str(transaction_id)[:128] if transaction_id is not None else None
+    
     def _is_payment_completed(self, method: PaymentMethod, webhook_data: Dict[str, Any]) -> bool:
         """Check if payment is completed based on webhook data."""
         if method == PaymentMethod.PAYME:
@@ -0,0 +1,168 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.models import PaymentType
+from app.repositories.payment_repository import PaymentRepository
+from app.utils.response_cache import response_cache
+
+
+class PaymentStatsService:
+    """
+    Admin payment and subscription statistics.
+
+    Every figure is a GROUP BY / FILTER aggregate computed by the database,
+    so memory use depends on the number of groups (statuses, types, methods
+    and chart periods), never on the number of payments. Results are cached
+    for PAYMENT_STATS_CACHE_TTL_SECONDS and are not invalidated when
+    payments change, so they can lag by up to that long.
+    """
+
+    PERIODS = ("day", "month")
+
+    # Default and longest chart ranges, in periods
+    DEFAULT_PERIODS = {"day": 30, "month": 12}
+    MAX_PERIODS = {"day": 366, "month": 120}
+
+    def __init__(self, db: AsyncSession):
+        self.payment_repo = PaymentRepository(db)
+
+    async def get_overview(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> dict:
+        """
+        Get payment counts, revenue and breakdowns, and subscription counts.
+
+        Args:
+            start_date: Only payments created on or after this day
+            end_date: Only payments created on or before this day
+
+        Returns:
+            Dict with start_date, end_date, payments, breakdown and subscriptions
+
+        Raises:
+            ValidationError: If the range is empty
+        """
+        if start_date and end_date and end_date < start_date:
+            raise ValidationError("end_date must not be before start_date")
+
+        async def compute_overview():
+            breakdown = await self.payment_repo.get_payment_breakdown(start_date, end_date)
+            return {
+                "start_date": start_date.isoformat() if start_date else None,
+                "end_date": end_date.isoformat() if end_date else None,
+                "payments": await self.payment_repo.get_payment_stats(start_date, end_date),
+                "breakdown": [
+                    {
+                        **row,
+                        "status": row["status"].value,
+                        "payment_type": row["payment_type"].value,
+                        "payment_method": row["payment_method"].value
+                    }
+                    for row in breakdown
+                ],
+                "subscriptions": await self.payment_repo.get_subscription_stats()
+            }
+
+        return await response_cache.get_or_compute(
+            "payments:admin-stats",
+            {"start_date": start_date, "end_date": end_date},
+            (),
+            compute_overview,
+            ttl=settings.PAYMENT_STATS_CACHE_TTL_SECONDS
+        )
+
+    async def get_revenue_series(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        period: str = "day",
+        payment_type: Optional[PaymentType] = None
+    ) -> dict:
+        """
+        Get completed payment counts and revenue per day or month, for charts.
+
+        Periods without payments are included with zeros.
+
+        Args:
+            start_date: First day of the range (defaults to DEFAULT_PERIODS before end_date)
+            end_date: Last day of the range (defaults to today)
+            period: "day" or "month"
+            payment_type: Only count payments of this type
+
+        Returns:
+            Dict with period, start_date, end_date, payment_type, total_revenue and points
+
+        Raises:
+            ValidationError: If the period or range is invalid
+        """
+        if period not in self.PERIODS:
+            raise ValidationError(f"period must be one of: {', '.join(self.PERIODS)}")
+
+        end_date = end_date or date.today()
+        if start_date is None:
+            start_date = end_date - self._step(period) * (self.DEFAULT_PERIODS[period] - 1)
+            if period == "month":
+                start_date = start_date.replace(day=1)
+        if end_date < start_date:
+            raise ValidationError("end_date must not be before start_date")
+
+        if self._period_count(start_date, end_date, period) > self.MAX_PERIODS[period]:
+            raise ValidationError(f"Range too long: at most {self.MAX_PERIODS[period]} {period}s")
+        period_starts = self._period_starts(start_date, end_date, period)
+
+        async def compute_series():
+            rows = await self.payment_repo.get_revenue_series(start_date, end_date, period, payment_type)
+            by_period = {row["period_start"]: row for row in rows}
+            points = [
+                by_period.get(period_start.isoformat(), {
+                    "period_start": period_start.isoformat(),
+                    "payments": 0,
+                    "revenue": 0.0
+                })
+                for period_start in period_starts
+            ]
+            return {
+                "period": period,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "payment_type": payment_type.value if payment_type else None,
+                "total_revenue": sum(point["revenue"] for point in points),
+                "points": points
+            }
+
+        return await response_cache.get_or_compute(
+            "payments:admin-revenue",
+            {
+                "start_date": start_date,
+                "end_date": end_date,
+                "period": period,
+                "payment_type": payment_type.value if payment_type else None
+            },
+            (),
+            compute_series,
+            ttl=settings.PAYMENT_STATS_CACHE_TTL_SECONDS
+        )
+
+    def _step(self, period: str):
+        return timedelta(days=1) if period == "day" else relativedelta(months=1)
+
+    def _period_count(self, start_date: date, end_date: date, period: str) -> int:
+        if period == "day":
+            return (end_date - start_date).days + 1
+        return (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+
+    def _period_starts(self, start_date: date, end_date: date, period: str) -> List[date]:
+        """First day of every day or month overlapping the range."""
+        current = start_date if period == "day" else start_date.replace(day=1)
+        period_starts = []
+        while current <= end_date:
+            period_starts.append(current)
+            current += self._step(period)
+        return period_starts
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Set
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import PaymentWebhookEvent
+from app.repositories.webhook_event_repository import WebhookEventRepository
+from app.services.payment_providers import get_payment_providers
+from app.services.payment_service import PaymentService
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentWebhookWorker:
+    """
+    Background processing of the payment webhook inbox.
+
+    The webhook endpoint only stores events (PaymentService.accept_payment_webhook)
+    and calls notify(). One loop per process claims due events and applies
+    each with PaymentService.process_payment_webhook() in its own session,
+    with at most WEBHOOK_WORKER_CONCURRENCY in flight. An event is marked
+    processed in the same transaction as the payment changes it causes.
+    Failed attempts are retried with exponential backoff and, after
+    WEBHOOK_MAX_ATTEMPTS, left as failed for inspection. Events of one
+    transaction are applied one at a time, in the order they arrived.
+    """
+
+    def __init__(self):
+        self.concurrency = settings.WEBHOOK_WORKER_CONCURRENCY
+        self.max_attempts = settings.WEBHOOK_MAX_ATTEMPTS
+        self.retry_base_delay = settings.WEBHOOK_RETRY_BASE_DELAY_SECONDS
+        self.lease = timedelta(seconds=settings.WEBHOOK_LEASE_SECONDS)
+
+        self._session_factory: Optional[Callable[[], AsyncSession]] = None
+        self._payment_providers = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self, session_factory: Callable[[], AsyncSession], interval: Optional[float] = None) -> None:
+        """
+        Start the processing loop.
+
+        Args:
+            session_factory: Callable returning a new AsyncSession
+            interval: Seconds between polls for due events (defaults to settings)
+        """
+        if self._task and not self._task.done():
+            return
+
+        self._session_factory = session_factory
+        self._wakeup = asyncio.Event()
+        interval = interval or settings.WEBHOOK_POLL_INTERVAL_SECONDS
+        self._task = asyncio.create_task(self._run(interval))
+
+    def notify(self) -> None:
+        """Wake the loop for a newly accepted event (no-op when not started)."""
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop claiming events and wait briefly for events in flight.
+
+        Unfinished events keep their lease and are processed again once it
+        expires.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+
+        if self._inflight:
+            _, pending = await asyncio.wait(self._inflight, timeout=timeout)
+            for task in pending:
+                task.cancel()
+
+    async def run_once(self, session_factory: Optional[Callable[[], AsyncSession]] = None) -> int:
+        """
+        Claim and process one batch of due events, waiting for them to finish.
+
+        Args:
+            session_factory: Callable returning a new AsyncSession (defaults to the started one)
+
+        Returns:
+            Number of events claimed (0 when none were due)
+        """
+        if session_factory:
+            self._session_factory = session_factory
+        event_ids = await self._claim(self.concurrency)
+        await asyncio.gather(*(self._process(event_id) for event_id in event_ids))
+        return len(event_ids)
+
+    async def _run(self, interval: float) -> None:
+        """Processing loop; errors are logged and the claim retried next tick."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                # Keep claiming while there are free slots and events are due
+                while len(self._inflight) < self.concurrency:
+                    event_ids = await self._claim(self.concurrency - len(self._inflight))
+                    if not event_ids:
+                        break
+                    for event_id in event_ids:
+                        task = asyncio.create_task(self._process(event_id))
+                        self._inflight.add(task)
+                        task.add_done_callback(self._on_done)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Payment webhook loop error: {str(e)}")
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        # A slot is free and the next event of the same transaction may be due
+        self.notify()
+
+    async def _claim(self, limit: int) -> list:
+        async with self._session_factory() as session:
+            return await WebhookEventRepository(session).claim_due_events(limit, self.lease)
+
+    async def _process(self, event_id: UUID) -> bool:
+        """
+        Apply one claimed event.
+
+        Returns:
+            True if the event was applied, False if the attempt failed
+        """
+        async with self._session_factory() as session:
+            repo = WebhookEventRepository(session)
+            event = await session.get(PaymentWebhookEvent, event_id)
+            if event is None:
+                return False
+            # Read before a rollback expires the instance
+            provider, provider_event_id, attempts = event.provider, event.event_id, event.attempts
+
+            try:
+                if self._payment_providers is None:
+                    self._payment_providers = get_payment_providers()
+                payment_service = PaymentService(
+                    session=session,
+                    payment_providers=self._payment_providers,
+                    sms_service=None
+                )
+                # Committed by process_payment_webhook together with the payment update
+                repo.mark_processed(event)
+                await payment_service.process_payment_webhook(event.provider, event.payload)
+                await session.commit()
+                return True
+            except Exception as e:
+                await session.rollback()
+                if attempts >= self.max_attempts:
+                    retry_at = None
+                    logger.error(
+                        f"Giving up on {provider.value} webhook event {provider_event_id} "
+                        f"after {attempts} attempts: {str(e)}"
+                    )
+                else:
+                    retry_at = datetime.now() + timedelta(seconds=self.retry_base_delay * 2 ** (attempts - 1))
+                    logger.warning(
+                        f"{provider.value} webhook event {provider_event_id} failed "
+                        f"(attempt {attempts}), retrying at {retry_at}: {str(e)}"
+                    )
+                await repo.record_failure(event_id, str(e), retry_at)
+                return False
+
+
+# Global instance
+payment_webhook_worker = PaymentWebhookWorker()
@@ -0,0 +1,90 @@
+import math
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import InteractionType
+from app.repositories.service_repository import ServiceRepository
+from app.utils.response_cache import response_cache, TAG_TRENDING
+
+
+class PopularityService:
+    """
+    Service maintaining the time-decayed popularity score of services.
+
+    The score is the sum of interaction weights, each halved every
+    POPULARITY_HALF_LIFE_HOURS since the interaction. Because the decay is
+    exponential, a refresh only multiplies the stored score by the decay
+    since the last refresh and adds the interactions created in between,
+    so no history is rescanned after the first run.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.service_repo = ServiceRepository(db)
+
+    @staticmethod
+    def get_weights() -> Dict[InteractionType, float]:
+        """Get the configured score weight per interaction type."""
+        return {
+            InteractionType.VIEW: settings.POPULARITY_VIEW_WEIGHT,
+            InteractionType.LIKE: settings.POPULARITY_LIKE_WEIGHT,
+            InteractionType.SAVE: settings.POPULARITY_SAVE_WEIGHT,
+            InteractionType.SHARE: settings.POPULARITY_SHARE_WEIGHT,
+        }
+
+    async def refresh_scores(
+        self,
+        full: bool = False,
+        batch_size: Optional[int] = None,
+        run_at: Optional[datetime] = None
+    ) -> dict:
+        """
+        Refresh popularity scores of all services in ID-ordered batches.
+
+        Each batch is committed on its own, so locks are held briefly and an
+        interrupted run resumes cleanly on the next one.
+
+        Args:
+            full: Rebuild scores from all interactions (e.g. after changing weights)
+            batch_size: Services per batch (defaults to POPULARITY_BATCH_SIZE)
+            run_at: Refresh timestamp (defaults to now)
+
+        Returns:
+            Dict with the number of batches and updated services
+        """
+        run_at = run_at or datetime.now()
+        batch_size = batch_size or settings.POPULARITY_BATCH_SIZE
+        decay_rate = math.log(2) / (settings.POPULARITY_HALF_LIFE_HOURS * 3600)
+        weights = self.get_weights()
+
+        batches = 0
+        updated = 0
+        after_id = None
+        while True:
+            service_ids = await self.service_repo.get_service_id_batch(after_id, batch_size)
+            if not service_ids:
+                break
+
+            try:
+                updated += await self.service_repo.refresh_popularity_scores(
+                    first_id=service_ids[0],
+                    last_id=service_ids[-1],
+                    run_at=run_at,
+                    weights=weights,
+                    decay_rate=decay_rate,
+                    full=full
+                )
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                raise
+
+            batches += 1
+            after_id = service_ids[-1]
+
+        await response_cache.invalidate(TAG_TRENDING)
+
+        return {"batches": batches, "updated_services": updated}
@@ -0,0 +1,142 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Set
+from urllib.parse import unquote, urlsplit
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import ImageType
+from app.repositories.image_upload_repository import ImageUploadRepository
+from app.utils.image_upload import ImageUploadService, image_upload_service
+
+logger = logging.getLogger(__name__)
+
+# Bucket prefixes holding uploaded images, one per image type
+IMAGE_PREFIXES = tuple(f"{image_type.value}/" for image_type in ImageType)
+
+
+class S3OrphanCollector:
+    """
+    Removes S3 objects that no database row refers to.
+
+    Stored URLs are compared by S3 key, so references written under other
+    endpoint or URL settings still match. The referenced keys of a prefix
+    are loaded in one streamed pass; the prefix is then listed one page (up
+    to 1000 keys) at a time and each page's orphans are deleted with a single
+    DeleteObjects request. Objects younger than the minimum age are kept
+    because their row may not be committed yet.
+
+    As a safeguard the run is aborted, before anything else is deleted, when
+    a stored URL under a prefix cannot be mapped to a key, or when a page
+    with orphans has no referenced object at all; both usually mean the
+    stored URLs are in a form the collector does not understand.
+    """
+
+    def __init__(self, db: AsyncSession, upload_service: Optional[ImageUploadService] = None):
+        self.upload_repo = ImageUploadRepository(db)
+        self.upload_service = upload_service or image_upload_service
+        self.s3 = self.upload_service.s3
+
+    async def collect(
+        self,
+        prefixes: Iterable[str] = IMAGE_PREFIXES,
+        min_age: Optional[timedelta] = None,
+        dry_run: bool = False
+    ) -> dict:
+        """
+        Find and delete orphaned objects.
+
+        Args:
+            prefixes: Bucket prefixes to scan
+            min_age: Only objects older than this are considered (defaults to settings)
+            dry_run: Count orphans without deleting them
+
+        Returns:
+            Dict with scanned, orphaned, deleted and failed counts, and
+            whether the run was aborted
+        """
+        if min_age is None:
+            min_age = timedelta(hours=settings.S3_ORPHAN_MIN_AGE_HOURS)
+        # LastModified from S3 is timezone-aware (UTC)
+        cutoff = datetime.now(timezone.utc) - min_age
+        stats = {"scanned": 0, "orphaned": 0, "deleted": 0, "failed": 0, "aborted": False}
+
+        for prefix in prefixes:
+            referenced = await self._get_referenced_keys(prefix)
+            if referenced is None:
+                stats["aborted"] = True
+                return stats
+
+            pages = self.s3.iter_object_pages(prefix)
+            while True:
+                # Each page is one blocking ListObjectsV2 request
+                page = await self.upload_service.run_in_s3_pool(next, pages, None)
+                if page is None:
+                    break
+
+                stats["scanned"] += len(page)
+                orphans = await self._find_orphans(
+                    [obj["key"] for obj in page if obj["last_modified"] < cutoff], referenced
+                )
+                stats["orphaned"] += len(orphans)
+                if not orphans:
+                    continue
+                if not any(obj["key"] in referenced for obj in page):
+                    logger.error(
+                        f"Aborting orphan collection: no object on a page of {prefix} is referenced "
+                        f"(first key {page[0]['key']}); check the stored image URLs"
+                    )
+                    stats["aborted"] = True
+                    return stats
+                if dry_run:
+                    continue
+
+                failed = await self.upload_service.run_in_s3_pool(self.s3.delete_objects, orphans)
+                stats["deleted"] += len(orphans) - len(failed)
+                stats["failed"] += len(failed)
+
+        if stats["failed"]:
+            logger.warning(f"Could not delete {stats['failed']} orphaned S3 object(s)")
+        return stats
+
+    async def _get_referenced_keys(self, prefix: str) -> Optional[Set[str]]:
+        """
+        Get the keys under a prefix that a stored URL refers to.
+
+        Returns None (after logging) if a stored URL mentioning the prefix
+        does not map to a key under it.
+        """
+        referenced = set()
+        async for url in self.upload_repo.iter_referenced_urls(f"/{prefix}"):
+            s3_key = self._key_from_url(url)
+            if not s3_key.startswith(prefix):
+                logger.error(
+                    f"Aborting orphan collection: cannot map stored URL {url} to a key under {prefix}"
+                )
+                return None
+            referenced.add(s3_key)
+        return referenced
+
+    def _key_from_url(self, url: str) -> str:
+        """
+        Get the S3 key a stored URL points to.
+
+        Accepts virtual-hosted and path-style S3 URLs as well as CDN or
+        custom-domain URLs; the query string is ignored.
+        """
+        path = unquote(urlsplit(url).path).lstrip("/")
+        bucket_prefix = f"{self.s3.bucket_name}/"
+        if path.startswith(bucket_prefix):
+            # Path-style URL (custom endpoint or s3.<region>.amazonaws.com/<bucket>)
+            path = path[len(bucket_prefix):]
+        return path
+
+    async def _find_orphans(self, s3_keys: List[str], referenced: Set[str]) -> List[str]:
+        """Get the keys that are neither referenced by a stored URL nor pending upload."""
+        candidates = [s3_key for s3_key in s3_keys if s3_key not in referenced]
+        if not candidates:
+            return []
+
+        pending = await self.upload_repo.get_pending_keys(candidates)
+        return [s3_key for s3_key in candidates if s3_key not in pending]
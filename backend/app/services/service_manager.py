@@ -1,10 +1,10 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, List, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import NotFoundError, ValidationError
-from app.models import User, InteractionType
+from app.models import Service, User, InteractionType, ContactType
 from app.repositories.service_repository import ServiceRepository
 from app.repositories.user_repository import UserRepository
 from app.schemas.service_schema import (
@@ -22,6 +22,9 @@ from app.schemas.service_schema import (
 from app.repositories.merchant_repository import MerchantRepository
 from app.schemas.common_schema import PaginationParams
 from app.utils.constants import UZBEKISTAN_REGIONS, INTERACTION_TYPES
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.utils.counter_buffer import service_counter_buffer
+from app.utils.geo import haversine_km
 
 
 class ServiceManager:
@@ -76,6 +79,17 @@ class ServiceManager:
         Returns:
             PaginatedServiceResponse with services and pagination info
         """
+        if pagination.use_cursor:
+            if category_id:
+                after = self._decode_cursor(pagination.cursor, "created_at", "desc")
+                rows, has_more = await self.service_repo.get_services_by_category_keyset(
+                    category_id=category_id,
+                    after=after,
+                    limit=pagination.limit
+                )
+                return await self._build_cursor_page(rows, has_more, pagination, "created_at", "desc", user_id)
+            return await self.search_services(ServiceSearchFilters(), pagination, user_id=user_id)
+        
         if category_id:
             services, total = await self.service_repo.get_services_by_category(
                 category_id=category_id,
@@ -92,10 +106,7 @@ class ServiceManager:
             )
         
         # Convert to response format
-        service_items = []
-        for service in services:
-            service_item = await self._convert_to_service_list_item(service, user_id=user_id)
-            service_items.append(service_item)
+        service_items = await self._build_service_list_items(services, user_id=user_id)
         
         total_pages = (total + pagination.limit - 1) // pagination.limit
         has_more = pagination.page < total_pages
@@ -109,6 +120,33 @@ class ServiceManager:
             total_pages=total_pages
         )
     
+    async def get_trending_services(
+        self,
+        category_id: Optional[int] = None,
+        location_region: Optional[str] = None,
+        pagination: PaginationParams = PaginationParams(),
+        user_id: Optional[str] = None
+    ) -> PaginatedServiceResponse:
+        """
+        Get services ordered by their precomputed popularity score.
+        
+        Args:
+            category_id: Optional category filter
+            location_region: Optional region filter
+            pagination: Pagination parameters
+            user_id: Optional user ID to check if user has liked/saved services
+            
+        Returns:
+            PaginatedServiceResponse with the most popular services first
+        """
+        filters = ServiceSearchFilters(
+            category_id=category_id,
+            location_region=location_region,
+            sort_by="popularity",
+            sort_order="desc"
+        )
+        return await self.search_services(filters, pagination, user_id=user_id)
+    
     async def search_services(
         self,
         filters: ServiceSearchFilters,
@@ -132,6 +170,19 @@ class ServiceManager:
         # Validate filters
         await self._validate_search_filters(filters)
         
+        if pagination.use_cursor:
+            sort_by = filters.sort_by or "created_at"
+            sort_order = filters.sort_order or "desc"
+            after = self._decode_cursor(pagination.cursor, sort_by, sort_order)
+            rows, has_more = await self.service_repo.search_services_keyset(
+                filters=filters,
+                after=after,
+                limit=pagination.limit
+            )
+            page = await self._build_cursor_page(rows, has_more, pagination, sort_by, sort_order, user_id)
+            self._apply_distances(page.services, [service for service, _ in rows], filters)
+            return page
+        
         services, total = await self.service_repo.search_services(
             filters=filters,
             offset=pagination.offset,
@@ -139,10 +190,8 @@ class ServiceManager:
         )
         
         # Convert to response format
-        service_items = []
-        for service in services:
-            service_item = await self._convert_to_service_list_item(service, user_id=user_id)
-            service_items.append(service_item)
+        service_items = await self._build_service_list_items(services, user_id=user_id)
+        self._apply_distances(service_items, services, filters)
         
         total_pages = (total + pagination.limit - 1) // pagination.limit
         has_more = pagination.page < total_pages
@@ -156,6 +205,87 @@ class ServiceManager:
             total_pages=total_pages
         )
     
+    def _apply_distances(
+        self,
+        service_items: List[ServiceListItem],
+        services: List[Service],
+        filters: ServiceSearchFilters
+    ) -> None:
+        """
+        Set distance_km on a page of items for geo searches.
+        
+        Args:
+            service_items: ServiceListItem objects to update in place
+            services: Service models in the same order as service_items
+            filters: Search filters (no-op without latitude/longitude)
+        """
+        if filters.latitude is None or filters.longitude is None:
+            return
+        
+        for item, service in zip(service_items, services):
+            if service.latitude is not None and service.longitude is not None:
+                item.distance_km = round(
+                    haversine_km(filters.latitude, filters.longitude, service.latitude, service.longitude), 3
+                )
+    
+    def _decode_cursor(self, cursor: str, sort_by: str, sort_order: str):
+        """
+        Decode a request cursor; an empty cursor means the first page.
+        
+        Args:
+            cursor: Cursor string from the request
+            sort_by: Sort field of the current request
+            sort_order: Sort order of the current request
+            
+        Returns:
+            Optional (sort_key, service_id) to continue after
+            
+        Raises:
+            ValidationError: If the cursor is invalid
+        """
+        if not cursor:
+            return None
+        return decode_cursor(cursor, sort_by, sort_order)
+    
+    async def _build_cursor_page(
+        self,
+        rows,
+        has_more: bool,
+        pagination: PaginationParams,
+        sort_by: str,
+        sort_order: str,
+        user_id: Optional[str]
+    ) -> PaginatedServiceResponse:
+        """
+        Build a cursor-mode page response (no total count).
+        
+        Args:
+            rows: List of (Service, sort_key) tuples for the page
+            has_more: Whether another page exists
+            pagination: Pagination parameters
+            sort_by: Sort field used for the page
+            sort_order: Sort order used for the page
+            user_id: Optional user ID to check if user has liked/saved services
+            
+        Returns:
+            PaginatedServiceResponse with next_cursor set when has_more
+        """
+        services = [service for service, _ in rows]
+        service_items = await self._build_service_list_items(services, user_id=user_id)
+        
+        next_cursor = None
+        if has_more and rows:
+            last_service, last_key = rows[-1]
+            next_cursor = encode_cursor(sort_by, sort_order, last_key, last_service.id)
+        
+        return PaginatedServiceResponse(
+            services=service_items,
+            page=pagination.page,
+            limit=pagination.limit,
+            has_more=has_more,
+            next_cursor=next_cursor
+        )
+    
     async def get_featured_services(self, limit: Optional[int] = None, user_id: Optional[str] = None) -> FeaturedServicesResponse:
         """
         Get currently active featured services.
@@ -170,17 +300,52 @@ class ServiceManager:
         services = await self.service_repo.get_featured_services(limit=limit)
         
         # Convert to response format
-        service_items = []
-        for service in services:
-            service_item = await self._convert_to_service_list_item(service, user_id=user_id)
+        service_items = await self._build_service_list_items(services, user_id=user_id)
+        for service_item in service_items:
             service_item.is_featured = True
-            service_items.append(service_item)
         
         return FeaturedServicesResponse(
             services=service_items,
             total=len(service_items)
         )
     
+    async def get_service_detail_version(self, service_id: str, user_id: Optional[str] = None) -> Optional[List[Any]]:
+        """
+        Get the values service details depend on, for building an ETag.
+        
+        View counts are excluded (they change on every request), so the
+        version identifies semantically equivalent responses only.
+        
+        Args:
+            service_id: 9-digit numeric string ID of the service
+            user_id: Optional user ID (like/save flags are per user)
+            
+        Returns:
+            JSON-compatible list of version values, or None if the service
+            does not exist or is inactive
+        """
+        version = await self.service_repo.get_service_detail_version(service_id, user_id=user_id)
+        if version is None:
+            return None
+        
+        # Unflushed like/save/share deltas are part of the response as well
+        pending = service_counter_buffer.get_pending(service_id)
+        return [
+            *version,
+            pending["like_count"],
+            pending["save_count"],
+            pending["share_count"]
+        ]
+    
+    async def record_service_view(self, service_id: str) -> None:
+        """
+        Count a service detail view that was answered without the body.
+        
+        Args:
+            service_id: 9-digit numeric string ID of the service
+        """
+        await self.service_repo.increment_view_count(service_id)
+    
     async def get_service_details(self, service_id: str, user_id: Optional[str] = None) -> ServiceDetailResponse:
         """
         Get detailed service information.
@@ -195,59 +360,46 @@ class ServiceManager:
         Raises:
             NotFoundError: If service not found or inactive
         """
-        service = await self.service_repo.get_service_with_details(service_id)
-        if not service:
+        # Service, merchant, category, images, contacts and flags in one round-trip
+        detail = await self.service_repo.load_service_detail(service_id, user_id=user_id)
+        if not detail:
             raise NotFoundError("Service not found or inactive")
         
-        # Get related data
-        merchant = await self.service_repo.get_merchant_by_service(service_id)
-        category = await self.service_repo.get_category_by_service(service_id)
-        images = await self.service_repo.get_service_images(service_id)
-        is_featured, featured_until = await self.service_repo.is_service_featured(service_id)
-        
-        if not merchant or not category:
+        service = detail["service"]
+        merchant = detail["merchant"]
+        if not merchant or not detail["category_name"]:
             raise NotFoundError("Service data incomplete")
+        if not detail["merchant_user_id"]:
+            raise NotFoundError("Merchant user not found")
+        
+        await self.service_repo.increment_view_count(service_id)
         
-        # Check user interactions if user_id provided
-        is_liked = False
-        is_saved = False
-        if user_id:
-            from app.models import InteractionType
-            user_interactions = await self.service_repo.get_user_interactions_for_service(user_id, service_id)
-            for interaction in user_interactions:
-                if interaction.interaction_type == InteractionType.LIKE:
-                    is_liked = True
-                elif interaction.interaction_type == InteractionType.SAVE:
-                    is_saved = True
-        
-        # Convert images
         image_responses = [
             ServiceImageResponse(
-                id=img.id,
-                s3_url=img.s3_url,
-                file_name=img.file_name,
-                display_order=img.display_order
+                id=image["id"],
+                s3_url=image["s3_url"],
+                thumbnail_url=image["thumbnail_url"],
+                medium_url=image["medium_url"],
+                file_name=image["file_name"],
+                display_order=image["display_order"]
             )
-            for img in images
+            for image in detail["images"]
         ]
         
-        # Get merchant contacts (phones and social media)
-        contacts = await self.merchant_repo.get_merchant_contacts(merchant.id)
+        # Contact types come back from JSON as the stored enum names
         contact_responses = [
             MerchantContactResponse(
-                id=contact.id,
-                contact_type=contact.contact_type.value,
-                contact_value=contact.contact_value,
-                platform_name=contact.platform_name,
-                display_order=contact.display_order
+                id=contact["id"],
+                contact_type=ContactType[contact["contact_type"]].value,
+                contact_value=contact["contact_value"],
+                platform_name=contact["platform_name"],
+                display_order=contact["display_order"]
             )
-            for contact in contacts
+            for contact in detail["contacts"]
         ]
         
-        # Get merchant user info
-        merchant_user = await self.user_repo.get_by_id(merchant.user_id)
-        if not merchant_user:
-            raise NotFoundError("Merchant user not found")
+        # Counters include buffered (not yet flushed) deltas, e.g. this view
+        counts = service_counter_buffer.merged_counts(service)
         
         merchant_info = MerchantBasicInfo(
             id=merchant.id,
@@ -256,7 +408,8 @@ class ServiceManager:
             total_reviews=merchant.total_reviews,
             location_region=merchant.location_region,
             is_verified=merchant.is_verified,
-            avatar_url=merchant_user.avatar_url
+            avatar_url=detail["avatar_url"],
+            avatar_thumbnail_url=detail["avatar_thumbnail_url"]
         )
         
         return ServiceDetailResponse(
@@ -268,24 +421,24 @@ class ServiceManager:
             location_region=service.location_region,
             latitude=service.latitude,
             longitude=service.longitude,
-            view_count=service.view_count,
-            like_count=service.like_count,
-            save_count=service.save_count,
-            share_count=service.share_count,
+            view_count=counts["view_count"],
+            like_count=counts["like_count"],
+            save_count=counts["save_count"],
+            share_count=counts["share_count"],
             overall_rating=service.overall_rating,
             total_reviews=service.total_reviews,
             is_active=service.is_active,
             created_at=service.created_at,
             updated_at=service.updated_at,
             merchant=merchant_info,
-            category_id=category.id,
-            category_name=category.name,
+            category_id=service.category_id,
+            category_name=detail["category_name"],
             images=image_responses,
             contacts=contact_responses,
-            is_featured=is_featured,
-            featured_until=featured_until,
-            is_liked=is_liked,
-            is_saved=is_saved
+            is_featured=detail["featured_until"] is not None,
+            featured_until=detail["featured_until"],
+            is_liked=detail["is_liked"],
+            is_saved=detail["is_saved"]
         )
     
     async def record_service_interaction(
@@ -313,39 +466,24 @@ class ServiceManager:
         if interaction_type not in INTERACTION_TYPES:
             raise ValidationError(f"Invalid interaction type: {interaction_type}")
         
-        # Check if user exists
-        user = await self.user_repo.get_by_id(user_id)
-        if not user:
-            raise NotFoundError("User not found")
-        
-        # Check if service exists
-        service = await self.service_repo.get_by_id(service_id)
-        if not service or not service.is_active:
-            raise NotFoundError("Service not found or inactive")
-        
         # Convert string to enum
         interaction_enum = InteractionType(interaction_type)
         
-        # Record interaction (returns True if created/added, False if removed)
-        # For like/save, this toggles the interaction
-        was_added = await self.service_repo.record_user_interaction(
+        # Record interaction and read the new count in one transaction.
+        # For like/save, this toggles the interaction.
+        result = await self.service_repo.apply_user_interaction(
             user_id=user_id,
             service_id=service_id,
             interaction_type=interaction_enum
         )
+        if result is None:
+            # Only the failure path pays for telling the two cases apart
+            user = await self.user_repo.get_by_id(user_id)
+            if not user:
+                raise NotFoundError("User not found")
+            raise NotFoundError("Service not found or inactive")
         
-        # Get updated service to return new count
-        updated_service = await self.service_repo.get_by_id(service_id)
-        
-        # Return appropriate count based on interaction type
-        if interaction_type == "like":
-            new_count = updated_service.like_count
-        elif interaction_type == "save":
-            new_count = updated_service.save_count
-        elif interaction_type == "share":
-            new_count = updated_service.share_count
-        else:  # view
-            new_count = updated_service.view_count
+        was_added, new_count = result
         
         # Return success message
         if interaction_type in ["like", "save"]:
@@ -382,68 +520,121 @@ class ServiceManager:
         Raises:
             NotFoundError: If merchant or category not found for service
         """
-        # Get merchant info
-        merchant = await self.service_repo.get_merchant_by_service(service.id)
-        if not merchant:
-            raise NotFoundError(f"Merchant not found for service {service.id}")
+        service_items = await self._build_service_list_items([service], user_id=user_id)
+        return service_items[0]
+    
+    async def apply_user_flags(self, services: List[ServiceListItem], user_id: Optional[str]) -> None:
+        """
+        Overlay a user's is_liked/is_saved flags onto shared list items.
         
-        merchant_user = await self.user_repo.get_by_id(merchant.user_id)
+        Used after a cache lookup, where items were built without a user.
         
-        # Get category info
-        category = await self.service_repo.get_category_by_service(service.id)
-        if not category:
-            raise NotFoundError(f"Category not found for service {service.id}")
+        Args:
+            services: ServiceListItem objects to update in place
+            user_id: Optional user ID; nothing is done for anonymous requests
+        """
+        if not user_id or not services:
+            return
         
-        # Get main image (first image)
-        images = await self.service_repo.get_service_images(service.id)
-        main_image_url = images[0].s3_url if images else None
+        user_interactions = await self.service_repo.get_user_interaction_types(
+            user_id, [item.id for item in services]
+        )
+        for item in services:
+            interaction_types = user_interactions.get(item.id, set())
+            item.is_liked = InteractionType.LIKE in interaction_types
+            item.is_saved = InteractionType.SAVE in interaction_types
+    
+    async def _build_service_list_items(
+        self,
+        services: List[Service],
+        user_id: Optional[str] = None
+    ) -> List[ServiceListItem]:
+        """
+        Convert a page of Service models to ServiceListItem responses.
         
-        # Check if featured
-        is_featured, _ = await self.service_repo.is_service_featured(service.id)
+        Related data (merchants, merchant users, categories, main images,
+        featured flags and the user's likes/saves) is loaded with one query
+        per kind for the whole page instead of per service.
         
-        # Check user interactions if user_id provided
-        is_liked = False
-        is_saved = False
-        if user_id:
-            from app.models import InteractionType
-            user_interactions = await self.service_repo.get_user_interactions_for_service(user_id, service.id)
-            for interaction in user_interactions:
-                if interaction.interaction_type == InteractionType.LIKE:
-                    is_liked = True
-                elif interaction.interaction_type == InteractionType.SAVE:
-                    is_saved = True
+        Args:
+            services: Service model instances, in the order to return them
+            user_id: Optional user ID to check if user has liked/saved the services
+            
+        Returns:
+            List of ServiceListItem response objects in the same order
+            
+        Raises:
+            NotFoundError: If merchant or category not found for a service
+        """
+        if not services:
+            return []
         
-        merchant_info = MerchantBasicInfo(
-            id=merchant.id,
-            business_name=merchant.business_name or "",
-            overall_rating=merchant.overall_rating,
-            total_reviews=merchant.total_reviews,
-            location_region=merchant.location_region or "",
-            is_verified=merchant.is_verified,
-            avatar_url=merchant_user.avatar_url if merchant_user else None
-        )
+        service_ids = [service.id for service in services]
         
-        return ServiceListItem(
-            id=service.id,
-            name=service.name,
-            description=service.description,
-            price=service.price,
-            price_type=service.price_type,
-            location_region=service.location_region,
-            overall_rating=service.overall_rating,
-            total_reviews=service.total_reviews,
-            view_count=service.view_count,
-            like_count=service.like_count,
-            save_count=service.save_count,
-            created_at=service.created_at,
-            merchant=merchant_info,
-            category_id=category.id,
-            category_name=category.name,
-            main_image_url=main_image_url,
-            is_featured=is_featured,
-            is_liked=is_liked,
-            is_saved=is_saved
+        merchants = await self.service_repo.get_merchants_with_users(
+            service.merchant_id for service in services
+        )
+        categories = await self.service_repo.get_categories_by_ids(
+            service.category_id for service in services
         )
+        main_images = await self.service_repo.get_main_images(service_ids)
+        featured_ids = await self.service_repo.get_featured_service_ids(service_ids)
+        
+        # Check user interactions if user_id provided
+        user_interactions = {}
+        if user_id:
+            user_interactions = await self.service_repo.get_user_interaction_types(user_id, service_ids)
+        
+        service_items = []
+        for service in services:
+            merchant_row = merchants.get(service.merchant_id)
+            if not merchant_row:
+                raise NotFoundError(f"Merchant not found for service {service.id}")
+            merchant, merchant_user = merchant_row
+            
+            category = categories.get(service.category_id)
+            if not category:
+                raise NotFoundError(f"Category not found for service {service.id}")
+            
+            interaction_types = user_interactions.get(service.id, set())
+            counts = service_counter_buffer.merged_counts(service)
+            
+            merchant_info = MerchantBasicInfo(
+                id=merchant.id,
+                business_name=merchant.business_name or "",
+                overall_rating=merchant.overall_rating,
+                total_reviews=merchant.total_reviews,
+                location_region=merchant.location_region or "",
+                is_verified=merchant.is_verified,
+                avatar_url=merchant_user.avatar_url if merchant_user else None,
+                avatar_thumbnail_url=merchant_user.avatar_thumbnail_url if merchant_user else None
+            )
+            main_image_url, main_image_thumbnail_url = main_images.get(service.id, (None, None))
+            
+            service_items.append(ServiceListItem(
+                id=service.id,
+                name=service.name,
+                description=service.description,
+                price=service.price,
+                price_type=service.price_type,
+                location_region=service.location_region,
+                overall_rating=service.overall_rating,
+                total_reviews=service.total_reviews,
+                view_count=counts["view_count"],
+                like_count=counts["like_count"],
+                save_count=counts["save_count"],
+                created_at=service.created_at,
+                merchant=merchant_info,
+                category_id=category.id,
+                category_name=category.name,
+                main_image_url=main_image_url,
+                main_image_thumbnail_url=main_image_thumbnail_url,
+                is_featured=service.id in featured_ids,
+                is_liked=InteractionType.LIKE in interaction_types,
+                is_saved=InteractionType.SAVE in interaction_types
+            ))
+        
+        return service_items
     
     async def _validate_search_filters(self, filters: ServiceSearchFilters) -> None:
         """
@@ -466,10 +657,19 @@ class ServiceManager:
             raise ValidationError("min_price cannot be greater than max_price")
         
         # Validate sort options
-        valid_sort_by = ["created_at", "price", "rating", "popularity", "name"]
+        valid_sort_by = ["created_at", "price", "rating", "popularity", "name", "relevance", "distance"]
         if filters.sort_by and filters.sort_by not in valid_sort_by:
             raise ValidationError(f"Invalid sort_by: {filters.sort_by}")
         
+        # Validate geo search point
+        has_point = filters.latitude is not None and filters.longitude is not None
+        if (filters.latitude is None) != (filters.longitude is None):
+            raise ValidationError("latitude and longitude must be provided together")
+        if filters.radius_km is not None and not has_point:
+            raise ValidationError("radius_km requires latitude and longitude")
+        if filters.sort_by == "distance" and not has_point:
+            raise ValidationError("sort_by=distance requires latitude and longitude")
+        
         valid_sort_order = ["asc", "desc"]
         if filters.sort_order and filters.sort_order not in valid_sort_order:
             raise ValidationError(f"Invalid sort_order: {filters.sort_order}")
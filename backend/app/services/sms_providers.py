@@ -0,0 +1,234 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.exceptions import SMSError
+
+logger = logging.getLogger(__name__)
+
+
+class TransientSMSError(SMSError):
+    """SMS provider failure worth retrying (timeouts, provider busy, 5xx)."""
+    pass
+
+
+class BaseSMSProvider(ABC):
+    """Base class for SMS providers."""
+
+    @abstractmethod
+    async def send(self, phone_number: str, message: str) -> None:
+        """
+        Send one SMS.
+
+        Raises:
+            TransientSMSError: If the send may succeed when retried
+            SMSError: If the send failed permanently
+        """
+        pass
+
+    async def send_batch(self, messages: List[Dict[str, str]]) -> None:
+        """
+        Send several SMS in one dispatch.
+
+        Args:
+            messages: Dicts with phone_number and message
+        """
+        for item in messages:
+            await self.send(item["phone_number"], item["message"])
+
+    async def close(self) -> None:
+        """Release provider resources."""
+        pass
+
+
+class EskizSMSProvider(BaseSMSProvider):
+    """
+    eskiz.uz SMS provider.
+
+    Uses one keep-alive HTTP client and one auth token for the whole
+    process; the token is refreshed once when a request gets 401.
+    """
+
+    SENDER = "4546"
+
+    def __init__(self):
+        self.base_url = settings.ESKIZ_BASE_URL
+        self._client: Optional[httpx.AsyncClient] = None
+        self._token: Optional[str] = None
+        self._token_lock = asyncio.Lock()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=settings.SMS_HTTP_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=settings.SMS_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.SMS_HTTP_MAX_CONNECTIONS
+                )
+            )
+        return self._client
+
+    async def _get_auth_token(self, stale_token: Optional[str] = None) -> str:
+        """
+        Get the shared authentication token, logging in if needed.
+
+        Args:
+            stale_token: Token that was just rejected; replaced unless another
+                request already refreshed it
+
+        Returns:
+            str: Authentication token
+
+        Raises:
+            SMSError: If authentication fails
+        """
+        async with self._token_lock:
+            if self._token and self._token != stale_token:
+                return self._token
+
+            try:
+                response = await self._get_client().post(
+                    "/auth/login",
+                    json={
+                        "email": settings.ESKIZ_EMAIL,
+                        "password": settings.ESKIZ_PASSWORD
+                    }
+                )
+            except httpx.RequestError as e:
+                logger.error(f"SMS service request error: {e}")
+                raise TransientSMSError("Failed to connect to SMS service")
+
+            if response.status_code != 200:
+                raise SMSError(f"SMS authentication failed: {response.status_code}")
+
+            token = response.json().get("data", {}).get("token")
+            if not token:
+                raise SMSError("No token received from SMS service")
+
+            self._token = token
+            return token
+
+    async def _post(self, path: str, payload: Dict) -> httpx.Response:
+        """POST with the shared token, refreshing it once on 401."""
+        token = await self._get_auth_token()
+        client = self._get_client()
+
+        try:
+            response = await client.post(path, json=payload, headers={"Authorization": f"Bearer {token}"})
+            if response.status_code == 401:
+                logger.warning("SMS token expired, refreshing token and retrying...")
+                token = await self._get_auth_token(stale_token=token)
+                response = await client.post(path, json=payload, headers={"Authorization": f"Bearer {token}"})
+        except httpx.RequestError as e:
+            logger.error(f"SMS service request error: {e}")
+            raise TransientSMSError("Failed to connect to SMS service")
+
+        if response.status_code >= 500 or response.status_code == 429:
+            raise TransientSMSError(f"SMS service error: {response.status_code}")
+        if response.status_code != 200:
+            logger.error(f"SMS API error: {response.status_code} - {response.text}")
+            raise SMSError(f"SMS service error: {response.status_code}")
+        return response
+
+    def _check_result(self, response: httpx.Response) -> None:
+        """Raise for a 200 response whose body reports a failure."""
+        try:
+            data = response.json()
+        except ValueError:
+            return
+        if not isinstance(data, dict) or "status" not in data:
+            return
+        if data["status"] in ("success", "waiting"):
+            return
+
+        error_msg = str(data.get("message", "Unknown error"))
+        if "waiting" in error_msg.lower():
+            raise TransientSMSError(f"SMS provider busy: {error_msg}")
+        raise SMSError(f"Failed to send SMS: {error_msg}")
+
+    async def send(self, phone_number: str, message: str) -> None:
+        response = await self._post(
+            "/message/sms/send",
+            {
+                # Add country code for Uzbekistan
+                "mobile_phone": f"998{phone_number}",
+                "message": message,
+                "from": self.SENDER
+            }
+        )
+        self._check_result(response)
+
+    async def send_batch(self, messages: List[Dict[str, str]]) -> None:
+        response = await self._post(
+            "/message/sms/send-batch",
+            {
+                "messages": [
+                    {
+                        "user_sms_id": str(index),
+                        "to": f"998{item['phone_number']}",
+                        "text": item["message"]
+                    }
+                    for index, item in enumerate(messages)
+                ],
+                "from": self.SENDER
+            }
+        )
+        self._check_result(response)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class StubSMSProvider(BaseSMSProvider):
+    """
+    Local provider that logs messages instead of sending them.
+
+    Used in development and tests; sent messages are kept in `sent` so tests
+    can inspect them, and `fail_with` makes the next sends raise.
+    """
+
+    def __init__(self):
+        self.sent: List[Dict[str, str]] = []
+        self.fail_with: Optional[Exception] = None
+
+    async def send(self, phone_number: str, message: str) -> None:
+        if self.fail_with is not None:
+            raise self.fail_with
+        logger.info(f"SMS to {phone_number}: {message}")
+        self.sent.append({"phone_number": phone_number, "message": message})
+
+
+_provider: Optional[BaseSMSProvider] = None
+
+
+def get_sms_provider() -> BaseSMSProvider:
+    """
+    Get the process-wide SMS provider.
+
+    The stub provider is used in DEBUG mode or when SMS_PROVIDER is "stub".
+
+    Returns:
+        BaseSMSProvider: Shared provider instance
+    """
+    global _provider
+    if _provider is None:
+        if settings.DEBUG or settings.SMS_PROVIDER == "stub":
+            _provider = StubSMSProvider()
+        else:
+            _provider = EskizSMSProvider()
+    return _provider
+
+
+async def close_sms_provider() -> None:
+    """Close the shared SMS provider's connections."""
+    global _provider
+    if _provider is not None:
+        provider, _provider = _provider, None
+        await provider.close()
@@ -0,0 +1,337 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from redis.exceptions import ResponseError
+
+from app.core.config import settings
+from app.core.exceptions import SMSError
+from app.services.sms_providers import BaseSMSProvider, TransientSMSError, get_sms_provider
+from app.utils.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+# Message kinds: OTP codes are sent one by one, notifications in batches
+KIND_OTP = "otp"
+KIND_NOTIFICATION = "notification"
+
+
+class SMSDeliveryQueue:
+    """
+    Durable SMS delivery queue on a Redis stream.
+
+    enqueue() only appends to the stream, so callers return as soon as the
+    message is stored. Workers (one loop per process, started in the app
+    lifespan) read through a consumer group and send with bounded
+    concurrency. Transient provider errors are retried with exponential
+    backoff; messages that fail permanently or run out of attempts are
+    moved to a dead-letter stream. While a worker is delivering, it
+    re-claims its entries every CLAIM_REFRESH_SECONDS, however long the
+    retries take, so only entries left unacknowledged by a crashed worker
+    go idle long enough (CLAIM_IDLE_MS) to be claimed by another one.
+
+    With SMS_QUEUE_ENABLED off, messages are sent inline instead.
+    """
+
+    STREAM = "sms:outbox"
+    DEAD_LETTER_STREAM = "sms:dead"
+    GROUP = "sms-senders"
+
+    # Milliseconds a delivery may stay unacknowledged before it is reclaimed
+    CLAIM_IDLE_MS = 120_000
+    # Seconds between ownership refreshes of deliveries in flight (well under CLAIM_IDLE_MS)
+    CLAIM_REFRESH_SECONDS = 30
+    # Seconds between scans for abandoned deliveries
+    CLAIM_INTERVAL_SECONDS = 30
+    # Milliseconds a read blocks waiting for new messages
+    BLOCK_MS = 5000
+
+    def __init__(self, provider: Optional[BaseSMSProvider] = None, enabled: Optional[bool] = None):
+        self.enabled = settings.SMS_QUEUE_ENABLED if enabled is None else enabled
+        self.concurrency = settings.SMS_QUEUE_CONCURRENCY
+        self.max_attempts = settings.SMS_MAX_ATTEMPTS
+        self.retry_base_delay = settings.SMS_RETRY_BASE_DELAY_SECONDS
+        self.batch_size = settings.SMS_BATCH_SIZE
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+
+        self._provider = provider
+        self._redis_client = RedisClient()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._inflight: Set[asyncio.Task] = set()
+        # Stream entry IDs being delivered by this worker
+        self._owned_ids: Set[str] = set()
+        # Where the next XAUTOCLAIM resumes; "0-0" starts a new pass over the pending entries
+        self._claim_cursor = "0-0"
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def provider(self) -> BaseSMSProvider:
+        return self._provider or get_sms_provider()
+
+    async def enqueue(self, phone_number: str, message: str, kind: str = KIND_NOTIFICATION) -> None:
+        """
+        Queue one SMS for delivery.
+
+        Falls back to sending inline if the queue is disabled or Redis is
+        unavailable, so the message is never silently dropped.
+
+        Args:
+            phone_number: 9-digit phone number (Uzbekistan format)
+            message: Message text
+            kind: KIND_OTP or KIND_NOTIFICATION
+
+        Raises:
+            SMSError: If the message could neither be queued nor sent
+        """
+        if self.enabled:
+            try:
+                redis = await self._redis_client.get_redis()
+                await redis.xadd(self.STREAM, self._fields(phone_number, message, kind))
+                return
+            except Exception as e:
+                logger.warning(f"SMS queue unavailable, sending inline: {str(e)}")
+
+        await self.provider.send(phone_number, message)
+
+    async def enqueue_many(self, messages: List[Dict[str, str]]) -> int:
+        """
+        Queue notifications for many recipients in one round-trip.
+
+        Args:
+            messages: Dicts with phone_number and message
+
+        Returns:
+            int: Number of messages queued (or sent inline)
+        """
+        if not messages:
+            return 0
+
+        if self.enabled:
+            try:
+                redis = await self._redis_client.get_redis()
+                pipe = redis.pipeline(transaction=False)
+                for item in messages:
+                    pipe.xadd(self.STREAM, self._fields(item["phone_number"], item["message"], KIND_NOTIFICATION))
+                await pipe.execute()
+                return len(messages)
+            except Exception as e:
+                logger.warning(f"SMS queue unavailable, sending inline: {str(e)}")
+
+        for start in range(0, len(messages), self.batch_size):
+            await self.provider.send_batch(messages[start:start + self.batch_size])
+        return len(messages)
+
+    def start(self) -> None:
+        """Start the delivery loop."""
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+        self._refresh_task = asyncio.create_task(self._run_claim_refresh())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop reading new messages and wait briefly for deliveries in flight.
+
+        Unfinished deliveries stay pending in the stream and are reclaimed
+        by a worker later.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._inflight:
+            _, pending = await asyncio.wait(self._inflight, timeout=timeout)
+            for task in pending:
+                task.cancel()
+
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _run(self) -> None:
+        """Delivery loop; Redis errors are logged and retried."""
+        next_claim_at = 0.0
+        while True:
+            try:
+                redis = await self._redis_client.get_redis()
+                await self._ensure_group(redis)
+
+                # Keep the number of deliveries in flight bounded
+                while len(self._inflight) >= self.concurrency:
+                    await asyncio.wait(self._inflight, return_when=asyncio.FIRST_COMPLETED)
+
+                entries = []
+                if time.monotonic() >= next_claim_at:
+                    entries = await self._claim_idle(redis)
+                    # Finish an unfinished pass before waiting for the next one
+                    if self._claim_cursor == "0-0":
+                        next_claim_at = time.monotonic() + self.CLAIM_INTERVAL_SECONDS
+
+                if not entries:
+                    response = await redis.xreadgroup(
+                        self.GROUP, self.consumer, {self.STREAM: ">"},
+                        count=self.batch_size, block=self.BLOCK_MS
+                    )
+                    entries = response[0][1] if response else []
+
+                self._dispatch([self._decode(entry_id, fields) for entry_id, fields in entries])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"SMS delivery loop error: {str(e)}")
+                await asyncio.sleep(1)
+
+    async def _claim_idle(self, redis) -> List[Tuple[str, Dict[str, str]]]:
+        """
+        Claim a batch of deliveries abandoned by other workers.
+
+        Each call resumes from the cursor the previous XAUTOCLAIM returned,
+        so a pending list longer than the batch size is walked to the end
+        instead of rescanning its head; Redis returns "0-0" once a pass is
+        complete.
+        """
+        claimed = await redis.xautoclaim(
+            self.STREAM, self.GROUP, self.consumer,
+            min_idle_time=self.CLAIM_IDLE_MS, start_id=self._claim_cursor, count=self.batch_size
+        )
+        cursor = claimed[0]
+        self._claim_cursor = cursor.decode() if isinstance(cursor, bytes) else cursor
+        return claimed[1]
+
+    async def _run_claim_refresh(self) -> None:
+        """Ownership refresh loop; Redis errors are logged and retried next tick."""
+        while True:
+            await asyncio.sleep(self.CLAIM_REFRESH_SECONDS)
+            try:
+                await self._refresh_claims()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"SMS claim refresh error: {str(e)}")
+
+    async def _refresh_claims(self) -> None:
+        """
+        Reset the idle time of the entries being delivered by this worker.
+
+        XCLAIM with JUSTID only updates ownership and idle time, so retries
+        and provider timeouts never let another worker's XAUTOCLAIM take an
+        entry (and send it again) while this worker still holds it.
+        """
+        if not self._owned_ids:
+            return
+        redis = await self._redis_client.get_redis()
+        await redis.xclaim(
+            self.STREAM, self.GROUP, self.consumer,
+            min_idle_time=0, message_ids=list(self._owned_ids), justid=True
+        )
+
+    def _dispatch(self, entries: List[Tuple[str, Dict[str, str]]]) -> None:
+        """Start deliveries: OTP codes one by one, notifications in batches."""
+        notifications = [entry for entry in entries if entry[1].get("kind") != KIND_OTP]
+        groups = [[entry] for entry in entries if entry[1].get("kind") == KIND_OTP]
+        groups += [
+            notifications[start:start + self.batch_size]
+            for start in range(0, len(notifications), self.batch_size)
+        ]
+
+        for group in groups:
+            task = asyncio.create_task(self._deliver(group))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _deliver(self, entries: List[Tuple[str, Dict[str, str]]]) -> bool:
+        """
+        Send one message or batch, retrying transient errors with backoff.
+
+        Returns:
+            True if delivered, False if dead-lettered
+        """
+        ids = [entry_id for entry_id, _ in entries]
+        # Kept claimed by _refresh_claims() until acknowledged or dead-lettered
+        self._owned_ids.update(ids)
+        try:
+            return await self._send_with_retries(entries)
+        finally:
+            self._owned_ids.difference_update(ids)
+
+    async def _send_with_retries(self, entries: List[Tuple[str, Dict[str, str]]]) -> bool:
+        """Delivery attempts of _deliver()."""
+        messages = [{"phone_number": fields["phone_number"], "message": fields["message"]} for _, fields in entries]
+        error: Optional[Exception] = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with self._semaphore:
+                    if len(messages) == 1:
+                        await self.provider.send(messages[0]["phone_number"], messages[0]["message"])
+                    else:
+                        await self.provider.send_batch(messages)
+                await self._acknowledge(entries)
+                return True
+            except TransientSMSError as e:
+                error = e
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(self.retry_base_delay * 2 ** (attempt - 1))
+            except SMSError as e:
+                error = e
+                break
+            except Exception as e:
+                # Unknown failures are treated as transient
+                error = e
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(self.retry_base_delay * 2 ** (attempt - 1))
+
+        logger.error(f"SMS delivery failed for {len(entries)} message(s), dead-lettering: {str(error)}")
+        await self._dead_letter(entries, str(error))
+        return False
+
+    async def _acknowledge(self, entries: List[Tuple[str, Dict[str, str]]]) -> None:
+        redis = await self._redis_client.get_redis()
+        ids = [entry_id for entry_id, _ in entries]
+        pipe = redis.pipeline(transaction=True)
+        pipe.xack(self.STREAM, self.GROUP, *ids)
+        pipe.xdel(self.STREAM, *ids)
+        await pipe.execute()
+
+    async def _dead_letter(self, entries: List[Tuple[str, Dict[str, str]]], error: str) -> None:
+        redis = await self._redis_client.get_redis()
+        ids = [entry_id for entry_id, _ in entries]
+        pipe = redis.pipeline(transaction=True)
+        for entry_id, fields in entries:
+            pipe.xadd(self.DEAD_LETTER_STREAM, {**fields, "source_id": entry_id, "error": error[:500]})
+        pipe.xack(self.STREAM, self.GROUP, *ids)
+        pipe.xdel(self.STREAM, *ids)
+        await pipe.execute()
+
+    async def _ensure_group(self, redis) -> None:
+        try:
+            await redis.xgroup_create(self.STREAM, self.GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    @staticmethod
+    def _fields(phone_number: str, message: str, kind: str) -> Dict[str, str]:
+        return {"phone_number": phone_number, "message": message, "kind": kind}
+
+    @staticmethod
+    def _decode(entry_id, fields) -> Tuple[str, Dict[str, str]]:
+        def text(value):
+            return value.decode() if isinstance(value, bytes) else value
+        return text(entry_id), {text(key): text(value) for key, value in fields.items()}
+
+
+# Global instance
+sms_queue = SMSDeliveryQueue()
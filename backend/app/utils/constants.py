@@ -22,8 +22,10 @@ SERVICE_SORT_OPTIONS = {
     "created_at": "Created Date",
     "price": "Price",
     "rating": "Rating",
-    "popularity": "Popularity (views + likes)",
-    "name": "Name"
+    "popularity": "Popularity (trending score)",
+    "name": "Name",
+    "relevance": "Relevance (text search)",
+    "distance": "Distance (nearest first)"
 }
 
 # Valid interaction types
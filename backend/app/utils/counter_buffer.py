@@ -0,0 +1,209 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ("view_count", "like_count", "save_count", "share_count")
+
+
+class ServiceCounterBuffer:
+    """
+    Write-behind buffer for service interaction counters.
+
+    Counter deltas are accumulated in process memory (per worker) and
+    flushed to the services table periodically in batched updates, so
+    requests that bump counters never touch the hot service rows. Reads
+    merge the unflushed deltas to stay fresh.
+    """
+
+    # Rows per UPDATE statement when flushing
+    FLUSH_BATCH_SIZE = 500
+
+    def __init__(self):
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._flushing: Dict[str, Dict[str, int]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._session_factory: Optional[Callable[[], AsyncSession]] = None
+
+    def add(self, service_id: str, counter_field: str, delta: int = 1) -> None:
+        """
+        Buffer a counter change for a service.
+
+        Args:
+            service_id: 9-digit numeric string ID of the service
+            counter_field: One of view_count, like_count, save_count, share_count
+            delta: Amount to add (negative to decrement)
+        """
+        if counter_field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter field: {counter_field}")
+
+        deltas = self._pending.setdefault(str(service_id), dict.fromkeys(COUNTER_FIELDS, 0))
+        deltas[counter_field] += delta
+
+    def get_pending(self, service_id: str) -> Dict[str, int]:
+        """
+        Get unflushed deltas for a service (including a flush in progress).
+
+        Args:
+            service_id: 9-digit numeric string ID of the service
+
+        Returns:
+            Dict mapping counter field to pending delta
+        """
+        totals = dict.fromkeys(COUNTER_FIELDS, 0)
+        for source in (self._flushing, self._pending):
+            deltas = source.get(str(service_id))
+            if deltas:
+                for field, delta in deltas.items():
+                    totals[field] += delta
+        return totals
+
+    def merged_counts(self, service) -> Dict[str, int]:
+        """
+        Get a service's counters with unflushed deltas applied.
+
+        The model instance is not modified, so the merged values are never
+        written back as absolute values.
+
+        Args:
+            service: Service model instance
+
+        Returns:
+            Dict mapping counter field to its current value (floored at 0)
+        """
+        pending = self.get_pending(service.id)
+        return {
+            field: max((getattr(service, field) or 0) + pending[field], 0)
+            for field in COUNTER_FIELDS
+        }
+
+    async def flush(self, db: AsyncSession) -> int:
+        """
+        Write all buffered deltas to the services table.
+
+        Args:
+            db: Database session to flush with
+
+        Returns:
+            Number of services updated
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            self._flushing, self._pending = self._pending, {}
+            rows = [
+                {"service_id": service_id, **deltas}
+                for service_id, deltas in self._flushing.items()
+                if any(deltas.values())
+            ]
+
+            try:
+                for start in range(0, len(rows), self.FLUSH_BATCH_SIZE):
+                    await self._write_batch(db, rows[start:start + self.FLUSH_BATCH_SIZE])
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                # Put the deltas back so they are retried on the next flush
+                for service_id, deltas in self._flushing.items():
+                    for field, delta in deltas.items():
+                        if delta:
+                            self.add(service_id, field, delta)
+                raise
+            finally:
+                self._flushing = {}
+
+            return len(rows)
+
+    async def _write_batch(self, db: AsyncSession, rows: List[Dict[str, int]]) -> None:
+        """
+        Apply one batch of deltas.
+
+        PostgreSQL gets a single multi-row UPDATE ... FROM (VALUES ...); other
+        dialects get one executemany UPDATE.
+
+        Args:
+            db: Database session
+            rows: Dicts with service_id and one delta per counter field
+        """
+        if not rows:
+            return
+
+        if db.get_bind().dialect.name == "postgresql":
+            params = {}
+            values = []
+            for index, row in enumerate(rows):
+                params[f"id_{index}"] = row["service_id"]
+                placeholders = [f":id_{index}"]
+                for field in COUNTER_FIELDS:
+                    params[f"{field}_{index}"] = row[field]
+                    placeholders.append(f"CAST(:{field}_{index} AS INTEGER)")
+                values.append(f"({', '.join(placeholders)})")
+
+            assignments = ", ".join(
+                f"{field} = GREATEST(s.{field} + v.{field}, 0)" for field in COUNTER_FIELDS
+            )
+            statement = text(
+                f"UPDATE services AS s SET {assignments} "
+                f"FROM (VALUES {', '.join(values)}) AS v(id, {', '.join(COUNTER_FIELDS)}) "
+                f"WHERE s.id = v.id"
+            )
+            await db.execute(statement, params)
+            return
+
+        assignments = ", ".join(
+            f"{field} = CASE WHEN {field} + :{field} < 0 THEN 0 ELSE {field} + :{field} END"
+            for field in COUNTER_FIELDS
+        )
+        statement = text(f"UPDATE services SET {assignments} WHERE id = :service_id")
+        await db.execute(statement, rows)
+
+    def start(self, session_factory: Callable[[], AsyncSession], interval: Optional[int] = None) -> None:
+        """
+        Start the periodic background flush.
+
+        Args:
+            session_factory: Callable returning a new AsyncSession
+            interval: Flush interval in seconds (defaults to settings)
+        """
+        if self._task and not self._task.done():
+            return
+
+        self._session_factory = session_factory
+        interval = interval or settings.COUNTER_FLUSH_INTERVAL_SECONDS
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        """Stop the background flush and write any remaining deltas."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._session_factory and self._pending:
+            async with self._session_factory() as db:
+                await self.flush(db)
+
+    async def _run(self, interval: int) -> None:
+        """Flush loop; errors are logged and the deltas retried next tick."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with self._session_factory() as db:
+                    await self.flush(db)
+            except Exception as e:
+                logger.error(f"Failed to flush service counters: {str(e)}")
+
+
+# Global instance
+service_counter_buffer = ServiceCounterBuffer()
@@ -0,0 +1,60 @@
+"""Utility functions for opaque keyset pagination cursors."""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+
+from app.core.exceptions import ValidationError
+
+
+def encode_cursor(sort_by: str, sort_order: str, sort_key: Any, last_id: str) -> str:
+    """
+    Encode the position after the last returned row as an opaque cursor.
+
+    Args:
+        sort_by: Sort field the page was ordered by
+        sort_order: Sort order ("asc" or "desc")
+        sort_key: Value of the sort key for the last row
+        last_id: ID of the last row (tie-breaker)
+
+    Returns:
+        URL-safe cursor string
+    """
+    if isinstance(sort_key, datetime):
+        key = {"dt": sort_key.isoformat()}
+    else:
+        key = {"v": sort_key}
+
+    payload = {"s": sort_by, "o": sort_order, "k": key, "id": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, str]:
+    """
+    Decode a cursor produced by encode_cursor for the same sort.
+
+    Args:
+        cursor: Cursor string from a previous response
+        sort_by: Sort field of the current request
+        sort_order: Sort order of the current request
+
+    Returns:
+        Tuple of (sort_key, last_id)
+
+    Raises:
+        ValidationError: If the cursor is malformed or was issued for a different sort
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        key = payload["k"]
+        sort_key = datetime.fromisoformat(key["dt"]) if "dt" in key else key["v"]
+        last_id = str(payload["id"])
+    except (ValueError, TypeError, KeyError):
+        raise ValidationError("Invalid cursor")
+
+    if payload.get("s") != sort_by or payload.get("o") != sort_order:
+        raise ValidationError("Cursor does not match the requested sort")
+
+    return sort_key, last_id
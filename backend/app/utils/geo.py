@@ -0,0 +1,55 @@
+"""Utility functions for geographic distance calculations."""
+import math
+from typing import Tuple
+
+# Mean Earth radius in kilometres
+EARTH_RADIUS_KM = 6371.0088
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Get the latitude/longitude box containing a circle on the Earth's surface.
+
+    Used as an index-friendly prefilter before the exact haversine check.
+
+    Args:
+        latitude: Centre latitude in degrees
+        longitude: Centre longitude in degrees
+        radius_km: Circle radius in kilometres
+
+    Returns:
+        Tuple of (min_lat, max_lat, min_lng, max_lng) in degrees
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(latitude - lat_delta, -90.0)
+    max_lat = min(latitude + lat_delta, 90.0)
+
+    # Longitude degrees shrink towards the poles; near a pole the box spans all longitudes
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-12:
+        return min_lat, max_lat, -180.0, 180.0
+
+    lng_delta = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+    return min_lat, max_lat, longitude - lng_delta, longitude + lng_delta
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Great-circle distance between two points.
+
+    Args:
+        lat1: First point latitude in degrees
+        lng1: First point longitude in degrees
+        lat2: Second point latitude in degrees
+        lng2: Second point longitude in degrees
+
+    Returns:
+        Distance in kilometres
+    """
+    d_lat = math.radians(lat2 - lat1) / 2
+    d_lng = math.radians(lng2 - lng1) / 2
+    a = (
+        math.sin(d_lat) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(d_lng) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
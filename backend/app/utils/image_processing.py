@@ -0,0 +1,235 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+from PIL import ExifTags, Image as PILImage, ImageOps
+
+# Variant name -> longest side in pixels. Thumbnails are sized for list
+# cards on 3x screens; medium for full-width views.
+IMAGE_VARIANTS: Dict[str, int] = {
+    "thumbnail": 320,
+    "medium": 1080,
+}
+VARIANT_CONTENT_TYPE = "image/webp"
+WEBP_QUALITY = 80
+
+# JPEG segments kept when stripping metadata: JFIF (APP0), ICC profile (APP2)
+# and Adobe color transform (APP14). Other APPn segments (EXIF/XMP in APP1,
+# IPTC in APP13, ...) and comments are dropped.
+JPEG_KEPT_APP_MARKERS = (0xE0, 0xE2, 0xEE)
+# PNG chunks that only carry metadata
+PNG_METADATA_CHUNKS = (b"eXIf", b"tEXt", b"zTXt", b"iTXt", b"tIME")
+# WebP chunks that only carry metadata, and their VP8X flag bits
+WEBP_METADATA_CHUNKS = {b"EXIF": 0x08, b"XMP ": 0x04}
+
+
+def strip_metadata(data: bytes, content_type: str) -> bytes:
+    """
+    Remove EXIF, GPS, XMP and text metadata from an image without re-encoding it.
+
+    The pixel data is copied unchanged. A JPEG keeps a minimal EXIF block
+    with only its orientation, so it is still displayed the right way up.
+    Runs in a worker process; keep it free of app state.
+
+    Args:
+        data: Original image bytes
+        content_type: Detected MIME type (image/jpeg, image/png or image/webp)
+
+    Returns:
+        Image bytes without metadata
+
+    Raises:
+        ValueError: If the file structure is malformed
+    """
+    if content_type == "image/jpeg":
+        return _strip_jpeg(data)
+    if content_type == "image/png":
+        return _strip_png(data)
+    if content_type == "image/webp":
+        return _strip_webp(data)
+    raise ValueError(f"Cannot strip metadata from {content_type}")
+
+
+def _strip_jpeg(data: bytes) -> bytes:
+    with PILImage.open(BytesIO(data)) as image:
+        orientation = image.getexif().get(ExifTags.Base.Orientation)
+
+    segments = []
+    pos = 2
+    while True:
+        if pos + 4 > len(data) or data[pos] != 0xFF:
+            raise ValueError("Malformed JPEG segment")
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            pos += 1
+            continue
+        if marker == 0xDA:
+            # Start of scan: the rest is entropy-coded image data
+            break
+        length = int.from_bytes(data[pos + 2:pos + 4], "big")
+        end = pos + 2 + length
+        if length < 2 or end > len(data):
+            raise ValueError("Malformed JPEG segment")
+        is_metadata = marker == 0xFE or (0xE0 <= marker <= 0xEF and marker not in JPEG_KEPT_APP_MARKERS)
+        if not is_metadata:
+            segments.append(data[pos:end])
+        pos = end
+
+    if orientation and orientation != 1:
+        exif = PILImage.Exif()
+        exif[ExifTags.Base.Orientation] = orientation
+        payload = exif.tobytes()
+        if not payload.startswith(b"Exif\x00\x00"):
+            payload = b"Exif\x00\x00" + payload
+        app1 = b"\xff\xe1" + (len(payload) + 2).to_bytes(2, "big") + payload
+        # JFIF requires its APP0 segment to come first
+        index = 1 if segments and segments[0][1] == 0xE0 else 0
+        segments.insert(index, app1)
+
+    return data[:2] + b"".join(segments) + data[pos:]
+
+
+def _strip_png(data: bytes) -> bytes:
+    output = bytearray(data[:8])
+    pos = 8
+    while True:
+        if pos + 12 > len(data):
+            raise ValueError("Malformed PNG chunk")
+        length = int.from_bytes(data[pos:pos + 4], "big")
+        chunk_type = data[pos + 4:pos + 8]
+        end = pos + 12 + length
+        if end > len(data):
+            raise ValueError("Malformed PNG chunk")
+        if chunk_type not in PNG_METADATA_CHUNKS:
+            output += data[pos:end]
+        pos = end
+        if chunk_type == b"IEND":
+            return bytes(output)
+
+
+def _strip_webp(data: bytes) -> bytes:
+    output = bytearray(data[:12])
+    pos = 12
+    vp8x_flags_at = None
+    cleared_flags = 0
+    while pos < len(data):
+        if pos + 8 > len(data):
+            raise ValueError("Malformed WebP chunk")
+        fourcc = data[pos:pos + 4]
+        size = int.from_bytes(data[pos + 4:pos + 8], "little")
+        # Chunks are padded to an even size
+        end = pos + 8 + size + (size & 1)
+        if end > len(data):
+            raise ValueError("Malformed WebP chunk")
+        if fourcc in WEBP_METADATA_CHUNKS:
+            cleared_flags |= WEBP_METADATA_CHUNKS[fourcc]
+        else:
+            if fourcc == b"VP8X":
+                vp8x_flags_at = len(output) + 8
+            output += data[pos:end]
+        pos = end
+
+    if vp8x_flags_at is not None:
+        output[vp8x_flags_at] &= ~cleared_flags & 0xFF
+    output[4:8] = (len(output) - 8).to_bytes(4, "little")
+    return bytes(output)
+
+
+def render_variants(data: bytes, variants: Tuple[Tuple[str, int], ...], quality: int = WEBP_QUALITY) -> Dict[str, bytes]:
+    """
+    Render resized WebP variants of an image.
+
+    The EXIF orientation is applied to the pixels and all metadata (EXIF,
+    GPS, ICC comments) is dropped. Images are never upscaled. Runs in a
+    worker process; keep it free of app state.
+
+    Args:
+        data: Original image bytes
+        variants: (name, longest side in pixels) pairs
+        quality: WebP quality
+
+    Returns:
+        Dict mapping variant name to WebP bytes
+
+    Raises:
+        PIL.UnidentifiedImageError: If the data is not a decodable image
+    """
+    with PILImage.open(BytesIO(data)) as source:
+        source.load()
+        image = ImageOps.exif_transpose(source)
+
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = image.mode in ("LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    rendered = {}
+    for name, size in variants:
+        variant = image.copy()
+        variant.thumbnail((size, size), PILImage.Resampling.LANCZOS)
+        # Metadata is only written if present in info
+        variant.info = {}
+        buffer = BytesIO()
+        variant.save(buffer, format="WEBP", quality=quality, method=4)
+        rendered[name] = buffer.getvalue()
+    return rendered
+
+
+class ImageVariantProcessor:
+    """
+    Renders image variants in a process pool.
+
+    Decoding and resizing are CPU-bound, so they run outside the event
+    loop and outside the GIL. Workers are started with "spawn" so they do
+    not inherit the server's threads and event loop.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def render(self, data: bytes) -> Dict[str, bytes]:
+        """
+        Render every configured variant of an image.
+
+        Args:
+            data: Original image bytes
+
+        Returns:
+            Dict mapping variant name to WebP bytes
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), render_variants, data, tuple(IMAGE_VARIANTS.items())
+        )
+
+    async def strip_metadata(self, data: bytes, content_type: str) -> bytes:
+        """
+        Remove the metadata of an image (see strip_metadata()).
+
+        Args:
+            data: Original image bytes
+            content_type: Detected MIME type
+
+        Returns:
+            Image bytes without metadata
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), strip_metadata, data, content_type)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker processes on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
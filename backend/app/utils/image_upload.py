@@ -0,0 +1,218 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from typing import Dict, Optional
+
+from fastapi import UploadFile
+from PIL.Image import DecompressionBombError
+
+from app.core.config import settings
+from app.utils.image_processing import ImageVariantProcessor, VARIANT_CONTENT_TYPE
+from app.utils.s3_client import S3ImageManager, s3_image_manager
+
+logger = logging.getLogger(__name__)
+
+# Magic bytes of the accepted image formats
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+)
+
+
+def detect_image_type(header: bytes) -> Optional[str]:
+    """
+    Detect an image's MIME type from its first bytes.
+
+    Args:
+        header: At least the first 12 bytes of the file
+
+    Returns:
+        MIME type, or None if the format is not accepted
+    """
+    for signature, content_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return content_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class UploadedImage:
+    """Result of an image upload."""
+
+    def __init__(self, s3_url: str, content_type: str, size: int, file_name: Optional[str]):
+        self.s3_url = s3_url
+        self.content_type = content_type
+        self.size = size
+        self.file_name = file_name
+        # Variant name -> URL of the resized WebP copy
+        self.variant_urls: Dict[str, str] = {}
+
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return self.variant_urls.get("thumbnail")
+
+    @property
+    def medium_url(self) -> Optional[str]:
+        return self.variant_urls.get("medium")
+
+
+class ImageUploadService:
+    """
+    Non-blocking image uploads to S3.
+
+    The uploaded file stays in Starlette's spooled temporary file; it is
+    validated by reading it in chunks (format from the magic bytes, size
+    counted as it is read, stopping as soon as the limit is exceeded) and
+    then uploaded to S3 with its metadata (EXIF, GPS, XMP) stripped. The
+    blocking boto3 calls run in a bounded thread pool, so a slow S3 request
+    never stalls the event loop. Metadata stripping and the resized WebP
+    variants run in a process pool.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        s3_manager: Optional[S3ImageManager] = None,
+        max_workers: Optional[int] = None,
+        processor: Optional[ImageVariantProcessor] = None
+    ):
+        self.s3 = s3_manager or s3_image_manager
+        self.max_workers = max_workers or settings.S3_IO_MAX_WORKERS
+        self.processor = processor or ImageVariantProcessor(settings.IMAGE_PROCESS_WORKERS)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def run_in_s3_pool(self, func, *args, **kwargs):
+        """Run a blocking S3 call in the S3 I/O thread pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="s3-io")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def validate(self, file: UploadFile) -> UploadedImage:
+        """
+        Validate an uploaded image without loading it into memory.
+
+        The file is rewound afterwards.
+
+        Args:
+            file: Uploaded file
+
+        Returns:
+            UploadedImage without s3_url, with the detected content type and size
+
+        Raises:
+            ValueError: If the type or size constraints are violated
+        """
+        declared_type = file.content_type or 'application/octet-stream'
+        if declared_type not in self.s3.ALLOWED_CONTENT_TYPES:
+            raise ValueError(
+                f"Content type {declared_type} not allowed. Allowed types: {self.s3.ALLOWED_CONTENT_TYPES}"
+            )
+
+        await file.seek(0)
+        size = 0
+        content_type = None
+        while True:
+            chunk = await file.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            if size == 0:
+                content_type = detect_image_type(chunk[:12])
+                if content_type is None:
+                    raise ValueError("File content is not a JPEG, PNG or WebP image")
+            size += len(chunk)
+            if size > self.s3.MAX_IMAGE_SIZE:
+                raise ValueError(f"File size exceeds maximum of {self.s3.MAX_IMAGE_SIZE} bytes")
+
+        if size < self.s3.MIN_IMAGE_SIZE:
+            raise ValueError(f"File size {size} is below minimum of {self.s3.MIN_IMAGE_SIZE} bytes")
+
+        await file.seek(0)
+        return UploadedImage(s3_url="", content_type=content_type, size=size, file_name=file.filename)
+
+    async def upload(
+        self,
+        file: UploadFile,
+        image_type: str,
+        related_id: str,
+        variants: bool = False
+    ) -> UploadedImage:
+        """
+        Validate an uploaded image, strip its metadata and upload it to S3.
+
+        Args:
+            file: Uploaded file
+            image_type: Logical image folder/type (service_image, user_avatar, ...)
+            related_id: ID of the related entity
+            variants: Also render and upload the resized WebP variants
+
+        Returns:
+            UploadedImage with the S3 URL (and variant URLs)
+
+        Raises:
+            ValueError: If the type or size constraints are violated or the file is not a valid image
+            Exception: If the S3 upload fails
+        """
+        image = await self.validate(file)
+        s3_key = self.s3.build_key(image_type, related_id, image.content_type)
+
+        # Bounded by MAX_IMAGE_SIZE, checked in validate()
+        data = await file.read()
+        await file.seek(0)
+        rendered: Dict[str, bytes] = {}
+        try:
+            if variants:
+                rendered = await self.processor.render(data)
+            # The original is public too, so it must not leak the uploader's location
+            data = await self.processor.strip_metadata(data, image.content_type)
+        except (OSError, SyntaxError, ValueError, DecompressionBombError) as e:
+            raise ValueError(f"File content is not a valid image: {str(e)}")
+        image.size = len(data)
+
+        uploads = [
+            self.run_in_s3_pool(
+                self.s3.upload_fileobj,
+                fileobj=BytesIO(data),
+                file_name=file.filename,
+                content_type=image.content_type,
+                image_type=image_type,
+                related_id=related_id,
+                s3_key=s3_key
+            )
+        ]
+        for name, body in rendered.items():
+            uploads.append(self.run_in_s3_pool(
+                self.s3.upload_bytes, body, self.s3.variant_key(s3_key, name), VARIANT_CONTENT_TYPE
+            ))
+
+        urls = await asyncio.gather(*uploads)
+        image.s3_url = urls[0]
+        image.variant_urls = dict(zip(rendered.keys(), urls[1:]))
+        return image
+
+    async def delete(self, s3_url: str) -> bool:
+        """
+        Delete an image from S3.
+
+        Args:
+            s3_url: Full S3 URL of the image
+
+        Returns:
+            True if deleted successfully, False otherwise
+        """
+        return await self.run_in_s3_pool(self.s3.delete_image, s3_url)
+
+    def shutdown(self) -> None:
+        """Stop the S3 I/O threads and image workers after pending calls finish."""
+        self.processor.shutdown()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# Global instance
+image_upload_service = ImageUploadService()
@@ -0,0 +1,99 @@
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.redis_client import RedisClient
+
+# KEYS: otp key, attempts key
+# ARGV: code, code TTL seconds, max sends per window, window seconds
+ISSUE_OTP_SCRIPT = """
+local attempts = tonumber(redis.call('GET', KEYS[2]) or '0')
+if attempts >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+return 1
+"""
+
+# KEYS: otp key, attempts key
+# ARGV: code
+CONSUME_OTP_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if not stored or stored ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+return 1
+"""
+
+
+class OTPStore:
+    """
+    OTP codes and send counters in Redis.
+    
+    Issuing and consuming a code are Lua scripts, so each is a single
+    round-trip and atomic: concurrent sends cannot exceed the attempt limit
+    and a code can only be consumed once.
+    """
+    
+    # Window of the per-phone send limit in seconds
+    ATTEMPTS_WINDOW_SECONDS = 3600
+    
+    def __init__(self, redis_client: Optional[RedisClient] = None):
+        self.redis_client = redis_client or RedisClient()
+        self._issue_script = None
+        self._consume_script = None
+    
+    async def issue(self, phone_number: str, code: str) -> bool:
+        """
+        Store a new code for a phone number and count the send.
+        
+        Args:
+            phone_number: Normalized phone number
+            code: OTP code to store
+            
+        Returns:
+            True if stored, False if the send limit is reached
+        """
+        if self._issue_script is None:
+            redis = await self.redis_client.get_redis()
+            self._issue_script = redis.register_script(ISSUE_OTP_SCRIPT)
+        
+        issued = await self._issue_script(
+            keys=[self._otp_key(phone_number), self._attempts_key(phone_number)],
+            args=[
+                code,
+                settings.OTP_EXPIRE_MINUTES * 60,
+                settings.OTP_MAX_ATTEMPTS,
+                self.ATTEMPTS_WINDOW_SECONDS
+            ]
+        )
+        return bool(issued)
+    
+    async def consume(self, phone_number: str, code: str) -> bool:
+        """
+        Check a code and, if it matches, delete it and reset the send counter.
+        
+        Args:
+            phone_number: Normalized phone number
+            code: OTP code entered by the user
+            
+        Returns:
+            True if the code matched, False if it is wrong or expired
+        """
+        if self._consume_script is None:
+            redis = await self.redis_client.get_redis()
+            self._consume_script = redis.register_script(CONSUME_OTP_SCRIPT)
+        
+        consumed = await self._consume_script(
+            keys=[self._otp_key(phone_number), self._attempts_key(phone_number)],
+            args=[code]
+        )
+        return bool(consumed)
+    
+    def _otp_key(self, phone_number: str) -> str:
+        return f"otp:{phone_number}"
+    
+    def _attempts_key(self, phone_number: str) -> str:
+        return f"otp_attempts:{phone_number}"
@@ -1,20 +1,71 @@
 import json
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Union
 import redis.asyncio as redis
 
 from app.core.config import settings
 
+# Connection pool shared by every RedisClient in the process
+_pool: Optional[redis.BlockingConnectionPool] = None
+
+
+def init_redis_pool() -> redis.BlockingConnectionPool:
+    """
+    Create the shared Redis connection pool (idempotent).
+    
+    The pool holds at most REDIS_POOL_MAX_CONNECTIONS connections; when all
+    are busy, callers wait up to REDIS_POOL_TIMEOUT_SECONDS for one instead
+    of opening more.
+    
+    Returns:
+        redis.BlockingConnectionPool: Shared pool
+    """
+    global _pool
+    if _pool is None:
+        _pool = redis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_POOL_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT_SECONDS
+        )
+    return _pool
+
+
+async def close_redis_pool() -> None:
+    """Disconnect and drop the shared Redis connection pool."""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.disconnect()
+
+
+def redis_pool_stats() -> Dict[str, Any]:
+    """
+    Get connection counts of the shared Redis pool.
+    
+    Returns:
+        Dict with max, in-use and idle connection counts (zeros before the
+        pool is created)
+    """
+    if _pool is None:
+        return {"max_connections": settings.REDIS_POOL_MAX_CONNECTIONS, "in_use": 0, "idle": 0}
+    return {
+        "max_connections": _pool.max_connections,
+        "in_use": len(_pool._in_use_connections),
+        "idle": len(_pool._available_connections)
+    }
+
 
 class RedisClient:
-    """Async Redis client wrapper."""
+    """Async Redis client wrapper on the shared connection pool."""
     
     def __init__(self):
         self._redis: Optional[redis.Redis] = None
     
     async def get_redis(self) -> redis.Redis:
         """Get Redis connection."""
-        if not self._redis:
-            self._redis = redis.from_url(settings.REDIS_URL)
+        pool = init_redis_pool()
+        # Rebind if the shared pool was recreated after close_redis_pool()
+        if not self._redis or self._redis.connection_pool is not pool:
+            self._redis = redis.Redis(connection_pool=pool)
         return self._redis
     
     async def get(self, key: str) -> Optional[str]:
@@ -152,6 +203,7 @@ class RedisClient:
             return False
     
     async def close(self):
-        """Close Redis connection."""
+        """Release the client; the shared pool stays open (see close_redis_pool)."""
         if self._redis:
-            await self._redis.close()
\ No newline at end of file
+            await self._redis.aclose()
+            self._redis = None
\ No newline at end of file
@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+# Invalidation tags for cached public catalogue responses
+TAG_SERVICES = "services"
+TAG_CATEGORIES = "categories"
+TAG_FEATURED = "featured"
+TAG_TRENDING = "trending"
+
+
+class ResponseCache:
+    """
+    Two-tier cache for anonymous, identical-for-everyone responses.
+
+    Entries are JSON-compatible payloads keyed by a namespace and the
+    normalized request parameters. Lookups hit a small in-process LRU first
+    (short TTL, so other workers' invalidations are picked up quickly) and
+    Redis second. Concurrent misses for the same key in a worker share one
+    computation (single-flight). Entries carry tags; invalidating a tag
+    drops every entry carrying it from both tiers.
+
+    Redis failures never fail a request: the cache falls back to the local
+    tier and retries Redis after a short pause.
+    """
+
+    KEY_PREFIX = "response_cache"
+
+    # Seconds to skip Redis after a connection error
+    REDIS_RETRY_SECONDS = 30
+
+    def __init__(self, enabled: Optional[bool] = None, use_redis: bool = True):
+        self.enabled = settings.RESPONSE_CACHE_ENABLED if enabled is None else enabled
+        self.use_redis = use_redis
+        self.ttl = settings.RESPONSE_CACHE_TTL_SECONDS
+        self.local_ttl = settings.RESPONSE_CACHE_LOCAL_TTL_SECONDS
+        self.max_entries = settings.RESPONSE_CACHE_MAX_ENTRIES
+
+        self._local: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._tag_versions: Dict[str, int] = {}
+        self._redis_client = RedisClient()
+        self._redis_retry_at = 0.0
+
+    def make_key(self, namespace: str, params: Dict[str, Any]) -> str:
+        """
+        Build a cache key from a namespace and request parameters.
+
+        None values are dropped and keys sorted, so equivalent requests share
+        an entry regardless of parameter order.
+
+        Args:
+            namespace: Endpoint namespace (e.g. "services:browse")
+            params: Request parameters
+
+        Returns:
+            Cache key string
+        """
+        normalized = {key: value for key, value in params.items() if value is not None}
+        digest = hashlib.sha1(
+            json.dumps(normalized, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"{self.KEY_PREFIX}:{namespace}:{digest}"
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        params: Dict[str, Any],
+        tags: Iterable[str],
+        compute: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Get a cached payload, computing and storing it on a miss.
+
+        Args:
+            namespace: Endpoint namespace
+            params: Request parameters the payload depends on
+            tags: Invalidation tags for the entry
+            compute: Coroutine function producing a JSON-compatible payload
+            ttl: Entry lifetime in seconds (defaults to settings); also caps the local TTL
+
+        Returns:
+            Cached or freshly computed payload (treat as read-only)
+        """
+        if not self.enabled:
+            return await compute()
+
+        key = self.make_key(namespace, params)
+        tags = tuple(tags)
+
+        value = self._get_local(key)
+        if value is not None:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only recompute if the leading request was cancelled, not this one
+                if not inflight.cancelled():
+                    raise
+                return await compute()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        versions = self._snapshot_versions(tags)
+        try:
+            value = await self._get_redis(key)
+            if value is None:
+                value = await compute()
+                # Skip storing if a tag was invalidated while computing
+                if versions == self._snapshot_versions(tags):
+                    await self._set_redis(key, value, tags, ttl)
+            if versions == self._snapshot_versions(tags):
+                self._set_local(key, value, tags, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception without waiters is not logged
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def invalidate(self, *tags: str) -> None:
+        """
+        Drop all entries carrying any of the tags from both tiers.
+
+        Args:
+            tags: Tags to invalidate
+        """
+        if not self.enabled or not tags:
+            return
+
+        for tag in tags:
+            self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+
+        stale_keys = [key for key, (_, _, entry_tags) in self._local.items() if set(entry_tags) & set(tags)]
+        for key in stale_keys:
+            self._local.pop(key, None)
+
+        redis = await self._redis()
+        if redis is None:
+            return
+        try:
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            pipe = redis.pipeline()
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            members = await pipe.execute()
+
+            keys = {member.decode() if isinstance(member, bytes) else member for group in members for member in group}
+            await redis.delete(*keys, *tag_keys)
+        except Exception as e:
+            self._redis_failed(e)
+
+    def clear_local(self) -> None:
+        """Drop all in-process entries."""
+        self._local.clear()
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.KEY_PREFIX}:tag:{tag}"
+
+    def _snapshot_versions(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self._local.pop(key, None)
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Any, tags: Tuple[str, ...], ttl: Optional[int] = None) -> None:
+        local_ttl = min(self.local_ttl, ttl) if ttl else self.local_ttl
+        self._local[key] = (time.monotonic() + local_ttl, value, tags)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _redis(self):
+        """Get the Redis connection, or None while Redis is disabled or backing off."""
+        if not self.use_redis or time.monotonic() < self._redis_retry_at:
+            return None
+        return await self._redis_client.get_redis()
+
+    def _redis_failed(self, error: Exception) -> None:
+        logger.warning(f"Response cache Redis unavailable: {str(error)}")
+        self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_SECONDS
+
+    async def _get_redis(self, key: str) -> Optional[Any]:
+        redis = await self._redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(key)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        return json.loads(raw) if raw else None
+
+    async def _set_redis(self, key: str, value: Any, tags: Tuple[str, ...], ttl: Optional[int] = None) -> None:
+        redis = await self._redis()
+        if redis is None:
+            return
+        ttl = ttl or self.ttl
+        try:
+            pipe = redis.pipeline()
+            pipe.setex(key, ttl, json.dumps(value))
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), key)
+                # Tag sets only need to outlive the entries they point to
+                pipe.expire(self._tag_key(tag), max(ttl, self.ttl) * 2)
+            await pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+
+# Global instance
+response_cache = ResponseCache()
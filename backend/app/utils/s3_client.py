@@ -1,6 +1,8 @@
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
 import uuid
 import mimetypes
 from datetime import datetime, timedelta
@@ -9,16 +11,31 @@ from app.core.config import settings
 
 
 class S3ImageManager:
-    """AWS S3 client for image upload and management."""
+    """
+    AWS S3 client for image upload and management.
+    
+    Methods are blocking boto3 calls; from async code use
+    app.utils.image_upload.image_upload_service, which runs them in a
+    bounded thread pool.
+    """
+    
+    ALLOWED_CONTENT_TYPES = ['image/jpeg', 'image/png', 'image/webp']
+    MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
+    MIN_IMAGE_SIZE = 1024  # 1KB
     
     def __init__(self):
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
+            region_name=settings.AWS_REGION,
+            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+            # One connection per S3 I/O thread
+            config=Config(max_pool_connections=settings.S3_IO_MAX_WORKERS)
         )
         self.bucket_name = settings.AWS_BUCKET_NAME
+        # Upload in the calling thread instead of starting transfer threads per file
+        self.transfer_config = TransferConfig(use_threads=False)
     
     def generate_presigned_upload_url(
         self,
@@ -26,33 +43,36 @@ class S3ImageManager:
         content_type: str,
         image_type: str,
         related_id: str,
-        expires_in: int = 3600
+        expires_in: int = 3600,
+        s3_key: Optional[str] = None
     ) -> Tuple[str, str]:
         """
         Generate presigned URL for image upload.
         
+        The URL is signed for a PUT with the given Content-Type header. The
+        size is not enforced by S3; check it with get_image_info() before
+        accepting the upload.
+        
         Args:
             file_name: Original file name
             content_type: MIME type of the file
             image_type: Type of image (service_image, merchant_gallery, etc.)
             related_id: ID of related entity
             expires_in: URL expiration time in seconds
+            s3_key: S3 key to use (generated if not given)
             
         Returns:
-            Tuple of (s3_key, presigned_url)
+            Tuple of (s3_url, presigned_url)
             
         Raises:
             ValueError: If content type is not allowed
         """
         # Validate content type
-        allowed_types = ['image/jpeg', 'image/png', 'image/webp']
-        if content_type not in allowed_types:
+        if content_type not in self.ALLOWED_CONTENT_TYPES:
             raise ValueError(f"Content type {content_type} not allowed")
         
         # Generate unique S3 key
-        file_extension = mimetypes.guess_extension(content_type) or '.jpg'
-        unique_id = str(uuid.uuid4())
-        s3_key = f"{image_type}/{related_id}/{unique_id}{file_extension}"
+        s3_key = s3_key or self.build_key(image_type, related_id, content_type)
         
         try:
             presigned_url = self.s3_client.generate_presigned_url(
@@ -60,13 +80,12 @@ class S3ImageManager:
                 Params={
                     'Bucket': self.bucket_name,
                     'Key': s3_key,
-                    'ContentType': content_type,
-                    'ContentLength': 5 * 1024 * 1024  # Max 5MB
+                    'ContentType': content_type
                 },
                 ExpiresIn=expires_in
             )
             
-            s3_url = f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{s3_key}"
+            s3_url = self.get_public_url(s3_key)
             
             return s3_url, presigned_url
             
@@ -85,7 +104,7 @@ class S3ImageManager:
         """
         try:
             # Extract S3 key from URL
-            s3_key = self._extract_key_from_url(s3_url)
+            s3_key = self.extract_key_from_url(s3_url)
             if not s3_key:
                 return False
             
@@ -98,6 +117,53 @@ class S3ImageManager:
         except ClientError:
             return False
     
+    def delete_objects(self, s3_keys: List[str]) -> List[str]:
+        """
+        Delete many objects with batched DeleteObjects requests.
+        
+        Args:
+            s3_keys: S3 keys to delete
+            
+        Returns:
+            Keys that could not be deleted
+        """
+        failed = []
+        # DeleteObjects accepts up to 1000 keys per request
+        for start in range(0, len(s3_keys), 1000):
+            batch = s3_keys[start:start + 1000]
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+                failed.extend(error['Key'] for error in response.get('Errors', []))
+            except ClientError:
+                failed.extend(batch)
+        return failed
+    
+    def iter_object_pages(self, prefix: str, page_size: int = 1000) -> Iterator[List[dict]]:
+        """
+        List objects under a prefix one page at a time.
+        
+        Args:
+            prefix: Key prefix (e.g. "service_image/")
+            page_size: Objects per ListObjectsV2 request (at most 1000)
+            
+        Yields:
+            Lists of dicts with key and last_modified
+        """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=self.bucket_name,
+            Prefix=prefix,
+            PaginationConfig={'PageSize': page_size}
+        )
+        for page in pages:
+            yield [
+                {'key': obj['Key'], 'last_modified': obj['LastModified']}
+                for obj in page.get('Contents', [])
+            ]
+    
     def get_image_info(self, s3_url: str) -> Optional[dict]:
         """
         Get image metadata from S3.
@@ -109,7 +175,7 @@ class S3ImageManager:
             Dictionary with image metadata or None if not found
         """
         try:
-            s3_key = self._extract_key_from_url(s3_url)
+            s3_key = self.extract_key_from_url(s3_url)
             if not s3_key:
                 return None
             
@@ -128,7 +194,79 @@ class S3ImageManager:
         except ClientError:
             return None
     
-    def _extract_key_from_url(self, s3_url: str) -> Optional[str]:
+    def read_object_header(self, s3_key: str, length: int = 12) -> Optional[bytes]:
+        """
+        Read the first bytes of an object with a ranged GET.
+        
+        Args:
+            s3_key: S3 key of the object
+            length: Number of bytes to read
+            
+        Returns:
+            The first bytes of the object, or None if it does not exist
+        """
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Range=f"bytes=0-{length - 1}"
+            )
+        except ClientError:
+            return None
+        
+        body = response['Body']
+        try:
+            return body.read(length)
+        finally:
+            body.close()
+    
+    def build_key(self, image_type: str, related_id: str, content_type: str) -> str:
+        """
+        Generate a unique S3 key for a new image.
+        
+        Args:
+            image_type: Type of image (service_image, merchant_gallery, etc.)
+            related_id: ID of related entity
+            content_type: MIME type of the file
+            
+        Returns:
+            S3 key
+        """
+        file_extension = mimetypes.guess_extension(content_type) or '.jpg'
+        return f"{image_type}/{related_id}/{uuid.uuid4()}{file_extension}"
+    
+    @staticmethod
+    def variant_key(s3_key: str, variant: str, extension: str = ".webp") -> str:
+        """
+        Get the S3 key of a resized variant stored next to the original.
+        
+        Args:
+            s3_key: S3 key of the original image
+            variant: Variant name (thumbnail, medium)
+            extension: File extension of the variant
+            
+        Returns:
+            S3 key of the variant
+        """
+        base = s3_key.rsplit('.', 1)[0]
+        return f"{base}_{variant}{extension}"
+    
+    def get_public_url(self, s3_key: str) -> str:
+        """
+        Build the public URL of an object.
+        
+        Args:
+            s3_key: S3 object key
+            
+        Returns:
+            Full URL of the object
+        """
+        if settings.AWS_S3_ENDPOINT_URL:
+            # Path-style URL on an S3-compatible server (MinIO, LocalStack)
+            return f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{self.bucket_name}/{s3_key}"
+        return f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{s3_key}"
+    
+    def extract_key_from_url(self, s3_url: str) -> Optional[str]:
         """
         Extract S3 key from full URL.
         
@@ -139,6 +277,10 @@ class S3ImageManager:
             S3 key or None if invalid URL
         """
         try:
+            if settings.AWS_S3_ENDPOINT_URL:
+                prefix = f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{self.bucket_name}/"
+                return s3_url[len(prefix):] if s3_url.startswith(prefix) else None
+            
             # Expected format: https://bucket.s3.region.amazonaws.com/key
             if not s3_url.startswith('https://'):
                 return None
@@ -165,19 +307,18 @@ class S3ImageManager:
             ValueError: If constraints are violated
         """
         # Check content type
-        allowed_types = ['image/jpeg', 'image/png', 'image/webp']
-        if content_type not in allowed_types:
-            raise ValueError(f"Content type {content_type} not allowed. Allowed types: {allowed_types}")
+        if content_type not in self.ALLOWED_CONTENT_TYPES:
+            raise ValueError(
+                f"Content type {content_type} not allowed. Allowed types: {self.ALLOWED_CONTENT_TYPES}"
+            )
         
         # Check file size (5MB max)
-        max_size = 5 * 1024 * 1024  # 5MB
-        if content_length > max_size:
-            raise ValueError(f"File size {content_length} exceeds maximum of {max_size} bytes")
+        if content_length > self.MAX_IMAGE_SIZE:
+            raise ValueError(f"File size {content_length} exceeds maximum of {self.MAX_IMAGE_SIZE} bytes")
         
         # Check minimum size (1KB)
-        min_size = 1024  # 1KB
-        if content_length < min_size:
-            raise ValueError(f"File size {content_length} is below minimum of {min_size} bytes")
+        if content_length < self.MIN_IMAGE_SIZE:
+            raise ValueError(f"File size {content_length} is below minimum of {self.MIN_IMAGE_SIZE} bytes")
 
     def upload_fileobj(
         self,
@@ -185,7 +326,8 @@ class S3ImageManager:
         file_name: str,
         content_type: str,
         image_type: str,
-        related_id: str
+        related_id: str,
+        s3_key: Optional[str] = None
     ) -> str:
         """
         Upload a file-like object directly to S3 and return its public URL.
@@ -196,14 +338,13 @@ class S3ImageManager:
             content_type: MIME type
             image_type: logical image folder/type
             related_id: related entity id
+            s3_key: S3 key to use (generated if not given)
 
         Returns:
             s3_url (str)
         """
         # Generate unique S3 key similar to presigned URL generation
-        file_extension = mimetypes.guess_extension(content_type) or '.jpg'
-        unique_id = str(uuid.uuid4())
-        s3_key = f"{image_type}/{related_id}/{unique_id}{file_extension}"
+        s3_key = s3_key or self.build_key(image_type, related_id, content_type)
 
         try:
             # Ensure fileobj is at start
@@ -217,11 +358,35 @@ class S3ImageManager:
                 Fileobj=fileobj,
                 Bucket=self.bucket_name,
                 Key=s3_key,
-                ExtraArgs={'ContentType': content_type}
+                ExtraArgs={'ContentType': content_type},
+                Config=self.transfer_config
             )
 
-            s3_url = f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com/{s3_key}"
-            return s3_url
+            return self.get_public_url(s3_key)
+
+        except ClientError as e:
+            raise Exception(f"Failed to upload file to S3: {str(e)}")
+
+    def upload_bytes(self, body: bytes, s3_key: str, content_type: str) -> str:
+        """
+        Upload generated content (e.g. an image variant) and return its public URL.
+
+        Args:
+            body: Object content
+            s3_key: S3 key
+            content_type: MIME type
+
+        Returns:
+            s3_url (str)
+        """
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Body=body,
+                ContentType=content_type
+            )
+            return self.get_public_url(s3_key)
 
         except ClientError as e:
             raise Exception(f"Failed to upload file to S3: {str(e)}")
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.utils.image_upload import ImageUploadService, image_upload_service
+
+logger = logging.getLogger(__name__)
+
+
+class S3DeletionQueue:
+    """
+    Background batch deletion of S3 objects.
+
+    Requests that replace or remove an image only queue its key (in process
+    memory, per worker); keys are deleted periodically with DeleteObjects
+    requests of up to 1000 keys, off the request path. Failed keys are
+    retried a few times and then logged; anything lost (failures, worker
+    crashes) is picked up by the orphan collector.
+    """
+
+    # DeleteObjects accepts up to 1000 keys per request
+    BATCH_SIZE = 1000
+
+    def __init__(self, upload_service: Optional[ImageUploadService] = None):
+        self.upload_service = upload_service or image_upload_service
+        # Key -> failed attempts so far
+        self._pending: Dict[str, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def enqueue(self, *s3_urls: Optional[str]) -> int:
+        """
+        Queue objects for deletion by their URLs.
+
+        None and URLs outside the bucket are ignored, so optional URL
+        columns can be passed as they are.
+
+        Args:
+            s3_urls: Full S3 URLs of the objects
+
+        Returns:
+            Number of keys queued
+        """
+        queued = 0
+        for s3_url in s3_urls:
+            s3_key = self.upload_service.s3.extract_key_from_url(s3_url) if s3_url else None
+            if s3_key:
+                self._pending.setdefault(s3_key, 0)
+                queued += 1
+
+        if self._wakeup and len(self._pending) >= self.BATCH_SIZE:
+            # A full batch is waiting; do not wait for the next tick
+            self._wakeup.set()
+        return queued
+
+    @property
+    def pending_count(self) -> int:
+        """Number of keys waiting to be deleted."""
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """
+        Delete all queued keys.
+
+        Returns:
+            Number of keys deleted
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            batch_keys, self._pending = self._pending, {}
+            keys = list(batch_keys)
+            deleted = 0
+
+            for start in range(0, len(keys), self.BATCH_SIZE):
+                batch = keys[start:start + self.BATCH_SIZE]
+                try:
+                    failed = set(await self.upload_service.run_in_s3_pool(
+                        self.upload_service.s3.delete_objects, batch
+                    ))
+                except Exception as e:
+                    logger.error(f"Failed to delete S3 objects: {str(e)}")
+                    failed = set(batch)
+
+                deleted += len(batch) - len(failed)
+                for s3_key in failed:
+                    attempts = batch_keys[s3_key] + 1
+                    if attempts < settings.S3_DELETE_MAX_ATTEMPTS:
+                        self._pending.setdefault(s3_key, attempts)
+                    else:
+                        logger.warning(f"Giving up deleting S3 object {s3_key} after {attempts} attempts")
+
+            return deleted
+
+    def start(self, interval: Optional[int] = None) -> None:
+        """
+        Start the periodic background flush.
+
+        Args:
+            interval: Flush interval in seconds (defaults to settings)
+        """
+        if self._task and not self._task.done():
+            return
+
+        self._wakeup = asyncio.Event()
+        interval = interval or settings.S3_DELETE_FLUSH_INTERVAL_SECONDS
+        self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self) -> None:
+        """Stop the background flush and delete any remaining keys."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+
+        if self._pending:
+            await self.flush()
+
+    async def _run(self, interval: int) -> None:
+        """Flush loop; errors are logged and the keys retried next tick."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush S3 deletion queue: {str(e)}")
+
+
+# Global instance
+s3_deletion_queue = S3DeletionQueue()
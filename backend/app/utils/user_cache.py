@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.models import User
+from app.utils.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+class AuthUserCache:
+    """
+    Short-TTL cache of active user rows for request authentication.
+
+    Entries live in a per-worker LRU and, when AUTH_USER_CACHE_USE_REDIS is
+    set, in Redis as well so workers share them. Changes to a user go
+    through invalidate(), which drops the entry everywhere and publishes
+    the user ID on a Redis channel so every worker's LRU drops it too. If
+    Redis is unreachable, entries still expire after the TTL, which bounds
+    how stale an authentication decision can be.
+
+    Cached users are returned as new, unattached User instances; merge them
+    into the request's session before modifying them.
+    """
+
+    KEY_PREFIX = "auth_user"
+    CHANNEL = "auth_user:invalidate"
+
+    # Seconds to skip Redis after a connection error
+    REDIS_RETRY_SECONDS = 30
+    # Seconds between reconnect attempts of the invalidation listener
+    LISTEN_RETRY_SECONDS = 5
+
+    def __init__(self, enabled: Optional[bool] = None, use_redis: Optional[bool] = None):
+        self.enabled = settings.AUTH_USER_CACHE_ENABLED if enabled is None else enabled
+        self.use_redis = settings.AUTH_USER_CACHE_USE_REDIS if use_redis is None else use_redis
+        self.ttl = settings.AUTH_USER_CACHE_TTL_SECONDS
+        self.max_entries = settings.AUTH_USER_CACHE_MAX_ENTRIES
+
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._redis_client = RedisClient()
+        self._redis_retry_at = 0.0
+        self._listener: Optional[asyncio.Task] = None
+
+    async def get(self, user_id: str) -> Optional[User]:
+        """
+        Get a cached active user.
+
+        Args:
+            user_id: 9-digit numeric string ID of the user
+
+        Returns:
+            Unattached User instance, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        data = self._get_local(user_id)
+        if data is None and self.use_redis:
+            data = await self._get_redis(user_id)
+            if data is not None:
+                self._set_local(user_id, data)
+        return User.model_validate(data) if data is not None else None
+
+    async def set(self, user: User) -> None:
+        """
+        Cache an active user.
+
+        Args:
+            user: User loaded from the database
+        """
+        if not self.enabled or not user.is_active:
+            return
+
+        data = user.model_dump(mode="json")
+        self._set_local(user.id, data)
+        if self.use_redis:
+            redis = await self._redis()
+            if redis is None:
+                return
+            try:
+                await redis.setex(self._key(user.id), self.ttl, json.dumps(data))
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def invalidate(self, user_id: str) -> None:
+        """
+        Drop a user from every worker's cache.
+
+        Call after any change to the user row (profile, avatar, deactivation).
+
+        Args:
+            user_id: 9-digit numeric string ID of the user
+        """
+        if not self.enabled:
+            return
+
+        self._local.pop(user_id, None)
+
+        redis = await self._redis()
+        if redis is None:
+            return
+        try:
+            pipe = redis.pipeline()
+            if self.use_redis:
+                pipe.delete(self._key(user_id))
+            pipe.publish(self.CHANNEL, user_id)
+            await pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+    def clear_local(self) -> None:
+        """Drop all in-process entries."""
+        self._local.clear()
+
+    def start(self) -> None:
+        """Start listening for invalidations published by other workers."""
+        if not self.enabled or (self._listener and not self._listener.done()):
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop the invalidation listener."""
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self) -> None:
+        """Invalidation loop; reconnects after Redis errors."""
+        while True:
+            try:
+                redis = await self._redis_client.get_redis()
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(self.CHANNEL)
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        user_id = message["data"]
+                        if isinstance(user_id, bytes):
+                            user_id = user_id.decode()
+                        self._local.pop(user_id, None)
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Auth user cache invalidation listener failed: {str(e)}")
+                # Invalidations may have been missed while disconnected
+                self._local.clear()
+                await asyncio.sleep(self.LISTEN_RETRY_SECONDS)
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{user_id}"
+
+    def _get_local(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._local.get(user_id)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if expires_at < time.monotonic():
+            self._local.pop(user_id, None)
+            return None
+        self._local.move_to_end(user_id)
+        return data
+
+    def _set_local(self, user_id: str, data: Dict[str, Any]) -> None:
+        self._local[user_id] = (time.monotonic() + self.ttl, data)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _redis(self):
+        """Get the Redis connection, or None while backing off after an error."""
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        return await self._redis_client.get_redis()
+
+    def _redis_failed(self, error: Exception) -> None:
+        logger.warning(f"Auth user cache Redis unavailable: {str(error)}")
+        self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_SECONDS
+
+    async def _get_redis(self, user_id: str) -> Optional[Dict[str, Any]]:
+        redis = await self._redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(self._key(user_id))
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        return json.loads(raw) if raw else None
+
+
+# Global instance
+auth_user_cache = AuthUserCache()
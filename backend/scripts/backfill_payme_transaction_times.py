@@ -0,0 +1,52 @@
+"""
+One-time script to fill the payme_* time columns for older Payme payments.
+
+Payments that went through CreateTransaction before the columns existed
+kept the Payme times and cancel reason in payment_metadata only, and are
+left out of GetStatement until payme_create_time is set. They are updated
+in small chunks, each committed separately, so the payments table is never
+locked for long:
+
+    python scripts/backfill_payme_transaction_times.py [--batch-size 1000] [--pause 0.1]
+
+Safe to re-run; payments that already have payme_create_time are skipped.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the app directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.repositories.payment_repository import PaymentRepository
+
+
+async def backfill_payme_transaction_times(batch_size: int, pause: float):
+    """Backfill chunk by chunk until every Payme payment has been examined."""
+    total = 0
+    chunks = 0
+    after_id = None
+
+    async with AsyncSessionLocal() as db:
+        payment_repo = PaymentRepository(db)
+        while True:
+            updated, after_id = await payment_repo.backfill_payme_transaction_times(after_id, batch_size)
+            if after_id is None:
+                break
+            total += updated
+            chunks += 1
+            # Give concurrent writers room between chunks
+            await asyncio.sleep(pause)
+
+    print(f"Backfilled Payme transaction times on {total} payment(s) in {chunks} chunk(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the payments.payme_* time columns")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Payments examined per chunk")
+    parser.add_argument("--pause", type=float, default=0.1, help="Seconds to sleep between chunks")
+    args = parser.parse_args()
+
+    asyncio.run(backfill_payme_transaction_times(args.batch_size, args.pause))
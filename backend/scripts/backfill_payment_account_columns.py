@@ -0,0 +1,51 @@
+"""
+One-time script to fill the typed account columns of older pending payments.
+
+Pending payments created before the columns existed kept their tariff plan
+and months, or service and days, in payment_metadata only, so Payme cannot
+match them. They are updated in small chunks, each committed separately, so
+the payments table is never locked for long:
+
+    python scripts/backfill_payment_account_columns.py [--batch-size 1000] [--pause 0.1]
+
+Safe to re-run; payments that already have the columns set are skipped.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the app directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.repositories.payment_repository import PaymentRepository
+
+
+async def backfill_payment_account_columns(batch_size: int, pause: float):
+    """Backfill chunk by chunk until every pending payment has been examined."""
+    total = 0
+    chunks = 0
+    after_id = None
+
+    async with AsyncSessionLocal() as db:
+        payment_repo = PaymentRepository(db)
+        while True:
+            updated, after_id = await payment_repo.backfill_payment_account_columns(after_id, batch_size)
+            if after_id is None:
+                break
+            total += updated
+            chunks += 1
+            # Give concurrent writers room between chunks
+            await asyncio.sleep(pause)
+
+    print(f"Backfilled account columns on {total} payment(s) in {chunks} chunk(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill the payments account requisite columns")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Payments examined per chunk")
+    parser.add_argument("--pause", type=float, default=0.1, help="Seconds to sleep between chunks")
+    args = parser.parse_args()
+
+    asyncio.run(backfill_payment_account_columns(args.batch_size, args.pause))
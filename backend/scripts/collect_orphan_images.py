@@ -0,0 +1,56 @@
+"""
+Script to delete S3 image objects that no database row refers to.
+
+Lists every image prefix page by page and deletes objects not stored as an
+image, avatar, cover or icon URL and not pending upload. Run it
+periodically, e.g. daily from cron:
+
+    python scripts/collect_orphan_images.py [--dry-run] [--min-age-hours 24] [--prefix service_image/]
+"""
+import argparse
+import asyncio
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add the app directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.s3_orphan_collector import IMAGE_PREFIXES, S3OrphanCollector
+from app.utils.image_upload import image_upload_service
+
+
+async def collect_orphan_images(prefixes, min_age_hours: int, dry_run: bool):
+    """Scan the prefixes and delete (or count) orphaned objects."""
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await S3OrphanCollector(db).collect(
+                prefixes=prefixes,
+                min_age=timedelta(hours=min_age_hours),
+                dry_run=dry_run
+            )
+    finally:
+        image_upload_service.shutdown()
+
+    if result["aborted"]:
+        print("Aborted: stored image URLs could not be matched to S3 keys, see the log")
+    summary = f"Scanned {result['scanned']} object(s): {result['orphaned']} orphaned"
+    if dry_run:
+        print(f"{summary} (dry run, nothing deleted)")
+    else:
+        print(f"{summary}, {result['deleted']} deleted, {result['failed']} failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete S3 image objects no database row refers to")
+    parser.add_argument("--dry-run", action="store_true", help="Only count orphaned objects")
+    parser.add_argument(
+        "--min-age-hours", type=int, default=settings.S3_ORPHAN_MIN_AGE_HOURS,
+        help="Keep objects younger than this"
+    )
+    parser.add_argument("--prefix", action="append", help="Prefix to scan (repeatable; default: all image prefixes)")
+    args = parser.parse_args()
+
+    asyncio.run(collect_orphan_images(args.prefix or IMAGE_PREFIXES, args.min_age_hours, args.dry_run))
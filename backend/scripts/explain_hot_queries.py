@@ -0,0 +1,211 @@
+"""
+Script to EXPLAIN ANALYZE the repository hot queries and compare plans.
+
+The hot queries are produced by calling the real repository methods, so
+the plans match the SQL the API runs. Use it on a seeded PostgreSQL
+database (see scripts/seed_data.py) around a migration:
+
+    python scripts/explain_hot_queries.py --save before.json
+    alembic upgrade head
+    python scripts/explain_hot_queries.py --compare before.json
+
+Every statement runs inside a transaction that is rolled back.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add the app directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, func, select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models import Payment, PaymentMethod, Service, UserInteraction
+from app.repositories.payment_repository import PaymentRepository
+from app.repositories.review_repository import ReviewRepository
+from app.repositories.service_repository import ServiceRepository
+from app.schemas.service_schema import ServiceSearchFilters
+
+
+class QueryCapture:
+    """Collects the SELECT statements sent to the driver while enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.statements: List[tuple] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            self.statements.append((statement, parameters))
+
+
+async def load_samples(db) -> Dict[str, Any]:
+    """Pick representative IDs from the seeded data."""
+    service = (await db.execute(
+        select(Service).where(Service.is_active == True).order_by(Service.created_at.desc()).limit(1)
+    )).scalar_one_or_none()
+    if service is None:
+        raise SystemExit("No active services found - seed the database first")
+
+    service_ids = (await db.execute(
+        select(Service.id).where(Service.is_active == True).order_by(Service.created_at.desc()).limit(20)
+    )).scalars().all()
+    user_id = (await db.execute(
+        select(UserInteraction.user_id)
+        .group_by(UserInteraction.user_id)
+        .order_by(func.count().desc())
+        .limit(1)
+    )).scalar_one_or_none()
+    transaction_id = (await db.execute(
+        select(Payment.transaction_id).where(Payment.transaction_id.isnot(None)).limit(1)
+    )).scalar_one_or_none()
+
+    return {
+        "service": service,
+        "service_ids": list(service_ids),
+        "user_id": user_id or "000000000",
+        "transaction_id": transaction_id or "missing",
+    }
+
+
+def hot_queries(db, samples: Dict[str, Any]):
+    """Map of hot query name to a coroutine function running it."""
+    service_repo = ServiceRepository(db)
+    review_repo = ReviewRepository(db)
+    payment_repo = PaymentRepository(db)
+    service = samples["service"]
+    service_ids = samples["service_ids"]
+
+    return {
+        "browse_services": lambda: service_repo.search_services(ServiceSearchFilters(), 0, 20),
+        "browse_category": lambda: service_repo.get_services_by_category(service.category_id, 0, 20),
+        "trending_category_region": lambda: service_repo.search_services(
+            ServiceSearchFilters(
+                category_id=service.category_id,
+                location_region=service.location_region,
+                sort_by="popularity"
+            ),
+            0, 20
+        ),
+        "service_images": lambda: service_repo.get_service_images(service.id),
+        "main_image_urls": lambda: service_repo.get_main_image_urls(service_ids),
+        "featured_services": lambda: service_repo.get_featured_services(limit=20),
+        "is_service_featured": lambda: service_repo.is_service_featured(service.id),
+        "featured_service_ids": lambda: service_repo.get_featured_service_ids(service_ids),
+        "user_interaction_types": lambda: service_repo.get_user_interaction_types(samples["user_id"], service_ids),
+        "service_reviews": lambda: review_repo.get_reviews_by_service(service.id, offset=0, limit=20),
+        "payment_by_transaction": lambda: payment_repo.get_payment_by_transaction_id(samples["transaction_id"]),
+        # Payme webhook lookup (PaymeMerchantAPI)
+        "payme_payment_by_transaction": lambda: db.execute(
+            select(Payment).where(
+                Payment.payment_method == PaymentMethod.PAYME,
+                Payment.transaction_id == samples["transaction_id"]
+            )
+        ),
+    }
+
+
+def summarize_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce an EXPLAIN (FORMAT JSON) result to timings and scan nodes."""
+    scans = []
+
+    def walk(node: Dict[str, Any]) -> None:
+        if "Relation Name" in node:
+            scan = f"{node['Node Type']} on {node['Relation Name']}"
+            if "Index Name" in node:
+                scan += f" using {node['Index Name']}"
+            scans.append(scan)
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan["Plan"])
+    return {
+        "planning_ms": round(plan.get("Planning Time", 0.0), 3),
+        "execution_ms": round(plan.get("Execution Time", 0.0), 3),
+        "scans": scans,
+    }
+
+
+async def explain_hot_queries() -> Dict[str, List[Dict[str, Any]]]:
+    """Run every hot query and EXPLAIN ANALYZE the statements it issued."""
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("EXPLAIN ANALYZE reports need a PostgreSQL DATABASE_URL")
+
+    capture = QueryCapture()
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    report: Dict[str, List[Dict[str, Any]]] = {}
+
+    try:
+        async with AsyncSessionLocal() as db:
+            samples = await load_samples(db)
+
+            for name, run_query in hot_queries(db, samples).items():
+                capture.statements = []
+                capture.enabled = True
+                try:
+                    await run_query()
+                finally:
+                    capture.enabled = False
+
+                connection = await db.connection()
+                report[name] = []
+                for statement, parameters in capture.statements:
+                    result = await connection.exec_driver_sql(
+                        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+                    )
+                    plan = result.scalar_one()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    report[name].append(summarize_plan(plan[0]))
+
+            await db.rollback()
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+        await engine.dispose()
+
+    return report
+
+
+def print_report(report: Dict[str, List[Dict[str, Any]]], baseline: Optional[Dict[str, Any]] = None):
+    """Print each query's plans, side by side with the baseline when given."""
+    for name, plans in report.items():
+        print(f"\n== {name}")
+        previous_plans = (baseline or {}).get(name, [])
+        for index, plan in enumerate(plans):
+            previous = previous_plans[index] if index < len(previous_plans) else None
+            timing = f"{plan['execution_ms']} ms"
+            if previous:
+                timing = f"{previous['execution_ms']} ms -> {timing}"
+            print(f"  statement {index + 1}: {timing} (planning {plan['planning_ms']} ms)")
+
+            if previous and previous["scans"] != plan["scans"]:
+                for scan in previous["scans"]:
+                    print(f"    - {scan}")
+                for scan in plan["scans"]:
+                    print(f"    + {scan}")
+            else:
+                for scan in plan["scans"]:
+                    print(f"      {scan}")
+
+
+async def main(save: Optional[str], compare: Optional[str]):
+    baseline = json.loads(Path(compare).read_text()) if compare else None
+    report = await explain_hot_queries()
+    print_report(report, baseline)
+
+    if save:
+        Path(save).write_text(json.dumps(report, indent=2))
+        print(f"\nSaved plans to {save}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE repository hot queries")
+    parser.add_argument("--save", help="Write the plan summary to this JSON file")
+    parser.add_argument("--compare", help="Show changes against a previously saved plan summary")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.save, args.compare))
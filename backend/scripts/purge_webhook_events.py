@@ -0,0 +1,49 @@
+"""
+Script to delete applied payment webhook events from the inbox.
+
+Events stay in the inbox after processing so provider redeliveries are
+recognised as duplicates; once older than the retention period they are
+deleted in batches. Failed events are kept for inspection. Run it
+periodically, e.g. daily from cron:
+
+    python scripts/purge_webhook_events.py [--days 30] [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the app directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.repositories.webhook_event_repository import WebhookEventRepository
+
+
+async def purge_webhook_events(days: int, batch_size: int):
+    """Delete events processed more than the given number of days ago."""
+    cutoff = datetime.now() - timedelta(days=days)
+    total = 0
+    async with AsyncSessionLocal() as db:
+        repo = WebhookEventRepository(db)
+        while True:
+            deleted = await repo.delete_processed_before(cutoff, batch_size=batch_size)
+            total += deleted
+            if deleted < batch_size:
+                break
+
+    print(f"Deleted {total} webhook event(s) processed before {cutoff:%Y-%m-%d %H:%M}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete old processed payment webhook events")
+    parser.add_argument(
+        "--days", type=int, default=settings.WEBHOOK_EVENT_RETENTION_DAYS,
+        help="Keep events processed within this many days"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000, help="Events deleted per batch")
+    args = parser.parse_args()
+
+    asyncio.run(purge_webhook_events(args.days, args.batch_size))
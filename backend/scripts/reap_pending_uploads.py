@@ -0,0 +1,39 @@
+"""
+Script to remove presigned image uploads that were never confirmed.
+
+Deletes the uploaded S3 objects (if any) and their pending upload rows once
+the upload URL has expired and the confirmation grace period has passed.
+Run it periodically, e.g. hourly from cron:
+
+    python scripts/reap_pending_uploads.py [--batch-size 500]
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the app directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.image_upload_manager import ImageUploadManager
+from app.utils.image_upload import image_upload_service
+
+
+async def reap_pending_uploads(batch_size: int):
+    """Reap expired unconfirmed uploads."""
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await ImageUploadManager(db).reap_expired_uploads(batch_size=batch_size)
+    finally:
+        image_upload_service.shutdown()
+
+    print(f"Reaped {result['reaped']} expired upload(s); {result['failed']} object(s) could not be deleted")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove expired unconfirmed image uploads")
+    parser.add_argument("--batch-size", type=int, default=500, help="Pending uploads per batch")
+    args = parser.parse_args()
+
+    asyncio.run(reap_pending_uploads(args.batch_size))
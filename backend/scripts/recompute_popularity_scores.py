@@ -0,0 +1,41 @@
+"""
+Script to refresh the time-decayed popularity score used for trending services.
+
+Run it periodically (e.g. every 15 minutes from cron) for incremental updates:
+
+    python scripts/recompute_popularity_scores.py
+
+Rebuild every score from all interactions (e.g. after changing the weights):
+
+    python scripts/recompute_popularity_scores.py --full
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the app directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.popularity_service import PopularityService
+
+
+async def recompute_popularity_scores(full: bool = False, batch_size: int = None):
+    """Refresh popularity scores incrementally, or rebuild them when full is set."""
+    async with AsyncSessionLocal() as db:
+        popularity_service = PopularityService(db)
+
+        print(f"{'Rebuilding' if full else 'Refreshing'} service popularity scores...")
+        result = await popularity_service.refresh_scores(full=full, batch_size=batch_size)
+
+        print(f"Updated {result['updated_services']} service(s) in {result['batches']} batch(es)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh service popularity scores")
+    parser.add_argument("--full", action="store_true", help="Rebuild scores from all interactions")
+    parser.add_argument("--batch-size", type=int, help="Services per batch")
+    args = parser.parse_args()
+
+    asyncio.run(recompute_popularity_scores(args.full, args.batch_size))
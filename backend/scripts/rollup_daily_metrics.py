@@ -0,0 +1,49 @@
+"""
+Script to roll user interactions and reviews up into the daily metrics tables.
+
+Run it periodically (e.g. every few minutes from cron) for incremental updates:
+
+    python scripts/rollup_daily_metrics.py
+
+Backfill a historical range in bulk:
+
+    python scripts/rollup_daily_metrics.py --backfill-from 2024-01-01 [--backfill-to 2024-06-30]
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add the app directory to the Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import AsyncSessionLocal
+from app.services.metrics_rollup_service import MetricsRollupService
+
+
+async def rollup_daily_metrics(backfill_from: date = None, backfill_to: date = None):
+    """Run the incremental rollup, or a backfill when a start date is given."""
+    async with AsyncSessionLocal() as db:
+        rollup_service = MetricsRollupService(db)
+
+        if backfill_from:
+            print(f"Backfilling daily metrics from {backfill_from} to {backfill_to or 'today'}...")
+            result = await rollup_service.backfill(backfill_from, backfill_to)
+        else:
+            print("Rolling up daily metrics since last watermark...")
+            result = await rollup_service.run_incremental()
+
+        print(
+            f"Processed {result['days']} day(s) ({result['start_date']} - {result['end_date']}): "
+            f"{result['service_rows']} service rows, {result['merchant_rows']} merchant rows"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll up daily service and merchant metrics")
+    parser.add_argument("--backfill-from", type=date.fromisoformat, help="First day to backfill (YYYY-MM-DD)")
+    parser.add_argument("--backfill-to", type=date.fromisoformat, help="Last day to backfill (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    asyncio.run(rollup_daily_metrics(args.backfill_from, args.backfill_to))
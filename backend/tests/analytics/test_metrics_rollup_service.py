@@ -0,0 +1,132 @@
+"""
+Tests for MetricsRollupService.
+"""
+import pytest
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.services.metrics_rollup_service import MetricsRollupService
+from app.repositories.service_repository import ServiceRepository
+from app.core.exceptions import ValidationError
+from app.models import (
+    Service, User, Merchant, Review, InteractionType, UserInteraction,
+    DailyServiceMetrics, MerchantDailyMetrics
+)
+
+
+async def get_service_row(db_session, service_id: str, metric_date: date):
+    result = await db_session.execute(
+        select(DailyServiceMetrics).where(
+            DailyServiceMetrics.service_id == service_id,
+            DailyServiceMetrics.metric_date == metric_date
+        ).execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+@pytest.mark.asyncio
+class TestMetricsRollupService:
+    """Test MetricsRollupService methods."""
+    
+    async def test_backfill_rolls_up_interactions_and_reviews(
+        self,
+        db_session,
+        sample_service: Service,
+        sample_client_user: User,
+        sample_merchant: Merchant,
+        sample_review: Review
+    ):
+        """Test that a backfill writes daily and cumulative service/merchant rows."""
+        repo = ServiceRepository(db_session)
+        for interaction_type in (InteractionType.VIEW, InteractionType.LIKE, InteractionType.SHARE, InteractionType.SHARE):
+            await repo.apply_user_interaction(sample_client_user.id, sample_service.id, interaction_type)
+        
+        today = date.today()
+        result = await MetricsRollupService(db_session).backfill(today, today)
+        
+        assert result["days"] == 1
+        assert result["service_rows"] >= 1
+        
+        row = await get_service_row(db_session, sample_service.id, today)
+        assert row is not None
+        assert row.merchant_id == sample_merchant.id
+        assert (row.views_today, row.likes_today, row.saves_today, row.shares_today, row.reviews_today) == (1, 1, 0, 2, 1)
+        assert (row.total_views, row.total_likes, row.total_shares, row.total_reviews) == (1, 1, 2, 1)
+        assert row.average_rating == 5.0
+        
+        merchant_result = await db_session.execute(
+            select(MerchantDailyMetrics).where(
+                MerchantDailyMetrics.merchant_id == sample_merchant.id,
+                MerchantDailyMetrics.metric_date == today
+            )
+        )
+        merchant_row = merchant_result.scalar_one()
+        assert merchant_row.total_shares_today == 2
+        assert merchant_row.total_reviews_today == 1
+        assert merchant_row.active_services == 1
+    
+    async def test_rerun_is_idempotent_and_resets_removed_activity(
+        self,
+        db_session,
+        sample_service: Service,
+        sample_client_user: User
+    ):
+        """Test that recomputing a day upserts in place and drops removed likes."""
+        repo = ServiceRepository(db_session)
+        await repo.apply_user_interaction(sample_client_user.id, sample_service.id, InteractionType.LIKE)
+        
+        rollup_service = MetricsRollupService(db_session)
+        await rollup_service.run_incremental()
+        
+        # Unlike, then roll up again
+        await repo.apply_user_interaction(sample_client_user.id, sample_service.id, InteractionType.LIKE)
+        await rollup_service.run_incremental()
+        
+        today = date.today()
+        count_result = await db_session.execute(
+            select(DailyServiceMetrics.id).where(DailyServiceMetrics.service_id == sample_service.id)
+        )
+        assert len(count_result.all()) == 1
+        
+        row = await get_service_row(db_session, sample_service.id, today)
+        assert row.likes_today == 0
+        assert row.total_likes == 0
+    
+    async def test_backfill_keeps_historical_active_services(
+        self,
+        db_session,
+        sample_service: Service,
+        sample_client_user: User,
+        sample_merchant: Merchant
+    ):
+        """Test that a backfill does not write today's active service count into past days."""
+        repo = ServiceRepository(db_session)
+        await repo.apply_user_interaction(sample_client_user.id, sample_service.id, InteractionType.VIEW)
+        past_day = date.today() - timedelta(days=3)
+        await db_session.execute(
+            update(UserInteraction)
+            .where(UserInteraction.service_id == sample_service.id)
+            .values(created_at=datetime.combine(past_day, datetime.min.time()) + timedelta(hours=12))
+        )
+        db_session.add(MerchantDailyMetrics(merchant_id=sample_merchant.id, metric_date=past_day, active_services=4))
+        await db_session.commit()
+        
+        await MetricsRollupService(db_session).backfill(past_day, past_day)
+        
+        merchant_result = await db_session.execute(
+            select(MerchantDailyMetrics).where(
+                MerchantDailyMetrics.merchant_id == sample_merchant.id,
+                MerchantDailyMetrics.metric_date == past_day
+            ).execution_options(populate_existing=True)
+        )
+        merchant_row = merchant_result.scalar_one()
+        assert merchant_row.total_views_today == 1
+        assert merchant_row.active_services == 4
+    
+    async def test_backfill_invalid_range(self, db_session):
+        """Test that a backfill with end before start raises ValidationError."""
+        today = date.today()
+        
+        with pytest.raises(ValidationError, match="end date"):
+            await MetricsRollupService(db_session).backfill(today, today - timedelta(days=1))
@@ -44,27 +44,16 @@ async def test_app(db_session):
     
     app.dependency_overrides[get_db_session] = override_get_db_session
     
-    # Mock Redis and SMS services
-    with patch('app.services.auth_service.RedisClient') as MockRedisClient, \
+    # Mock OTP store and SMS services
+    with patch('app.services.auth_service.OTPStore') as MockOTPStore, \
          patch('app.services.auth_service.SMSService') as MockSMSService:
         
-        # Create mock Redis client
-        mock_redis = AsyncMock()
-        mock_redis.get = AsyncMock(return_value=None)
-        mock_redis.setex = AsyncMock(return_value=True)
-        mock_redis.incr = AsyncMock(return_value=1)
-        mock_redis.expire = AsyncMock(return_value=True)
-        mock_redis.delete = AsyncMock(return_value=1)
+        # Create mock OTP store (issue/consume are atomic Redis scripts)
+        mock_otp_store = MagicMock()
+        mock_otp_store.issue = AsyncMock(return_value=True)
+        mock_otp_store.consume = AsyncMock(return_value=True)
         
-        # Create mock RedisClient instance
-        mock_redis_client_instance = MagicMock()
-        mock_redis_client_instance.get = mock_redis.get
-        mock_redis_client_instance.setex = mock_redis.setex
-        mock_redis_client_instance.incr = mock_redis.incr
-        mock_redis_client_instance.expire = mock_redis.expire
-        mock_redis_client_instance.delete = mock_redis.delete
-        
-        MockRedisClient.return_value = mock_redis_client_instance
+        MockOTPStore.return_value = mock_otp_store
         
         # Create mock SMS service
         mock_sms = AsyncMock()
@@ -72,7 +61,7 @@ async def test_app(db_session):
         MockSMSService.return_value = mock_sms
         
         # Store mocks in app state for later access
-        app.state.mock_redis = mock_redis_client_instance
+        app.state.mock_otp = mock_otp_store
         app.state.mock_sms = mock_sms
         
         # Add exception handlers (same as main.py)
@@ -126,8 +115,8 @@ class TestAuthAPI:
         client
     ):
         """Test POST /send-otp (send OTP successfully)."""
-        mock_redis = test_app.state.mock_redis
-        mock_redis.get.return_value = None  # No rate limit
+        mock_otp = test_app.state.mock_otp
+        mock_otp.issue.return_value = True  # No rate limit
         
         response = await client.post(
             "/api/v1/auth/send-otp",
@@ -148,8 +137,8 @@ class TestAuthAPI:
         client
     ):
         """Test POST /send-otp (rate limit exceeded)."""
-        mock_redis = test_app.state.mock_redis
-        mock_redis.get.return_value = "5"  # Max attempts
+        mock_otp = test_app.state.mock_otp
+        mock_otp.issue.return_value = False  # Max attempts
         
         response = await client.post(
             "/api/v1/auth/send-otp",
@@ -169,8 +158,8 @@ class TestAuthAPI:
         db_session
     ):
         """Test POST /verify-otp (new user, needs registration)."""
-        mock_redis = test_app.state.mock_redis
-        mock_redis.get.return_value = "123456"  # OTP stored
+        mock_otp = test_app.state.mock_otp
+        mock_otp.consume.return_value = True  # OTP matches
         
         unique_phone = f"90{random.randint(1000000, 9999999)}"
         
@@ -195,8 +184,8 @@ class TestAuthAPI:
         sample_client_user
     ):
         """Test POST /verify-otp (existing user, returns tokens)."""
-        mock_redis = test_app.state.mock_redis
-        mock_redis.get.return_value = "123456"  # OTP stored
+        mock_otp = test_app.state.mock_otp
+        mock_otp.consume.return_value = True  # OTP matches
         
         response = await client.post(
             "/api/v1/auth/verify-otp",
@@ -219,8 +208,8 @@ class TestAuthAPI:
         client
     ):
         """Test POST /verify-otp (invalid OTP code)."""
-        mock_redis = test_app.state.mock_redis
-        mock_redis.get.return_value = "123456"  # Stored OTP
+        mock_otp = test_app.state.mock_otp
+        mock_otp.consume.return_value = False  # Different OTP stored
         
         response = await client.post(
             "/api/v1/auth/verify-otp",
@@ -240,8 +229,8 @@ class TestAuthAPI:
         client
     ):
         """Test POST /verify-otp (expired OTP)."""
-        mock_redis = test_app.state.mock_redis
-        mock_redis.get.return_value = None  # OTP expired/not found
+        mock_otp = test_app.state.mock_otp
+        mock_otp.consume.return_value = False  # OTP expired/not found
         
         response = await client.post(
             "/api/v1/auth/verify-otp",
@@ -27,26 +27,15 @@ from app.models import User, UserType, Merchant
 @pytest.fixture
 async def auth_service(db_session):
     """Create AuthService instance with mocked dependencies."""
-    with patch('app.services.auth_service.RedisClient') as MockRedisClient, \
+    with patch('app.services.auth_service.OTPStore') as MockOTPStore, \
          patch('app.services.auth_service.SMSService') as MockSMSService:
         
-        # Create mock Redis client
-        mock_redis = AsyncMock()
-        mock_redis.get = AsyncMock(return_value=None)
-        mock_redis.setex = AsyncMock(return_value=True)
-        mock_redis.incr = AsyncMock(return_value=1)
-        mock_redis.expire = AsyncMock(return_value=True)
-        mock_redis.delete = AsyncMock(return_value=1)
+        # Create mock OTP store (issue/consume are atomic Redis scripts)
+        mock_otp_store = MagicMock()
+        mock_otp_store.issue = AsyncMock(return_value=True)
+        mock_otp_store.consume = AsyncMock(return_value=True)
         
-        # Create mock RedisClient instance
-        mock_redis_client_instance = MagicMock()
-        mock_redis_client_instance.get = mock_redis.get
-        mock_redis_client_instance.setex = mock_redis.setex
-        mock_redis_client_instance.incr = mock_redis.incr
-        mock_redis_client_instance.expire = mock_redis.expire
-        mock_redis_client_instance.delete = mock_redis.delete
-        
-        MockRedisClient.return_value = mock_redis_client_instance
+        MockOTPStore.return_value = mock_otp_store
         
         # Create mock SMS service
         mock_sms = AsyncMock()
@@ -54,10 +43,10 @@ async def auth_service(db_session):
         MockSMSService.return_value = mock_sms
         
         service = AuthService(db_session)
-        service.redis_client = mock_redis_client_instance
+        service.otp_store = mock_otp_store
         service.sms_service = mock_sms
         
-        yield service, mock_redis_client_instance, mock_sms
+        yield service, mock_otp_store, mock_sms
 
 
 @pytest.mark.asyncio
@@ -70,17 +59,17 @@ class TestAuthService:
         db_session
     ):
         """Test sending OTP successfully."""
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
-        # Mock Redis to return no attempts
-        mock_redis.get.return_value = None
+        # Mock OTP store to accept the send (under the attempt limit)
+        mock_otp.issue.return_value = True
         
         result = await service.send_otp("998901234567")
         
         assert result.message == "OTP sent successfully"
         assert result.phone_number == "901234567"  # Normalized
-        assert mock_redis.setex.called
-        assert mock_redis.incr.called
+        mock_otp.issue.assert_called_once()
+        assert mock_otp.issue.call_args.args[0] == "901234567"
         assert mock_sms.send_otp.called
     
     async def test_send_otp_rate_limit_exceeded(
@@ -89,15 +78,14 @@ class TestAuthService:
         db_session
     ):
         """Test sending OTP when rate limit is exceeded."""
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
-        # Mock Redis to return max attempts
-        mock_redis.get.return_value = "5"  # OTP_MAX_ATTEMPTS
+        # Mock OTP store to refuse the send (OTP_MAX_ATTEMPTS reached)
+        mock_otp.issue.return_value = False
         
         with pytest.raises(ValidationError, match="Maximum OTP attempts"):
             await service.send_otp("998901234567")
         
-        assert not mock_redis.setex.called
         assert not mock_sms.send_otp.called
     
     async def test_verify_otp_new_user(
@@ -106,10 +94,10 @@ class TestAuthService:
         db_session
     ):
         """Test verifying OTP for new user (not registered)."""
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
-        # Mock Redis to return OTP
-        mock_redis.get.return_value = "123456"
+        # Mock OTP store to accept the code
+        mock_otp.consume.return_value = True
         
         # No user exists in DB
         result = await service.verify_otp("998901234567", "123456")
@@ -117,7 +105,7 @@ class TestAuthService:
         assert result.is_new_user is True
         assert result.message == "Registration required"
         assert result.access_token is None
-        assert mock_redis.delete.called
+        mock_otp.consume.assert_called_once()
     
     async def test_verify_otp_existing_user(
         self,
@@ -126,10 +114,10 @@ class TestAuthService:
         sample_client_user
     ):
         """Test verifying OTP for existing user."""
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
-        # Mock Redis to return OTP
-        mock_redis.get.return_value = "123456"
+        # Mock OTP store to accept the code
+        mock_otp.consume.return_value = True
         
         result = await service.verify_otp(sample_client_user.phone_number, "123456")
         
@@ -137,7 +125,7 @@ class TestAuthService:
         assert result.access_token is not None
         assert result.refresh_token is not None
         assert result.message == "Authentication successful"
-        assert mock_redis.delete.called
+        mock_otp.consume.assert_called_once()
     
     async def test_verify_otp_invalid_code(
         self,
@@ -145,10 +133,10 @@ class TestAuthService:
         db_session
     ):
         """Test verifying OTP with invalid code."""
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
-        # Mock Redis to return different OTP
-        mock_redis.get.return_value = "123456"
+        # Mock OTP store to reject the code (different OTP stored)
+        mock_otp.consume.return_value = False
         
         with pytest.raises(AuthenticationError, match="Invalid or expired OTP"):
             await service.verify_otp("998901234567", "000000")
@@ -159,10 +147,10 @@ class TestAuthService:
         db_session
     ):
         """Test verifying OTP when expired (not in Redis)."""
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
-        # Mock Redis to return None (expired)
-        mock_redis.get.return_value = None
+        # Mock OTP store to reject the code (expired)
+        mock_otp.consume.return_value = False
         
         with pytest.raises(AuthenticationError, match="Invalid or expired OTP"):
             await service.verify_otp("998901234567", "123456")
@@ -174,7 +162,7 @@ class TestAuthService:
     ):
         """Test verifying OTP for inactive user."""
         import random
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
         # Create inactive user with unique phone number
         unique_phone = f"90{random.randint(1000000, 9999999)}"
@@ -188,8 +176,8 @@ class TestAuthService:
         await db_session.commit()
         await db_session.refresh(inactive_user)
         
-        # Mock Redis to return OTP
-        mock_redis.get.return_value = "123456"
+        # Mock OTP store to accept the code
+        mock_otp.consume.return_value = True
         
         with pytest.raises(AuthenticationError, match="Account is deactivated"):
             await service.verify_otp(f"998{unique_phone}", "123456")
@@ -201,7 +189,7 @@ class TestAuthService:
     ):
         """Test completing registration for client user."""
         import random
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
         # Use unique phone number
         unique_phone = f"90{random.randint(1000000, 9999999)}"
@@ -230,7 +218,7 @@ class TestAuthService:
     ):
         """Test completing registration for merchant user."""
         import random
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
         # Use unique phone number
         unique_phone = f"90{random.randint(1000000, 9999999)}"
@@ -265,7 +253,7 @@ class TestAuthService:
         sample_client_user
     ):
         """Test completing registration when user already exists."""
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
         with pytest.raises(ConflictError, match="User already exists"):
             await service.complete_registration(
@@ -283,7 +271,7 @@ class TestAuthService:
         """Test refreshing access token successfully."""
         from app.core.security import create_refresh_token
         
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
         # Create valid refresh token
         refresh_token = create_refresh_token(str(sample_client_user.id))
@@ -300,7 +288,7 @@ class TestAuthService:
         db_session
     ):
         """Test refreshing token with invalid refresh token."""
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
         with pytest.raises(AuthenticationError, match="Invalid refresh token"):
             await service.refresh_token("invalid_token")
@@ -314,7 +302,7 @@ class TestAuthService:
         import random
         from app.core.security import create_refresh_token
         
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
         # Create inactive user with unique phone number
         unique_phone = f"90{random.randint(1000000, 9999999)}"
@@ -340,9 +328,9 @@ class TestAuthService:
         db_session
     ):
         """Test phone number normalization in send_otp."""
-        service, mock_redis, mock_sms = auth_service
+        service, mock_otp, mock_sms = auth_service
         
-        mock_redis.get.return_value = None
+        mock_otp.issue.return_value = True
         
         # Test various phone number formats
         result = await service.send_otp("998901234567")
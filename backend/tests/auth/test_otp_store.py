@@ -0,0 +1,98 @@
+"""
+Tests for OTPStore and the shared Redis connection pool.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.config import settings
+from app.utils import redis_client
+from app.utils.otp_store import OTPStore, ISSUE_OTP_SCRIPT, CONSUME_OTP_SCRIPT
+from app.utils.redis_client import RedisClient, init_redis_pool, close_redis_pool, redis_pool_stats
+
+
+@pytest.fixture
+def scripts():
+    """Redis client mock whose registered scripts are AsyncMocks keyed by source."""
+    registered = {}
+    
+    def register_script(source):
+        registered[source] = AsyncMock(return_value=1)
+        return registered[source]
+    
+    redis = MagicMock()
+    redis.register_script = MagicMock(side_effect=register_script)
+    client = MagicMock()
+    client.get_redis = AsyncMock(return_value=redis)
+    return client, redis, registered
+
+
+@pytest.mark.asyncio
+class TestOTPStore:
+    """Test OTPStore script calls."""
+    
+    async def test_issue(self, scripts):
+        """Test issuing runs one script call with the code, TTL and limits."""
+        client, redis, registered = scripts
+        store = OTPStore(client)
+        
+        assert await store.issue("901234567", "654321") is True
+        
+        registered[ISSUE_OTP_SCRIPT].assert_awaited_once_with(
+            keys=["otp:901234567", "otp_attempts:901234567"],
+            args=[
+                "654321",
+                settings.OTP_EXPIRE_MINUTES * 60,
+                settings.OTP_MAX_ATTEMPTS,
+                OTPStore.ATTEMPTS_WINDOW_SECONDS
+            ]
+        )
+        
+        # Rate limited: the script refuses
+        registered[ISSUE_OTP_SCRIPT].return_value = 0
+        assert await store.issue("901234567", "654321") is False
+        assert redis.register_script.call_count == 1
+    
+    async def test_consume(self, scripts):
+        """Test consuming runs one script call and reports a match."""
+        client, redis, registered = scripts
+        store = OTPStore(client)
+        
+        assert await store.consume("901234567", "654321") is True
+        registered[CONSUME_OTP_SCRIPT].assert_awaited_once_with(
+            keys=["otp:901234567", "otp_attempts:901234567"],
+            args=["654321"]
+        )
+        
+        registered[CONSUME_OTP_SCRIPT].return_value = 0
+        assert await store.consume("901234567", "000000") is False
+
+
+@pytest.mark.asyncio
+class TestRedisPool:
+    """Test the shared Redis connection pool lifecycle."""
+    
+    async def test_clients_share_pool(self):
+        """Test every client uses the one bounded pool until it is closed."""
+        await close_redis_pool()
+        assert redis_pool_stats()["in_use"] == 0
+        
+        pool = init_redis_pool()
+        first = await RedisClient().get_redis()
+        second = await RedisClient().get_redis()
+        
+        assert init_redis_pool() is pool
+        assert first.connection_pool is pool
+        assert second.connection_pool is pool
+        assert redis_pool_stats() == {
+            "max_connections": settings.REDIS_POOL_MAX_CONNECTIONS,
+            "in_use": 0,
+            "idle": 0
+        }
+        
+        # A client outliving the pool rebinds to the new one
+        client = RedisClient()
+        await client.get_redis()
+        await close_redis_pool()
+        assert redis_client._pool is None
+        assert (await client.get_redis()).connection_pool is init_redis_pool()
+        await close_redis_pool()
@@ -0,0 +1,268 @@
+"""
+Tests for SMSService, the SMS delivery queue and the SMS providers.
+"""
+import asyncio
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.exceptions import SMSError
+from app.services.sms_providers import EskizSMSProvider, StubSMSProvider, TransientSMSError
+from app.services.sms_queue import KIND_NOTIFICATION, KIND_OTP, SMSDeliveryQueue
+from app.services.sms_service import SMSService
+
+
+@pytest.fixture
+def redis():
+    """Redis client mock whose pipelines record their commands."""
+    redis = MagicMock()
+    redis.xadd = AsyncMock()
+    redis.xclaim = AsyncMock()
+    redis.pipelines = []
+
+    def pipeline(transaction=True):
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[])
+        redis.pipelines.append(pipe)
+        return pipe
+
+    redis.pipeline = MagicMock(side_effect=pipeline)
+    return redis
+
+
+def make_queue(redis, provider, enabled=True):
+    queue = SMSDeliveryQueue(provider=provider, enabled=enabled)
+    queue._redis_client = MagicMock()
+    queue._redis_client.get_redis = AsyncMock(return_value=redis)
+    queue.retry_base_delay = 0
+    return queue
+
+
+@pytest.mark.asyncio
+class TestSMSService:
+    """Test SMSService through the delivery queue."""
+
+    async def test_send_otp_enqueues(self, redis):
+        """Test an OTP is only appended to the stream when the queue is enabled."""
+        provider = StubSMSProvider()
+        service = SMSService(make_queue(redis, provider))
+
+        assert await service.send_otp("901234567", "123456") is True
+
+        redis.xadd.assert_awaited_once_with(
+            SMSDeliveryQueue.STREAM,
+            {
+                "phone_number": "901234567",
+                "message": "Wedy ilovasi uchun tasdiqlash kodi: 123456",
+                "kind": KIND_OTP
+            }
+        )
+        assert provider.sent == []
+
+    async def test_send_inline_when_queue_unavailable(self, redis):
+        """Test messages are sent directly if Redis is down or the queue disabled."""
+        provider = StubSMSProvider()
+        redis.xadd.side_effect = ConnectionError("redis down")
+        service = SMSService(make_queue(redis, provider))
+
+        await service.send_otp("901234567", "123456")
+        await SMSService(make_queue(redis, provider, enabled=False)).send_notification("907654321", "Hello")
+
+        assert [item["phone_number"] for item in provider.sent] == ["901234567", "907654321"]
+
+    async def test_send_bulk_notification(self, redis):
+        """Test bulk notifications are queued in one pipeline."""
+        provider = StubSMSProvider()
+        service = SMSService(make_queue(redis, provider))
+
+        count = await service.send_bulk_notification(["901111111", "902222222", "903333333"], "Sale")
+
+        assert count == 3
+        assert len(redis.pipelines) == 1
+        assert redis.pipelines[0].xadd.call_count == 3
+        redis.pipelines[0].execute.assert_awaited_once()
+
+    async def test_send_otp_error_propagates(self, redis):
+        """Test a failed inline send raises SMSError."""
+        provider = StubSMSProvider()
+        provider.fail_with = SMSError("Failed to send SMS")
+        service = SMSService(make_queue(redis, provider, enabled=False))
+
+        with pytest.raises(SMSError):
+            await service.send_otp("901234567", "123456")
+
+
+@pytest.mark.asyncio
+class TestSMSDeliveryQueue:
+    """Test delivery, retry and dead-lettering of queued messages."""
+
+    async def test_deliver_retries_transient_errors(self, redis):
+        """Test transient errors are retried and the message acknowledged once sent."""
+        provider = StubSMSProvider()
+        provider.send = AsyncMock(side_effect=[TransientSMSError("busy"), TransientSMSError("busy"), None])
+        queue = make_queue(redis, provider)
+        entry = ("1-0", {"phone_number": "901234567", "message": "Hi", "kind": KIND_OTP})
+
+        assert await queue._deliver([entry]) is True
+
+        assert provider.send.await_count == 3
+        pipe = redis.pipelines[-1]
+        pipe.xack.assert_called_once_with(SMSDeliveryQueue.STREAM, SMSDeliveryQueue.GROUP, "1-0")
+        pipe.xdel.assert_called_once_with(SMSDeliveryQueue.STREAM, "1-0")
+
+    async def test_deliver_dead_letters_permanent_errors(self, redis):
+        """Test a permanent error moves the message to the dead-letter stream without retrying."""
+        provider = StubSMSProvider()
+        provider.fail_with = SMSError("Invalid phone number")
+        provider.send = AsyncMock(wraps=provider.send)
+        queue = make_queue(redis, provider)
+        entry = ("1-0", {"phone_number": "901234567", "message": "Hi", "kind": KIND_OTP})
+
+        assert await queue._deliver([entry]) is False
+
+        assert provider.send.await_count == 1
+        pipe = redis.pipelines[-1]
+        dead_stream, fields = pipe.xadd.call_args.args
+        assert dead_stream == SMSDeliveryQueue.DEAD_LETTER_STREAM
+        assert fields["source_id"] == "1-0"
+        assert fields["error"] == "Invalid phone number"
+        pipe.xack.assert_called_once()
+
+    async def test_deliver_dead_letters_after_max_attempts(self, redis):
+        """Test a message failing transiently on every attempt is dead-lettered."""
+        provider = StubSMSProvider()
+        provider.fail_with = TransientSMSError("busy")
+        provider.send = AsyncMock(wraps=provider.send)
+        queue = make_queue(redis, provider)
+        queue.max_attempts = 3
+        entry = ("1-0", {"phone_number": "901234567", "message": "Hi", "kind": KIND_OTP})
+
+        assert await queue._deliver([entry]) is False
+
+        assert provider.send.await_count == 3
+        assert redis.pipelines[-1].xadd.call_args.args[0] == SMSDeliveryQueue.DEAD_LETTER_STREAM
+
+    async def test_dispatch_batches_notifications(self, redis):
+        """Test notifications go out as provider batches and OTP codes one by one."""
+        provider = StubSMSProvider()
+        provider.send_batch = AsyncMock()
+        queue = make_queue(redis, provider)
+        queue.batch_size = 2
+        entries = [
+            (f"{index}-0", {"phone_number": f"90000000{index}", "message": "Sale", "kind": KIND_NOTIFICATION})
+            for index in range(3)
+        ]
+        entries.append(("9-0", {"phone_number": "901234567", "message": "Code", "kind": KIND_OTP}))
+
+        queue._dispatch(entries)
+        await queue.stop()
+
+        provider.send_batch.assert_awaited_once()
+        batch = provider.send_batch.await_args.args[0]
+        assert [item["phone_number"] for item in batch] == ["900000000", "900000001"]
+        # The OTP and the leftover notification are sent on their own
+        assert sorted(item["phone_number"] for item in provider.sent) == ["900000002", "901234567"]
+
+    async def test_refresh_claims_keeps_deliveries_in_flight(self, redis):
+        """Test entries being retried are re-claimed, and released once delivered."""
+        release = asyncio.Event()
+        provider = StubSMSProvider()
+
+        async def send(phone_number, message):
+            await release.wait()
+
+        provider.send = AsyncMock(side_effect=send)
+        queue = make_queue(redis, provider)
+        queue._dispatch([("1-0", {"phone_number": "901234567", "message": "Code", "kind": KIND_OTP})])
+        await asyncio.sleep(0)
+
+        await queue._refresh_claims()
+
+        redis.xclaim.assert_awaited_once_with(
+            SMSDeliveryQueue.STREAM, SMSDeliveryQueue.GROUP, queue.consumer,
+            min_idle_time=0, message_ids=["1-0"], justid=True
+        )
+
+        release.set()
+        await queue.stop()
+        await queue._refresh_claims()
+
+        assert redis.xclaim.await_count == 1
+
+    async def test_claim_idle_resumes_from_cursor(self, redis):
+        """Test each XAUTOCLAIM continues where the previous one stopped, until Redis returns 0-0."""
+        entry = ("5-0", {"phone_number": "901234567", "message": "Code", "kind": KIND_OTP})
+        redis.xautoclaim = AsyncMock(side_effect=[[b"7-0", [entry], []], ["0-0", [], []], ["0-0", [], []]])
+        queue = make_queue(redis, StubSMSProvider())
+
+        assert await queue._claim_idle(redis) == [entry]
+        assert await queue._claim_idle(redis) == []
+        await queue._claim_idle(redis)
+
+        assert [call.kwargs["start_id"] for call in redis.xautoclaim.await_args_list] == ["0-0", "7-0", "0-0"]
+
+    async def test_decode_bytes(self):
+        """Test stream entries read as bytes are decoded."""
+        entry_id, fields = SMSDeliveryQueue._decode(b"1-0", {b"phone_number": b"901234567", b"kind": b"otp"})
+
+        assert entry_id == "1-0"
+        assert fields == {"phone_number": "901234567", "kind": "otp"}
+
+
+@pytest.mark.asyncio
+class TestEskizSMSProvider:
+    """Test the eskiz.uz provider against a mocked HTTP transport."""
+
+    def make_provider(self, handler):
+        provider = EskizSMSProvider()
+        provider._client = httpx.AsyncClient(
+            base_url="https://notify.test/api",
+            transport=httpx.MockTransport(handler)
+        )
+        return provider
+
+    async def test_token_shared_and_refreshed_on_401(self):
+        """Test the token is fetched once and refreshed when the provider rejects it."""
+        calls = []
+        tokens = iter(["token-1", "token-2"])
+
+        def handler(request):
+            calls.append((request.url.path, request.headers.get("Authorization")))
+            if request.url.path.endswith("/auth/login"):
+                return httpx.Response(200, json={"data": {"token": next(tokens)}})
+            if request.headers["Authorization"] == "Bearer token-1" and len(calls) > 3:
+                return httpx.Response(401)
+            return httpx.Response(200, json={"status": "waiting"})
+
+        provider = self.make_provider(handler)
+
+        await provider.send("901234567", "one")
+        await provider.send("901234567", "two")
+        await provider.send("901234567", "three")
+        await provider.close()
+
+        paths = [path for path, _ in calls]
+        assert paths.count("/api/auth/login") == 2
+        assert calls[-1] == ("/api/message/sms/send", "Bearer token-2")
+
+    async def test_error_classification(self):
+        """Test 5xx responses are transient and 4xx responses permanent."""
+        status = {"code": 503}
+
+        def handler(request):
+            if request.url.path.endswith("/auth/login"):
+                return httpx.Response(200, json={"data": {"token": "token"}})
+            return httpx.Response(status["code"], json={"status": "error", "message": "Bad"})
+
+        provider = self.make_provider(handler)
+
+        with pytest.raises(TransientSMSError):
+            await provider.send("901234567", "Hi")
+
+        status["code"] = 400
+        with pytest.raises(SMSError) as exc_info:
+            await provider.send("901234567", "Hi")
+        assert not isinstance(exc_info.value, TransientSMSError)
+
+        await provider.close()
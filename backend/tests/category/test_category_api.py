@@ -143,6 +143,30 @@ class TestCategoryAPI:
         assert len(data["categories"]) >= 1
         assert any(cat["id"] == str(sample_category.id) for cat in data["categories"])
     
+    async def test_get_categories_conditional(
+        self,
+        test_app,
+        db_session,
+        sample_category,
+        unauthenticated_client
+    ):
+        """Test GET / returns an ETag and 304 for a matching If-None-Match."""
+        response = await unauthenticated_client.get("/api/v1/categories/")
+        
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert not etag.startswith("W/")
+        assert response.headers["cache-control"].startswith("public, max-age=")
+        
+        response = await unauthenticated_client.get(
+            "/api/v1/categories/",
+            headers={"If-None-Match": f'"other", {etag}'}
+        )
+        
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+    
     async def test_get_category_by_id_public(
         self,
         test_app,
@@ -8,6 +8,13 @@ import asyncio
 from typing import AsyncGenerator
 from uuid import uuid4
 
+# Fixtures write straight to the database, bypassing cache invalidation
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+os.environ.setdefault("AUTH_USER_CACHE_ENABLED", "false")
+# No Redis in tests; SMS goes straight to the (stub) provider
+os.environ.setdefault("SMS_QUEUE_ENABLED", "false")
+os.environ.setdefault("SMS_PROVIDER", "stub")
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlmodel import SQLModel
 
@@ -95,6 +102,12 @@ async def db_session(setup_test_db) -> AsyncGenerator[AsyncSession, None]:
         await session.rollback()
 
 
+@pytest.fixture
+def session_factory(setup_test_db):
+    """Provide the test session factory, for code that opens its own sessions."""
+    return TestSessionLocal
+
+
 @pytest.fixture
 async def sample_client_user(db_session: AsyncSession) -> User:
     """Create a sample client user for testing."""
@@ -0,0 +1,235 @@
+"""
+Tests for presigned direct-to-S3 image uploads against a stubbed boto3 S3 client.
+"""
+import io
+from datetime import date, datetime, timedelta
+
+import pytest
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from sqlmodel import select
+
+from app.core.exceptions import ForbiddenError, NotFoundError, ValidationError
+from app.models import Image, ImageType, MerchantSubscription, PendingImageUpload, SubscriptionStatus
+from app.services.image_upload_manager import ImageUploadManager
+from app.utils.image_upload import ImageUploadService
+from app.utils.s3_client import S3ImageManager
+
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n\x00\x00\x00\r"
+
+
+def object_body(data: bytes) -> StreamingBody:
+    return StreamingBody(io.BytesIO(data), len(data))
+
+
+@pytest.fixture
+def s3():
+    """Real S3ImageManager whose boto3 client is answered locally by a Stubber."""
+    manager = S3ImageManager()
+    service = ImageUploadService(manager, max_workers=1)
+    with Stubber(manager.s3_client) as stubber:
+        yield service, stubber
+    service.shutdown()
+
+
+@pytest.fixture
+async def subscription(db_session, sample_merchant, sample_tariff):
+    """Active subscription for the sample merchant."""
+    subscription = MerchantSubscription(
+        merchant_id=sample_merchant.id,
+        tariff_plan_id=sample_tariff.id,
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=30),
+        status=SubscriptionStatus.ACTIVE
+    )
+    db_session.add(subscription)
+    await db_session.commit()
+    return subscription
+
+
+@pytest.mark.asyncio
+class TestImageUploadManager:
+    """Test issuing, confirming and reaping presigned uploads."""
+
+    async def test_request_upload(self, db_session, s3, sample_merchant_user, sample_service, subscription):
+        """Test an upload URL is signed for the pending upload's key."""
+        upload_service, stubber = s3
+        manager = ImageUploadManager(db_session, upload_service=upload_service)
+
+        pending, upload_url = await manager.request_upload(
+            sample_merchant_user.id, ImageType.SERVICE_IMAGE, "photo.png", "image/png",
+            service_id=sample_service.id
+        )
+
+        assert pending.s3_key.startswith(f"service_image/{sample_service.id}/")
+        assert pending.s3_key in upload_url
+        assert pending.expires_at > datetime.now()
+        assert pending.user_id == sample_merchant_user.id
+
+    async def test_pending_uploads_count_against_limit(
+        self, db_session, s3, sample_merchant_user, sample_tariff, subscription
+    ):
+        """Test the gallery limit includes uploads that are not confirmed yet."""
+        upload_service, stubber = s3
+        sample_tariff.max_gallery_images = 2
+        db_session.add(sample_tariff)
+        await db_session.commit()
+        manager = ImageUploadManager(db_session, upload_service=upload_service)
+
+        for _ in range(2):
+            await manager.request_upload(sample_merchant_user.id, ImageType.MERCHANT_GALLERY, "a.jpg", "image/jpeg")
+
+        with pytest.raises(ForbiddenError, match="pending uploads: 2"):
+            await manager.request_upload(sample_merchant_user.id, ImageType.MERCHANT_GALLERY, "a.jpg", "image/jpeg")
+
+    async def test_request_upload_validation(self, db_session, s3, sample_merchant_user, subscription):
+        """Test disallowed types and services of other merchants are rejected."""
+        upload_service, stubber = s3
+        manager = ImageUploadManager(db_session, upload_service=upload_service)
+
+        with pytest.raises(ValidationError, match="not allowed"):
+            await manager.request_upload(sample_merchant_user.id, ImageType.MERCHANT_GALLERY, "a.gif", "image/gif")
+        with pytest.raises(NotFoundError, match="Service not found"):
+            await manager.request_upload(
+                sample_merchant_user.id, ImageType.SERVICE_IMAGE, "a.png", "image/png", service_id="999999999"
+            )
+
+    async def test_confirm_upload(self, db_session, s3, sample_merchant_user, sample_merchant, subscription):
+        """Test a confirmed upload becomes an Image with the size reported by S3."""
+        upload_service, stubber = s3
+        manager = ImageUploadManager(db_session, upload_service=upload_service)
+        pending, _ = await manager.request_upload(
+            sample_merchant_user.id, ImageType.MERCHANT_GALLERY, "photo.png", "image/png", display_order=3
+        )
+        stubber.add_response(
+            "head_object",
+            {"ContentLength": 4096, "ContentType": "image/png"},
+            {"Bucket": upload_service.s3.bucket_name, "Key": pending.s3_key}
+        )
+        stubber.add_response(
+            "get_object",
+            {"Body": object_body(PNG_HEADER)},
+            {"Bucket": upload_service.s3.bucket_name, "Key": pending.s3_key, "Range": "bytes=0-11"}
+        )
+
+        image = await manager.confirm_upload(sample_merchant_user.id, pending.id, ImageType.MERCHANT_GALLERY)
+
+        assert image.s3_url == upload_service.s3.get_public_url(pending.s3_key)
+        assert image.file_size == 4096
+        assert image.display_order == 3
+        assert image.related_id == str(sample_merchant.id)
+        assert await manager.upload_repo.get_pending_upload(pending.id, sample_merchant_user.id) is None
+        stubber.assert_no_pending_responses()
+
+    async def test_confirm_before_upload_keeps_pending(self, db_session, s3, sample_merchant_user, subscription):
+        """Test confirming before the object exists fails but can be retried."""
+        upload_service, stubber = s3
+        manager = ImageUploadManager(db_session, upload_service=upload_service)
+        pending, _ = await manager.request_upload(
+            sample_merchant_user.id, ImageType.MERCHANT_GALLERY, "photo.png", "image/png"
+        )
+        stubber.add_client_error("head_object", service_error_code="404", http_status_code=404)
+
+        with pytest.raises(ValidationError, match="not been uploaded"):
+            await manager.confirm_upload(sample_merchant_user.id, pending.id, ImageType.MERCHANT_GALLERY)
+
+        assert await manager.upload_repo.get_pending_upload(pending.id, sample_merchant_user.id) is not None
+
+    async def test_confirm_rejects_invalid_object(self, db_session, s3, sample_merchant_user, subscription):
+        """Test an oversized object is deleted with its pending upload."""
+        upload_service, stubber = s3
+        s3_manager = upload_service.s3
+        manager = ImageUploadManager(db_session, upload_service=upload_service)
+        pending, _ = await manager.request_upload(
+            sample_merchant_user.id, ImageType.MERCHANT_GALLERY, "photo.png", "image/png"
+        )
+        stubber.add_response("head_object", {"ContentLength": s3_manager.MAX_IMAGE_SIZE + 1, "ContentType": "image/png"})
+        stubber.add_response(
+            "delete_objects", {},
+            {"Bucket": s3_manager.bucket_name, "Delete": {"Objects": [{"Key": pending.s3_key}], "Quiet": True}}
+        )
+
+        with pytest.raises(ValidationError, match="exceeds maximum"):
+            await manager.confirm_upload(sample_merchant_user.id, pending.id, ImageType.MERCHANT_GALLERY)
+
+        assert await manager.upload_repo.get_pending_upload(pending.id, sample_merchant_user.id) is None
+        stubber.assert_no_pending_responses()
+
+    async def test_confirm_rejects_content_not_matching_type(
+        self, db_session, s3, sample_merchant_user, subscription
+    ):
+        """Test an object labelled as an image whose bytes are not that image is deleted."""
+        upload_service, stubber = s3
+        s3_manager = upload_service.s3
+        manager = ImageUploadManager(db_session, upload_service=upload_service)
+        pending, _ = await manager.request_upload(
+            sample_merchant_user.id, ImageType.MERCHANT_GALLERY, "photo.jpg", "image/jpeg"
+        )
+        stubber.add_response("head_object", {"ContentLength": 4096, "ContentType": "image/jpeg"})
+        stubber.add_response("get_object", {"Body": object_body(b"<html><script")})
+        stubber.add_response(
+            "delete_objects", {},
+            {"Bucket": s3_manager.bucket_name, "Delete": {"Objects": [{"Key": pending.s3_key}], "Quiet": True}}
+        )
+
+        with pytest.raises(ValidationError, match="not a valid image/jpeg image"):
+            await manager.confirm_upload(sample_merchant_user.id, pending.id, ImageType.MERCHANT_GALLERY)
+
+        assert await manager.upload_repo.get_pending_upload(pending.id, sample_merchant_user.id) is None
+        stubber.assert_no_pending_responses()
+
+    async def test_confirm_other_users_upload(self, db_session, s3, sample_merchant_user, sample_client_user, subscription):
+        """Test an upload can only be confirmed by the user who requested it."""
+        upload_service, stubber = s3
+        manager = ImageUploadManager(db_session, upload_service=upload_service)
+        pending, _ = await manager.request_upload(
+            sample_merchant_user.id, ImageType.MERCHANT_GALLERY, "photo.png", "image/png"
+        )
+
+        with pytest.raises(NotFoundError):
+            await manager.confirm_upload(sample_client_user.id, pending.id, ImageType.MERCHANT_GALLERY)
+
+    async def test_reap_expired_uploads(self, db_session, s3, sample_merchant_user, sample_merchant):
+        """Test expired uploads are deleted from S3 in one batch, and unexpired ones kept."""
+        upload_service, stubber = s3
+        s3_manager = upload_service.s3
+        expired = [
+            PendingImageUpload(
+                s3_key=f"merchant_gallery/{sample_merchant.id}/expired-{index}.png",
+                content_type="image/png",
+                file_name="photo.png",
+                image_type=ImageType.MERCHANT_GALLERY,
+                related_id=str(sample_merchant.id),
+                user_id=sample_merchant_user.id,
+                expires_at=datetime.now() - timedelta(days=1)
+            )
+            for index in range(2)
+        ]
+        current = PendingImageUpload(
+            s3_key=f"merchant_gallery/{sample_merchant.id}/current.png",
+            content_type="image/png",
+            file_name="photo.png",
+            image_type=ImageType.MERCHANT_GALLERY,
+            related_id=str(sample_merchant.id),
+            user_id=sample_merchant_user.id,
+            expires_at=datetime.now() + timedelta(minutes=5)
+        )
+        db_session.add_all(expired + [current])
+        await db_session.commit()
+        stubber.add_response(
+            "delete_objects", {},
+            {
+                "Bucket": s3_manager.bucket_name,
+                "Delete": {"Objects": [{"Key": pending.s3_key} for pending in expired], "Quiet": True}
+            }
+        )
+
+        result = await ImageUploadManager(db_session, upload_service=upload_service).reap_expired_uploads()
+
+        assert result == {"reaped": 2, "failed": 0}
+        remaining = (await db_session.execute(
+            select(PendingImageUpload.s3_key).where(PendingImageUpload.user_id == sample_merchant_user.id)
+        )).scalars().all()
+        assert remaining == [current.s3_key]
+        stubber.assert_no_pending_responses()
@@ -68,6 +68,42 @@ class TestMerchantManager:
         assert profile.subscription.tariff_plan_id == sample_tariff.id
         assert profile.subscription.days_remaining >= 0
     
+    async def test_get_merchant_profile_with_identity(
+        self,
+        db_session,
+        sample_merchant: "Merchant",
+        sample_merchant_user: "User",
+        sample_tariff: "TariffPlan"
+    ):
+        """Test the request identity is used instead of refetching."""
+        from app.core.identity import RequestIdentity
+        
+        now = date.today()
+        subscription = MerchantSubscription(
+            merchant_id=sample_merchant.id,
+            tariff_plan_id=sample_tariff.id,
+            start_date=now,
+            end_date=now + timedelta(days=30),
+            status=SubscriptionStatus.ACTIVE
+        )
+        identity = RequestIdentity(sample_merchant_user, sample_merchant, subscription, sample_tariff)
+        manager = MerchantManager(db_session, identity)
+        
+        # The subscription only exists in the identity, not in the database
+        profile = await manager.get_merchant_profile(sample_merchant_user.id)
+        
+        assert profile.id == sample_merchant.id
+        assert profile.subscription.tariff_plan_id == sample_tariff.id
+        assert await manager.get_merchant(sample_merchant_user.id) is sample_merchant
+        
+        # Without an active subscription the identity still answers
+        manager = MerchantManager(db_session, RequestIdentity(sample_merchant_user, sample_merchant))
+        with pytest.raises(PaymentRequiredError):
+            await manager.update_merchant_profile(
+                sample_merchant_user.id,
+                MerchantProfileUpdateRequest(business_name="No Subscription")
+            )
+    
     async def test_get_merchant_profile_not_found(
         self,
         db_session
@@ -0,0 +1,107 @@
+"""
+Tests for Payme GetStatement.
+"""
+import json
+import random
+from datetime import datetime
+
+import pytest
+
+from app.models import Payment, PaymentMethod, PaymentStatus, PaymentType
+from app.repositories.payment_repository import PaymentRepository
+from app.services.payme_merchant_api import PaymeMerchantAPI
+
+
+@pytest.fixture
+async def statement_payments(db_session, sample_merchant_user):
+    """Payme payments in each transaction state, one second apart from a random base time."""
+    base_time = random.randint(1, 10 ** 6) * 10 ** 6
+    payments = []
+    for index, (status, extra) in enumerate((
+        (PaymentStatus.COMPLETED, {"payme_perform_time": base_time + 1500, "completed_at": datetime.now()}),
+        (PaymentStatus.PENDING, {}),
+        (PaymentStatus.CANCELLED, {"payme_cancel_time": base_time + 3500, "payme_cancel_reason": 3}),
+    )):
+        payments.append(Payment(
+            user_id=sample_merchant_user.id,
+            payment_type=PaymentType.TARIFF_SUBSCRIPTION,
+            payment_method=PaymentMethod.PAYME,
+            amount=100000.0,
+            status=status,
+            transaction_id=f"{base_time + index:024x}",
+            payme_transaction_id=f"{base_time + index:024x}",
+            payme_create_time=base_time + (index + 1) * 1000,
+            **extra
+        ))
+    # Another provider's payment in the same period is never listed
+    payments.append(Payment(
+        user_id=sample_merchant_user.id,
+        payment_type=PaymentType.TARIFF_SUBSCRIPTION,
+        payment_method=PaymentMethod.CLICK,
+        amount=100000.0,
+        payme_create_time=base_time + 2000
+    ))
+    db_session.add_all(payments)
+    await db_session.commit()
+    return base_time, payments
+
+
+@pytest.mark.asyncio
+class TestPaymeStatement:
+    """Test GetStatement range queries and streaming."""
+
+    async def test_get_statement_range(self, db_session, statement_payments):
+        """Test only Payme transactions created in the period are listed, oldest first."""
+        base_time, payments = statement_payments
+        api = PaymeMerchantAPI(db_session, secret_key="test")
+
+        result = await api.get_statement({"from": base_time + 1000, "to": base_time + 3000})
+
+        transactions = result["transactions"]
+        assert [t["transaction"] for t in transactions] == [str(payment.id) for payment in payments[:3]]
+        assert [t["state"] for t in transactions] == [
+            api.STATE_COMPLETED, api.STATE_CREATED, api.STATE_CANCELLED
+        ]
+        assert transactions[0]["perform_time"] == base_time + 1500
+        assert transactions[2]["cancel_time"] == base_time + 3500
+        assert transactions[2]["reason"] == 3
+
+        result = await api.get_statement({"from": base_time + 1001, "to": base_time + 2999})
+        assert [t["transaction"] for t in result["transactions"]] == [str(payments[1].id)]
+
+    async def test_stream_statement(self, db_session, session_factory, statement_payments):
+        """Test the streamed body is the same JSON-RPC response, written in several chunks."""
+        base_time, _ = statement_payments
+        api = PaymeMerchantAPI(db_session, secret_key="test")
+        api.STATEMENT_CHUNK_SIZE = 1
+        request_data = {
+            "id": 42,
+            "method": "GetStatement",
+            "params": {"from": base_time, "to": base_time + 10 ** 5}
+        }
+
+        chunks = [chunk async for chunk in await api.stream_statement(request_data, session_factory)]
+
+        assert len(chunks) > 2
+        assert json.loads(b"".join(chunks)) == await api.handle_request(request_data)
+
+    async def test_stream_statement_invalid_params(self, db_session, session_factory):
+        """Test invalid periods are left to handle_request for the error response."""
+        api = PaymeMerchantAPI(db_session, secret_key="test")
+        request_data = {"id": 1, "method": "GetStatement", "params": {"from": 2, "to": 1}}
+
+        assert await api.stream_statement(request_data, session_factory) is None
+        assert (await api.handle_request(request_data))["error"]["code"] == -32602
+
+    async def test_stream_statement_database_error(self, db_session, session_factory, monkeypatch):
+        """Test a database error before the first chunk is left to handle_request."""
+        async def failing_stream(self, from_time, to_time):
+            raise RuntimeError("connection lost")
+            yield
+
+        monkeypatch.setattr(PaymentRepository, "stream_payme_payments_by_create_time", failing_stream)
+        api = PaymeMerchantAPI(db_session, secret_key="test")
+        request_data = {"id": 1, "method": "GetStatement", "params": {"from": 1, "to": 2}}
+
+        assert await api.stream_statement(request_data, session_factory) is None
+        assert (await api.handle_request(request_data))["error"]["code"] == -32603
@@ -341,15 +341,30 @@ class TestPaymentAPI:
     async def test_get_payment_stats_admin(
         self,
         test_app,
-        unauthenticated_client
+        authenticated_client
     ):
         """Test GET /admin/stats (admin endpoint)."""
-        response = await unauthenticated_client.get(
-            "/api/v1/payments/admin/stats"
-        )
+        from app.api.deps import get_current_admin
+        
+        # Non-admin users are rejected
+        response = await authenticated_client.get("/api/v1/payments/admin/stats")
+        assert response.status_code == 403
+        
+        test_app.dependency_overrides[get_current_admin] = lambda: None
+        response = await authenticated_client.get("/api/v1/payments/admin/stats")
         
-        # Admin endpoint should work (currently no auth check)
         assert response.status_code == 200
         data = response.json()
-        assert "message" in data
+        assert "total_revenue" in data["payments"]
+        assert "active_subscriptions" in data["subscriptions"]
+        assert isinstance(data["breakdown"], list)
+        
+        response = await authenticated_client.get(
+            "/api/v1/payments/admin/stats/revenue",
+            params={"period": "month", "start_date": "2001-01-01", "end_date": "2001-03-31"}
+        )
+        assert response.status_code == 200
+        assert [point["period_start"] for point in response.json()["points"]] == [
+            "2001-01-01", "2001-02-01", "2001-03-01"
+        ]
 
@@ -80,6 +80,207 @@ class TestPaymentRepository:
         assert retrieved is not None
         assert retrieved.transaction_id == transaction_id
     
+    async def test_backfill_and_get_payment_by_payme_transaction_id(self, db_session, sample_merchant_user):
+        """Test older Payme payments are backfilled in chunks and then found by Payme ID."""
+        repo = PaymentRepository(db_session)
+        
+        in_transaction_id = uuid4().hex[:24]
+        in_metadata = uuid4().hex[:24]
+        payments = [
+            Payment(
+                user_id=sample_merchant_user.id,
+                payment_type=PaymentType.TARIFF_SUBSCRIPTION,
+                payment_method=PaymentMethod.PAYME,
+                amount=100000.0,
+                transaction_id=transaction_id,
+                payment_metadata=payment_metadata
+            )
+            for transaction_id, payment_metadata in (
+                (in_transaction_id, None),
+                (str(uuid4()), {"payme_transaction_id": in_metadata}),
+                (None, {"tariff_plan_id": str(uuid4())}),
+            )
+        ]
+        db_session.add_all(payments)
+        await db_session.commit()
+        
+        # Not found before the backfill: the ID is only in metadata
+        assert await repo.get_payment_by_payme_transaction_id(in_metadata) is None
+        
+        after_id = None
+        chunks = 0
+        while True:
+            _, after_id = await repo.backfill_payme_transaction_ids(after_id, batch_size=2)
+            if after_id is None:
+                break
+            chunks += 1
+        
+        for payment in payments:
+            await db_session.refresh(payment)
+        assert chunks >= 2
+        assert [payment.payme_transaction_id for payment in payments] == [in_transaction_id, in_metadata, None]
+        assert (await repo.get_payment_by_payme_transaction_id(in_metadata)).id == payments[1].id
+        assert (await repo.get_payment_by_payme_transaction_id(in_transaction_id)).id == payments[0].id
+    
+    async def test_backfill_payme_transaction_times(self, db_session, sample_merchant_user):
+        """Test Payme times are backfilled in chunks from metadata, falling back to created_at."""
+        repo = PaymentRepository(db_session)
+        
+        created_at = datetime(2024, 5, 1, 12, 0, 0)
+        payments = [
+            Payment(
+                user_id=sample_merchant_user.id,
+                payment_type=PaymentType.TARIFF_SUBSCRIPTION,
+                payment_method=PaymentMethod.PAYME,
+                amount=100000.0,
+                transaction_id=transaction_id,
+                payment_metadata=payment_metadata,
+                created_at=created_at
+            )
+            for transaction_id, payment_metadata in (
+                (uuid4().hex[:24], {
+                    "payme_create_time": 1714550000000,
+                    "payme_perform_time": "1714550001000",
+                    "payme_cancel_time": 1714550002000,
+                    "payme_cancel_reason": 5
+                }),
+                (str(uuid4()), {"payme_transaction_id": uuid4().hex[:24], "payme_create_time": "not-a-time"}),
+                (None, {"tariff_plan_id": str(uuid4())}),
+            )
+        ]
+        db_session.add_all(payments)
+        await db_session.commit()
+        
+        after_id = None
+        chunks = 0
+        while True:
+            _, after_id = await repo.backfill_payme_transaction_times(after_id, batch_size=2)
+            if after_id is None:
+                break
+            chunks += 1
+        
+        for payment in payments:
+            await db_session.refresh(payment)
+        assert chunks >= 2
+        assert (
+            payments[0].payme_create_time, payments[0].payme_perform_time,
+            payments[0].payme_cancel_time, payments[0].payme_cancel_reason
+        ) == (1714550000000, 1714550001000, 1714550002000, 5)
+        assert payments[1].payme_create_time == int(created_at.timestamp() * 1000)
+        assert payments[1].payme_perform_time is None
+        # Never went through CreateTransaction
+        assert payments[2].payme_create_time is None
+    
+    async def test_backfill_payment_account_columns(self, db_session, sample_merchant_user):
+        """Test pending payments get account columns from metadata, skipping malformed values."""
+        repo = PaymentRepository(db_session)
+        
+        tariff_plan_id = uuid4()
+        payments = [
+            Payment(
+                user_id=sample_merchant_user.id,
+                payment_type=payment_type,
+                payment_method=PaymentMethod.PAYME,
+                amount=100000.0,
+                status=status,
+                payment_metadata=payment_metadata
+            )
+            for payment_type, status, payment_metadata in (
+                (PaymentType.TARIFF_SUBSCRIPTION, PaymentStatus.PENDING,
+                 {"tariff_plan_id": str(tariff_plan_id), "duration_months": "3"}),
+                (PaymentType.FEATURED_SERVICE, PaymentStatus.PENDING,
+                 {"service_id": "123456789", "duration_days": 7}),
+                (PaymentType.TARIFF_SUBSCRIPTION, PaymentStatus.PENDING,
+                 {"tariff_plan_id": "not-a-uuid", "duration_months": 3}),
+                (PaymentType.FEATURED_SERVICE, PaymentStatus.COMPLETED,
+                 {"service_id": "123456789", "duration_days": 7}),
+            )
+        ]
+        db_session.add_all(payments)
+        await db_session.commit()
+        
+        after_id = None
+        chunks = 0
+        while True:
+            _, after_id = await repo.backfill_payment_account_columns(after_id, batch_size=2)
+            if after_id is None:
+                break
+            chunks += 1
+        
+        for payment in payments:
+            await db_session.refresh(payment)
+        assert chunks >= 2
+        assert (payments[0].tariff_plan_id, payments[0].duration_months) == (tariff_plan_id, 3)
+        assert (payments[1].service_id, payments[1].duration_days) == ("123456789", 7)
+        assert payments[2].tariff_plan_id is None
+        # Only pending payments are ever matched
+        assert payments[3].service_id is None
+    
+    async def test_get_payment_by_tariff_params(
+        self, db_session, sample_merchant_user, sample_client_user, sample_tariff
+    ):
+        """Test pending tariff payments are matched on the account columns, for the payer only."""
+        repo = PaymentRepository(db_session)
+        
+        def tariff_payment(user, duration_months, status=PaymentStatus.PENDING):
+            return Payment(
+                user_id=user.id,
+                payment_type=PaymentType.TARIFF_SUBSCRIPTION,
+                payment_method=PaymentMethod.PAYME,
+                amount=100000.0,
+                status=status,
+                tariff_plan_id=sample_tariff.id,
+                duration_months=duration_months
+            )
+        
+        own = tariff_payment(sample_merchant_user, 3)
+        other = tariff_payment(sample_client_user, 3)
+        db_session.add_all([
+            own,
+            other,
+            tariff_payment(sample_merchant_user, 6, status=PaymentStatus.COMPLETED),
+        ])
+        await db_session.commit()
+        
+        found = await repo.get_payment_by_tariff_params(
+            f"+998{sample_merchant_user.phone_number}", str(sample_tariff.id), 3
+        )
+        assert found.id == own.id
+        
+        # Payme may truncate the tariff ID
+        found = await repo.get_payment_by_tariff_params(sample_merchant_user.phone_number, str(sample_tariff.id)[:8], 3)
+        assert found.id == own.id
+        
+        # Another user's matching payment is never returned
+        assert await repo.get_payment_by_tariff_params("000000000", str(sample_tariff.id), 3) is None
+        own.status = PaymentStatus.CANCELLED
+        await db_session.commit()
+        assert await repo.get_payment_by_tariff_params(sample_merchant_user.phone_number, str(sample_tariff.id), 3) is None
+        found = await repo.get_payment_by_tariff_params(sample_client_user.phone_number, str(sample_tariff.id), 3)
+        assert found.id == other.id
+        
+        assert await repo.get_payment_by_tariff_params(sample_merchant_user.phone_number, str(sample_tariff.id), 6) is None
+        assert await repo.get_payment_by_tariff_params(sample_merchant_user.phone_number, str(uuid4()), 3) is None
+    
+    async def test_get_payment_by_service_boost_params(self, db_session, sample_merchant_user, sample_service):
+        """Test pending boost payments are matched on service and days."""
+        repo = PaymentRepository(db_session)
+        
+        payment = Payment(
+            user_id=sample_merchant_user.id,
+            payment_type=PaymentType.FEATURED_SERVICE,
+            payment_method=PaymentMethod.PAYME,
+            amount=50000.0,
+            service_id=sample_service.id,
+            duration_days=7
+        )
+        db_session.add(payment)
+        await db_session.commit()
+        
+        found = await repo.get_payment_by_service_boost_params(sample_merchant_user.phone_number, sample_service.id, 7)
+        assert found.id == payment.id
+        assert await repo.get_payment_by_service_boost_params(sample_merchant_user.phone_number, sample_service.id, 30) is None
+    
     async def test_get_payments_by_user_id(self, db_session, sample_merchant_user):
         """Test getting payments by user ID."""
         repo = PaymentRepository(db_session)
@@ -0,0 +1,118 @@
+"""
+Tests for PaymentStatsService.
+"""
+from datetime import date, datetime
+from itertools import count
+
+import pytest
+
+from app.core.exceptions import ValidationError
+from app.models import Payment, PaymentMethod, PaymentStatus, PaymentType
+from app.services.payment_stats_service import PaymentStatsService
+
+
+# The test database is shared, so each test gets payments in a year of its own
+_years = count(1901)
+
+
+@pytest.fixture
+async def dated_payments(db_session, sample_merchant_user):
+    """Payments created and completed in March-April of an otherwise empty year; returns the year."""
+    year = next(_years)
+    payments = [
+        Payment(
+            user_id=sample_merchant_user.id,
+            payment_type=payment_type,
+            payment_method=payment_method,
+            amount=amount,
+            status=status,
+            created_at=created_at,
+            completed_at=created_at if status == PaymentStatus.COMPLETED else None
+        )
+        for payment_type, payment_method, amount, status, created_at in (
+            (PaymentType.TARIFF_SUBSCRIPTION, PaymentMethod.PAYME, 100000.0, PaymentStatus.COMPLETED, datetime(year, 3, 1, 10)),
+            (PaymentType.TARIFF_SUBSCRIPTION, PaymentMethod.PAYME, 100000.0, PaymentStatus.COMPLETED, datetime(year, 3, 1, 18)),
+            (PaymentType.FEATURED_SERVICE, PaymentMethod.CLICK, 20000.0, PaymentStatus.COMPLETED, datetime(year, 3, 3, 9)),
+            (PaymentType.FEATURED_SERVICE, PaymentMethod.PAYME, 20000.0, PaymentStatus.PENDING, datetime(year, 3, 3, 9)),
+            (PaymentType.TARIFF_SUBSCRIPTION, PaymentMethod.PAYME, 100000.0, PaymentStatus.FAILED, datetime(year, 3, 4, 9)),
+            (PaymentType.TARIFF_SUBSCRIPTION, PaymentMethod.PAYME, 300000.0, PaymentStatus.COMPLETED, datetime(year, 4, 15, 9)),
+        )
+    ]
+    db_session.add_all(payments)
+    await db_session.commit()
+    return year
+
+
+@pytest.mark.asyncio
+class TestPaymentStatsService:
+    """Test aggregated admin statistics."""
+
+    async def test_get_overview(self, db_session, dated_payments):
+        """Test counts, revenue and the status/type/method breakdown for a date range."""
+        year = dated_payments
+        service = PaymentStatsService(db_session)
+
+        overview = await service.get_overview(date(year, 3, 1), date(year, 3, 31))
+
+        assert overview["payments"] == {
+            "total_payments": 5,
+            "completed_payments": 3,
+            "pending_payments": 1,
+            "failed_payments": 1,
+            "cancelled_payments": 0,
+            "total_revenue": 220000.0,
+            "tariff_payments": 3,
+            "featured_payments": 2
+        }
+        breakdown = {
+            (row["status"], row["payment_type"], row["payment_method"]): (row["payments"], row["amount"])
+            for row in overview["breakdown"]
+        }
+        assert breakdown == {
+            ("completed", "tariff_subscription", "payme"): (2, 200000.0),
+            ("completed", "featured_service", "click"): (1, 20000.0),
+            ("pending", "featured_service", "payme"): (1, 20000.0),
+            ("failed", "tariff_subscription", "payme"): (1, 100000.0)
+        }
+        assert "active_subscriptions" in overview["subscriptions"]
+
+    async def test_get_revenue_series_by_day(self, db_session, dated_payments):
+        """Test daily revenue includes empty days and only completed payments."""
+        year = dated_payments
+        service = PaymentStatsService(db_session)
+
+        series = await service.get_revenue_series(date(year, 3, 1), date(year, 3, 4), period="day")
+
+        assert [(p["period_start"], p["payments"], p["revenue"]) for p in series["points"]] == [
+            (f"{year}-03-01", 2, 200000.0),
+            (f"{year}-03-02", 0, 0.0),
+            (f"{year}-03-03", 1, 20000.0),
+            (f"{year}-03-04", 0, 0.0)
+        ]
+        assert series["total_revenue"] == 220000.0
+
+    async def test_get_revenue_series_by_month(self, db_session, dated_payments):
+        """Test monthly revenue, optionally filtered by payment type."""
+        year = dated_payments
+        service = PaymentStatsService(db_session)
+
+        series = await service.get_revenue_series(date(year, 2, 10), date(year, 4, 30), period="month")
+        assert [(p["period_start"], p["revenue"]) for p in series["points"]] == [
+            (f"{year}-02-01", 0.0),
+            (f"{year}-03-01", 220000.0),
+            (f"{year}-04-01", 300000.0)
+        ]
+
+        series = await service.get_revenue_series(
+            date(year, 3, 1), date(year, 4, 30), period="month", payment_type=PaymentType.FEATURED_SERVICE
+        )
+        assert [p["revenue"] for p in series["points"]] == [20000.0, 0.0]
+
+    async def test_get_revenue_series_validation(self, db_session):
+        """Test unknown periods and overly long ranges are rejected."""
+        service = PaymentStatsService(db_session)
+
+        with pytest.raises(ValidationError, match="period"):
+            await service.get_revenue_series(period="week")
+        with pytest.raises(ValidationError, match="Range too long"):
+            await service.get_revenue_series(date(2000, 1, 1), date(2002, 1, 1), period="day")
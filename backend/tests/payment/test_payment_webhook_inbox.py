@@ -0,0 +1,231 @@
+"""
+Tests for the payment webhook inbox and its background worker.
+"""
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlmodel import select
+
+from app.models import (
+    MerchantSubscription, Payment, PaymentMethod, PaymentStatus, PaymentType, PaymentWebhookEvent,
+    SubscriptionStatus, WebhookEventStatus
+)
+from app.repositories.webhook_event_repository import WebhookEventRepository
+from app.services.payment_service import PaymentService
+from app.services.payment_webhook_worker import PaymentWebhookWorker
+
+
+def payme_webhook(transaction_id: str, state: int) -> dict:
+    return {"method": "CheckTransaction", "params": {"id": transaction_id, "state": state}}
+
+
+async def get_event(db_session, transaction_id: str, state: int) -> PaymentWebhookEvent:
+    result = await db_session.execute(
+        select(PaymentWebhookEvent).where(
+            PaymentWebhookEvent.provider == PaymentMethod.PAYME,
+            PaymentWebhookEvent.event_id == f"{transaction_id}:{state}"
+        ).execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+async def drain(worker: PaymentWebhookWorker, session_factory) -> None:
+    """Process due events until none are left, including those left over by other tests."""
+    while await worker.run_once(session_factory):
+        pass
+
+
+@pytest.fixture
+def worker():
+    """Worker applying one event at a time (in-memory SQLite shares one connection)."""
+    worker = PaymentWebhookWorker()
+    worker.concurrency = 1
+    return worker
+
+
+@pytest.mark.asyncio
+class TestPaymentWebhookInbox:
+    """Test accepting, claiming and applying webhook events."""
+
+    async def test_accept_deduplicates_redeliveries(self, db_session):
+        """Test the same provider event is stored once."""
+        payment_service = PaymentService(db_session, payment_providers={}, sms_service=None)
+        webhook = payme_webhook(uuid4().hex, 2)
+
+        assert await payment_service.accept_payment_webhook(PaymentMethod.PAYME, webhook) is True
+        assert await payment_service.accept_payment_webhook(PaymentMethod.PAYME, webhook) is False
+
+        event = await get_event(db_session, webhook["params"]["id"], 2)
+        assert event.status == WebhookEventStatus.PENDING
+        assert event.transaction_id == webhook["params"]["id"]
+
+    async def test_run_once_applies_event(self, db_session, sample_merchant_user, worker, session_factory):
+        """Test a claimed event updates its payment and is marked processed."""
+        transaction_id = uuid4().hex
+        payment = Payment(
+            user_id=sample_merchant_user.id,
+            payment_type=PaymentType.TARIFF_SUBSCRIPTION,
+            payment_method=PaymentMethod.PAYME,
+            amount=100000.0,
+            transaction_id=transaction_id
+        )
+        db_session.add(payment)
+        await db_session.commit()
+        payment_service = PaymentService(db_session, payment_providers={}, sms_service=None)
+        await payment_service.accept_payment_webhook(PaymentMethod.PAYME, payme_webhook(transaction_id, -1))
+
+        await drain(worker, session_factory)
+
+        event = await get_event(db_session, transaction_id, -1)
+        assert event.status == WebhookEventStatus.PROCESSED
+        assert event.attempts == 1
+        assert event.processed_at is not None
+        await db_session.refresh(payment)
+        assert payment.status == PaymentStatus.FAILED
+
+    async def test_failed_event_is_retried_later(self, db_session, worker, session_factory):
+        """Test an event that cannot be applied goes back to pending with a backoff."""
+        transaction_id = uuid4().hex
+        payment_service = PaymentService(db_session, payment_providers={}, sms_service=None)
+        await payment_service.accept_payment_webhook(PaymentMethod.PAYME, payme_webhook(transaction_id, 2))
+
+        await drain(worker, session_factory)
+
+        event = await get_event(db_session, transaction_id, 2)
+        assert event.status == WebhookEventStatus.PENDING
+        assert event.attempts == 1
+        assert event.next_attempt_at > datetime.now()
+        assert "Payment not found" in event.last_error
+
+    async def test_failed_activation_is_completed_by_retry(
+        self, db_session, sample_merchant, sample_merchant_user, sample_tariff, worker, session_factory, monkeypatch
+    ):
+        """Test a subscription activation that fails once is created when the event is retried."""
+        transaction_id = uuid4().hex
+        payment = Payment(
+            user_id=sample_merchant_user.id,
+            payment_type=PaymentType.TARIFF_SUBSCRIPTION,
+            payment_method=PaymentMethod.PAYME,
+            amount=100000.0,
+            transaction_id=transaction_id,
+            payment_metadata={"tariff_plan_id": str(sample_tariff.id), "duration_months": 1}
+        )
+        db_session.add(payment)
+        await db_session.commit()
+        payment_service = PaymentService(db_session, payment_providers={}, sms_service=None)
+        await payment_service.accept_payment_webhook(PaymentMethod.PAYME, payme_webhook(transaction_id, 2))
+
+        activate = PaymentService._process_tariff_subscription_payment
+        calls = []
+
+        async def fail_once(self, payment, webhook_data):
+            calls.append(payment.id)
+            if len(calls) == 1:
+                raise RuntimeError("database unavailable")
+            await activate(self, payment, webhook_data)
+
+        monkeypatch.setattr(PaymentService, "_process_tariff_subscription_payment", fail_once)
+
+        await drain(worker, session_factory)
+
+        # Nothing of the failed attempt was committed
+        event = await get_event(db_session, transaction_id, 2)
+        assert event.status == WebhookEventStatus.PENDING
+        await db_session.refresh(payment)
+        assert payment.status == PaymentStatus.PENDING
+
+        event.next_attempt_at = datetime.now()
+        await db_session.commit()
+        await drain(worker, session_factory)
+
+        event = await get_event(db_session, transaction_id, 2)
+        assert event.status == WebhookEventStatus.PROCESSED
+        await db_session.refresh(payment)
+        assert payment.status == PaymentStatus.COMPLETED
+        result = await db_session.execute(
+            select(MerchantSubscription).where(MerchantSubscription.payment_id == payment.id)
+        )
+        subscription = result.scalar_one()
+        assert subscription.merchant_id == sample_merchant.id
+        assert subscription.status == SubscriptionStatus.ACTIVE
+
+    async def test_completed_payment_without_activation_is_activated(
+        self, db_session, sample_merchant, sample_merchant_user, sample_tariff
+    ):
+        """Test a redelivered success webhook activates a paid payment whose activation is missing."""
+        transaction_id = uuid4().hex
+        payment = Payment(
+            user_id=sample_merchant_user.id,
+            payment_type=PaymentType.TARIFF_SUBSCRIPTION,
+            payment_method=PaymentMethod.PAYME,
+            amount=100000.0,
+            status=PaymentStatus.COMPLETED,
+            completed_at=datetime.now(),
+            transaction_id=transaction_id,
+            payment_metadata={"tariff_plan_id": str(sample_tariff.id), "duration_months": 1}
+        )
+        db_session.add(payment)
+        await db_session.commit()
+        payment_service = PaymentService(db_session, payment_providers={}, sms_service=None)
+
+        assert await payment_service.process_payment_webhook(PaymentMethod.PAYME, payme_webhook(transaction_id, 2))
+        assert await payment_service.process_payment_webhook(PaymentMethod.PAYME, payme_webhook(transaction_id, 2))
+
+        result = await db_session.execute(
+            select(MerchantSubscription).where(MerchantSubscription.payment_id == payment.id)
+        )
+        assert len(result.scalars().all()) == 1
+
+    async def test_failed_event_gives_up_after_max_attempts(self, db_session, worker, session_factory):
+        """Test an event is marked failed once it used all its attempts."""
+        transaction_id = uuid4().hex
+        payment_service = PaymentService(db_session, payment_providers={}, sms_service=None)
+        await payment_service.accept_payment_webhook(PaymentMethod.PAYME, payme_webhook(transaction_id, 2))
+        worker.max_attempts = 1
+
+        await drain(worker, session_factory)
+
+        event = await get_event(db_session, transaction_id, 2)
+        assert event.status == WebhookEventStatus.FAILED
+
+    async def test_events_of_one_transaction_are_claimed_in_order(self, db_session):
+        """Test a later event waits until the earlier one of its transaction is finished."""
+        transaction_id = uuid4().hex
+        payment_service = PaymentService(db_session, payment_providers={}, sms_service=None)
+        await payment_service.accept_payment_webhook(PaymentMethod.PAYME, payme_webhook(transaction_id, 1))
+        await payment_service.accept_payment_webhook(PaymentMethod.PAYME, payme_webhook(transaction_id, 2))
+        first = await get_event(db_session, transaction_id, 1)
+        second = await get_event(db_session, transaction_id, 2)
+        repo = WebhookEventRepository(db_session)
+
+        claimed = await repo.claim_due_events(100, timedelta(minutes=5))
+        assert first.id in claimed
+        assert second.id not in claimed
+
+        # Still held back while the first event is leased
+        assert second.id not in await repo.claim_due_events(100, timedelta(minutes=5))
+
+        first = await get_event(db_session, transaction_id, 1)
+        repo.mark_processed(first)
+        await db_session.commit()
+        assert second.id in await repo.claim_due_events(100, timedelta(minutes=5))
+
+    async def test_delete_processed_before(self, db_session):
+        """Test only processed events older than the cutoff are deleted."""
+        transaction_id = uuid4().hex
+        payment_service = PaymentService(db_session, payment_providers={}, sms_service=None)
+        await payment_service.accept_payment_webhook(PaymentMethod.PAYME, payme_webhook(transaction_id, 1))
+        await payment_service.accept_payment_webhook(PaymentMethod.PAYME, payme_webhook(transaction_id, 2))
+        old = await get_event(db_session, transaction_id, 1)
+        repo = WebhookEventRepository(db_session)
+        repo.mark_processed(old)
+        old.processed_at = datetime(2000, 1, 1)
+        await db_session.commit()
+
+        assert await repo.delete_processed_before(datetime(2000, 1, 2)) >= 1
+
+        result = await db_session.execute(
+            select(PaymentWebhookEvent.event_id).where(PaymentWebhookEvent.transaction_id == transaction_id)
+        )
+        assert result.scalars().all() == [f"{transaction_id}:2"]
@@ -0,0 +1,272 @@
+"""
+Tests for ImageUploadService and image variants against a stubbed boto3 S3 client.
+"""
+import asyncio
+import threading
+import time
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+import pytest
+from botocore.stub import Stubber
+from fastapi import UploadFile
+from PIL import Image as PILImage
+from PIL.PngImagePlugin import PngInfo
+from starlette.datastructures import Headers
+
+from app.utils.image_processing import IMAGE_VARIANTS, ImageVariantProcessor, render_variants, strip_metadata
+from app.utils.image_upload import ImageUploadService, detect_image_type
+from app.utils.s3_client import S3ImageManager
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+
+def make_png(**params) -> bytes:
+    """Encode a noisy PNG, well above the minimum upload size."""
+    buffer = BytesIO()
+    PILImage.effect_noise((64, 64), 64).convert("RGB").save(buffer, format="PNG", **params)
+    return buffer.getvalue()
+
+
+def make_upload(content: bytes, content_type: str = "image/png", filename: str = "photo.png") -> UploadFile:
+    """Build an UploadFile backed by a spooled temporary file, like Starlette does."""
+    spooled = SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(content)
+    spooled.seek(0)
+    return UploadFile(file=spooled, filename=filename, headers=Headers({"content-type": content_type}))
+
+
+@pytest.fixture
+def s3():
+    """Real S3ImageManager whose boto3 client is answered locally by a Stubber."""
+    manager = S3ImageManager()
+    puts = []
+
+    def record_put(params, **kwargs):
+        body = params["Body"]
+        puts.append({
+            "key": params["Key"],
+            "content_type": params.get("ContentType"),
+            "body": body if isinstance(body, bytes) else body.read(),
+            "thread": threading.current_thread().name
+        })
+
+    manager.s3_client.meta.events.register("before-parameter-build.s3.PutObject", record_put)
+    with Stubber(manager.s3_client) as stubber:
+        yield manager, stubber, puts
+
+
+@pytest.mark.asyncio
+class TestImageUploadService:
+    """Test streaming validation and off-loop S3 uploads."""
+
+    async def test_upload_streams_file_to_s3(self, s3):
+        """Test a valid image is uploaded whole, with the detected type, from an S3 I/O thread."""
+        manager, stubber, puts = s3
+        stubber.add_response("put_object", {})
+        service = ImageUploadService(manager, max_workers=2)
+        content = make_png()
+
+        uploaded = await service.upload(make_upload(content), "service_image", "123456789")
+
+        assert uploaded.size == len(content)
+        assert uploaded.content_type == "image/png"
+        assert uploaded.s3_url == manager.get_public_url(puts[0]["key"])
+        assert puts[0]["key"].startswith("service_image/123456789/")
+        assert puts[0]["content_type"] == "image/png"
+        assert puts[0]["body"] == content
+        assert puts[0]["thread"].startswith("s3-io")
+        stubber.assert_no_pending_responses()
+        service.shutdown()
+
+    async def test_upload_does_not_block_event_loop(self, s3):
+        """Test other coroutines keep running while S3 is slow."""
+        manager, stubber, puts = s3
+        stubber.add_response("put_object", {})
+        manager.s3_client.meta.events.register(
+            "before-parameter-build.s3.PutObject", lambda **kwargs: time.sleep(0.3)
+        )
+        service = ImageUploadService(manager, max_workers=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.create_task(ticker())
+        await service.upload(make_upload(make_png()), "user_avatar", "123456789")
+        ticker_task.cancel()
+
+        assert ticks >= 10
+        service.shutdown()
+
+    async def test_rejects_oversized_file_early(self, s3):
+        """Test reading stops as soon as the size limit is exceeded and nothing is uploaded."""
+        manager, stubber, puts = s3
+        service = ImageUploadService(manager)
+        upload = make_upload(PNG_HEADER + b"\x00" * (manager.MAX_IMAGE_SIZE * 2))
+
+        with pytest.raises(ValueError, match="exceeds maximum"):
+            await service.upload(upload, "service_image", "123456789")
+
+        assert upload.file.tell() <= manager.MAX_IMAGE_SIZE + service.CHUNK_SIZE
+        assert puts == []
+
+    async def test_rejects_invalid_content(self, s3):
+        """Test declared type, file signature and minimum size are validated."""
+        manager, stubber, puts = s3
+        service = ImageUploadService(manager)
+
+        with pytest.raises(ValueError, match="not allowed"):
+            await service.validate(make_upload(PNG_HEADER + b"\x00" * 4096, content_type="application/pdf"))
+        with pytest.raises(ValueError, match="not a JPEG, PNG or WebP"):
+            await service.validate(make_upload(b"%PDF-1.4" + b"\x00" * 4096))
+        with pytest.raises(ValueError, match="below minimum"):
+            await service.validate(make_upload(PNG_HEADER + b"\x00" * 10))
+
+        assert puts == []
+
+    async def test_delete(self, s3):
+        """Test deleting an image issues DeleteObject for its key."""
+        manager, stubber, puts = s3
+        key = "service_image/123456789/image.png"
+        stubber.add_response("delete_object", {}, {"Bucket": manager.bucket_name, "Key": key})
+        service = ImageUploadService(manager)
+
+        assert await service.delete(manager.get_public_url(key)) is True
+        stubber.assert_no_pending_responses()
+        service.shutdown()
+
+    async def test_detect_image_type(self):
+        """Test image formats are detected from their magic bytes."""
+        assert detect_image_type(b"\xff\xd8\xff\xe0" + b"\x00" * 8) == "image/jpeg"
+        assert detect_image_type(PNG_HEADER + b"\x00" * 4) == "image/png"
+        assert detect_image_type(b"RIFF\x00\x00\x00\x00WEBP") == "image/webp"
+        assert detect_image_type(b"GIF89a" + b"\x00" * 6) is None
+
+
+def make_photo(width: int, height: int, orientation: int = 1) -> bytes:
+    """Encode a JPEG photo with EXIF orientation and camera metadata."""
+    photo = PILImage.new("RGB", (width, height), (200, 30, 30))
+    exif = PILImage.Exif()
+    exif[0x0112] = orientation  # Orientation
+    exif[0x010F] = "Camera maker"  # Make
+    buffer = BytesIO()
+    photo.save(buffer, format="JPEG", exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+class TestImageVariants:
+    """Test rendering and uploading resized WebP variants."""
+
+    async def test_render_variants(self):
+        """Test variants are resized WebP images with orientation applied and EXIF removed."""
+        # Orientation 6: stored landscape, displayed portrait
+        rendered = render_variants(make_photo(2000, 1000, orientation=6), (("thumbnail", 320), ("medium", 4000)))
+
+        with PILImage.open(BytesIO(rendered["thumbnail"])) as thumbnail:
+            assert thumbnail.format == "WEBP"
+            assert thumbnail.size == (160, 320)
+            assert not thumbnail.getexif()
+        with PILImage.open(BytesIO(rendered["medium"])) as medium:
+            # Never upscaled
+            assert medium.size == (1000, 2000)
+
+    async def test_upload_with_variants(self, s3):
+        """Test the original, without its metadata, and every variant are uploaded next to each other."""
+        manager, stubber, puts = s3
+        for _ in range(1 + len(IMAGE_VARIANTS)):
+            stubber.add_response("put_object", {})
+        service = ImageUploadService(manager, max_workers=2, processor=ImageVariantProcessor(max_workers=1))
+        content = make_photo(1600, 1200, orientation=6)
+
+        uploaded = await service.upload(
+            make_upload(content, content_type="image/jpeg", filename="photo.jpg"),
+            "service_image", "123456789", variants=True
+        )
+        service.shutdown()
+
+        original = next(put for put in puts if put["content_type"] == "image/jpeg")
+        assert original["body"] == strip_metadata(content, "image/jpeg")
+        assert uploaded.size == len(original["body"])
+        base = original["key"].rsplit(".", 1)[0]
+        variant_keys = {put["key"] for put in puts if put["content_type"] == "image/webp"}
+        assert variant_keys == {f"{base}_thumbnail.webp", f"{base}_medium.webp"}
+        assert uploaded.thumbnail_url == manager.get_public_url(f"{base}_thumbnail.webp")
+        assert uploaded.medium_url == manager.get_public_url(f"{base}_medium.webp")
+
+    async def test_upload_rejects_undecodable_image(self, s3):
+        """Test a file with a valid signature that Pillow cannot decode is rejected."""
+        manager, stubber, puts = s3
+        service = ImageUploadService(manager, processor=ImageVariantProcessor(max_workers=1))
+
+        with pytest.raises(ValueError, match="not a valid image"):
+            await service.upload(make_upload(PNG_HEADER + b"\x00" * 4096), "user_avatar", "123456789", variants=True)
+        service.shutdown()
+
+        assert puts == []
+
+
+class TestStripMetadata:
+    """Test metadata is removed from originals without touching the pixels."""
+
+    @staticmethod
+    def pixels(data: bytes) -> bytes:
+        with PILImage.open(BytesIO(data)) as image:
+            return image.convert("RGB").tobytes()
+
+    def test_jpeg_keeps_only_orientation(self):
+        """Test a JPEG loses its camera metadata and comment but keeps its orientation."""
+        photo = PILImage.open(BytesIO(make_photo(200, 100, orientation=6)))
+        buffer = BytesIO()
+        photo.save(buffer, format="JPEG", exif=photo.getexif().tobytes(), comment=b"taken at home")
+        content = buffer.getvalue()
+
+        stripped = strip_metadata(content, "image/jpeg")
+
+        with PILImage.open(BytesIO(stripped)) as image:
+            assert dict(image.getexif()) == {0x0112: 6}
+            assert "comment" not in image.info
+        assert b"Camera maker" not in stripped
+        assert self.pixels(stripped) == self.pixels(content)
+
+    def test_png_drops_text_and_exif(self):
+        """Test PNG text and eXIf chunks are removed."""
+        info = PngInfo()
+        info.add_text("Location", "41.2995,69.2401")
+        exif = PILImage.Exif()
+        exif[0x010F] = "Camera maker"
+        content = make_png(pnginfo=info, exif=exif.tobytes())
+
+        stripped = strip_metadata(content, "image/png")
+
+        with PILImage.open(BytesIO(stripped)) as image:
+            assert image.text == {}
+            assert not image.getexif()
+        assert self.pixels(stripped) == self.pixels(content)
+
+    def test_webp_drops_exif(self):
+        """Test the WebP EXIF chunk is removed and the container stays valid."""
+        exif = PILImage.Exif()
+        exif[0x010F] = "Camera maker"
+        buffer = BytesIO()
+        PILImage.effect_noise((64, 64), 64).convert("RGB").save(
+            buffer, format="WEBP", lossless=True, exif=exif.tobytes()
+        )
+        content = buffer.getvalue()
+
+        stripped = strip_metadata(content, "image/webp")
+
+        assert b"Camera maker" not in stripped
+        assert int.from_bytes(stripped[4:8], "little") == len(stripped) - 8
+        with PILImage.open(BytesIO(stripped)) as image:
+            assert not image.getexif()
+        assert self.pixels(stripped) == self.pixels(content)
+
+    def test_rejects_malformed_file(self):
+        """Test a truncated file is rejected instead of being stored as is."""
+        with pytest.raises(ValueError):
+            strip_metadata(make_png()[:200], "image/png")
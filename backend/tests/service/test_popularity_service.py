@@ -0,0 +1,103 @@
+"""
+Tests for PopularityService.
+"""
+import math
+import pytest
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.services.popularity_service import PopularityService
+from app.repositories.service_repository import ServiceRepository
+from app.models import Service, User, UserInteraction, InteractionType
+
+
+async def get_score(db_session, service: Service) -> float:
+    await db_session.refresh(service)
+    return service.popularity_score
+
+
+@pytest.mark.asyncio
+class TestPopularityService:
+    """Test popularity score refresh."""
+    
+    async def test_refresh_decays_score_and_adds_new_interactions(
+        self,
+        db_session,
+        sample_service: Service,
+        sample_client_user: User
+    ):
+        """Test that a refresh decays the stored score and adds only new interactions."""
+        repo = ServiceRepository(db_session)
+        weights = PopularityService.get_weights()
+        half_life = timedelta(hours=settings.POPULARITY_HALF_LIFE_HOURS)
+        decay_rate = math.log(2) / half_life.total_seconds()
+        run_at = datetime.now()
+        
+        # A like one half-life old counts half its weight
+        db_session.add(UserInteraction(
+            user_id=sample_client_user.id,
+            service_id=sample_service.id,
+            interaction_type=InteractionType.LIKE,
+            created_at=run_at - half_life
+        ))
+        await db_session.commit()
+        
+        async def refresh(at: datetime) -> int:
+            updated = await repo.refresh_popularity_scores(
+                sample_service.id, sample_service.id, at, weights, decay_rate
+            )
+            await db_session.commit()
+            return updated
+        
+        assert await refresh(run_at) == 1
+        assert await get_score(db_session, sample_service) == pytest.approx(
+            settings.POPULARITY_LIKE_WEIGHT / 2, rel=1e-3
+        )
+        
+        # Same run again is a no-op
+        await refresh(run_at)
+        assert await get_score(db_session, sample_service) == pytest.approx(
+            settings.POPULARITY_LIKE_WEIGHT / 2, rel=1e-3
+        )
+        
+        # One half-life later the score halves and a fresh share is added in full
+        next_run = run_at + half_life
+        db_session.add(UserInteraction(
+            user_id=sample_client_user.id,
+            service_id=sample_service.id,
+            interaction_type=InteractionType.SHARE,
+            created_at=next_run
+        ))
+        await db_session.commit()
+        
+        await refresh(next_run + timedelta(seconds=1))
+        assert await get_score(db_session, sample_service) == pytest.approx(
+            settings.POPULARITY_LIKE_WEIGHT / 4 + settings.POPULARITY_SHARE_WEIGHT, rel=1e-3
+        )
+    
+    async def test_refresh_scores_full_rebuild_in_batches(
+        self,
+        db_session,
+        sample_service: Service,
+        sample_client_user: User
+    ):
+        """Test that a full rebuild walks every batch and recomputes from history."""
+        run_at = datetime.now()
+        db_session.add(UserInteraction(
+            user_id=sample_client_user.id,
+            service_id=sample_service.id,
+            interaction_type=InteractionType.SAVE,
+            created_at=run_at - timedelta(seconds=1)
+        ))
+        sample_service.popularity_score = 1000.0
+        await db_session.commit()
+        
+        result = await PopularityService(db_session).refresh_scores(
+            full=True, batch_size=2, run_at=run_at
+        )
+        
+        assert result["batches"] >= 1
+        assert result["updated_services"] >= 1
+        assert await get_score(db_session, sample_service) == pytest.approx(
+            settings.POPULARITY_SAVE_WEIGHT, rel=1e-3
+        )
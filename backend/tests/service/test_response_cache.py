@@ -0,0 +1,100 @@
+"""
+Tests for the public catalogue ResponseCache.
+"""
+import asyncio
+import pytest
+
+from app.utils.response_cache import ResponseCache, TAG_SERVICES, TAG_CATEGORIES
+
+
+@pytest.fixture
+def cache():
+    """In-process response cache (Redis tier disabled)."""
+    return ResponseCache(enabled=True, use_redis=False)
+
+
+@pytest.mark.asyncio
+class TestResponseCache:
+    """Test ResponseCache behaviour."""
+    
+    async def test_key_ignores_parameter_order_and_none(self, cache):
+        """Test that equivalent parameter sets share a key."""
+        key1 = cache.make_key("services:browse", {"page": 1, "limit": 20, "category_id": None})
+        key2 = cache.make_key("services:browse", {"limit": 20, "page": 1})
+        key3 = cache.make_key("services:browse", {"limit": 20, "page": 2})
+        
+        assert key1 == key2
+        assert key1 != key3
+    
+    async def test_get_or_compute_caches_value(self, cache):
+        """Test that a hit does not recompute."""
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            return {"value": len(calls)}
+        
+        first = await cache.get_or_compute("ns", {"page": 1}, (TAG_SERVICES,), compute)
+        second = await cache.get_or_compute("ns", {"page": 1}, (TAG_SERVICES,), compute)
+        
+        assert first == second == {"value": 1}
+        assert len(calls) == 1
+    
+    async def test_concurrent_misses_compute_once(self, cache):
+        """Test single-flight coalescing of concurrent misses."""
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"value": "shared"}
+        
+        results = await asyncio.gather(*(
+            cache.get_or_compute("ns", {}, (TAG_SERVICES,), compute) for _ in range(20)
+        ))
+        
+        assert all(result == {"value": "shared"} for result in results)
+        assert len(calls) == 1
+    
+    async def test_invalidate_by_tag(self, cache):
+        """Test that invalidating a tag only drops entries carrying it."""
+        async def compute_services():
+            return {"kind": "services"}
+        
+        async def compute_categories():
+            return {"kind": "categories"}
+        
+        await cache.get_or_compute("services", {}, (TAG_SERVICES,), compute_services)
+        await cache.get_or_compute("categories", {}, (TAG_CATEGORIES,), compute_categories)
+        
+        await cache.invalidate(TAG_SERVICES)
+        
+        assert cache._get_local(cache.make_key("services", {})) is None
+        assert cache._get_local(cache.make_key("categories", {})) == {"kind": "categories"}
+    
+    async def test_errors_are_not_cached(self, cache):
+        """Test that a failing computation propagates and is retried next time."""
+        async def failing():
+            raise ValueError("boom")
+        
+        with pytest.raises(ValueError):
+            await cache.get_or_compute("ns", {}, (TAG_SERVICES,), failing)
+        
+        async def compute():
+            return {"ok": True}
+        
+        assert await cache.get_or_compute("ns", {}, (TAG_SERVICES,), compute) == {"ok": True}
+    
+    async def test_disabled_cache_always_computes(self):
+        """Test that a disabled cache passes through."""
+        cache = ResponseCache(enabled=False, use_redis=False)
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            return {}
+        
+        await cache.get_or_compute("ns", {}, (TAG_SERVICES,), compute)
+        await cache.get_or_compute("ns", {}, (TAG_SERVICES,), compute)
+        
+        assert len(calls) == 2
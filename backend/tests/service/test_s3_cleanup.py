@@ -0,0 +1,183 @@
+"""
+Tests for the S3 deletion queue and orphan collector against a stubbed boto3 S3 client.
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from botocore.stub import Stubber
+
+from app.core.config import settings
+from app.models import Image, ImageType, PendingImageUpload
+from app.services.s3_orphan_collector import S3OrphanCollector
+from app.utils.image_upload import ImageUploadService
+from app.utils.s3_client import S3ImageManager
+from app.utils.s3_deletion_queue import S3DeletionQueue
+
+
+@pytest.fixture
+def s3():
+    """Real S3ImageManager whose boto3 client is answered locally by a Stubber; records DeleteObjects batches."""
+    manager = S3ImageManager()
+    service = ImageUploadService(manager, max_workers=1)
+    batches = []
+
+    def record_delete(params, **kwargs):
+        batches.append([obj["Key"] for obj in params["Delete"]["Objects"]])
+
+    manager.s3_client.meta.events.register("before-parameter-build.s3.DeleteObjects", record_delete)
+    with Stubber(manager.s3_client) as stubber:
+        yield service, stubber, batches
+    service.shutdown()
+
+
+@pytest.mark.asyncio
+class TestS3DeletionQueue:
+    """Test batched background deletion."""
+
+    async def test_flush_deletes_in_batches(self, s3):
+        """Test queued keys are deleted with DeleteObjects requests of at most 1000 keys."""
+        service, stubber, batches = s3
+        stubber.add_response("delete_objects", {})
+        stubber.add_response("delete_objects", {})
+        queue = S3DeletionQueue(service)
+        urls = [service.s3.get_public_url(f"user_avatar/123456789/{index}.png") for index in range(1500)]
+
+        assert queue.enqueue(*urls, None) == 1500
+        assert await queue.flush() == 1500
+
+        assert [len(batch) for batch in batches] == [1000, 500]
+        assert queue.pending_count == 0
+        stubber.assert_no_pending_responses()
+
+    async def test_failed_keys_are_retried_then_dropped(self, s3):
+        """Test a key S3 fails to delete is retried up to the attempt limit."""
+        service, stubber, batches = s3
+        s3_key = "merchant_cover/abc/cover.png"
+        for _ in range(settings.S3_DELETE_MAX_ATTEMPTS):
+            stubber.add_response(
+                "delete_objects",
+                {"Errors": [{"Key": s3_key, "Code": "InternalError", "Message": "We encountered an internal error"}]}
+            )
+        queue = S3DeletionQueue(service)
+        queue.enqueue(service.s3.get_public_url(s3_key))
+
+        for _ in range(settings.S3_DELETE_MAX_ATTEMPTS):
+            assert queue.pending_count == 1
+            assert await queue.flush() == 0
+
+        assert queue.pending_count == 0
+        assert batches == [[s3_key]] * settings.S3_DELETE_MAX_ATTEMPTS
+        stubber.assert_no_pending_responses()
+
+    async def test_stop_flushes_remaining_keys(self, s3):
+        """Test keys queued before shutdown are still deleted."""
+        service, stubber, batches = s3
+        stubber.add_response("delete_objects", {})
+        queue = S3DeletionQueue(service)
+        queue.start(interval=3600)
+        queue.enqueue(service.s3.get_public_url("category_icon/1/icon.png"))
+
+        await queue.stop()
+
+        assert batches == [["category_icon/1/icon.png"]]
+
+
+@pytest.mark.asyncio
+class TestS3OrphanCollector:
+    """Test orphan detection against database references."""
+
+    async def test_collect_deletes_only_old_unreferenced_objects(
+        self, db_session, s3, sample_merchant, sample_merchant_user
+    ):
+        """Test referenced, pending and recent objects are kept and orphans deleted."""
+        service, stubber, batches = s3
+        prefix = f"merchant_gallery/{sample_merchant.id}/"
+        keys = {name: f"{prefix}{name}-{uuid4()}.png" for name in ("image", "pending", "thumbnail", "orphan", "recent")}
+        db_session.add(Image(
+            s3_url=service.s3.get_public_url(keys["image"]),
+            # Stored under another URL form, e.g. before a CDN was configured
+            thumbnail_url=f"https://cdn.example.com/{keys['thumbnail']}?v=2",
+            file_name="photo.png",
+            file_size=4096,
+            image_type=ImageType.MERCHANT_GALLERY,
+            related_id=str(sample_merchant.id)
+        ))
+        db_session.add(PendingImageUpload(
+            s3_key=keys["pending"],
+            content_type="image/png",
+            file_name="photo.png",
+            image_type=ImageType.MERCHANT_GALLERY,
+            related_id=str(sample_merchant.id),
+            user_id=sample_merchant_user.id,
+            expires_at=datetime.now()
+        ))
+        await db_session.commit()
+
+        old = datetime.now(timezone.utc) - timedelta(days=2)
+        contents = [
+            {"Key": key, "LastModified": datetime.now(timezone.utc) if name == "recent" else old}
+            for name, key in keys.items()
+        ]
+        # Two listing pages, to check the collector follows continuation tokens
+        stubber.add_response(
+            "list_objects_v2",
+            {"Contents": contents[:2], "IsTruncated": True, "NextContinuationToken": "page-2"},
+            {"Bucket": service.s3.bucket_name, "Prefix": prefix, "MaxKeys": 1000}
+        )
+        stubber.add_response(
+            "list_objects_v2",
+            {"Contents": contents[2:], "IsTruncated": False},
+            {"Bucket": service.s3.bucket_name, "Prefix": prefix, "MaxKeys": 1000, "ContinuationToken": "page-2"}
+        )
+        stubber.add_response("delete_objects", {})
+
+        result = await S3OrphanCollector(db_session, service).collect(prefixes=[prefix])
+
+        assert result == {"scanned": 5, "orphaned": 1, "deleted": 1, "failed": 0, "aborted": False}
+        assert batches == [[keys["orphan"]]]
+        stubber.assert_no_pending_responses()
+
+    async def test_dry_run_deletes_nothing(self, db_session, s3):
+        """Test a dry run only counts orphans."""
+        service, stubber, batches = s3
+        prefix = "category_icon/"
+        stubber.add_response(
+            "list_objects_v2",
+            {
+                "Contents": [{"Key": f"{prefix}{uuid4()}.png", "LastModified": datetime(2020, 1, 1, tzinfo=timezone.utc)}],
+                "IsTruncated": False
+            }
+        )
+
+        result = await S3OrphanCollector(db_session, service).collect(prefixes=[prefix], dry_run=True)
+
+        assert result["orphaned"] == 1
+        assert result["deleted"] == 0
+        assert batches == []
+
+    async def test_page_without_references_aborts(self, db_session, s3, sample_merchant):
+        """Test a page of only unreferenced objects aborts the run instead of deleting it."""
+        service, stubber, batches = s3
+        prefix = f"merchant_cover/{sample_merchant.id}/"
+        db_session.add(Image(
+            s3_url=service.s3.get_public_url(f"{prefix}cover-{uuid4()}.png"),
+            file_name="cover.png",
+            file_size=4096,
+            image_type=ImageType.MERCHANT_COVER,
+            related_id=str(sample_merchant.id)
+        ))
+        await db_session.commit()
+        stubber.add_response(
+            "list_objects_v2",
+            {
+                "Contents": [{"Key": f"{prefix}{uuid4()}.png", "LastModified": datetime(2020, 1, 1, tzinfo=timezone.utc)}],
+                "IsTruncated": False
+            }
+        )
+
+        result = await S3OrphanCollector(db_session, service).collect(prefixes=[prefix])
+
+        assert result["aborted"] is True
+        assert result["deleted"] == 0
+        assert batches == []
@@ -264,6 +264,152 @@ class TestServiceAPI:
         assert len(data["services"]) == 2
         assert data["total"] >= 5
     
+    async def test_get_services_browse_cached_with_user_overlay(
+        self,
+        test_app,
+        sample_service,
+        sample_category,
+        sample_merchant,
+        sample_client_user,
+        unauthenticated_client,
+        db_session,
+        monkeypatch
+    ):
+        """Test GET / browse mode is served from cache with the user's likes overlaid."""
+        from app.models import Service, UserInteraction, InteractionType
+        from app.api.deps import get_current_user_optional
+        from app.utils.response_cache import response_cache
+        
+        monkeypatch.setattr(response_cache, "enabled", True)
+        monkeypatch.setattr(response_cache, "use_redis", False)
+        response_cache.clear_local()
+        params = {"category_id": sample_category.id, "limit": 100}
+        
+        try:
+            first = await unauthenticated_client.get("/api/v1/services/", params=params)
+            assert first.status_code == 200
+            
+            # Written behind the cache's back: not visible until invalidated
+            late_service = Service(
+                merchant_id=sample_merchant.id,
+                category_id=sample_category.id,
+                name="Late Service",
+                description="Created after the page was cached",
+                price=1000000.0,
+                location_region="Tashkent",
+                is_active=True
+            )
+            db_session.add(late_service)
+            db_session.add(UserInteraction(
+                user_id=sample_client_user.id,
+                service_id=sample_service.id,
+                interaction_type=InteractionType.LIKE
+            ))
+            await db_session.commit()
+            
+            test_app.dependency_overrides[get_current_user_optional] = lambda: sample_client_user
+            second = await unauthenticated_client.get("/api/v1/services/", params=params)
+            assert second.status_code == 200
+            
+            first_ids = [s["id"] for s in first.json()["services"]]
+            second_items = {s["id"]: s for s in second.json()["services"]}
+            assert list(second_items) == first_ids
+            assert late_service.id not in second_items
+            assert second_items[sample_service.id]["is_liked"] is True
+            assert next(s for s in first.json()["services"] if s["id"] == sample_service.id)["is_liked"] is False
+        finally:
+            response_cache.clear_local()
+    
+    async def test_get_services_trending(
+        self,
+        test_app,
+        sample_category,
+        sample_merchant,
+        unauthenticated_client,
+        db_session
+    ):
+        """Test GET / trending mode orders services by popularity score."""
+        from app.models import Service
+        
+        services = [
+            Service(
+                merchant_id=sample_merchant.id,
+                category_id=sample_category.id,
+                name=f"Trending Service {score}",
+                description="Trending test service",
+                price=1000000.0,
+                location_region="Tashkent",
+                popularity_score=score,
+                is_active=True
+            )
+            for score in (2.5, 40.0, 7.0)
+        ]
+        db_session.add_all(services)
+        await db_session.commit()
+        
+        response = await unauthenticated_client.get(
+            "/api/v1/services/",
+            params={"trending": True, "category_id": sample_category.id, "location_region": "Tashkent"}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 3
+        assert [s["name"] for s in data["services"]] == [
+            "Trending Service 40.0", "Trending Service 7.0", "Trending Service 2.5"
+        ]
+    
+    async def test_get_services_with_cursor(
+        self,
+        test_app,
+        sample_category,
+        sample_merchant,
+        unauthenticated_client,
+        db_session
+    ):
+        """Test GET / in cursor mode returns next_cursor and no total."""
+        from app.models import Service
+        
+        for i in range(3):
+            db_session.add(Service(
+                merchant_id=sample_merchant.id,
+                category_id=sample_category.id,
+                name=f"Cursor API Service {i}",
+                description=f"Description {i}",
+                price=1000000.0,
+                location_region="Tashkent",
+                is_active=True
+            ))
+        await db_session.commit()
+        
+        response = await unauthenticated_client.get(
+            "/api/v1/services/",
+            params={"category_id": sample_category.id, "limit": 2, "cursor": ""}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        assert len(data["services"]) == 2
+        assert data["has_more"] is True
+        
+        response = await unauthenticated_client.get(
+            "/api/v1/services/",
+            params={"category_id": sample_category.id, "limit": 2, "cursor": data["next_cursor"]}
+        )
+        
+        assert response.status_code == 200
+        next_page = response.json()
+        first_ids = {s["id"] for s in data["services"]}
+        assert first_ids.isdisjoint(s["id"] for s in next_page["services"])
+        
+        # A garbage cursor is a client error
+        response = await unauthenticated_client.get(
+            "/api/v1/services/",
+            params={"cursor": "garbage"}
+        )
+        assert response.status_code == 400
+    
     async def test_get_service_details_public(
         self,
         test_app,
@@ -315,6 +461,51 @@ class TestServiceAPI:
         error_data = response.json()
         assert "error" in error_data
     
+    async def test_get_service_details_conditional(
+        self,
+        test_app,
+        sample_service,
+        unauthenticated_client,
+        db_session
+    ):
+        """Test GET /{service_id} with If-None-Match."""
+        from datetime import datetime
+        from app.utils.counter_buffer import service_counter_buffer
+        
+        response = await unauthenticated_client.get(
+            f"/api/v1/services/{sample_service.id}"
+        )
+        
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+        assert response.headers["cache-control"] == "private, no-cache"
+        
+        # Unchanged service: 304 without a body, the view is still counted
+        views = service_counter_buffer.get_pending(sample_service.id)["view_count"]
+        response = await unauthenticated_client.get(
+            f"/api/v1/services/{sample_service.id}",
+            headers={"If-None-Match": etag}
+        )
+        
+        assert response.status_code == 304
+        assert response.content == b""
+        assert service_counter_buffer.get_pending(sample_service.id)["view_count"] == views + 1
+        
+        # Changed service: new ETag and a full response
+        sample_service.price = sample_service.price + 1
+        sample_service.updated_at = datetime.now()
+        db_session.add(sample_service)
+        await db_session.commit()
+        
+        response = await unauthenticated_client.get(
+            f"/api/v1/services/{sample_service.id}",
+            headers={"If-None-Match": etag}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+    
     async def test_record_service_interaction_like(
         self,
         test_app,
@@ -8,9 +8,11 @@ from datetime import datetime, timedelta
 from app.repositories.service_repository import ServiceRepository
 from app.models import (
     Service, ServiceCategory, Merchant, User, UserType,
-    Image, ImageType, FeaturedService, FeatureType, UserInteraction, InteractionType
+    Image, ImageType, FeaturedService, FeatureType, UserInteraction, InteractionType,
+    MerchantContact, ContactType
 )
 from app.schemas.service_schema import ServiceSearchFilters
+from app.utils.counter_buffer import ServiceCounterBuffer, service_counter_buffer
 
 
 @pytest.mark.asyncio
@@ -303,6 +305,52 @@ class TestServiceRepository:
         prices = [s.price for s in services]
         assert prices == sorted(prices, reverse=True)
     
+    async def test_search_services_sort_by_relevance(
+        self,
+        db_session,
+        sample_merchant: Merchant,
+        sample_category: ServiceCategory
+    ):
+        """Test relevance sort ranks name matches above description matches."""
+        repo = ServiceRepository(db_session)
+        
+        marker = f"zq{random.randint(10000, 99999)}"
+        description_match = Service(
+            merchant_id=sample_merchant.id,
+            category_id=sample_category.id,
+            name="Decor Studio",
+            description=f"Also offers {marker} packages",
+            price=1000000.0,
+            location_region="Tashkent",
+            is_active=True
+        )
+        name_match = Service(
+            merchant_id=sample_merchant.id,
+            category_id=sample_category.id,
+            name=f"Best {marker} Hall",
+            description="Wedding hall",
+            price=1000000.0,
+            location_region="Tashkent",
+            is_active=True
+        )
+        prefix_match = Service(
+            merchant_id=sample_merchant.id,
+            category_id=sample_category.id,
+            name=f"{marker.upper()} Photo",
+            description="Photography",
+            price=1000000.0,
+            location_region="Tashkent",
+            is_active=True
+        )
+        db_session.add_all([description_match, name_match, prefix_match])
+        await db_session.commit()
+        
+        filters = ServiceSearchFilters(query=marker, sort_by="relevance")
+        services, total = await repo.search_services(filters, offset=0, limit=100)
+        
+        assert total == 3
+        assert [s.id for s in services] == [prefix_match.id, name_match.id, description_match.id]
+    
     async def test_search_services_pagination(
         self,
         db_session,
@@ -494,6 +542,83 @@ class TestServiceRepository:
         service = await repo.get_service_with_details("999999999")  # Non-existent 9-digit string ID
         assert service is None
     
+    async def test_load_service_detail(
+        self,
+        db_session,
+        sample_service: Service,
+        sample_merchant: Merchant,
+        sample_category: ServiceCategory,
+        sample_client_user: User
+    ):
+        """Test loading the service detail page data in one statement."""
+        repo = ServiceRepository(db_session)
+        
+        now = datetime.now()
+        db_session.add_all([
+            Image(
+                related_id=sample_service.id,
+                image_type=ImageType.SERVICE_IMAGE,
+                s3_url="https://example.com/second.jpg",
+                file_name="second.jpg",
+                display_order=2,
+                is_active=True
+            ),
+            Image(
+                related_id=sample_service.id,
+                image_type=ImageType.SERVICE_IMAGE,
+                s3_url="https://example.com/first.jpg",
+                file_name="first.jpg",
+                display_order=1,
+                is_active=True
+            ),
+            Image(
+                related_id=sample_service.id,
+                image_type=ImageType.SERVICE_IMAGE,
+                s3_url="https://example.com/hidden.jpg",
+                file_name="hidden.jpg",
+                display_order=0,
+                is_active=False
+            ),
+            MerchantContact(
+                merchant_id=sample_merchant.id,
+                contact_type=ContactType.PHONE,
+                contact_value="998901234567",
+                is_active=True
+            ),
+            FeaturedService(
+                service_id=sample_service.id,
+                merchant_id=sample_merchant.id,
+                start_date=now - timedelta(days=1),
+                end_date=now + timedelta(days=6),
+                days_duration=7,
+                feature_type=FeatureType.PAID_FEATURE,
+                is_active=True
+            ),
+            UserInteraction(
+                user_id=sample_client_user.id,
+                service_id=sample_service.id,
+                interaction_type=InteractionType.SAVE
+            ),
+        ])
+        await db_session.commit()
+        
+        detail = await repo.load_service_detail(sample_service.id, user_id=sample_client_user.id)
+        
+        assert detail["service"].id == sample_service.id
+        assert detail["merchant"].id == sample_merchant.id
+        assert detail["category_name"] == sample_category.name
+        assert detail["merchant_user_id"] == sample_merchant.user_id
+        assert [image["file_name"] for image in detail["images"]] == ["first.jpg", "second.jpg"]
+        assert [contact["contact_value"] for contact in detail["contacts"]] == ["998901234567"]
+        assert detail["featured_until"] is not None
+        assert detail["is_saved"] is True
+        assert detail["is_liked"] is False
+        
+        anonymous = await repo.load_service_detail(sample_service.id)
+        assert anonymous["is_saved"] is False
+        
+        assert await repo.load_service_detail("999999999") is None
+    
     async def test_get_service_images(
         self,
         db_session,
@@ -628,6 +753,109 @@ class TestServiceRepository:
         assert is_featured is True
         assert end_date is not None
     
+    async def test_get_main_image_urls(
+        self,
+        db_session,
+        sample_service: Service,
+        sample_merchant: Merchant,
+        sample_category: ServiceCategory
+    ):
+        """Test batch lookup of the first active image per service."""
+        repo = ServiceRepository(db_session)
+        
+        other_service = Service(
+            merchant_id=sample_merchant.id,
+            category_id=sample_category.id,
+            name="Service Without Images",
+            description="No images",
+            price=1000000.0,
+            location_region="Tashkent",
+            is_active=True
+        )
+        db_session.add(other_service)
+        db_session.add(Image(
+            related_id=sample_service.id,
+            image_type=ImageType.SERVICE_IMAGE,
+            s3_url="https://example.com/second.jpg",
+            file_name="second.jpg",
+            display_order=2,
+            is_active=True
+        ))
+        db_session.add(Image(
+            related_id=sample_service.id,
+            image_type=ImageType.SERVICE_IMAGE,
+            s3_url="https://example.com/hidden.jpg",
+            file_name="hidden.jpg",
+            display_order=0,
+            is_active=False
+        ))
+        db_session.add(Image(
+            related_id=sample_service.id,
+            image_type=ImageType.SERVICE_IMAGE,
+            s3_url="https://example.com/first.jpg",
+            file_name="first.jpg",
+            display_order=1,
+            is_active=True
+        ))
+        await db_session.commit()
+        
+        main_images = await repo.get_main_image_urls([sample_service.id, other_service.id])
+        
+        assert main_images[sample_service.id] == "https://example.com/first.jpg"
+        assert other_service.id not in main_images
+    
+    async def test_get_main_images_with_thumbnails(
+        self,
+        db_session,
+        sample_service: Service
+    ):
+        """Test the main image lookup returns the thumbnail variant when there is one."""
+        repo = ServiceRepository(db_session)
+        
+        db_session.add(Image(
+            related_id=sample_service.id,
+            image_type=ImageType.SERVICE_IMAGE,
+            s3_url="https://example.com/first.jpg",
+            thumbnail_url="https://example.com/first_thumbnail.webp",
+            medium_url="https://example.com/first_medium.webp",
+            file_name="first.jpg",
+            display_order=0,
+            is_active=True
+        ))
+        await db_session.commit()
+        
+        main_images = await repo.get_main_images([sample_service.id])
+        
+        assert main_images[sample_service.id] == (
+            "https://example.com/first.jpg",
+            "https://example.com/first_thumbnail.webp"
+        )
+    
+    async def test_get_featured_service_ids(
+        self,
+        db_session,
+        sample_service: Service,
+        sample_merchant: Merchant
+    ):
+        """Test batch lookup of currently featured services."""
+        repo = ServiceRepository(db_session)
+        
+        assert await repo.get_featured_service_ids([sample_service.id]) == set()
+        
+        now = datetime.now()
+        db_session.add(FeaturedService(
+            service_id=sample_service.id,
+            merchant_id=sample_merchant.id,
+            start_date=now - timedelta(days=1),
+            end_date=now + timedelta(days=7),
+            days_duration=8,
+            feature_type=FeatureType.MONTHLY_ALLOCATION,
+            is_active=True
+        ))
+        await db_session.commit()
+        
+        assert await repo.get_featured_service_ids([sample_service.id]) == {sample_service.id}
+    
     async def test_increment_view_count(
         self,
         db_session,
@@ -654,6 +882,104 @@ class TestServiceRepository:
         await repo.increment_view_count(sample_service.id)
         assert True  # Method executed without errors
     
+    async def test_search_services_geo_radius_sorted_by_distance(
+        self,
+        db_session,
+        sample_merchant: Merchant,
+        sample_category: ServiceCategory
+    ):
+        """Test radius filter excludes far services and distance sort puts the nearest first."""
+        repo = ServiceRepository(db_session)
+        
+        # Random point in the southern ocean so other tests' services never match
+        latitude = random.uniform(-60.0, -50.0)
+        longitude = random.uniform(-150.0, -100.0)
+        
+        def make_service(name: str, lat_offset: float) -> Service:
+            return Service(
+                merchant_id=sample_merchant.id,
+                category_id=sample_category.id,
+                name=name,
+                description="Geo test service",
+                price=1000000.0,
+                location_region="Tashkent",
+                latitude=latitude + lat_offset,
+                longitude=longitude,
+                is_active=True
+            )
+        
+        # 0.01 degree of latitude is roughly 1.1 km
+        far = make_service("Far Hall", 0.5)
+        middle = make_service("Middle Hall", 0.05)
+        near = make_service("Near Hall", 0.01)
+        db_session.add_all([far, middle, near])
+        await db_session.commit()
+        
+        filters = ServiceSearchFilters(
+            latitude=latitude, longitude=longitude, radius_km=10, sort_by="distance"
+        )
+        services, total = await repo.search_services(filters, offset=0, limit=100)
+        
+        assert total == 2
+        assert [s.id for s in services] == [near.id, middle.id]
+        
+        filters = ServiceSearchFilters(
+            latitude=latitude, longitude=longitude, radius_km=100, sort_by="distance", sort_order="asc"
+        )
+        services, total = await repo.search_services(filters, offset=0, limit=100)
+        
+        assert total == 3
+        assert [s.id for s in services] == [near.id, middle.id, far.id]
+        
+        filters = ServiceSearchFilters(
+            latitude=latitude, longitude=longitude, radius_km=100, sort_by="distance", sort_order="desc"
+        )
+        services, total = await repo.search_services(filters, offset=0, limit=100)
+        
+        assert [s.id for s in services] == [far.id, middle.id, near.id]
+    
+    async def test_increment_view_count_is_buffered(
+        self,
+        db_session,
+        sample_service: Service
+    ):
+        """Test that view increments are merged on read and written on flush."""
+        repo = ServiceRepository(db_session)
+        await db_session.refresh(sample_service)
+        initial_count = sample_service.view_count
+        
+        await repo.increment_view_count(sample_service.id)
+        await repo.increment_view_count(sample_service.id)
+        
+        assert service_counter_buffer.merged_counts(sample_service)["view_count"] == initial_count + 2
+        
+        await service_counter_buffer.flush(db_session)
+        await db_session.refresh(sample_service)
+        
+        assert sample_service.view_count == initial_count + 2
+        assert service_counter_buffer.get_pending(sample_service.id)["view_count"] == 0
+    
+    async def test_counter_buffer_flush_floors_at_zero(
+        self,
+        db_session,
+        sample_service: Service
+    ):
+        """Test that flushing negative deltas never drops a counter below zero."""
+        buffer = ServiceCounterBuffer()
+        sample_service.like_count = 1
+        await db_session.commit()
+        
+        buffer.add(sample_service.id, "like_count", -3)
+        buffer.add(sample_service.id, "save_count", 2)
+        
+        assert buffer.merged_counts(sample_service)["like_count"] == 0
+        assert await buffer.flush(db_session) == 1
+        
+        await db_session.refresh(sample_service)
+        assert sample_service.like_count == 0
+        assert sample_service.save_count == 2
+        assert await buffer.flush(db_session) == 0
+    
     async def test_record_user_interaction_like(
         self,
         db_session,
@@ -721,6 +1047,44 @@ class TestServiceRepository:
         interaction_count = count_result.scalar_one()
         assert interaction_count == 1  # Only one interaction record
     
+    async def test_apply_user_interaction_toggle_returns_count(
+        self,
+        db_session,
+        sample_service: Service,
+        sample_client_user: User
+    ):
+        """Test that like toggles return the updated counter from the same transaction."""
+        repo = ServiceRepository(db_session)
+        await db_session.refresh(sample_service)
+        initial_like_count = sample_service.like_count
+        
+        added = await repo.apply_user_interaction(
+            sample_client_user.id, sample_service.id, InteractionType.LIKE
+        )
+        assert added == (True, initial_like_count + 1)
+        
+        removed = await repo.apply_user_interaction(
+            sample_client_user.id, sample_service.id, InteractionType.LIKE
+        )
+        assert removed == (False, initial_like_count)
+        
+        await db_session.refresh(sample_service)
+        assert sample_service.like_count == initial_like_count
+    
+    async def test_apply_user_interaction_missing_service(
+        self,
+        db_session,
+        sample_client_user: User
+    ):
+        """Test that interactions with a non-existent service are not recorded."""
+        repo = ServiceRepository(db_session)
+        
+        result = await repo.apply_user_interaction(
+            sample_client_user.id, "999999999", InteractionType.LIKE
+        )
+        
+        assert result is None
+    
     async def test_record_user_interaction_save(
         self,
         db_session,
@@ -322,6 +322,68 @@ class TestServiceManager:
         assert sample_service.id in service_ids
         assert service2.id not in service_ids
     
+    async def test_search_services_with_geo_radius(
+        self,
+        db_session,
+        sample_category: "ServiceCategory",
+        sample_merchant: "Merchant"
+    ):
+        """Test geo search returns distance_km for services within the radius."""
+        manager = ServiceManager(db_session)
+        
+        from app.models import Service
+        latitude = random.uniform(50.0, 60.0)
+        longitude = random.uniform(100.0, 150.0)
+        service = Service(
+            merchant_id=sample_merchant.id,
+            category_id=sample_category.id,
+            name="Geo Service",
+            description="Service near the search point",
+            price=4000000.0,
+            location_region="Tashkent",
+            latitude=latitude + 0.02,
+            longitude=longitude,
+            is_active=True
+        )
+        db_session.add(service)
+        await db_session.commit()
+        
+        filters = ServiceSearchFilters(
+            latitude=latitude, longitude=longitude, radius_km=5, sort_by="distance"
+        )
+        response = await manager.search_services(
+            filters=filters,
+            pagination=PaginationParams(page=1, limit=100)
+        )
+        
+        assert [s.id for s in response.services] == [service.id]
+        assert response.services[0].distance_km == pytest.approx(2.224, abs=0.01)
+    
+    async def test_search_services_validation_geo_requires_point(
+        self,
+        db_session
+    ):
+        """Test geo search validation without a complete search point."""
+        manager = ServiceManager(db_session)
+        
+        with pytest.raises(ValidationError, match="latitude and longitude must be provided together"):
+            await manager.search_services(
+                filters=ServiceSearchFilters(latitude=41.3),
+                pagination=PaginationParams()
+            )
+        
+        with pytest.raises(ValidationError, match="radius_km requires latitude and longitude"):
+            await manager.search_services(
+                filters=ServiceSearchFilters(radius_km=5),
+                pagination=PaginationParams()
+            )
+        
+        with pytest.raises(ValidationError, match="sort_by=distance requires latitude and longitude"):
+            await manager.search_services(
+                filters=ServiceSearchFilters(sort_by="distance"),
+                pagination=PaginationParams()
+            )
+    
     async def test_search_services_validation_invalid_region(
         self,
         db_session
@@ -697,4 +759,146 @@ class TestServiceManager:
                 service_id="999999999",  # Non-existent 9-digit string service ID
                 interaction_type="like"
             )
-
+    
+    async def test_build_service_list_items_batch(
+        self,
+        db_session,
+        sample_service: "Service",
+        sample_category: "ServiceCategory",
+        sample_merchant: "Merchant",
+        sample_client_user: "User"
+    ):
+        """Test hydrating a page of services in one pass keeps order and per-service data."""
+        manager = ServiceManager(db_session)
+        
+        from app.models import Service, Image, ImageType, UserInteraction, InteractionType
+        other_service = Service(
+            merchant_id=sample_merchant.id,
+            category_id=sample_category.id,
+            name="Second Service",
+            description="Another service",
+            price=2000000.0,
+            location_region="Tashkent",
+            is_active=True
+        )
+        db_session.add(other_service)
+        db_session.add(Image(
+            related_id=sample_service.id,
+            image_type=ImageType.SERVICE_IMAGE,
+            s3_url="https://example.com/main.jpg",
+            file_name="main.jpg",
+            display_order=0,
+            is_active=True
+        ))
+        await db_session.commit()
+        db_session.add(UserInteraction(
+            user_id=sample_client_user.id,
+            service_id=other_service.id,
+            interaction_type=InteractionType.SAVE
+        ))
+        await db_session.commit()
+        
+        items = await manager._build_service_list_items(
+            [other_service, sample_service],
+            user_id=sample_client_user.id
+        )
+        
+        assert [item.id for item in items] == [other_service.id, sample_service.id]
+        assert items[0].is_saved is True
+        assert items[0].is_liked is False
+        assert items[0].main_image_url is None
+        assert items[1].is_saved is False
+        assert items[1].main_image_url == "https://example.com/main.jpg"
+        assert all(item.category_id == sample_category.id for item in items)
+        assert all(item.merchant.id == sample_merchant.id for item in items)
+    
+    @pytest.mark.parametrize("sort_by", ["created_at", "price", "rating", "popularity", "name"])
+    async def test_search_services_cursor_pagination(
+        self,
+        db_session,
+        sample_category: "ServiceCategory",
+        sample_merchant: "Merchant",
+        sort_by: str
+    ):
+        """Test walking all pages with a cursor returns every service exactly once in order."""
+        manager = ServiceManager(db_session)
+        
+        from app.models import Service
+        region = "Khorezm"
+        created = []
+        for i in range(7):
+            service = Service(
+                merchant_id=sample_merchant.id,
+                category_id=sample_category.id,
+                name=f"Cursor Service {i % 3}",
+                description="Cursor pagination test",
+                price=1000000.0 * (i % 3),  # Duplicate sort keys exercise the id tie-breaker
+                location_region=region,
+                view_count=i % 2,
+                is_active=True
+            )
+            db_session.add(service)
+            created.append(service)
+        await db_session.commit()
+        
+        filters = ServiceSearchFilters(
+            category_id=sample_category.id,
+            location_region=region,
+            sort_by=sort_by,
+            sort_order="asc"
+        )
+        expected = await manager.search_services(filters, PaginationParams(page=1, limit=100))
+        
+        seen = []
+        cursor = ""
+        while True:
+            page = await manager.search_services(
+                filters, PaginationParams(limit=3, cursor=cursor)
+            )
+            assert page.total is None
+            seen.extend(item.id for item in page.services)
+            if not page.has_more:
+                assert page.next_cursor is None
+                break
+            cursor = page.next_cursor
+        
+        assert len(seen) == len(created)
+        assert seen == [item.id for item in expected.services]
+    
+    async def test_browse_services_cursor_with_category(
+        self,
+        db_session,
+        sample_service: "Service",
+        sample_category: "ServiceCategory"
+    ):
+        """Test cursor mode for category browsing."""
+        manager = ServiceManager(db_session)
+        
+        response = await manager.browse_services(
+            category_id=sample_category.id,
+            pagination=PaginationParams(limit=10, cursor="")
+        )
+        
+        assert response.total is None
+        assert sample_service.id in [s.id for s in response.services]
+    
+    async def test_search_services_invalid_cursor(
+        self,
+        db_session
+    ):
+        """Test malformed or mismatched cursors raise ValidationError."""
+        manager = ServiceManager(db_session)
+        
+        from app.utils.cursor import encode_cursor
+        
+        with pytest.raises(ValidationError, match="Invalid cursor"):
+            await manager.search_services(
+                ServiceSearchFilters(), PaginationParams(cursor="not-a-cursor")
+            )
+        
+        price_cursor = encode_cursor("price", "asc", 10.0, "123456789")
+        with pytest.raises(ValidationError, match="does not match"):
+            await manager.search_services(
+                ServiceSearchFilters(sort_by="name", sort_order="asc"),
+                PaginationParams(cursor=price_cursor)
+            )
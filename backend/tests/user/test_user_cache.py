@@ -0,0 +1,136 @@
+"""
+Tests for the authenticated user cache and the decoded-token cache.
+"""
+import pytest
+from datetime import timedelta
+from types import SimpleNamespace
+
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlmodel import select
+
+from app.api.deps import get_current_user
+from app.core import security
+from app.core.security import create_access_token, verify_token
+from app.models import User
+from app.repositories.user_repository import UserRepository
+from app.utils.user_cache import AuthUserCache, auth_user_cache
+
+
+@pytest.fixture
+def cache():
+    """In-process auth user cache (Redis tier disabled)."""
+    return AuthUserCache(enabled=True, use_redis=False)
+
+
+@pytest.mark.asyncio
+class TestAuthUserCache:
+    """Test AuthUserCache behaviour."""
+    
+    async def test_set_and_get(self, cache, sample_client_user: User):
+        """Test a cached user comes back as an equal, unattached instance."""
+        await cache.set(sample_client_user)
+        
+        user = await cache.get(sample_client_user.id)
+        
+        assert user is not sample_client_user
+        assert user.id == sample_client_user.id
+        assert user.phone_number == sample_client_user.phone_number
+        assert user.user_type == sample_client_user.user_type
+        assert user.created_at == sample_client_user.created_at
+        assert await cache.get("999999999") is None
+    
+    async def test_inactive_user_not_cached(self, cache, sample_client_user: User):
+        """Test inactive users are never cached."""
+        sample_client_user.is_active = False
+        
+        await cache.set(sample_client_user)
+        
+        assert await cache.get(sample_client_user.id) is None
+    
+    async def test_expired_entry(self, cache, sample_client_user: User):
+        """Test entries expire after the TTL."""
+        cache.ttl = -1
+        
+        await cache.set(sample_client_user)
+        
+        assert await cache.get(sample_client_user.id) is None
+    
+    async def test_repository_update_invalidates(
+        self,
+        db_session,
+        sample_client_user: User,
+        monkeypatch
+    ):
+        """Test user updates and soft deletes drop the cached user."""
+        monkeypatch.setattr(auth_user_cache, "enabled", True)
+        monkeypatch.setattr(auth_user_cache, "use_redis", False)
+        repo = UserRepository(db_session)
+        
+        await auth_user_cache.set(sample_client_user)
+        sample_client_user.name = "Renamed"
+        await repo.update(sample_client_user)
+        
+        assert await auth_user_cache.get(sample_client_user.id) is None
+        
+        await auth_user_cache.set(sample_client_user)
+        await repo.soft_delete_user(sample_client_user.id)
+        
+        assert await auth_user_cache.get(sample_client_user.id) is None
+        auth_user_cache.clear_local()
+    
+    async def test_get_current_user_cache_hit(
+        self,
+        db_session,
+        sample_client_user: User,
+        monkeypatch
+    ):
+        """Test a cache hit skips the query and the user can still be updated."""
+        monkeypatch.setattr(auth_user_cache, "enabled", True)
+        monkeypatch.setattr(auth_user_cache, "use_redis", False)
+        credentials = HTTPAuthorizationCredentials(
+            scheme="Bearer",
+            credentials=create_access_token(sample_client_user.id)
+        )
+        
+        # Miss: loaded with the identity query
+        request = SimpleNamespace(state=SimpleNamespace())
+        await get_current_user(request, credentials, db_session)
+        assert request.state.identity.user.id == sample_client_user.id
+        
+        # Hit: no identity query, user attached to the session
+        db_session.expunge_all()
+        request = SimpleNamespace(state=SimpleNamespace())
+        user = await get_current_user(request, credentials, db_session)
+        assert not hasattr(request.state, "identity")
+        
+        user.name = "Cached Rename"
+        await db_session.commit()
+        db_session.expunge_all()
+        
+        stored = (await db_session.execute(select(User).where(User.id == user.id))).scalar_one()
+        assert stored.name == "Cached Rename"
+        auth_user_cache.clear_local()
+
+
+class TestTokenCache:
+    """Test decoded-token caching in verify_token."""
+    
+    def test_repeated_token_skips_decoding(self, monkeypatch):
+        """Test a verified token is not decoded again."""
+        token = create_access_token("123456789")
+        payload = verify_token(token)
+        
+        def fail_decode(*args, **kwargs):
+            raise AssertionError("token decoded twice")
+        
+        monkeypatch.setattr(security.jwt, "decode", fail_decode)
+        
+        assert verify_token(token) == payload
+        assert payload["sub"] == "123456789"
+    
+    def test_invalid_and_expired_tokens(self):
+        """Test invalid and expired tokens are rejected."""
+        expired = create_access_token("123456789", expires_delta=timedelta(minutes=-1))
+        
+        assert verify_token("not-a-token") is None
+        assert verify_token(expired) is None
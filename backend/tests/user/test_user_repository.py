@@ -73,6 +73,63 @@ class TestUserRepository:
         
         assert merchant is None
     
+    async def test_get_user_identity(
+        self,
+        db_session,
+        sample_merchant_user: User,
+        sample_merchant: Merchant,
+        sample_tariff
+    ):
+        """Test loading user, merchant and active subscription in one query."""
+        from datetime import date, timedelta
+        from app.models import MerchantSubscription, SubscriptionStatus
+        
+        repo = UserRepository(db_session)
+        
+        user, merchant, subscription, tariff_plan = await repo.get_user_identity(sample_merchant_user.id)
+        
+        assert user.id == sample_merchant_user.id
+        assert merchant.id == sample_merchant.id
+        assert subscription is None
+        assert tariff_plan is None
+        
+        # Expired subscriptions are ignored
+        today = date.today()
+        db_session.add_all([
+            MerchantSubscription(
+                merchant_id=sample_merchant.id,
+                tariff_plan_id=sample_tariff.id,
+                start_date=today - timedelta(days=60),
+                end_date=today - timedelta(days=30),
+                status=SubscriptionStatus.ACTIVE
+            ),
+            MerchantSubscription(
+                merchant_id=sample_merchant.id,
+                tariff_plan_id=sample_tariff.id,
+                start_date=today,
+                end_date=today + timedelta(days=30),
+                status=SubscriptionStatus.ACTIVE
+            )
+        ])
+        await db_session.commit()
+        
+        _, _, subscription, tariff_plan = await repo.get_user_identity(sample_merchant_user.id)
+        
+        assert subscription.end_date == today + timedelta(days=30)
+        assert tariff_plan.id == sample_tariff.id
+    
+    async def test_get_user_identity_client(self, db_session, sample_client_user: User):
+        """Test identity of a client has no merchant data."""
+        repo = UserRepository(db_session)
+        
+        user, merchant, subscription, tariff_plan = await repo.get_user_identity(sample_client_user.id)
+        
+        assert user.id == sample_client_user.id
+        assert merchant is None
+        assert subscription is None
+        assert tariff_plan is None
+        assert await repo.get_user_identity("999999999") is None
+    
     async def test_is_phone_number_taken(self, db_session, sample_client_user: User):
         """Test checking if phone number is taken."""
         repo = UserRepository(db_session)